@@ -1,14 +1,19 @@
+import time
+
+# Taken before anything else is imported so --profile can report import time
+IMPORT_STARTED = time.perf_counter()
+
 import argparse
+import asyncio
+import csv
 import json
 import os
 import re
 import sys
-import time
 from collections import defaultdict
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from functools import lru_cache
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple, Union
 
 import requests
 from colorama import Fore, Style, init
@@ -16,10 +21,22 @@ from requests.adapters import HTTPAdapter
 from tqdm import tqdm
 from urllib3.util.retry import Retry
 
+from src.api.address_scan import AddressScanner, ChainScan, is_address
+from src.api.block_times import BlockTime
+from src.api.chain_changes import parse_since
+from src.api.chain_index import EMPTY_INDEX, ChainIndex
+from src.api.chain_records import to_builtin
+from src.api.chain_resolver import RESOLVE_THRESHOLD, ChainMatch, Resolution
 from src.api.chainlist import chainlist_api  # Import the global instance
+from src.api.rpc_probe import ChainProbe, RpcProber
 from src.api.defillama import DefiLlamaAPI
 from src.core.config import config
+from src.core.logger import RpcError, setup_logger
+from src.core.metrics import counts_rows, metrics, rows_rendered
+from src.core.profiler import profiler
+from src.core.tracing import tracer
 from src.utils.display import (
+    format_age,
     format_chain_data,
     format_chain_info,
     format_dex_data,
@@ -73,16 +90,9 @@ CACHE_FILE = os.path.join(
 
 
 def initialize_data_structures(data):
-    """Initialize optimized data structures for lookups"""
-    global blockchain_data, chain_by_id, chain_by_name, chain_by_short_name
-    blockchain_data = data
-    chain_by_id = {chain["chainId"]: chain for chain in data}
-    chain_by_name = {chain["name"].lower(): chain for chain in data}
-    chain_by_short_name = {
-        chain.get("shortName", "").lower(): chain
-        for chain in data
-        if chain.get("shortName")
-    }
+    """Build a new chain index snapshot and swap it in"""
+    global chain_index
+    chain_index = ChainIndex(data, compact=config.get("chainlist.compact_records", False))
 
 
 def create_session():
@@ -102,8 +112,9 @@ def create_session():
 
 
 def get_all_blockchain_data(force_refresh=False):
-    # Check if cache exists and is fresh
-    if not force_refresh and os.path.exists(CACHE_FILE):
+    offline = config.get("network.offline")
+    # Check if cache exists and is fresh (any age will do when offline)
+    if (not force_refresh or offline) and os.path.exists(CACHE_FILE):
         try:
             with open(CACHE_FILE, "r") as f:
                 cache = json.load(f)
@@ -113,7 +124,7 @@ def get_all_blockchain_data(force_refresh=False):
                     config.get("display.date_format")
                 )
                 print_info(f"Data last updated: {last_updated_str}")
-            if time.time() - last_updated < config.get("cache.expiry_seconds"):
+            if offline or time.time() - last_updated < config.get("cache.expiry_seconds"):
                 print_success("Using cached data")
                 data = cache.get("data", [])
                 initialize_data_structures(data)
@@ -122,6 +133,11 @@ def get_all_blockchain_data(force_refresh=False):
             print_error(f"Error reading cache: {e}")
             pass  # If cache is corrupted, fetch fresh
 
+    if offline:
+        print_error("Offline mode: no cached blockchain data available")
+        initialize_data_structures([])
+        return []
+
     # Fetch fresh data
     print_info("Fetching fresh data...")
     url = "https://chainlist.org/rpcs.json"
@@ -144,58 +160,58 @@ def get_all_blockchain_data(force_refresh=False):
         return []
 
 
-# Initialize blockchain data
-blockchain_data = get_all_blockchain_data()
+# Blockchain data is loaded on first use so that --offline is honoured
+chain_index = EMPTY_INDEX
+
+
+def ensure_blockchain_data():
+    """Load blockchain data if it hasn't been loaded yet"""
+    if not chain_index.chains:
+        get_all_blockchain_data()
+    return chain_index
 
 
-@lru_cache(maxsize=128)
 def get_chain_data_by_id(chain_id):
-    """Get chain data by ID with caching"""
-    return chain_by_id.get(chain_id)
+    """Get chain data by ID"""
+    return ensure_blockchain_data().by_id.get(chain_id)
 
 
-@lru_cache(maxsize=128)
 def get_chain_data_by_name(chain_name):
-    """Get chain data by name with caching"""
-    return chain_by_name.get(chain_name.lower())
+    """Get chain data by name"""
+    return ensure_blockchain_data().by_name.get(chain_name.lower())
 
 
 def search_chains(query):
     """Search for chains by name or ID with optimized lookups"""
-    query = query.lower()
+    index = ensure_blockchain_data()
     results = []
 
     # Check chain ID
     try:
         chain_id = int(query)
-        if chain_id in chain_by_id:
-            results.append(chain_by_id[chain_id])
+        if chain_id in index.by_id:
+            results.append(index.by_id[chain_id])
     except ValueError:
         pass
 
     # Check chain names
-    for chain in blockchain_data:
-        if (
-            query in chain["name"].lower()
-            or query in chain.get("shortName", "").lower()
-        ):
-            results.append(chain)
-
+    results.extend(index.search_chains(query, ("name", "shortName")))
     return results
 
 
 def list_chains(format="table"):
     """List all available chains"""
+    chains = ensure_blockchain_data().chains
     if format == "table":
         print(f"\n{Fore.CYAN}Available Chains:{Style.RESET_ALL}")
         print(f"{Fore.CYAN}{'ID':<8} {'Name':<30} {'Short Name':<15}{Style.RESET_ALL}")
         print("-" * 55)
-        for chain in sorted(blockchain_data, key=lambda x: x["chainId"]):
+        for chain in sorted(chains, key=lambda x: x["chainId"]):
             print(
                 f"{chain['chainId']:<8} {chain['name']:<30} {chain.get('shortName', 'N/A'):<15}"
             )
     elif format == "json":
-        print(json.dumps(blockchain_data, indent=2))
+        print(json.dumps(chains, indent=2, default=to_builtin))
 
 
 def get_chain_data(identifier):
@@ -205,9 +221,9 @@ def get_chain_data(identifier):
     return get_chain_data_by_name(identifier)
 
 
-def get_rpcs(identifier, rpc_type, no_tracking=False):
-    """Unified function to get RPCs by type"""
-    return chainlist_api.get_rpcs(identifier, rpc_type, no_tracking)
+def get_rpcs(identifier, rpc_type, no_tracking=False, ranked=False):
+    """Unified function to get RPCs by type, best-first if ranked"""
+    return chainlist_api.get_rpcs(identifier, rpc_type, no_tracking, ranked=ranked)
 
 
 def get_http_rpcs(identifier, no_tracking=False):
@@ -220,6 +236,11 @@ def get_wss_rpcs(identifier, no_tracking=False):
     return get_rpcs(identifier, "wss", no_tracking)
 
 
+def get_rpcs_many(identifiers, rpc_type, no_tracking=False, ranked=False):
+    """Get RPCs of one type for many chains at once"""
+    return chainlist_api.get_rpcs_many(identifiers, rpc_type, no_tracking, ranked=ranked)
+
+
 def get_explorer(identifier, explorer_type=None):
     """Get explorer by ID or name"""
     chain_data = get_chain_data(identifier)
@@ -275,16 +296,8 @@ def get_explorer_link(chain_id, address):
 
 def cleanup_resources():
     """Clean up resources and clear caches"""
-    global blockchain_data, chain_by_id, chain_by_name, chain_by_short_name
-    blockchain_data = []
-    chain_by_id.clear()
-    chain_by_name.clear()
-    chain_by_short_name.clear()
-    # Only clear cache if the functions have been decorated
-    if hasattr(get_chain_data_by_id, "cache_clear"):
-        get_chain_data_by_id.cache_clear()
-    if hasattr(get_chain_data_by_name, "cache_clear"):
-        get_chain_data_by_name.cache_clear()
+    global chain_index
+    chain_index = EMPTY_INDEX
 
 
 def get_protocol_tvl(protocol: str) -> Dict:
@@ -314,6 +327,7 @@ def get_top_protocols(limit: Optional[int] = None) -> List[Dict]:
     return defillama_api.get_top_protocols(limit)
 
 
+@profiler.timed("filtering")
 def get_chain_protocols(
     chain: str, limit: Optional[int] = None
 ) -> List[Dict[str, Any]]:
@@ -355,6 +369,7 @@ def print_protocol_info(protocol_data: Dict[str, Any]):
         print_warning("No TVL history data available")
 
 
+@profiler.timed("filtering")
 def get_pools(
     limit: Optional[int] = None,
     min_tvl: Optional[float] = None,
@@ -465,6 +480,8 @@ def get_fee_history(protocol: str, limit: Optional[int] = None) -> Dict:
     return result
 
 
+@profiler.timed("rendering")
+@counts_rows
 def format_chain_data(
     data, output_format="text", oracle_filter=None, show_chains=False, limit=None
 ):
@@ -547,6 +564,8 @@ def format_percentage(value):
     return "0.00%"
 
 
+@profiler.timed("rendering")
+@counts_rows
 def format_price_data(
     price_data: Union[Dict[str, float], List[Dict[str, Any]]], format: str = "table"
 ) -> str:
@@ -605,6 +624,8 @@ def format_price_data(
     return "\n".join(result)
 
 
+@profiler.timed("rendering")
+@counts_rows
 def format_chart_data(chart_data: List[Dict[str, Any]], format: str = "table") -> str:
     """Format historical chart data for display"""
     if format == "json":
@@ -628,6 +649,8 @@ def format_chart_data(chart_data: List[Dict[str, Any]], format: str = "table") -
     return "\n".join(result)
 
 
+@profiler.timed("rendering")
+@counts_rows
 def format_pool_data(pool_data: List[Dict[str, Any]], format: str = "table") -> str:
     """Format pool data for display"""
     if format == "json":
@@ -669,6 +692,8 @@ def format_pool_data(pool_data: List[Dict[str, Any]], format: str = "table") ->
     return "\n".join(result)
 
 
+@profiler.timed("rendering")
+@counts_rows
 def format_dex_data(
     dex_data: Union[Dict[str, Any], List[Dict[str, Any]]],
     format: str = "table",
@@ -783,6 +808,8 @@ def format_dex_data(
     return "\n".join(result)
 
 
+@profiler.timed("rendering")
+@counts_rows
 def format_options_data(
     options_data: Union[Dict[str, Any], List[Dict[str, Any]]], format: str = "table"
 ) -> str:
@@ -901,6 +928,8 @@ def get_token_identifier(token: str) -> str:
     return f"coingecko:{token.lower()}"
 
 
+@profiler.timed("rendering")
+@counts_rows
 def format_transaction_data(transactions: List[Transaction], format: str = "table") -> str:
     """Format transaction data for display."""
     if format == "table":
@@ -916,6 +945,8 @@ def format_transaction_data(transactions: List[Transaction], format: str = "tabl
         return json.dumps([tx.dict() for tx in transactions], indent=2)
 
 
+@profiler.timed("rendering")
+@counts_rows
 def format_token_transfer_data(transfers: List[TokenTransfer], format: str = "table") -> str:
     """Format token transfer data for display."""
     if format == "table":
@@ -931,6 +962,8 @@ def format_token_transfer_data(transfers: List[TokenTransfer], format: str = "ta
         return json.dumps([transfer.dict() for transfer in transfers], indent=2)
 
 
+@profiler.timed("rendering")
+@counts_rows
 def format_contract_source(contract: ContractSource, format: str = "table") -> str:
     """Format contract source code for display."""
     if format == "table":
@@ -945,9 +978,74 @@ def format_contract_source(contract: ContractSource, format: str = "table") -> s
         return json.dumps(contract.dict(), indent=2)
 
 
+def report_data_age(output_format: str = "table"):
+    """Report the age of the cached data served in offline mode"""
+    ages = [
+        api.data_age
+        for api in (chainlist_api, defillama_api, etherscan_api)
+        if api.data_age is not None
+    ]
+    # Machine-readable output (json, ndjson, csv) must stay parseable
+    if ages and output_format == "table":
+        print_info(f"Offline mode: served cached data up to {format_age(max(ages))} old")
+
+
 def setup_parser():
     """Set up the argument parser."""
     parser = argparse.ArgumentParser(description="ChainData - Blockchain Data Aggregator")
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Serve cached data regardless of age and never touch the network",
+    )
+    parser.add_argument(
+        "--record",
+        metavar="DIR",
+        help="Capture upstream responses into DIR for replay by the stub server",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print a per-phase timing breakdown to stderr",
+    )
+    parser.add_argument(
+        "--profile-stats",
+        metavar="FILE",
+        help="Write cProfile stats to FILE (implies --profile)",
+    )
+    parser.add_argument(
+        "--flamegraph",
+        metavar="FILE",
+        help="Write sampled collapsed stacks for flamegraph tools to FILE (implies --profile)",
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="FILE",
+        help="Write tracing spans for the command and its HTTP calls to FILE as JSON lines"
+        " ('-' for stderr)",
+    )
+    parser.add_argument(
+        "--log-level",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        type=str.upper,
+        help="Log level for stderr diagnostics (default INFO)",
+    )
+    parser.add_argument(
+        "--log-format",
+        choices=["text", "json"],
+        help="Write diagnostics as text or as one JSON object per line",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        metavar="FILE",
+        help="Write Prometheus metrics to FILE for node_exporter's textfile collector",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        metavar="PORT",
+        help="Serve Prometheus metrics on http://127.0.0.1:PORT/metrics while the command runs",
+    )
     subparsers = parser.add_subparsers(dest="command", help="Available commands")
 
     # Chainlist commands
@@ -964,6 +1062,14 @@ def setup_parser():
     search_parser.add_argument(
         "--format", choices=["table", "json"], default="table", help="Output format"
     )
+    search_parser.add_argument(
+        "--fuzzy",
+        action="store_true",
+        help="Rank typo-tolerant matches with scores instead of substring matches",
+    )
+    search_parser.add_argument(
+        "--limit", type=int, default=5, help="Number of fuzzy candidates to show"
+    )
 
     # Chainlist list command
     list_parser = chainlist_subparsers.add_parser("list", help="List all chains")
@@ -987,10 +1093,216 @@ def setup_parser():
     rpcs_parser.add_argument(
         "--no-tracking", action="store_true", help="Exclude tracking RPCs"
     )
+    rpcs_parser.add_argument(
+        "--ranked",
+        action="store_true",
+        help="Order by remembered health and latency, dropping unhealthy RPCs",
+    )
+    rpcs_parser.add_argument(
+        "--min-health",
+        type=float,
+        help="Health (0-1) a ranked RPC needs to be listed (default: 0.5)",
+    )
     rpcs_parser.add_argument(
         "--format", choices=["table", "json"], default="table", help="Output format"
     )
 
+    # Chainlist resolve command
+    resolve_parser = chainlist_subparsers.add_parser(
+        "resolve", help="Resolve many chain IDs, names or short names at once"
+    )
+    resolve_parser.add_argument(
+        "input",
+        nargs="?",
+        default="-",
+        help="File with one identifier per line (default: stdin)",
+    )
+    resolve_parser.add_argument(
+        "--format", choices=["ndjson", "csv"], default="ndjson", help="Output format"
+    )
+    resolve_parser.add_argument(
+        "--fuzzy",
+        action="store_true",
+        help="Fall back to the best typo-tolerant match for unknown identifiers",
+    )
+    resolve_parser.add_argument(
+        "--strict",
+        action="store_true",
+        help="Exit with status 1 when any identifier is not found",
+    )
+
+    # Chainlist call command
+    call_parser = chainlist_subparsers.add_parser(
+        "call", help="Send JSON-RPC calls to a chain in batches across its endpoints"
+    )
+    call_parser.add_argument("chain", help="Chain name or ID")
+    call_parser.add_argument(
+        "input",
+        nargs="?",
+        default="-",
+        help="File with a JSON array of calls or one call per line (default: stdin)",
+    )
+    call_parser.add_argument(
+        "--batch-size", type=int, help="Calls per JSON-RPC batch (default: 100)"
+    )
+    call_parser.add_argument(
+        "--max-bytes", type=int, help="Bytes of JSON per batch (default: 1048576)"
+    )
+    call_parser.add_argument(
+        "--no-tracking", action="store_true", help="Only use RPCs that declare no tracking"
+    )
+    call_parser.add_argument(
+        "--strict", action="store_true", help="Exit with status 1 when any call fails"
+    )
+
+    # Chainlist changes command
+    changes_parser = chainlist_subparsers.add_parser(
+        "changes", help="Show chains added, removed or changed by refreshes"
+    )
+    changes_parser.add_argument(
+        "--since",
+        help="Only refreshes since a duration ago (30m, 24h, 7d), a date or a timestamp",
+    )
+    changes_parser.add_argument(
+        "--refresh", action="store_true", help="Refresh the chain list before showing changes"
+    )
+    changes_parser.add_argument(
+        "--format", choices=["table", "json"], default="table", help="Output format"
+    )
+
+    # Chainlist probe command
+    probe_parser = chainlist_subparsers.add_parser(
+        "probe", help="Check RPC endpoints for health, latency and block lag"
+    )
+    probe_parser.add_argument("chains", nargs="+", help="Chain names or IDs")
+    probe_parser.add_argument(
+        "--type", choices=["http", "wss", "all"], default="all", help="RPC types to probe"
+    )
+    probe_parser.add_argument(
+        "--samples", type=int, help="eth_blockNumber calls per endpoint (default: 3)"
+    )
+    probe_parser.add_argument("--timeout", type=float, help="Seconds per call (default: 5)")
+    probe_parser.add_argument(
+        "--per-host", type=int, help="Endpoints probed at once per host (default: 4)"
+    )
+    probe_parser.add_argument(
+        "--max-lag", type=int, help="Blocks behind the median head still counted healthy (default: 5)"
+    )
+    probe_parser.add_argument(
+        "--best",
+        type=int,
+        metavar="N",
+        help="Only print the URLs of the N fastest healthy endpoints per chain",
+    )
+    probe_parser.add_argument(
+        "--format", choices=["table", "json"], default="table", help="Output format"
+    )
+
+    # Chainlist block command
+    block_parser = chainlist_subparsers.add_parser(
+        "block", help="Find the block at a time, or the time of a block"
+    )
+    block_parser.add_argument("chain", help="Chain name or ID")
+    block_parser.add_argument(
+        "times",
+        nargs="+",
+        help="Timestamps, dates or durations ago (24h, 7d); block numbers with --blocks",
+    )
+    block_parser.add_argument(
+        "--blocks", action="store_true", help="Look up the timestamps of block numbers"
+    )
+    block_parser.add_argument(
+        "--no-llama", action="store_true", help="Search over RPC only, without asking DefiLlama"
+    )
+    block_parser.add_argument(
+        "--no-tracking", action="store_true", help="Only use RPCs that declare no tracking"
+    )
+    block_parser.add_argument(
+        "--format", choices=["table", "json"], default="table", help="Output format"
+    )
+
+    # Chainlist watch command
+    watch_parser = chainlist_subparsers.add_parser(
+        "watch", help="Stream new heads or logs over WebSocket RPCs as NDJSON"
+    )
+    watch_parser.add_argument("chain", help="Chain name or ID")
+    watch_parser.add_argument(
+        "--logs", action="store_true", help="Stream logs instead of new heads"
+    )
+    watch_parser.add_argument("--address", nargs="+", help="Contract addresses to match")
+    watch_parser.add_argument(
+        "--topics",
+        nargs="+",
+        help="Topics by position; 'a,b' matches either and '-' matches anything",
+    )
+    watch_parser.add_argument(
+        "--connections", type=int, help="WebSockets to keep open (default: 2)"
+    )
+    watch_parser.add_argument("--count", type=int, help="Stop after this many events")
+    watch_parser.add_argument(
+        "--no-tracking", action="store_true", help="Only use RPCs that declare no tracking"
+    )
+
+    # Scan commands
+    scan_parser = subparsers.add_parser(
+        "scan", help="Check addresses across many chains or pull event logs"
+    )
+    scan_subparsers = scan_parser.add_subparsers(dest="subcommand", help="Scan subcommand")
+    address_parser = scan_subparsers.add_parser(
+        "address", help="Find balances, nonces and contracts on every mainnet"
+    )
+    address_parser.add_argument("addresses", nargs="*", help="Addresses to check")
+    address_parser.add_argument(
+        "--input", help="File with one address per line ('-' for stdin)"
+    )
+    address_parser.add_argument(
+        "--chains", nargs="+", help="Chain names or IDs to scan (default: every mainnet)"
+    )
+    address_parser.add_argument(
+        "--deadline", type=float, help="Seconds the whole scan may take (default: 30)"
+    )
+    address_parser.add_argument(
+        "--concurrency", type=int, help="Chains scanned at once (default: 64)"
+    )
+    address_parser.add_argument(
+        "--per-chain", type=int, help="Batches in flight per chain (default: 4)"
+    )
+    address_parser.add_argument(
+        "--no-tracking", action="store_true", help="Only use RPCs that declare no tracking"
+    )
+    address_parser.add_argument(
+        "--all",
+        action="store_true",
+        help="Show every chain and address, not just where an address is active",
+    )
+    address_parser.add_argument(
+        "--format", choices=["table", "ndjson"], default="table", help="Output format"
+    )
+    logs_parser = scan_subparsers.add_parser(
+        "logs", help="Stream a chain's event logs over a block range as NDJSON"
+    )
+    logs_parser.add_argument("chain", help="Chain name or ID")
+    logs_parser.add_argument("--from-block", type=int, required=True, help="First block")
+    logs_parser.add_argument(
+        "--to-block", default="latest", help="Last block, inclusive (default: latest)"
+    )
+    logs_parser.add_argument("--address", nargs="+", help="Contract addresses to match")
+    logs_parser.add_argument(
+        "--topics",
+        nargs="+",
+        help="Topics by position; 'a,b' matches either and '-' matches anything",
+    )
+    logs_parser.add_argument(
+        "--checkpoint", help="File recording progress, so a rerun resumes where this one stopped"
+    )
+    logs_parser.add_argument("--output", help="File to append logs to (default: stdout)")
+    logs_parser.add_argument(
+        "--chunk-size", type=int, help="Blocks per query to start with (default: 1000)"
+    )
+    logs_parser.add_argument(
+        "--no-tracking", action="store_true", help="Only use RPCs that declare no tracking"
+    )
+
     # DefiLlama commands
     defillama_parser = subparsers.add_parser(
         "defillama", help="Interact with DefiLlama API"
@@ -1103,13 +1415,401 @@ def main():
         parser.print_help()
         return
 
+    profiling = args.profile or args.profile_stats or args.flamegraph
+    if profiling:
+        profiler.start(IMPORT_STARTED, args.profile_stats, args.flamegraph)
+
+    with profiler.phase("config load"):
+        if args.offline:
+            config.set("network.offline", True)
+        if args.record:
+            config.set("network.record_dir", args.record)
+        if args.log_level or args.log_format:
+            setup_logger(level=args.log_level, fmt=args.log_format)
+
+    trace_file = args.trace or config.get("tracing.file")
+    if trace_file:
+        tracer.configure(trace_file)
+
+    metrics_file = args.metrics_file or config.get("metrics.textfile")
+    metrics_port = args.metrics_port or config.get("metrics.port")
+    metrics_server = metrics.serve(metrics_port) if metrics_port else None
+
+    subcommand = getattr(args, "subcommand", None)
+    try:
+        with tracer.start_span(
+            " ".join(filter(None, ["chaindata", args.command, subcommand])),
+            {"cli.command": args.command, "cli.subcommand": subcommand},
+        ) as span:
+            status = run_command(parser, args)
+            span.set_attribute("cli.exit_code", status)
+            span.set_status("OK" if status == 0 else "ERROR")
+            return status
+    finally:
+        if profiling:
+            profiler.stop()
+            profiler.report()
+        if trace_file:
+            tracer.shutdown()
+        if metrics_file:
+            metrics.write_textfile(metrics_file)
+        if metrics_server is not None:
+            metrics_server.shutdown()
+
+
+def resolve_chain_argument(identifier: str, fmt: str = "table") -> Optional[Dict[str, Any]]:
+    """Look up a chain named on the command line, accepting close spellings"""
+    # Exact matches come from the snapshot without loading the whole dataset
+    chain = chainlist_api.lookup_chain(identifier)
+    if chain:
+        return chain
+
+    if not chainlist_api.blockchain_data:
+        chainlist_api.get_all_blockchain_data()
+    matches = chainlist_api.resolve(identifier)
+    if matches and matches[0].score >= RESOLVE_THRESHOLD:
+        best = matches[0].chain
+        if fmt != "json":
+            print_info(f"Using {best['name']} (chain {best['chainId']}) for '{identifier}'")
+        return best
+
+    print_error(f"Chain not found: {identifier}")
+    if matches:
+        suggestions = ", ".join(
+            f"{match.chain['name']} ({match.chain['chainId']})" for match in matches
+        )
+        print_info(f"Did you mean: {suggestions}")
+    return None
+
+
+@profiler.timed("rendering")
+@counts_rows
+def format_chain_matches(matches: List[ChainMatch], format: str = "table") -> str:
+    """Format ranked fuzzy matches with their scores"""
+    rows = [
+        {
+            "chainId": match.chain.get("chainId"),
+            "name": match.chain.get("name"),
+            "shortName": match.chain.get("shortName"),
+            "score": round(match.score, 3),
+            "matched": match.matched,
+            "method": match.method,
+        }
+        for match in matches
+    ]
+    if format == "json":
+        return json.dumps(rows, indent=2)
+    if not rows:
+        return "No matching chains"
+
+    header = f"{'ID':<10} {'Name':<30} {'Short Name':<15} {'Score':>6} {'Method':<10} Matched"
+    lines = [header, "-" * len(header)]
+    for row in rows:
+        lines.append(
+            f"{row['chainId']!s:<10} {str(row['name'])[:30]:<30} {str(row['shortName'])[:15]:<15}"
+            f" {row['score']:>6.3f} {row['method']:<10} {row['matched']}"
+        )
+    return "\n".join(lines)
+
+
+def format_chain_changes(entries: List[Dict[str, Any]], format: str = "table") -> str:
+    """Format changelog entries, one line per chain added, removed or changed"""
+    if format == "json":
+        return json.dumps(entries, indent=2)
+    rows = []
+    for entry in entries:
+        at = datetime.fromtimestamp(entry.get("at", 0)).strftime(config.get("display.date_format"))
+        for change in ("added", "removed", "changed"):
+            for chain in entry.get(change, ()):
+                rows.append((at, change, chain, ", ".join(chain.get("fields", ()))))
+    if not rows:
+        return "No changes recorded"
+
+    header = f"{'Refreshed':<19} {'Change':<8} {'ID':<10} {'Name':<30} Fields"
+    lines = [header, "-" * len(header)]
+    for at, change, chain, fields in rows:
+        lines.append(
+            f"{at:<19} {change:<8} {chain.get('chainId')!s:<10} {str(chain.get('name'))[:30]:<30} {fields}"
+        )
+    return "\n".join(lines)
+
+
+def format_block_times(answers: List[Tuple[int, BlockTime]], format: str = "table") -> str:
+    """Format (queried time or block, BlockTime) pairs, one line each"""
+    rows = [
+        {"query": query, "block": answer.block, "timestamp": answer.timestamp}
+        for query, answer in answers
+    ]
+    if format == "json":
+        return json.dumps(rows, indent=2)
+    date_format = config.get("display.date_format")
+    header = f"{'Query':<12} {'Block':>12}  Block time"
+    lines = [header, "-" * len(header)]
+    for row in rows:
+        at = datetime.fromtimestamp(row["timestamp"]).strftime(date_format)
+        lines.append(f"{row['query']:<12} {row['block']:>12}  {at} ({row['timestamp']})")
+    return "\n".join(lines)
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 1)
+
+
+def format_balance(balance: Optional[int], chain: Dict[str, Any]) -> str:
+    """Format a balance in wei in the chain's native currency"""
+    if balance is None:
+        return "-"
+    currency = chain.get("nativeCurrency") or {}
+    decimals = currency.get("decimals", 18)
+    return f"{balance / 10 ** decimals:.6g} {currency.get('symbol') or ''}".rstrip()
+
+
+def format_chain_scan(
+    scan: ChainScan, chain: Dict[str, Any], format: str = "table", show_all: bool = False
+) -> List[str]:
+    """Format one chain's scan results as lines, leaving out inactive addresses unless show_all"""
+    accounts = scan.accounts if show_all else scan.active
+    if format == "ndjson":
+        if scan.error is not None:
+            return [json.dumps({"chainId": scan.chain_id, "name": scan.name, "error": scan.error})]
+        return [
+            json.dumps(
+                {
+                    "chainId": scan.chain_id,
+                    "name": scan.name,
+                    "address": account.address,
+                    "balance": str(account.balance) if account.balance is not None else None,
+                    "nonce": account.nonce,
+                    "contract": account.has_code,
+                    "error": account.error,
+                }
+            )
+            for account in accounts
+        ]
+
+    label = f"{scan.name} ({scan.chain_id})"
+    if scan.error is not None:
+        return [f"{label}: {scan.error}"] if show_all else []
+    lines = []
+    for account in accounts:
+        details = [format_balance(account.balance, chain)]
+        details.append(f"nonce {account.nonce if account.nonce is not None else '-'}")
+        if account.has_code:
+            details.append("contract")
+        if account.error:
+            details.append(f"errors: {account.error}")
+        lines.append(f"{label}  {account.address}  " + ", ".join(details))
+    return lines
+
+
+def format_probe_results(
+    reports: List[ChainProbe], names: Dict[int, str], format: str = "table"
+) -> str:
+    """Format RPC probe reports, healthy endpoints first and fastest first"""
+    rows = []
+    for report in reports:
+        healthy = report.healthy()
+        others = [endpoint for endpoint in report.endpoints if endpoint not in healthy]
+        rows.append(
+            {
+                "chainId": report.chain_id,
+                "name": names.get(report.chain_id),
+                "head": report.head,
+                "latency_ms": {
+                    f"p{q}": _round(value) for q, value in report.latency_percentiles().items()
+                },
+                "healthy": len(healthy),
+                "endpoints": [
+                    {
+                        "url": endpoint.url,
+                        "status": endpoint.status(report.max_lag),
+                        "latency_ms": _round(endpoint.latency_ms),
+                        "block": endpoint.block,
+                        "lag": endpoint.lag,
+                        "reportedChainId": endpoint.reported_chain_id,
+                        "error": endpoint.error,
+                    }
+                    for endpoint in healthy + others
+                ],
+            }
+        )
+    if format == "json":
+        return json.dumps(rows, indent=2)
+
+    sections = []
+    for row in rows:
+        latency = ", ".join(
+            f"{q} {value:.1f} ms" for q, value in row["latency_ms"].items() if value is not None
+        )
+        head = row["head"] if row["head"] is not None else "unknown"
+        summary = f"Chain {row['chainId']} ({row['name']}): head {head}, "
+        summary += f"{row['healthy']}/{len(row['endpoints'])} healthy"
+        if latency:
+            summary += f", latency {latency}"
+        header = f"{'Status':<12} {'p50 ms':>8} {'Block':>12} {'Lag':>6}  URL"
+        lines = [summary, header, "-" * len(header)]
+        for endpoint in row["endpoints"]:
+            if endpoint["error"]:
+                note = f"  ({endpoint['error']})"
+            elif endpoint["status"] == "wrong chain":
+                note = f"  (reports chain {endpoint['reportedChainId']})"
+            else:
+                note = ""
+            lines.append(
+                f"{endpoint['status']:<12} {_dash(endpoint['latency_ms']):>8}"
+                f" {_dash(endpoint['block']):>12} {_dash(endpoint['lag']):>6}"
+                f"  {endpoint['url']}{note}"
+            )
+        sections.append("\n".join(lines))
+    return "\n\n".join(sections)
+
+
+def _dash(value: Any) -> str:
+    return "-" if value is None else str(value)
+
+
+# Columns written by `chainlist resolve`, in CSV order
+RESOLVE_COLUMNS = ("input", "found", "chainId", "name", "shortName", "method", "score")
+
+
+def read_identifiers(source: str) -> Iterator[str]:
+    """Yield the non-blank lines of a file, or of stdin when source is '-'"""
+    stream = sys.stdin if source == "-" else open(source, encoding="utf-8")
+    try:
+        for line in stream:
+            identifier = line.strip()
+            if identifier:
+                yield identifier
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def read_rpc_calls(source: str) -> List[Dict[str, Any]]:
+    """Read JSON-RPC calls from a JSON array or one JSON object per line ('-' for stdin)
+
+    Each call needs a "method" and may have "params" and an "id", which
+    defaults to its position.
+    """
+    if source == "-":
+        text = sys.stdin.read()
+    else:
+        with open(source, encoding="utf-8") as f:
+            text = f.read()
+    stripped = text.strip()
+    if stripped.startswith("["):
+        calls = json.loads(stripped)
+    else:
+        calls = [json.loads(line) for line in stripped.splitlines() if line.strip()]
+    for position, call in enumerate(calls):
+        if not isinstance(call, dict) or not isinstance(call.get("method"), str):
+            raise ValueError(f"Call {position + 1} has no method")
+        params = call.get("params", [])
+        if not isinstance(params, list):
+            raise ValueError(f"Call {position + 1} has params that are not a list")
+        call.setdefault("id", position)
+    return calls
+
+
+def parse_topics(values: Iterable[str]) -> List[Union[None, str, List[str]]]:
+    """Turn topic arguments into a filter: '-' or 'null' matches anything, 'a,b' either"""
+    topics: List[Union[None, str, List[str]]] = []
+    for value in values:
+        if value.lower() in ("-", "null", "none"):
+            topics.append(None)
+        elif "," in value:
+            topics.append([topic for topic in value.split(",") if topic])
+        else:
+            topics.append(value)
+    return topics
+
+
+def write_rpc_results(
+    calls: List[Dict[str, Any]], results: List[Any], stream: Optional[TextIO] = None
+) -> int:
+    """Write one NDJSON line per call with its result or error, returning the errors"""
+    if stream is None:
+        stream = sys.stdout
+    errors = 0
+    for call, result in zip(calls, results):
+        if isinstance(result, RpcError):
+            errors += 1
+            line = {"id": call["id"], "error": {"code": result.code, "message": result.message}}
+        else:
+            line = {"id": call["id"], "result": result}
+        stream.write(json.dumps(line) + "\n")
+    return errors
+
+
+class _Line:
+    """File stand-in that hands back what csv.writer writes to it"""
+
+    def write(self, text: str) -> str:
+        return text
+
+
+def write_resolutions(
+    resolutions: Iterable[Resolution], format: str = "ndjson", stream: Optional[TextIO] = None
+) -> Tuple[int, int]:
+    """Stream one NDJSON or CSV row per resolution, returning (found, total)"""
+    if stream is None:
+        stream = sys.stdout
+    csv_writer = csv.writer(_Line(), lineterminator="\n")
+    if format == "csv":
+        stream.write(csv_writer.writerow(RESOLVE_COLUMNS))
+    # Everything after the input column, rendered once per chain and method
+    tails: Dict[Tuple[int, Optional[str], float], str] = {}
+    dumps = json.dumps
+    found = total = 0
+    for resolution in resolutions:
+        total += 1
+        chain = resolution.chain
+        if chain is not None:
+            found += 1
+        key = (id(chain), resolution.method, resolution.score)
+        tail = tails.get(key)
+        if tail is None:
+            row = {
+                "found": chain is not None,
+                "chainId": chain.get("chainId") if chain else None,
+                "name": chain.get("name") if chain else None,
+                "shortName": chain.get("shortName") if chain else None,
+                "method": resolution.method,
+                "score": round(resolution.score, 3),
+            }
+            if format == "csv":
+                tail = csv_writer.writerow(
+                    [""] + ["" if value is None else value for value in row.values()]
+                )
+            else:
+                tail = ", " + dumps(row)[1:] + "\n"
+            tails[key] = tail
+        if format == "csv":
+            stream.write(csv_writer.writerow((resolution.identifier,))[:-1] + tail)
+        else:
+            stream.write('{"input": ' + dumps(resolution.identifier) + tail)
+    stream.flush()
+    rows_rendered.labels("write_resolutions").inc(total)
+    return found, total
+
+
+def run_command(parser, args):
+    """Dispatch a parsed command, returning the exit status"""
     # Get the etherscan subparser for help display
     etherscan_parser = parser._subparsers._group_actions[0].choices.get('etherscan')
 
     try:
         if args.command == "chainlist":
-            # Initialize chainlist data if not already done
-            if not chainlist_api.blockchain_data:
+            # Initialize chainlist data if not already done; single-chain
+            # lookups try the snapshot first and load it only if they must,
+            # and the changelog needs no data at all
+            if not chainlist_api.blockchain_data and args.subcommand not in (
+                "info",
+                "rpcs",
+                "changes",
+                "probe",
+                "call",
+            ):
                 chainlist_api.get_all_blockchain_data()
 
             if not args.subcommand:
@@ -1117,7 +1817,15 @@ def main():
                 return 1
 
             if args.subcommand == "search":
-                results = chainlist_api.search_chains(args.query)
+                results = [] if args.fuzzy else chainlist_api.search_chains(args.query)
+                if not results:
+                    matches = chainlist_api.resolve(args.query, args.limit)
+                    if args.fuzzy:
+                        print(format_chain_matches(matches, args.format))
+                        return 0
+                    if matches and args.format != "json":
+                        print_info(f"No chains contain '{args.query}'; closest matches:")
+                    results = [match.chain for match in matches]
                 print(format_chain_info(results, args.format))
 
             elif args.subcommand == "list":
@@ -1125,32 +1833,24 @@ def main():
                 print(format_chain_info(results, args.format))
 
             elif args.subcommand == "info":
-                # Try to convert to int if possible
-                try:
-                    chain_id = int(args.chain)
-                    info = chainlist_api.get_chain_data_by_id(chain_id)
-                except ValueError:
-                    info = chainlist_api.get_chain_data_by_name(args.chain)
-
+                info = resolve_chain_argument(args.chain, args.format)
                 if not info:
-                    print_error(f"Chain not found: {args.chain}")
                     return 1
                 print(format_chain_info(info, args.format))
 
             elif args.subcommand == "rpcs":
-                # Try to convert to int if possible
-                try:
-                    chain_id = int(args.chain)
-                    chain_data = chainlist_api.get_chain_data_by_id(chain_id)
-                except ValueError:
-                    chain_data = chainlist_api.get_chain_data_by_name(args.chain)
-
+                chain_data = resolve_chain_argument(args.chain, args.format)
                 if not chain_data:
-                    print_error(f"Chain not found: {args.chain}")
                     return 1
 
                 rpc_type = "https" if args.type == "http" else "wss"
-                rpcs = chainlist_api.get_rpcs(chain_data, rpc_type, args.no_tracking)
+                rpcs = chainlist_api.get_rpcs(
+                    chain_data,
+                    rpc_type,
+                    args.no_tracking,
+                    ranked=args.ranked or args.min_health is not None,
+                    min_health=args.min_health,
+                )
 
                 # Format the RPCs for display
                 if args.format == "json":
@@ -1160,6 +1860,266 @@ def main():
                     for rpc in rpcs:
                         print(f"- {rpc}")
 
+            elif args.subcommand == "resolve":
+                try:
+                    identifiers = read_identifiers(args.input)
+                    found, total = write_resolutions(
+                        chainlist_api.resolve_many(identifiers, fuzzy=args.fuzzy),
+                        args.format,
+                    )
+                except OSError as e:
+                    print_error(f"Cannot read identifiers: {e}")
+                    return 1
+                print(f"Resolved {found} of {total} identifiers", file=sys.stderr)
+                if args.strict and found < total:
+                    return 1
+
+            elif args.subcommand == "call":
+                chain = resolve_chain_argument(args.chain, "json")
+                if not chain:
+                    return 1
+                try:
+                    calls = read_rpc_calls(args.input)
+                except (OSError, ValueError) as e:
+                    print_error(f"Cannot read calls: {e}")
+                    return 1
+                try:
+                    client = chainlist_api.rpc_client(
+                        chain,
+                        args.no_tracking,
+                        batch_size=args.batch_size,
+                        max_batch_bytes=args.max_bytes,
+                    )
+                except ValueError as e:
+                    print_error(str(e))
+                    return 1
+
+                async def run_calls():
+                    async with client:
+                        return await client.call_many(
+                            ((call["method"], call.get("params")) for call in calls),
+                            return_errors=True,
+                        )
+
+                errors = write_rpc_results(calls, asyncio.run(run_calls()))
+                print(
+                    f"Answered {len(calls) - errors} of {len(calls)} calls", file=sys.stderr
+                )
+                if args.strict and errors:
+                    return 1
+
+            elif args.subcommand == "probe":
+                chains = []
+                for identifier in args.chains:
+                    chain = resolve_chain_argument(identifier, args.format)
+                    if not chain:
+                        return 1
+                    chains.append(chain)
+                schemes = {"http": ("https", "http"), "wss": ("wss", "ws")}.get(
+                    args.type, ("https", "http", "wss", "ws")
+                )
+                prober = RpcProber(
+                    samples=args.samples,
+                    timeout=args.timeout,
+                    per_host=args.per_host,
+                    max_lag=args.max_lag,
+                    scoreboard=chainlist_api.rpc_scores,
+                )
+                reports = chainlist_api.probe_rpcs(chains, schemes, prober)
+                if args.best is not None:
+                    for report in reports:
+                        for url in report.best(args.best):
+                            print(url)
+                else:
+                    names = {chain["chainId"]: chain.get("name") for chain in chains}
+                    print(format_probe_results(reports, names, args.format))
+
+            elif args.subcommand == "block":
+                chain = resolve_chain_argument(args.chain, args.format)
+                if not chain:
+                    return 1
+                try:
+                    if args.blocks:
+                        queries = [int(value, 0) for value in args.times]
+                    else:
+                        queries = [int(parse_since(value)) for value in args.times]
+                except ValueError as e:
+                    print_error(str(e))
+                    return 1
+                try:
+                    resolver = chainlist_api.block_time_resolver(
+                        chain, args.no_tracking, None if args.no_llama else defillama_api
+                    )
+                except ValueError as e:
+                    print_error(str(e))
+                    return 1
+
+                async def resolve_blocks():
+                    async with resolver:
+                        if args.blocks:
+                            return [
+                                BlockTime(block, await resolver.timestamp_of(block))
+                                for block in queries
+                            ]
+                        return [await resolver.block_at(at) for at in queries]
+
+                try:
+                    answers = asyncio.run(resolve_blocks())
+                except (RpcError, ValueError) as e:
+                    print_error(str(e))
+                    return 1
+                print(format_block_times(list(zip(queries, answers)), args.format))
+
+            elif args.subcommand == "watch":
+                # Keep stdout to events only
+                chain = resolve_chain_argument(args.chain, "json")
+                if not chain:
+                    return 1
+                try:
+                    manager = chainlist_api.subscriptions(
+                        chain, args.no_tracking, connections=args.connections
+                    )
+                except ValueError as e:
+                    print_error(str(e))
+                    return 1
+                topics = parse_topics(args.topics) if args.topics else None
+
+                async def watch():
+                    async with manager:
+                        if args.logs or args.address or args.topics:
+                            events = manager.logs(args.address, topics)
+                        else:
+                            events = manager.new_heads()
+                        seen = 0
+                        async for event in events:
+                            print(json.dumps(event), flush=True)
+                            seen += 1
+                            if args.count is not None and seen >= args.count:
+                                break
+
+                try:
+                    asyncio.run(watch())
+                except KeyboardInterrupt:
+                    pass
+                stats = manager.stats
+                print(
+                    f"Received {stats['events']} events ({stats['duplicates']} duplicates "
+                    f"dropped) over {stats['connects']} connections",
+                    file=sys.stderr,
+                )
+
+            elif args.subcommand == "changes":
+                try:
+                    since = parse_since(args.since) if args.since else None
+                except ValueError as e:
+                    print_error(str(e))
+                    return 1
+                if args.refresh:
+                    chainlist_api.get_all_blockchain_data(force_refresh=True)
+                print(format_chain_changes(chainlist_api.changes(since), args.format))
+
+        elif args.command == "scan" and args.subcommand == "logs":
+            # Keep stdout to logs only
+            chain = resolve_chain_argument(args.chain, "json")
+            if not chain:
+                return 1
+            to_block = args.to_block
+            if to_block != "latest":
+                try:
+                    to_block = int(to_block, 0)
+                except ValueError:
+                    print_error(f"Invalid block '{args.to_block}'")
+                    return 1
+            try:
+                scanner = chainlist_api.log_scanner(
+                    chain, args.no_tracking, args.checkpoint, args.chunk_size
+                )
+            except ValueError as e:
+                print_error(str(e))
+                return 1
+            topics = parse_topics(args.topics) if args.topics else None
+
+            async def scan_logs(stream):
+                async with scanner.client:
+                    async for log in scanner.scan(
+                        args.from_block, to_block, args.address, topics
+                    ):
+                        stream.write(json.dumps(log) + "\n")
+
+            stream = open(args.output, "a", encoding="utf-8") if args.output else sys.stdout
+            started = time.perf_counter()
+            try:
+                asyncio.run(scan_logs(stream))
+            except (RpcError, ValueError) as e:
+                print_error(str(e))
+                return 1
+            finally:
+                if stream is not sys.stdout:
+                    stream.close()
+            stats = scanner.stats
+            print(
+                f"Fetched {stats['logs']} logs in {stats['chunks']} chunks "
+                f"({stats['splits']} splits) in {time.perf_counter() - started:.1f}s",
+                file=sys.stderr,
+            )
+
+        elif args.command == "scan":
+            if args.subcommand != "address":
+                parser.parse_args(["scan", "--help"])
+                return 1
+            addresses = list(args.addresses)
+            if args.input:
+                try:
+                    addresses.extend(read_identifiers(args.input))
+                except OSError as e:
+                    print_error(f"Cannot read addresses: {e}")
+                    return 1
+            invalid = [address for address in addresses if not is_address(address)]
+            if not addresses or invalid:
+                print_error(f"Invalid address: {invalid[0]}" if invalid else "No addresses given")
+                return 1
+
+            if args.chains:
+                chains = []
+                for identifier in args.chains:
+                    chain = resolve_chain_argument(identifier, args.format)
+                    if not chain:
+                        return 1
+                    chains.append(chain)
+            else:
+                chainlist_api.get_all_blockchain_data()
+                chains = None
+            records = (
+                {chain["chainId"]: chain for chain in chains}
+                if chains is not None
+                else chainlist_api.chain_by_id
+            )
+            scanner = AddressScanner(
+                concurrency=args.concurrency, per_chain=args.per_chain, deadline=args.deadline
+            )
+
+            async def scan():
+                counts = {"chains": 0, "failed": 0, "active": 0}
+                results = chainlist_api.scan_addresses(
+                    addresses, chains, args.no_tracking, scanner
+                )
+                async for result in results:
+                    counts["chains"] += 1
+                    counts["failed"] += result.error is not None
+                    counts["active"] += len(result.active)
+                    chain = records.get(result.chain_id) or {}
+                    for line in format_chain_scan(result, chain, args.format, args.all):
+                        print(line, flush=True)
+                return counts
+
+            started = time.perf_counter()
+            counts = asyncio.run(scan())
+            print(
+                f"Scanned {counts['chains']} chains in {time.perf_counter() - started:.1f}s: "
+                f"{counts['active']} active, {counts['failed']} failed",
+                file=sys.stderr,
+            )
+
         elif args.command == "defillama":
             if not args.subcommand:
                 parser.parse_args(["defillama", "--help"])
@@ -1243,6 +2203,8 @@ def main():
             else:
                 etherscan_parser.print_help()
 
+        if config.get("network.offline"):
+            report_data_age(getattr(args, "format", "table"))
         return 0
 
     except Exception as e:
@@ -0,0 +1,216 @@
+"""Checking addresses on many chains at once.
+
+For every address, each chain is asked for the native balance, the nonce and
+the deployed code, as one batch of calls through that chain's RpcClient. Many
+chains are scanned concurrently, and each chain has its own limit on calls in
+flight. Results are yielded as each chain finishes. A global deadline ends the
+scan, and chains still outstanding then are reported as timed out, so one dead
+chain cannot hold up the rest.
+"""
+
+import asyncio
+import re
+import time
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from ..core.config import config
+from ..core.logger import RpcError, get_logger
+from .rpc_client import RpcClient
+from .rpc_probe import quantity
+
+logger = get_logger("api.address_scan")
+
+_ADDRESS = re.compile(r"^0x[0-9a-fA-F]{40}$")
+
+# Words in a chain name that mark a test network
+_TESTNET_NAME = re.compile(r"\b(testnet|devnet|sepolia|goerli|holesky|hoodi)\b", re.IGNORECASE)
+
+# Calls made per address, in this order
+CHECKS = (
+    ("balance", "eth_getBalance"),
+    ("nonce", "eth_getTransactionCount"),
+    ("code", "eth_getCode"),
+)
+
+
+def is_address(value: str) -> bool:
+    return bool(_ADDRESS.match(value))
+
+
+def is_mainnet(chain: Mapping[str, Any]) -> bool:
+    """Check a chainlist record is a live production network rather than a testnet"""
+    if chain.get("isTestnet") or chain.get("status") == "deprecated":
+        return False
+    if str(chain.get("network") or "").lower() == "testnet":
+        return False
+    return not _TESTNET_NAME.search(str(chain.get("name") or ""))
+
+
+class AddressState(NamedTuple):
+    """What one chain reported for one address; None where a call failed"""
+
+    address: str
+    balance: Optional[int] = None
+    nonce: Optional[int] = None
+    has_code: Optional[bool] = None
+    error: Optional[str] = None
+
+    @property
+    def active(self) -> bool:
+        """Check the address holds funds, has sent transactions or is a contract"""
+        return bool(self.balance or self.nonce or self.has_code)
+
+
+class ChainScan(NamedTuple):
+    """Scan results for one chain"""
+
+    chain_id: int
+    name: Optional[str]
+    accounts: Tuple[AddressState, ...] = ()
+    # Set when the chain could not be scanned at all
+    error: Optional[str] = None
+    elapsed_ms: float = 0.0
+
+    @property
+    def active(self) -> Tuple[AddressState, ...]:
+        return tuple(account for account in self.accounts if account.active)
+
+
+def _quantity(result: Any, errors: List[str]) -> Optional[int]:
+    if isinstance(result, RpcError):
+        errors.append(result.message)
+        return None
+    try:
+        return quantity(result)
+    except RpcError as e:
+        errors.append(e.message)
+        return None
+
+
+def _account(address: str, results: Sequence[Any]) -> AddressState:
+    balance, nonce, code = results
+    errors: List[str] = []
+    balance = _quantity(balance, errors)
+    nonce = _quantity(nonce, errors)
+    if isinstance(code, RpcError):
+        errors.append(code.message)
+        has_code = None
+    else:
+        has_code = code not in (None, "0x", "0x0")
+    return AddressState(address, balance, nonce, has_code, "; ".join(errors) or None)
+
+
+class AddressScanner:
+    """Scan addresses across many chains under per-chain limits and a global deadline"""
+
+    def __init__(
+        self,
+        concurrency: Optional[int] = None,
+        per_chain: Optional[int] = None,
+        deadline: Optional[float] = None,
+        block: str = "latest",
+    ):
+        # Chains scanned at once
+        self.concurrency = config.get("rpc.concurrency", 64) if concurrency is None else concurrency
+        # Batches in flight per chain
+        self.per_chain = config.get("rpc.per_host", 4) if per_chain is None else per_chain
+        # Seconds the whole scan may take
+        self.deadline = config.get("rpc.scan_deadline", 30.0) if deadline is None else deadline
+        self.block = block
+
+    async def scan(
+        self,
+        addresses: Sequence[str],
+        chains: Iterable[Tuple[Mapping[str, Any], RpcClient]],
+    ) -> AsyncIterator[ChainScan]:
+        """Yield each chain's results as it finishes; clients are closed afterwards
+
+        Chains unfinished at the deadline are yielded last with an error.
+        """
+        for address in addresses:
+            if not is_address(address):
+                raise ValueError(f"Invalid address '{address}'")
+        calls = [(method, [address, self.block]) for address in addresses for _, method in CHECKS]
+        targets = list(chains)
+        slots = asyncio.Semaphore(self.concurrency)
+        started = time.monotonic()
+
+        async def scan_chain(chain: Mapping[str, Any], client: RpcClient) -> ChainScan:
+            async with slots:
+                chain_started = time.monotonic()
+                try:
+                    results = await client.call_many(
+                        calls, return_errors=True, concurrency=self.per_chain
+                    )
+                finally:
+                    await client.close(save=False)
+                accounts = tuple(
+                    _account(address, results[n * len(CHECKS) : (n + 1) * len(CHECKS)])
+                    for n, address in enumerate(addresses)
+                )
+                return ChainScan(
+                    chain["chainId"],
+                    chain.get("name"),
+                    accounts,
+                    elapsed_ms=(time.monotonic() - chain_started) * 1000,
+                )
+
+        tasks: Dict["asyncio.Task[ChainScan]", Mapping[str, Any]] = {
+            asyncio.ensure_future(scan_chain(chain, client)): chain for chain, client in targets
+        }
+        pending: Set["asyncio.Task[ChainScan]"] = set(tasks)
+        try:
+            while pending:
+                remaining = self.deadline - (time.monotonic() - started)
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(
+                    pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    chain = tasks[task]
+                    try:
+                        result = task.result()
+                    except (RpcError, ValueError) as e:
+                        result = ChainScan(chain["chainId"], chain.get("name"), error=str(e))
+                    yield result
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+            # Clients of chains that never got a slot were not closed by their task
+            for _, client in targets:
+                await client.close(save=False)
+            scoreboards = {id(client.scoreboard): client.scoreboard for _, client in targets}
+            for scoreboard in scoreboards.values():
+                if scoreboard is not None:
+                    scoreboard.save()
+        for task in pending:
+            chain = tasks[task]
+            yield ChainScan(
+                chain["chainId"],
+                chain.get("name"),
+                error=f"Deadline of {self.deadline:g}s passed",
+                elapsed_ms=self.deadline * 1000,
+            )
+
+    async def collect(
+        self,
+        addresses: Sequence[str],
+        chains: Iterable[Tuple[Mapping[str, Any], RpcClient]],
+    ) -> List[ChainScan]:
+        """Scan and return every chain's results in the order they finished"""
+        return [result async for result in self.scan(addresses, chains)]
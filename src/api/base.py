@@ -1,9 +1,16 @@
+import time
 from abc import ABC, abstractmethod
 from typing import Any, Dict, Optional
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+from ..core.logger import get_logger
+from ..core.metrics import observe_request
+from ..core.tracing import requests_retries, tracer, url_template
+
+logger = get_logger("api")
+
 class BaseAPI(ABC):
     def __init__(self, base_url: str):
         self.base_url = base_url
@@ -38,21 +45,31 @@ class BaseAPI(ABC):
         headers: Optional[Dict] = None
     ) -> Dict:
         """Make a request to the API with caching"""
-        try:
-            response = self.session.request(
-                method=method,
-                url=url,
-                params=params,
-                json=data,
-                headers=headers,
-                timeout=10
-            )
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            # TODO: Implement proper logging
-            print(f"Error making request to {url}: {e}")
-            return {}
+        template = url_template(url)
+        with tracer.http_span(method, template) as span:
+            try:
+                started = time.perf_counter()
+                response = self.session.request(
+                    method=method,
+                    url=url,
+                    params=params,
+                    json=data,
+                    headers=headers,
+                    timeout=10
+                )
+                elapsed = time.perf_counter() - started
+                retries = requests_retries(response)
+                # requests' connection pools never block, so there is no queue wait
+                span.record_response(response.status_code, len(response.content), retries)
+                observe_request(
+                    template, response.status_code, elapsed, len(response.content), retries
+                )
+                response.raise_for_status()
+                return response.json()
+            except requests.exceptions.RequestException as e:
+                span.set_status("ERROR", str(e))
+                logger.warning("Error making request to %s: %s", url, e)
+                return {}
 
     @abstractmethod
     def validate_response(self, response: Dict) -> bool:
@@ -0,0 +1,309 @@
+"""Converting between timestamps and block numbers from a growing local index.
+
+Every (block, timestamp) pair learned for a chain, from any source, goes into
+a sorted per-chain index. The block at a timestamp is the last one made at or
+before it. It is found in these steps:
+
+- The index holds the nearest known blocks on either side of the timestamp.
+  When they are consecutive the answer is local: a bisect, in microseconds.
+- When they are more than ``seed_span`` blocks apart, DefiLlama's
+  ``/block/{chain}/{timestamp}`` is asked for a nearby block first.
+- The block between the neighbours is then estimated by interpolating their
+  timestamps. The estimate and the block after it are read over RPC in one
+  batch and added to the index. This repeats until the neighbours are
+  consecutive. A guess that fails to halve the gap is followed by a midpoint,
+  so a chain with uneven block times is still bisected.
+
+Each lookup leaves the blocks it read in the index, so lookups near earlier
+ones close in one or two reads, and repeated ones need none. The index is
+saved beside the chain list cache.
+"""
+
+import asyncio
+import functools
+import json
+import os
+import threading
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from ..core.config import config
+from ..core.logger import RpcError, get_logger
+from .defillama import DefiLlamaAPI
+from .rpc_client import RpcClient
+from .rpc_probe import quantity
+
+logger = get_logger("api.block_times")
+
+# Layout of the index file; files with another version are ignored
+BLOCK_TIMES_VERSION = 1
+
+
+class BlockTime(NamedTuple):
+    """A block and the Unix time it was made"""
+
+    block: int
+    timestamp: int
+
+
+class BlockTimeIndex:
+    """Known block timestamps for one chain, sorted by block"""
+
+    def __init__(self, pairs: Iterable[Tuple[int, int]] = ()):
+        self.blocks: List[int] = []
+        self.timestamps: List[int] = []
+        for block, timestamp in sorted(pairs):
+            self.add(block, timestamp)
+
+    def __len__(self) -> int:
+        return len(self.blocks)
+
+    def add(self, block: int, timestamp: int) -> bool:
+        """Record a block's timestamp, refusing one that is out of order with its neighbours"""
+        position = bisect_left(self.blocks, block)
+        if position < len(self.blocks) and self.blocks[position] == block:
+            return self.timestamps[position] == timestamp
+        if (position > 0 and self.timestamps[position - 1] > timestamp) or (
+            position < len(self.blocks) and self.timestamps[position] < timestamp
+        ):
+            logger.debug(
+                "Ignoring block %d at %d, out of order with known blocks", block, timestamp
+            )
+            return False
+        self.blocks.insert(position, block)
+        self.timestamps.insert(position, timestamp)
+        return True
+
+    def timestamp(self, block: int) -> Optional[int]:
+        """Get a block's timestamp if it is known"""
+        position = bisect_left(self.blocks, block)
+        if position < len(self.blocks) and self.blocks[position] == block:
+            return self.timestamps[position]
+        return None
+
+    def bracket(self, timestamp: int) -> Tuple[Optional[BlockTime], Optional[BlockTime]]:
+        """Get the last known block at or before timestamp and the first known one after it"""
+        position = bisect_right(self.timestamps, timestamp)
+        before = (
+            BlockTime(self.blocks[position - 1], self.timestamps[position - 1])
+            if position > 0
+            else None
+        )
+        after = (
+            BlockTime(self.blocks[position], self.timestamps[position])
+            if position < len(self.blocks)
+            else None
+        )
+        return before, after
+
+    def find(self, timestamp: int) -> Optional[BlockTime]:
+        """Get the block at timestamp if the index alone pins it down"""
+        before, after = self.bracket(timestamp)
+        if before is not None and after is not None and after.block == before.block + 1:
+            return before
+        return None
+
+    def pairs(self) -> List[Tuple[int, int]]:
+        return list(zip(self.blocks, self.timestamps))
+
+
+class BlockTimeStore:
+    """Per-chain BlockTimeIndexes, read from and saved to a JSON file"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._indexes: Optional[Dict[int, BlockTimeIndex]] = None
+        self._lock = threading.Lock()
+
+    def _read(self) -> Dict[int, BlockTimeIndex]:
+        if not self.path:
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable block times in %s: %s", self.path, e)
+            return {}
+        if not isinstance(stored, dict) or stored.get("version") != BLOCK_TIMES_VERSION:
+            return {}
+        indexes = {}
+        for chain_id, pairs in (stored.get("chains") or {}).items():
+            try:
+                indexes[int(chain_id)] = BlockTimeIndex((int(b), int(t)) for b, t in pairs)
+            except (TypeError, ValueError):
+                continue
+        return indexes
+
+    def index(self, chain_id: int) -> BlockTimeIndex:
+        """Get a chain's index, reading the file on first use"""
+        if self._indexes is None:
+            with self._lock:
+                if self._indexes is None:
+                    self._indexes = self._read()
+        return self._indexes.setdefault(int(chain_id), BlockTimeIndex())
+
+    def save(self) -> None:
+        """Write every index, adding blocks another process saved"""
+        if not self.path or self._indexes is None:
+            return
+        with self._lock:
+            for chain_id, saved in self._read().items():
+                index = self._indexes.setdefault(chain_id, BlockTimeIndex())
+                for block, timestamp in saved.pairs():
+                    index.add(block, timestamp)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(
+                        {
+                            "version": BLOCK_TIMES_VERSION,
+                            "chains": {
+                                str(chain_id): index.pairs()
+                                for chain_id, index in self._indexes.items()
+                                if len(index)
+                            },
+                        },
+                        f,
+                        separators=(",", ":"),
+                    )
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                logger.warning("Error saving block times to %s: %s", self.path, e)
+
+
+class BlockTimeResolver:
+    """Answer timestamp and block lookups for one chain from its index, DefiLlama and RPC"""
+
+    def __init__(
+        self,
+        index: BlockTimeIndex,
+        client: Optional[RpcClient] = None,
+        llama: Optional[DefiLlamaAPI] = None,
+        llama_chain: Optional[str] = None,
+        seed_span: Optional[int] = None,
+        store: Optional[BlockTimeStore] = None,
+    ):
+        self.index = index
+        self.client = client
+        # DefiLlama is only asked when it knows the chain by name
+        self.llama = llama if llama_chain else None
+        self.llama_chain = llama_chain
+        self.seed_span = config.get("rpc.block_seed_span", 1000) if seed_span is None else seed_span
+        # Saved when the resolver is closed
+        self.store = store
+        self.stats = {"local": 0, "llama": 0, "reads": 0}
+
+    async def __aenter__(self) -> "BlockTimeResolver":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Close the RPC client and save the index"""
+        if self.client is not None:
+            await self.client.close()
+        if self.store is not None:
+            self.store.save()
+
+    async def _read(self, blocks: Iterable[Any]) -> List[BlockTime]:
+        """Read block headers over RPC (a number or "latest") and add them to the index"""
+        if self.client is None:
+            raise RpcError("No RPC endpoint to read blocks from")
+        tags = [block if isinstance(block, str) else hex(block) for block in blocks]
+        headers = await self.client.call_many(
+            [("eth_getBlockByNumber", [tag, False]) for tag in tags]
+        )
+        self.stats["reads"] += len(tags)
+        found = []
+        for tag, header in zip(tags, headers):
+            if not isinstance(header, dict):
+                raise RpcError(f"Block {tag} not found")
+            block = BlockTime(quantity(header.get("number")), quantity(header.get("timestamp")))
+            self.index.add(*block)
+            found.append(block)
+        return found
+
+    async def _seed(self, timestamp: int) -> None:
+        """Add DefiLlama's block nearest timestamp to the index"""
+        if self.llama is None or not self.llama_chain:
+            return
+        self.stats["llama"] += 1
+        answer = await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(self.llama.get_block, self.llama_chain, timestamp)
+        )
+        try:
+            self.index.add(int(answer["height"]), int(answer["timestamp"]))
+        except (KeyError, TypeError, ValueError):
+            logger.debug("No DefiLlama block for %s at %d", self.llama_chain, timestamp)
+
+    async def block_at(self, timestamp: int) -> BlockTime:
+        """Get the last block made at or before timestamp
+
+        Raises ValueError for a timestamp before the chain's first block.
+        Without an RPC client, an answer the index cannot pin down is the last
+        known block at or before timestamp, which may be some blocks early.
+        """
+        timestamp = int(timestamp)
+        found = self.index.find(timestamp)
+        if found is not None:
+            self.stats["local"] += 1
+            return found
+
+        if self.client is not None:
+            before, after = self.index.bracket(timestamp)
+            if after is None:
+                [head] = await self._read(["latest"])
+                if head.timestamp <= timestamp:
+                    return head
+            if before is None:
+                [first] = await self._read([0])
+                if first.timestamp > timestamp:
+                    raise ValueError(f"Timestamp {timestamp} is before the chain's first block")
+
+        before, after = self.index.bracket(timestamp)
+        if self.llama is not None and (
+            before is None or after is None or after.block - before.block > self.seed_span
+        ):
+            await self._seed(timestamp)
+            found = self.index.find(timestamp)
+            if found is not None:
+                return found
+        if self.client is None:
+            before, _ = self.index.bracket(timestamp)
+            if before is None:
+                raise RpcError(f"No block known at or before {timestamp}")
+            return before
+
+        previous_gap: Optional[int] = None
+        while True:
+            found = self.index.find(timestamp)
+            if found is not None:
+                return found
+            before, after = self.index.bracket(timestamp)
+            if before is None or after is None:
+                raise RpcError(f"No blocks known on both sides of {timestamp}")
+            gap = after.block - before.block
+            if previous_gap is not None and gap * 2 > previous_gap:
+                guess = before.block + gap // 2
+            else:
+                guess = before.block + (timestamp - before.timestamp) * gap // (
+                    after.timestamp - before.timestamp
+                )
+            guess = min(max(guess, before.block + 1), after.block - 1)
+            # The block after the guess confirms it in the same round trip
+            await self._read(block for block in (guess, guess + 1) if block < after.block)
+            if self.index.bracket(timestamp) == (before, after):
+                raise RpcError(f"Block timestamps around {timestamp} are out of order")
+            previous_gap = gap
+
+    async def timestamp_of(self, block: int) -> int:
+        """Get a block's timestamp"""
+        known = self.index.timestamp(block)
+        if known is not None:
+            self.stats["local"] += 1
+            return known
+        [found] = await self._read([block])
+        return found.timestamp
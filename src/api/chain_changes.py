@@ -0,0 +1,173 @@
+"""Record-level differences between two copies of the chain list.
+
+Each record is hashed over its canonical JSON encoding and filed under its
+chain ID, so comparing two copies of the list is a walk over two dicts: keys
+only in the new copy were added, keys only in the old one were removed, and
+keys whose digests differ were changed. Refreshes apply just those records to
+the indexes (see ``ChainIndex.refreshed``) and append a summary of them to a
+changelog, one JSON object per line, which ``chainlist changes`` reads back.
+"""
+
+import hashlib
+import json
+import os
+import re
+import time
+from datetime import datetime
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from .chain_records import CompactRecord, to_builtin
+
+# Changelog entries kept; older ones are dropped when a refresh appends
+CHANGELOG_MAX_ENTRIES = 1000
+
+# Shared, since json.dumps builds a new encoder per call when given options
+_CANONICAL = json.JSONEncoder(sort_keys=True, separators=(",", ":"), default=to_builtin)
+
+_DURATION = re.compile(r"^(\d+(?:\.\d+)?)\s*([smhdw])$")
+_DURATION_SECONDS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def record_key(chain: Mapping[str, Any]) -> str:
+    """Get the key a record is compared under: its chain ID, or its name without one"""
+    chain_id = chain.get("chainId")
+    if chain_id is not None:
+        return str(chain_id)
+    return f"name:{(chain.get('name') or '').lower()}"
+
+
+def record_digest(chain: Mapping[str, Any]) -> str:
+    """Hash a record's canonical JSON encoding; dicts and compact records agree"""
+    encoded = _CANONICAL.encode(chain)
+    return hashlib.blake2b(encoded.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def keyed(chains: Iterable[Mapping[str, Any]]) -> Iterator[Tuple[str, Mapping[str, Any]]]:
+    """Pair records with unique keys; repeats of a chain ID get "#2", "#3"... in order"""
+    seen: Dict[str, int] = {}
+    for chain in chains:
+        key = record_key(chain)
+        if key in seen:
+            seen[key] += 1
+            key = f"{key}#{seen[key]}"
+        else:
+            seen[key] = 1
+        yield key, chain
+
+
+def record_digests(chains: Iterable[Mapping[str, Any]]) -> Dict[str, str]:
+    """Get every record's digest by key"""
+    return {key: record_digest(chain) for key, chain in keyed(chains)}
+
+
+def changed_fields(old: Mapping[str, Any], new: Mapping[str, Any]) -> List[str]:
+    """Get the top-level fields whose values differ between two versions of a record"""
+    if isinstance(old, CompactRecord):
+        old = old.to_dict()
+    if isinstance(new, CompactRecord):
+        new = new.to_dict()
+    fields = list(old)
+    fields.extend(field for field in new if field not in old)
+    missing = object()
+    return [field for field in fields if old.get(field, missing) != new.get(field, missing)]
+
+
+def _summary(chain: Mapping[str, Any]) -> Dict[str, Any]:
+    return {"chainId": chain.get("chainId"), "name": chain.get("name")}
+
+
+class ChainDiff(NamedTuple):
+    """Records a refresh added, removed and changed, in dataset order"""
+
+    added: Tuple[Mapping[str, Any], ...] = ()
+    removed: Tuple[Mapping[str, Any], ...] = ()
+    # (old record, new record) pairs
+    changed: Tuple[Tuple[Mapping[str, Any], Mapping[str, Any]], ...] = ()
+
+    @property
+    def empty(self) -> bool:
+        return not (self.added or self.removed or self.changed)
+
+    def chain_ids(self) -> Set[Any]:
+        """Get the chain ID of every record touched, for invalidating downstream caches"""
+        chains = list(self.added) + list(self.removed)
+        for old, new in self.changed:
+            chains.extend((old, new))
+        return {chain.get("chainId") for chain in chains if chain.get("chainId") is not None}
+
+    def entry(self, at: Optional[float] = None, total: Optional[int] = None) -> Dict[str, Any]:
+        """Get the changelog entry describing this diff"""
+        entry: Dict[str, Any] = {"at": time.time() if at is None else at}
+        if total is not None:
+            entry["chains"] = total
+        entry["added"] = [_summary(chain) for chain in self.added]
+        entry["removed"] = [_summary(chain) for chain in self.removed]
+        entry["changed"] = [
+            dict(_summary(new), fields=changed_fields(old, new)) for old, new in self.changed
+        ]
+        return entry
+
+
+def append_changelog(
+    path: str, entry: Dict[str, Any], max_entries: int = CHANGELOG_MAX_ENTRIES
+) -> None:
+    """Append an entry to a changelog, dropping the oldest beyond max_entries"""
+    line = json.dumps(entry, separators=(",", ":"), default=to_builtin) + "\n"
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(line)
+    if max_entries <= 0:
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        lines = f.readlines()
+    if len(lines) > max_entries:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.writelines(lines[-max_entries:])
+        os.replace(tmp_path, path)
+
+
+def read_changelog(path: str, since: Optional[float] = None) -> List[Dict[str, Any]]:
+    """Get changelog entries at or after since, oldest first; unreadable lines are skipped"""
+    entries = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(entry, dict) and (since is None or entry.get("at", 0) >= since):
+                    entries.append(entry)
+    except FileNotFoundError:
+        return []
+    return entries
+
+
+def parse_since(text: str, now: Optional[float] = None) -> float:
+    """Turn "90m", "24h", "7d", "2w", an ISO date or a Unix timestamp into a timestamp"""
+    text = text.strip()
+    match = _DURATION.match(text.lower())
+    if match:
+        amount, unit = match.groups()
+        return (time.time() if now is None else now) - float(amount) * _DURATION_SECONDS[unit]
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(text).timestamp()
+    except ValueError:
+        raise ValueError(
+            f"Invalid time '{text}'; use a duration such as 24h or 7d, a date or a timestamp"
+        ) from None
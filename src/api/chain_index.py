@@ -0,0 +1,235 @@
+"""Immutable, versioned snapshots of the chainlist data and its lookup indexes.
+
+A snapshot is built completely off to the side and then published by a single
+attribute assignment, so readers that grab ``api.index`` once see either the
+old or the new data, never a mix. Each build gets a new version number, which
+is what per-lookup memos are keyed on.
+
+A refresh usually changes a handful of chains, so ``refreshed()`` builds the
+next snapshot from the previous one: unchanged records are reused along with
+everything derived from them, and only new and changed records are converted
+and classified.
+"""
+
+import itertools
+import threading
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, cast
+
+from ..utils.search import SubstringIndex, scan
+from .chain_changes import ChainDiff, keyed, record_digest, record_digests
+from .chain_records import CompactRecord, compact_chain
+from .chain_resolver import ChainResolver
+from .rpc_index import RpcIndex
+
+# Versions are unique across every index built in the process
+_versions = itertools.count(1)
+
+# Fields covered by the substring search index
+SEARCH_FIELDS = ("name", "shortName", "chain", "network")
+
+# Queries answered by a linear scan before the search index is worth building;
+# a one-shot CLI search never pays for it, a lookup loop builds it at once
+SCAN_QUERIES = 2
+
+# Guards the lazily built search index, resolver and digests
+_build_lock = threading.Lock()
+
+
+class ChainIndex:
+    """Chain records plus their id, name, short name and RPC indexes"""
+
+    __slots__ = (
+        "version",
+        "chains",
+        "by_id",
+        "by_name",
+        "by_short_name",
+        "rpcs",
+        "_search",
+        "_scans",
+        "_resolver",
+        "_digests",
+    )
+
+    version: int
+    chains: Tuple[Dict[str, Any], ...]
+    by_id: Mapping[int, Dict[str, Any]]
+    by_name: Mapping[str, Dict[str, Any]]
+    by_short_name: Mapping[str, Dict[str, Any]]
+    rpcs: RpcIndex
+    _search: Optional[SubstringIndex]
+    _scans: int
+    _resolver: Optional[ChainResolver]
+    _digests: Optional[Mapping[str, str]]
+
+    def __init__(
+        self,
+        data: Iterable[Mapping[str, Any]] = (),
+        version: Optional[int] = None,
+        compact: bool = False,
+    ):
+        chains: List[Dict[str, Any]] = []
+        by_id: Dict[int, Dict[str, Any]] = {}
+        by_name: Dict[str, Dict[str, Any]] = {}
+        by_short_name: Dict[str, Dict[str, Any]] = {}
+
+        chain: Mapping[str, Any]
+        for chain in data:
+            # Ensure chain has required fields
+            if isinstance(chain, dict):
+                if compact:
+                    chain = compact_chain(chain)
+            elif not isinstance(chain, CompactRecord):
+                continue
+            # Compact records are only ever read, through the same interface as dicts
+            record = cast(Dict[str, Any], chain)
+            chains.append(record)
+
+            chain_id = record.get("chainId")
+            name = record.get("name")
+            short_name = record.get("shortName")
+
+            if chain_id is not None:
+                by_id[chain_id] = record
+            if name:
+                by_name[name.lower()] = record
+            if short_name:
+                by_short_name[short_name.lower()] = record
+
+        set_field = object.__setattr__
+        set_field(self, "version", next(_versions) if version is None else version)
+        set_field(self, "chains", tuple(chains))
+        set_field(self, "by_id", MappingProxyType(by_id))
+        set_field(self, "by_name", MappingProxyType(by_name))
+        set_field(self, "by_short_name", MappingProxyType(by_short_name))
+        set_field(self, "rpcs", RpcIndex(by_id))
+        set_field(self, "_search", None)
+        set_field(self, "_scans", 0)
+        set_field(self, "_resolver", None)
+        set_field(self, "_digests", None)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("ChainIndex is immutable; build a new one instead")
+
+    @property
+    def search(self) -> SubstringIndex:
+        """Substring index over SEARCH_FIELDS, built on first use"""
+        search = self._search
+        if search is None:
+            with _build_lock:
+                search = self._search
+                if search is None:
+                    search = SubstringIndex(self.chains, SEARCH_FIELDS)
+                    object.__setattr__(self, "_search", search)
+        return search
+
+    @property
+    def resolver(self) -> ChainResolver:
+        """Fuzzy identifier resolver, built on first use"""
+        resolver = self._resolver
+        if resolver is None:
+            with _build_lock:
+                resolver = self._resolver
+                if resolver is None:
+                    resolver = ChainResolver(self.chains)
+                    object.__setattr__(self, "_resolver", resolver)
+        return resolver
+
+    @property
+    def digests(self) -> Mapping[str, str]:
+        """Digest of every record by key, computed on first use"""
+        digests = self._digests
+        if digests is None:
+            with _build_lock:
+                digests = self._digests
+                if digests is None:
+                    digests = MappingProxyType(record_digests(self.chains))
+                    object.__setattr__(self, "_digests", digests)
+        return digests
+
+    def refreshed(
+        self, data: Iterable[Mapping[str, Any]], compact: bool = False
+    ) -> Tuple["ChainIndex", ChainDiff]:
+        """Build the index for a new copy of the data, redoing only what changed
+
+        Unchanged records keep their objects and RPC classification. The search
+        index and resolver carry over too when no chain moved and no searchable
+        field changed. If nothing changed at all, this index itself is
+        returned, so memos keyed on its version stay valid.
+        """
+        old_digests = self.digests
+        old_records = dict(keyed(self.chains))
+        digests: Dict[str, str] = {}
+        chains: List[Mapping[str, Any]] = []
+        added = []
+        changed = []
+
+        records = (chain for chain in data if isinstance(chain, (dict, CompactRecord)))
+        for key, chain in keyed(records):
+            digest = digests[key] = record_digest(chain)
+            old = old_records.get(key)
+            as_compact = compact or isinstance(chain, CompactRecord)
+            if old is not None and old_digests.get(key) == digest:
+                if isinstance(old, CompactRecord) == as_compact:
+                    chains.append(old)
+                    continue
+            elif old is None:
+                added.append(key)
+            else:
+                changed.append(key)
+            chains.append(compact_chain(chain) if as_compact and isinstance(chain, dict) else chain)
+
+        new_records = dict(zip(digests, chains))
+        diff = ChainDiff(
+            tuple(new_records[key] for key in added),
+            tuple(old for key, old in old_records.items() if key not in digests),
+            tuple((old_records[key], new_records[key]) for key in changed),
+        )
+        if len(chains) == len(self.chains) and all(
+            new is old for new, old in zip(chains, self.chains)
+        ):
+            return self, diff
+
+        index = ChainIndex(chains)
+        set_field = object.__setattr__
+        set_field(index, "_digests", MappingProxyType(digests))
+        index.rpcs.inherit(self.rpcs)
+        same_layout = list(digests) == list(old_records) and all(
+            _searchable(old) == _searchable(new) for old, new in diff.changed
+        )
+        if same_layout:
+            if self._search is not None:
+                set_field(index, "_search", self._search.with_records(index.chains))
+            if self._resolver is not None:
+                set_field(index, "_resolver", self._resolver.with_chains(index.chains))
+            set_field(index, "_scans", self._scans)
+        return index, diff
+
+    def search_chains(
+        self, query: str, fields: Sequence[str] = SEARCH_FIELDS
+    ) -> List[Dict[str, Any]]:
+        """Get chains with query in any of the fields, in dataset order"""
+        if not set(fields) <= set(SEARCH_FIELDS):
+            # The search index holds no text for other fields
+            return scan(self.chains, query, fields)
+        if self._search is None and self._scans < SCAN_QUERIES:
+            # Not atomic, but a lost increment only means one extra scan
+            object.__setattr__(self, "_scans", self._scans + 1)
+            return scan(self.chains, query, fields)
+        return self.search.search(query, fields)
+
+    def __len__(self) -> int:
+        return len(self.chains)
+
+    def __repr__(self) -> str:
+        return f"ChainIndex(version={self.version}, chains={len(self.chains)})"
+
+
+def _searchable(chain: Mapping[str, Any]) -> Tuple[Any, ...]:
+    """Get the fields the search index and resolver are built from"""
+    return tuple(chain.get(field) for field in SEARCH_FIELDS) + (chain.get("chainId"),)
+
+
+# Index served before any data is loaded
+EMPTY_INDEX = ChainIndex(version=0)
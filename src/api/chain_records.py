@@ -0,0 +1,190 @@
+"""Compact, read-only chain records for long-lived processes.
+
+A decoded chainlist record is a dict of ~20 keys holding lists of more dicts,
+and each of those carries its own hash table. Converting a record turns every
+dict with a known shape into a ``__slots__`` object (a fixed array of
+pointers), every list into a tuple, and every short string into an interned
+one, so the thousands of "none", "ETH" and "EIP3091" values share one copy.
+
+The records are read-only ``Mapping``s: ``record["name"]``, ``record.get()``,
+``in`` and iteration work as they do on the dicts, so call sites do not
+change. Keys outside a record type's fields are kept in a small side dict.
+Use ``to_builtin`` as ``json.dumps``'s ``default`` to serialize them.
+"""
+
+import sys
+from collections.abc import Mapping
+from typing import Any, Dict, FrozenSet, Iterator, Optional, Tuple, Type
+
+# Strings this short are interned; longer ones (URLs, descriptions) rarely repeat
+INTERN_MAX_LENGTH = 32
+
+
+class CompactRecord(Mapping):
+    """Read-only mapping stored in slots, one per field of the record type"""
+
+    __slots__ = ("_extra",)
+
+    _fields: Tuple[str, ...] = ()
+    _field_set: FrozenSet[str] = frozenset()
+    # Nested record type per field, for fields holding a dict or a list of dicts
+    _nested: Dict[str, Type["CompactRecord"]] = {}
+
+    _extra: Optional[Dict[str, Any]]
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CompactRecord":
+        record = cls.__new__(cls)
+        set_field = object.__setattr__
+        extra = None
+        for key, value in data.items():
+            if key in cls._field_set:
+                nested = cls._nested.get(key)
+                set_field(record, key, compact(value, nested))
+            else:
+                if extra is None:
+                    extra = {}
+                extra[_intern(key)] = compact(value)
+        set_field(record, "_extra", extra)
+        return record
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._field_set:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        extra = self._extra
+        if extra is not None and key in extra:
+            return extra[key]
+        raise KeyError(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in self._field_set:
+            return getattr(self, key, default)
+        extra = self._extra
+        return default if extra is None else extra.get(key, default)
+
+    def __contains__(self, key: object) -> bool:
+        if isinstance(key, str) and key in self._field_set:
+            return hasattr(self, key)
+        extra = self._extra
+        return extra is not None and key in extra
+
+    def __iter__(self) -> Iterator[str]:
+        for field in self._fields:
+            if hasattr(self, field):
+                yield field
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        present = sum(1 for field in self._fields if hasattr(self, field))
+        return present + len(self._extra or ())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the record as plain dicts and lists again"""
+        return {key: _to_plain(value) for key, value in self.items()}
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return (type(self).from_dict, (self.to_dict(),))
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self.items())!r})"
+
+
+def _record_type(
+    name: str, fields: Tuple[str, ...], nested: Optional[Dict[str, Type[CompactRecord]]] = None
+) -> Type[CompactRecord]:
+    return type(
+        name,
+        (CompactRecord,),
+        {
+            "__slots__": fields,
+            "_fields": fields,
+            "_field_set": frozenset(fields),
+            "_nested": nested or {},
+            "__module__": __name__,
+        },
+    )
+
+
+RpcRecord = _record_type("RpcRecord", ("url", "tracking", "isOpenSource", "trackingDetails"))
+ExplorerRecord = _record_type("ExplorerRecord", ("name", "url", "standard", "icon"))
+CurrencyRecord = _record_type("CurrencyRecord", ("name", "symbol", "decimals"))
+FeatureRecord = _record_type("FeatureRecord", ("name",))
+ChainRecord = _record_type(
+    "ChainRecord",
+    (
+        "name",
+        "chain",
+        "icon",
+        "rpc",
+        "features",
+        "faucets",
+        "nativeCurrency",
+        "infoURL",
+        "shortName",
+        "chainId",
+        "networkId",
+        "network",
+        "slip44",
+        "ens",
+        "explorers",
+        "tvl",
+        "chainSlug",
+        "parent",
+        "status",
+        "redFlags",
+        "title",
+        "isTestnet",
+    ),
+    {
+        "rpc": RpcRecord,
+        "explorers": ExplorerRecord,
+        "nativeCurrency": CurrencyRecord,
+        "features": FeatureRecord,
+    },
+)
+
+
+def _intern(value: str) -> str:
+    return sys.intern(value) if len(value) <= INTERN_MAX_LENGTH else value
+
+
+def compact(value: Any, record_type: Optional[Type[CompactRecord]] = None) -> Any:
+    """Convert decoded JSON to records, tuples and interned strings"""
+    if isinstance(value, str):
+        return _intern(value)
+    if isinstance(value, dict):
+        if record_type is not None:
+            return record_type.from_dict(value)
+        return {_intern(key): compact(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return tuple(compact(item, record_type) for item in value)
+    return value
+
+
+def compact_chain(chain: Dict[str, Any]) -> CompactRecord:
+    """Convert one decoded chainlist record"""
+    return ChainRecord.from_dict(chain)
+
+
+def _to_plain(value: Any) -> Any:
+    if isinstance(value, CompactRecord):
+        return value.to_dict()
+    if isinstance(value, tuple):
+        return [_to_plain(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _to_plain(item) for key, item in value.items()}
+    return value
+
+
+def to_builtin(value: Any) -> Any:
+    """``json.dumps`` default hook that serializes compact records"""
+    if isinstance(value, CompactRecord):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
@@ -0,0 +1,203 @@
+"""Ranked, typo-tolerant resolution of chain identifiers to chain records.
+
+Identifiers from users and upstream feeds rarely match chainlist exactly:
+"arbitrum one", "Arb1", "polygon-pos" and "bsc" all name chains whose
+records say "Arbitrum One", "arb1", "Polygon Mainnet" and "BNB Smart Chain
+Mainnet". The resolver normalizes identifiers, checks an alias table, then
+falls back to edit distance and finally to substring matches, and returns
+every candidate with a score between 0 and 1.
+"""
+
+import copy
+import heapq
+import re
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Union
+
+from ..utils.fuzzy import EditDistanceIndex
+from ..utils.search import SubstringIndex
+
+# Best score a candidate needs before commands use it in place of an exact match
+RESOLVE_THRESHOLD = 0.8
+
+# Common names for chains that chainlist spells differently, by chain ID
+ALIASES: Dict[str, int] = {
+    "eth": 1,
+    "ethereum": 1,
+    "mainnet": 1,
+    "op": 10,
+    "optimism": 10,
+    "opmainnet": 10,
+    "bsc": 56,
+    "bnb": 56,
+    "bnbchain": 56,
+    "binance": 56,
+    "binancesmartchain": 56,
+    "gnosis": 100,
+    "xdai": 100,
+    "polygon": 137,
+    "polygonpos": 137,
+    "matic": 137,
+    "fantom": 250,
+    "ftm": 250,
+    "zksync": 324,
+    "zksyncera": 324,
+    "polygonzkevm": 1101,
+    "moonbeam": 1284,
+    "mantle": 5000,
+    "base": 8453,
+    "arbitrum": 42161,
+    "arb": 42161,
+    "arbitrumone": 42161,
+    "arbnova": 42170,
+    "celo": 42220,
+    "avalanche": 43114,
+    "avax": 43114,
+    "avalanchecchain": 43114,
+    "linea": 59144,
+    "blast": 81457,
+    "scroll": 534352,
+}
+
+# Trailing words chainlist adds to many names ("Polygon Mainnet")
+_GENERIC_SUFFIXES = ("mainnet",)
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+# Score multipliers so an exact match always outranks a near one
+_FUZZY_WEIGHT = 0.95
+_SUBSTRING_FLOOR = 0.3
+_SUBSTRING_RANGE = 0.45
+
+
+def _whole_text(text: str, field: str) -> str:
+    return text
+
+
+def normalize(identifier: str) -> str:
+    """Lowercase and drop everything but letters and digits: "Polygon-PoS" -> "polygonpos" """
+    return _NON_ALNUM.sub("", identifier.lower())
+
+
+class ChainMatch(NamedTuple):
+    """A candidate chain for an identifier"""
+
+    chain: Dict[str, Any]
+    score: float
+    # The name, short name or alias the identifier matched
+    matched: str
+    # "id", "exact", "alias", "fuzzy" or "substring"
+    method: str
+
+
+class Resolution(NamedTuple):
+    """The outcome of resolving one identifier in bulk"""
+
+    identifier: Union[int, str]
+    # None when nothing matched
+    chain: Optional[Dict[str, Any]]
+    # "id", "exact", "alias", "fuzzy" or "substring"; None when not found
+    method: Optional[str]
+    score: float
+
+    @property
+    def found(self) -> bool:
+        return self.chain is not None
+
+
+class ChainResolver:
+    """Resolve identifiers against one snapshot of chain records"""
+
+    def __init__(self, chains: Sequence[Dict[str, Any]], max_distance: int = 2):
+        self.chains = chains
+        self._by_id: Dict[int, int] = {}
+        self._aliases: Dict[str, int] = {}
+        # Names and short names; aliases are added to the edit distance index only
+        self._exact: Dict[str, List[int]] = {}
+        self._terms_index: EditDistanceIndex[int] = EditDistanceIndex(max_distance=max_distance)
+        # Normalized name for each chain, for substring matching
+        self._normalized: List[str] = []
+        # N-gram index over the normalized names, built on the first substring lookup
+        self._substrings: Optional[SubstringIndex] = None
+
+        for position, chain in enumerate(chains):
+            chain_id = chain.get("chainId")
+            if chain_id is not None:
+                self._by_id.setdefault(chain_id, position)
+            name = normalize(chain.get("name") or "")
+            self._normalized.append(name)
+            for term in self._terms(chain, name):
+                positions = self._exact.setdefault(term, [])
+                if position not in positions:
+                    positions.append(position)
+                self._terms_index.add(term, position)
+
+        for alias, chain_id in ALIASES.items():
+            if chain_id in self._by_id:
+                self._aliases[alias] = self._by_id[chain_id]
+                self._terms_index.add(alias, self._by_id[chain_id])
+
+    def with_chains(self, chains: Sequence[Dict[str, Any]]) -> "ChainResolver":
+        """Get a copy resolving to chains whose IDs, names and short names match the current ones"""
+        resolver = copy.copy(self)
+        resolver.chains = chains
+        return resolver
+
+    @staticmethod
+    def _terms(chain: Dict[str, Any], name: str) -> List[str]:
+        terms = [name, normalize(chain.get("shortName") or "")]
+        for suffix in _GENERIC_SUFFIXES:
+            if name.endswith(suffix) and len(name) > len(suffix):
+                terms.append(name[: -len(suffix)])
+        return [term for term in terms if term]
+
+    def _substring_index(self) -> SubstringIndex:
+        index = self._substrings
+        if index is None:
+            index = self._substrings = SubstringIndex(self._normalized, ("name",), _whole_text)
+        return index
+
+    def resolve(self, identifier: Union[int, str], limit: int = 5) -> List[ChainMatch]:
+        """Get up to limit candidates for identifier, best first"""
+        scores: Dict[int, ChainMatch] = {}
+
+        def offer(position: int, score: float, matched: str, method: str) -> None:
+            current = scores.get(position)
+            if current is None or score > current.score:
+                scores[position] = ChainMatch(self.chains[position], score, matched, method)
+
+        text = str(identifier).strip()
+        if text.isdigit() and int(text) in self._by_id:
+            offer(self._by_id[int(text)], 1.0, text, "id")
+
+        query = normalize(text)
+        if query:
+            for position in self._exact.get(query, ()):
+                offer(position, 1.0, query, "exact")
+            if query in self._aliases:
+                offer(self._aliases[query], 1.0, query, "alias")
+
+            if len(scores) < limit:
+                for match in self._terms_index.lookup(query):
+                    if match.distance == 0:
+                        continue
+                    score = _FUZZY_WEIGHT * (1 - match.distance / max(len(query), len(match.term)))
+                    for position in match.values:
+                        offer(position, score, match.term, "fuzzy")
+
+            if len(scores) < limit:
+                names = self._normalized
+                positions = (
+                    position
+                    for position in self._substring_index().search_positions(query)
+                    if position not in scores
+                )
+                # Shorter names score higher, so only the shortest few can be returned
+                for position in heapq.nsmallest(
+                    limit, positions, key=lambda position: (len(names[position]), position)
+                ):
+                    name = names[position]
+                    score = _SUBSTRING_FLOOR + _SUBSTRING_RANGE * len(query) / len(name)
+                    offer(position, score, name, "substring")
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1].score, item[0]))
+        return [match for _, match in ranked[:limit]]
@@ -1,22 +1,87 @@
 import json
+import os
+import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from functools import lru_cache
-from typing import Any, Dict, List, Optional, Union
+from typing import (
+    AsyncIterator,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
 from ..core.cache import blockchain_cache
+from ..core.config import config
+from ..core.logger import OfflineError, SnapshotError, get_logger
+from ..core.metrics import cache_requests, observe_request, records_changed, records_loaded
+from ..core.profiler import profiler
+from ..core.recorder import get_recorder
+from ..core.snapshot import Snapshot, write_snapshot
+from ..core.tracing import requests_retries, tracer
+from .address_scan import AddressScanner, ChainScan, is_mainnet
+from .block_times import BlockTimeResolver, BlockTimeStore
+from .chain_changes import CHANGELOG_MAX_ENTRIES, ChainDiff, append_changelog, read_changelog
+from .chain_index import EMPTY_INDEX, ChainIndex
+from .chain_resolver import RESOLVE_THRESHOLD, ChainMatch, Resolution, normalize
+from .defillama import DefiLlamaAPI
+from .log_scan import LogScanner, Topics
+from .rpc_index import SCHEMES, TRACKING_LEVELS, filter_urls
+from .rpc_client import RpcClient
+from .rpc_probe import ChainProbe, RpcProber
+from .rpc_scores import RpcScoreboard
+from .rpc_subscriptions import SubscriptionManager
+
+logger = get_logger("api.chainlist")
+
+# Lookups remembered per index version before the memo is reset
+MEMO_SIZE = 4096
+
+# Distinct identifiers remembered by one resolve_many() pass before its memo is reset
+BULK_MEMO_SIZE = 65536
+
+# Cache entry holding the chain list; its lookup snapshot, changelog and RPC
+# scores are stored beside it
+CACHE_KEY = "blockchain_data"
+
+
+def chain_snapshot_keys(chain: Mapping[str, Any]) -> List[str]:
+    """Get the keys a chain is filed under in the lookup snapshot"""
+    keys = []
+    chain_id = chain.get("chainId")
+    if chain_id is not None:
+        keys.append(f"id:{chain_id}")
+    name = chain.get("name")
+    if name:
+        keys.append(f"name:{name.lower()}")
+    short_name = chain.get("shortName")
+    if short_name:
+        keys.append(f"short:{short_name.lower()}")
+    return keys
 
 
 class ChainlistAPI:
     def __init__(self):
         self.session = self._create_session()
-        self.blockchain_data = []
-        self.chain_by_id = {}
-        self.chain_by_name = {}
-        self.chain_by_short_name = {}
+        # Replaced wholesale on every load; never mutated
+        self.index: ChainIndex = EMPTY_INDEX
+        self._memo: Dict[Tuple[int, str, Any], Any] = {}
+        # Age in seconds of the data served in offline mode, None when fresh
+        self.data_age: Optional[float] = None
+        # What the last incremental update added, removed and changed
+        self.last_changes: Optional[ChainDiff] = None
+        self._rpc_scores: Optional[RpcScoreboard] = None
+        self._block_times: Optional[BlockTimeStore] = None
 
     def _create_session(self):
         """Create a requests session with retry logic and connection pooling"""
@@ -33,94 +98,328 @@ class ChainlistAPI:
         session.mount("https://", adapter)
         return session
 
-    def initialize_data_structures(self, data: List[Dict[str, Any]]):
-        """Initialize optimized data structures for lookups"""
-        self.blockchain_data = data
-        self.chain_by_id = {}
-        self.chain_by_name = {}
-        self.chain_by_short_name = {}
-
-        for chain in data:
-            # Ensure chain has required fields
-            if not isinstance(chain, dict):
-                continue
+    @property
+    def blockchain_data(self) -> Tuple[Dict[str, Any], ...]:
+        return self.index.chains
 
-            chain_id = chain.get("chainId")
-            name = chain.get("name")
-            short_name = chain.get("shortName")
+    @property
+    def chain_by_id(self) -> Mapping[int, Dict[str, Any]]:
+        return self.index.by_id
 
-            if chain_id is not None:
-                self.chain_by_id[chain_id] = chain
-            if name:
-                self.chain_by_name[name.lower()] = chain
-            if short_name:
-                self.chain_by_short_name[short_name.lower()] = chain
+    @property
+    def chain_by_name(self) -> Mapping[str, Dict[str, Any]]:
+        return self.index.by_name
+
+    @property
+    def chain_by_short_name(self) -> Mapping[str, Dict[str, Any]]:
+        return self.index.by_short_name
+
+    @profiler.timed("indexing")
+    def initialize_data_structures(self, data: List[Dict[str, Any]]):
+        """Build a new index snapshot off to the side and swap it in"""
+        index = ChainIndex(data, compact=config.get("chainlist.compact_records", False))
+        self.index = index
+        self._memo = {}
+        records_loaded.labels("chainlist").set(len(index.by_id))
+
+    @profiler.timed("indexing")
+    def update_data_structures(
+        self, data: List[Dict[str, Any]], previous: Optional[ChainIndex] = None
+    ) -> ChainDiff:
+        """Swap in a new copy of the data, redoing index work only for chains that changed
+
+        The diff is taken against previous, which defaults to the current index.
+        """
+        previous = self.index if previous is None else previous
+        index, diff = previous.refreshed(
+            data, compact=config.get("chainlist.compact_records", False)
+        )
+        if index is not self.index:
+            self.index = index
+            self._memo = {}
+            records_loaded.labels("chainlist").set(len(index.by_id))
+        self.last_changes = diff
+        for change, records in (
+            ("added", diff.added),
+            ("removed", diff.removed),
+            ("changed", diff.changed),
+        ):
+            if records:
+                records_changed.labels("chainlist", change).inc(len(records))
+        return diff
+
+    def _index_cached(self, data: List[Dict[str, Any]]) -> None:
+        """Index data read from the cache, patching the current index if there is one"""
+        if self.index.chains:
+            self.update_data_structures(data)
+        else:
+            self.initialize_data_structures(data)
 
     def get_all_blockchain_data(
         self, force_refresh: bool = False
     ) -> List[Dict[str, Any]]:
         """Get all blockchain data with caching"""
-        cache_key = "blockchain_data"
-
-        # Try to load from cache first
-        if not force_refresh:
-            cached_data = blockchain_cache.load_from_cache(cache_key)
-            if cached_data is not None:
-                self.initialize_data_structures(cached_data)
-                return cached_data
-
-        # Fetch fresh data
-        url = "https://chainlist.org/rpcs.json"
+        cache_key = CACHE_KEY
+        base_url = config.get("api.chainlist_base_url")
+        url = f"{base_url}/rpcs.json"
+
+        with tracer.http_span("GET", url) as span:
+            # In offline mode serve whatever is cached, however old, and fail fast on a miss
+            if config.get("network.offline"):
+                cached = blockchain_cache.load_with_age(cache_key, ignore_expiry=True)
+                span.set_attribute("chaindata.cache", "offline" if cached else "miss")
+                if cached is None:
+                    raise OfflineError("Offline mode: no cached chainlist data available")
+                data, self.data_age = cached
+                self._index_cached(data)
+                self._ensure_snapshot(data)
+                return data
+
+            # Try to load from cache first (record mode always goes upstream)
+            recorder = get_recorder()
+            if not force_refresh and recorder is None:
+                cached_data = blockchain_cache.load_from_cache(cache_key)
+                if cached_data is not None:
+                    span.set_attribute("chaindata.cache", "hit")
+                    self._index_cached(cached_data)
+                    self._ensure_snapshot(cached_data)
+                    return cached_data
+            span.set_attribute("chaindata.cache", "bypass" if force_refresh or recorder is not None else "miss")
+
+            # Fetch fresh data
+            try:
+                started = time.perf_counter()
+                with profiler.phase("network wait"):
+                    response = self.session.get(url, timeout=10)
+                elapsed = time.perf_counter() - started
+                retries = requests_retries(response)
+                # requests' connection pools never block, so there is no queue wait
+                span.record_response(response.status_code, len(response.content), retries)
+                observe_request(
+                    url, response.status_code, elapsed, len(response.content), retries
+                )
+                response.raise_for_status()
+                with profiler.phase("json decode"):
+                    data = response.json()
+
+                # Diff against the copy this refresh replaces, even in a fresh process
+                previous: Optional[ChainIndex] = self.index
+                if not previous.chains:
+                    replaced = blockchain_cache.load_with_age(cache_key, ignore_expiry=True)
+                    previous = ChainIndex(replaced[0] or ()) if replaced is not None else None
+
+                # Save to cache
+                blockchain_cache.save_to_cache(cache_key, data)
+                self._write_snapshot(data)
+                if recorder is not None:
+                    recorder.record("chainlist", base_url, url, cache_key, data)
+                if previous is None:
+                    self.initialize_data_structures(data)
+                else:
+                    self._log_changes(self.update_data_structures(data, previous))
+                return data
+            except requests.exceptions.RequestException as e:
+                span.set_status("ERROR", str(e))
+                logger.warning("Error fetching blockchain data: %s", e)
+                return []
+
+    def _changelog_path(self) -> str:
+        return blockchain_cache.sidecar_path(CACHE_KEY, "changelog")
+
+    def _log_changes(self, diff: ChainDiff) -> None:
+        """Append a refresh's changes to the changelog; failures only lose history"""
+        if diff.empty:
+            return
+        logger.info(
+            "Chainlist refresh: %d added, %d removed, %d changed",
+            len(diff.added),
+            len(diff.removed),
+            len(diff.changed),
+        )
         try:
-            response = self.session.get(url, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-
-            # Save to cache
-            blockchain_cache.save_to_cache(cache_key, data)
-            self.initialize_data_structures(data)
-            return data
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching blockchain data: {e}")
-            return []
+            append_changelog(
+                self._changelog_path(),
+                diff.entry(total=len(self.index)),
+                config.get("chainlist.changelog_entries", CHANGELOG_MAX_ENTRIES),
+            )
+        except OSError as e:
+            logger.warning("Error writing chainlist changelog: %s", e)
+
+    def changes(self, since: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Get the changelog entries of refreshes at or after since, oldest first"""
+        return read_changelog(self._changelog_path(), since)
+
+    def _snapshot_path(self) -> str:
+        return blockchain_cache.sidecar_path(CACHE_KEY, "snap")
+
+    def _write_snapshot(self, data: List[Dict[str, Any]], written_at: Optional[float] = None) -> None:
+        """Write the single-lookup snapshot of data; failures only cost speed"""
+        try:
+            with profiler.phase("cache save"):
+                write_snapshot(
+                    self._snapshot_path(),
+                    (chain for chain in data if isinstance(chain, dict)),
+                    chain_snapshot_keys,
+                    written_at,
+                )
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning("Error writing chainlist snapshot: %s", e)
+
+    def _ensure_snapshot(self, data: List[Dict[str, Any]]) -> None:
+        """Rewrite the snapshot if it is missing or older than the cached data"""
+        saved_at = blockchain_cache.saved_at(CACHE_KEY)
+        try:
+            snapshot_at = os.path.getmtime(self._snapshot_path())
+        except OSError:
+            snapshot_at = None
+        if saved_at is not None and (snapshot_at is None or snapshot_at < saved_at):
+            # Dated like the cache entry, so it expires with it
+            self._write_snapshot(data, saved_at)
+
+    def _lookup_snapshot(self, identifier: Union[int, str]) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """Look identifier up in the snapshot, returning (usable, chain)"""
+        if get_recorder() is not None:
+            return False, None
+        offline = config.get("network.offline")
+        text = str(identifier).strip()
+        if text.isdigit():
+            keys = [f"id:{int(text)}"]
+        else:
+            keys = [f"name:{text.lower()}", f"short:{text.lower()}"]
+
+        with profiler.phase("cache lookup"):
+            try:
+                with Snapshot(self._snapshot_path(), chain_snapshot_keys) as snapshot:
+                    age = snapshot.age
+                    if not offline and age >= blockchain_cache.expiry_seconds:
+                        cache_requests.labels("chainlist-snapshot", "expired").inc()
+                        return False, None
+                    chain = None
+                    for key in keys:
+                        chain = snapshot.get(key)
+                        if chain is not None:
+                            break
+            except SnapshotError:
+                cache_requests.labels("chainlist-snapshot", "miss").inc()
+                return False, None
+
+        cache_requests.labels("chainlist-snapshot", "miss" if chain is None else "hit").inc()
+        if offline:
+            self.data_age = age
+        return True, chain
+
+    def lookup_chain(self, identifier: Union[int, str]) -> Optional[Dict[str, Any]]:
+        """Find a chain by exact ID, name or short name, loading as little as possible
+
+        Before the dataset is loaded, a fresh snapshot answers by decoding just
+        the one record; without one, the dataset is loaded as usual.
+        """
+        if not self.index.chains:
+            usable, chain = self._lookup_snapshot(identifier)
+            if usable:
+                return chain
+            self.get_all_blockchain_data()
+        return self._resolve_one(self.index, identifier, False).chain
 
-    @lru_cache(maxsize=128)
     def get_chain_data_by_id(self, chain_id: int) -> Optional[Dict[str, Any]]:
-        """Get chain data by ID with caching"""
-        return self.chain_by_id.get(chain_id)
+        """Get chain data by ID"""
+        return self.index.by_id.get(chain_id)
+
+    def _memoized(self, kind: str, key: Any, lookup: Callable[[ChainIndex], Any]) -> Any:
+        """Run lookup against the current index, memoized per index version"""
+        index = self.index
+        memo_key = (index.version, kind, key)
+        memo = self._memo
+        try:
+            return memo[memo_key]
+        except KeyError:
+            pass
+        result = lookup(index)
+        if len(memo) >= MEMO_SIZE:
+            memo = self._memo = {}
+        # Keyed by version, so an entry written after a swap is never served stale
+        memo[memo_key] = result
+        return result
 
-    @lru_cache(maxsize=128)
     def get_chain_data_by_name(self, chain_name: str) -> Optional[Dict[str, Any]]:
-        """Get chain data by name with caching"""
-        return self.chain_by_name.get(chain_name.lower())
+        """Get chain data by name, memoized per index version"""
+        name = chain_name.lower()
+        return self._memoized("name", name, lambda index: index.by_name.get(name))
+
+    def resolve(self, identifier: Union[int, str], limit: int = 5) -> List[ChainMatch]:
+        """Get ranked candidate chains for a loosely spelled ID, name, short name or alias"""
+        key = (normalize(str(identifier)), limit)
+        return list(
+            self._memoized(
+                "resolve", key, lambda index: tuple(index.resolver.resolve(identifier, limit))
+            )
+        )
 
-    def search_chains(self, query: str) -> List[Dict[str, Any]]:
-        """Search for chains by name or ID"""
-        query = query.lower()
-        results = []
+    @staticmethod
+    def _resolve_one(
+        index: ChainIndex, identifier: Union[int, str], fuzzy: bool
+    ) -> Resolution:
+        text = str(identifier).strip()
+        if text.isdigit():
+            chain = index.by_id.get(int(text))
+            method = "id"
+        else:
+            lowered = text.lower()
+            chain = index.by_name.get(lowered) or index.by_short_name.get(lowered)
+            method = "exact"
+        if chain is not None:
+            return Resolution(identifier, chain, method, 1.0)
+
+        if fuzzy and text:
+            matches = index.resolver.resolve(text, limit=1)
+            if matches and matches[0].score >= RESOLVE_THRESHOLD:
+                best = matches[0]
+                return Resolution(identifier, best.chain, best.method, best.score)
+        return Resolution(identifier, None, None, 0.0)
+
+    def resolve_many(
+        self, identifiers: Iterable[Union[int, str]], fuzzy: bool = False
+    ) -> Iterator[Resolution]:
+        """Resolve chain IDs, names and short names in one pass, in input order
+
+        Every identifier is resolved against the index current when iteration
+        starts, and repeats are answered from a memo. With fuzzy, identifiers
+        without an exact match take the best candidate scoring at least
+        RESOLVE_THRESHOLD.
+        """
+        index = self.index
+        resolve_one = self._resolve_one
+        seen: Dict[Union[int, str], Resolution] = {}
+        for identifier in identifiers:
+            resolution = seen.get(identifier)
+            if resolution is None:
+                if len(seen) >= BULK_MEMO_SIZE:
+                    seen.clear()
+                resolution = seen[identifier] = resolve_one(index, identifier, fuzzy)
+            yield resolution
+
+    @profiler.timed("filtering")
+    def search_chains(
+        self, query: str, fields: Sequence[str] = ("name", "shortName")
+    ) -> List[Dict[str, Any]]:
+        """Search for chains by ID, or by substring of the given fields (see SEARCH_FIELDS)"""
+        index = self.index
 
         # Check chain ID (exact match only)
         try:
             chain_id = int(query)
-            if chain_id in self.chain_by_id:
-                results.append(self.chain_by_id[chain_id])
-                return results  # Return immediately if we found an exact chain ID match
+            if chain_id in index.by_id:
+                return [index.by_id[chain_id]]
         except ValueError:
             pass
 
-        # Check chain names
-        for chain in self.blockchain_data:
-            name = chain.get("name", "").lower()
-            short_name = chain.get("shortName", "").lower()
-
-            # Check if query is a substring of name or short name
-            if query in name or query in short_name:
-                results.append(chain)
-
-        return results
+        # Check chain names through the substring index
+        return index.search_chains(query, fields)
 
-    def get_chain_data(self, identifier: Union[int, str]) -> Optional[Dict[str, Any]]:
-        """Get chain data by ID or name"""
+    def get_chain_data(
+        self, identifier: Union[int, str], fuzzy: bool = False
+    ) -> Optional[Dict[str, Any]]:
+        """Get chain data by ID or name, falling back to the best fuzzy match if asked"""
         if isinstance(identifier, int):
             chain_data = self.get_chain_data_by_id(identifier)
         else:
@@ -128,46 +427,288 @@ class ChainlistAPI:
 
         if chain_data:
             return chain_data
-        else:
-            return None
+        if fuzzy:
+            matches = self.resolve(identifier, limit=1)
+            if matches and matches[0].score >= RESOLVE_THRESHOLD:
+                return matches[0].chain
+        return None
 
+    @staticmethod
+    def _rpc_filters(
+        rpc_type: Optional[str], no_tracking: bool, max_tracking: Optional[str]
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """Translate get_rpcs arguments into an RpcIndex scheme and tracking cap"""
+        if no_tracking:
+            max_tracking = "none"
+        elif max_tracking is not None and max_tracking not in TRACKING_LEVELS:
+            raise ValueError(
+                f"Unknown tracking level {max_tracking!r}; expected one of {TRACKING_LEVELS}"
+            )
+        return (rpc_type if rpc_type in SCHEMES else None), max_tracking
+
+    @property
+    def rpc_scores(self) -> RpcScoreboard:
+        """Get the endpoint scores kept beside the chain list cache"""
+        if self._rpc_scores is None:
+            self._rpc_scores = RpcScoreboard(blockchain_cache.sidecar_path(CACHE_KEY, "scores"))
+        return self._rpc_scores
+
+    @property
+    def block_times(self) -> BlockTimeStore:
+        """Get the block timestamps learned so far, kept beside the chain list cache"""
+        if self._block_times is None:
+            self._block_times = BlockTimeStore(
+                blockchain_cache.sidecar_path(CACHE_KEY, "blocktimes")
+            )
+        return self._block_times
+
+    @profiler.timed("filtering")
     def get_rpcs(
         self,
         chain_data: Union[int, str, Dict],
-        rpc_type: str,
+        rpc_type: Optional[str] = "https",
         no_tracking: bool = False,
-    ) -> List[str]:
-        """Get RPCs by type"""
-        # If chain_data is an identifier (int or str), get the chain data
-        if isinstance(chain_data, (int, str)):
+        open_source: bool = False,
+        max_tracking: Optional[str] = None,
+        ranked: bool = False,
+        min_health: Optional[float] = None,
+    ) -> Tuple[str, ...]:
+        """Get RPC URLs by scheme (see SCHEMES; anything else means all) and privacy
+
+        no_tracking keeps endpoints that declare no tracking, max_tracking caps
+        the tracking level more loosely, and open_source keeps endpoints
+        flagged as open source. Chains in the current index are answered from
+        its precomputed RpcIndex. With ranked, URLs come best-first by their
+        rpc_scores and those below min_health (default rpc.min_health) are
+        dropped; endpoints with no score yet follow in dataset order.
+        """
+        urls = self._filtered_rpcs(chain_data, rpc_type, no_tracking, open_source, max_tracking)
+        if ranked:
+            return self.rpc_scores.rank(urls, min_health)
+        return urls
+
+    def _filtered_rpcs(
+        self,
+        chain_data: Union[int, str, Dict],
+        rpc_type: Optional[str],
+        no_tracking: bool,
+        open_source: bool,
+        max_tracking: Optional[str],
+    ) -> Tuple[str, ...]:
+        scheme, max_tracking = self._rpc_filters(rpc_type, no_tracking, max_tracking)
+        index = self.index
+        if isinstance(chain_data, int):
+            return index.rpcs.get(chain_data, scheme, max_tracking, open_source)
+
+        # If chain_data is a name, get the chain data
+        if isinstance(chain_data, str):
             chain_data = self.get_chain_data(chain_data)
 
-        if not chain_data or not isinstance(chain_data, dict):
-            return []
+        if not chain_data or not isinstance(chain_data, Mapping):
+            return ()
 
-        rpcs = chain_data.get("rpc", [])
-        result_rpcs = []
+        chain_id = chain_data.get("chainId")
+        if chain_id is not None and index.by_id.get(chain_id) is chain_data:
+            return index.rpcs.get(chain_id, scheme, max_tracking, open_source)
+        # A record from another snapshot or from the caller
+        return filter_urls(chain_data.get("rpc") or (), scheme, max_tracking, open_source)
 
-        for rpc in rpcs:
-            if not isinstance(rpc, dict):
+    def get_rpcs_many(
+        self,
+        identifiers: Iterable[Union[int, str]],
+        rpc_type: Optional[str] = "https",
+        no_tracking: bool = False,
+        open_source: bool = False,
+        max_tracking: Optional[str] = None,
+        ranked: bool = False,
+        min_health: Optional[float] = None,
+    ) -> Dict[Union[int, str], Tuple[str, ...]]:
+        """Get RPC URLs for many chain IDs, names or short names from one index snapshot"""
+        scheme, max_tracking = self._rpc_filters(rpc_type, no_tracking, max_tracking)
+        index = self.index
+        rpcs = index.rpcs
+        result: Dict[Union[int, str], Tuple[str, ...]] = {}
+        for identifier in identifiers:
+            if identifier in result:
                 continue
+            chain = self._resolve_one(index, identifier, False).chain
+            result[identifier] = (
+                rpcs.get(chain.get("chainId"), scheme, max_tracking, open_source)
+                if chain is not None
+                else ()
+            )
+        if ranked:
+            scores = self.rpc_scores
+            result = {key: scores.rank(urls, min_health) for key, urls in result.items()}
+        return result
+
+    def _require_chain(self, chain: Union[int, str, Mapping[str, Any]]) -> Mapping[str, Any]:
+        """Get the record for a chain given as a record, ID, name or short name
+
+        Raises ValueError for an unknown chain or a record without a chain ID.
+        """
+        record = chain if isinstance(chain, Mapping) else self.lookup_chain(chain)
+        if record is None or record.get("chainId") is None:
+            raise ValueError(f"Unknown chain {chain!r}")
+        return record
+
+    def probe_rpcs(
+        self,
+        chains: Iterable[Union[int, str, Mapping[str, Any]]],
+        schemes: Sequence[str] = SCHEMES,
+        prober: Optional[RpcProber] = None,
+    ) -> List[ChainProbe]:
+        """Probe the endpoints of chains, given as records, IDs, names or short names
+
+        Reports come back in input order; see RpcProber for the limits applied.
+        Without a prober, the results are folded into rpc_scores and saved.
+        """
+        endpoints: Dict[int, List[str]] = {}
+        for chain in chains:
+            record = self._require_chain(chain)
+            endpoints[record["chainId"]] = [
+                url for scheme in schemes for url in self.get_rpcs(record, scheme)
+            ]
+        if prober is None:
+            prober = RpcProber(scoreboard=self.rpc_scores)
+        reports = prober.run(endpoints)
+        if prober.scoreboard is not None:
+            prober.scoreboard.save()
+        return reports
+
+    def rpc_client(
+        self,
+        chain: Union[int, str, Mapping[str, Any]],
+        no_tracking: bool = False,
+        **options: Any,
+    ) -> RpcClient:
+        """Create a client balancing calls across a chain's HTTP endpoints
+
+        Endpoints below the scoreboard's health threshold are left out, and
+        the client's calls update rpc_scores. options are passed to RpcClient.
+        """
+        record = self._require_chain(chain)
+        urls = self.rpc_scores.rank(
+            url
+            for scheme in ("https", "http")
+            for url in self.get_rpcs(record, scheme, no_tracking)
+        )
+        if not urls:
+            raise ValueError(f"No healthy HTTP RPC endpoints for chain {record['chainId']}")
+        options.setdefault("scoreboard", self.rpc_scores)
+        return RpcClient(urls, **options)
 
-            url = rpc.get("url", "").lower()
-            tracking = rpc.get("tracking", "").lower()
-
-            # Check RPC type
-            if rpc_type == "https" and not url.startswith("https://"):
-                continue
-            if rpc_type == "wss" and not url.startswith("wss://"):
-                continue
+    def subscriptions(
+        self,
+        chain: Union[int, str, Mapping[str, Any]],
+        no_tracking: bool = False,
+        **options: Any,
+    ) -> SubscriptionManager:
+        """Create a manager sharing newHeads and logs subscriptions over a chain's WebSockets
+
+        Endpoints below the scoreboard's health threshold are left out, and
+        the rest are used best first. options are passed to SubscriptionManager.
+        """
+        record = self._require_chain(chain)
+        urls = [
+            url for scheme in ("wss", "ws") for url in self.get_rpcs(record, scheme, no_tracking)
+        ]
+        urls = self.rpc_scores.rank(urls)
+        if not urls:
+            raise ValueError(f"No healthy WebSocket RPC endpoints for chain {record['chainId']}")
+        options.setdefault("scoreboard", self.rpc_scores)
+        return SubscriptionManager(urls, **options)
+
+    def scan_addresses(
+        self,
+        addresses: Sequence[str],
+        chains: Optional[Iterable[Union[int, str, Mapping[str, Any]]]] = None,
+        no_tracking: bool = False,
+        scanner: Optional[AddressScanner] = None,
+        **options: Any,
+    ) -> AsyncIterator[ChainScan]:
+        """Check addresses on chains, by default every loaded mainnet, yielding as each finishes
+
+        Chains without a healthy HTTP endpoint are skipped. options are passed
+        to each chain's RpcClient; see AddressScanner for the limits applied.
+        """
+        if chains is None:
+            records: List[Mapping[str, Any]] = [
+                chain for chain in self.blockchain_data if is_mainnet(chain)
+            ]
+        else:
+            records = [self._require_chain(chain) for chain in chains]
 
-            # Check tracking status
-            if no_tracking and tracking != "none":
+        targets = []
+        for record in records:
+            try:
+                targets.append((record, self.rpc_client(record, no_tracking, **options)))
+            except ValueError:
                 continue
+        if len(targets) < len(records):
+            logger.info(
+                "Skipping %d chains without healthy HTTP RPCs", len(records) - len(targets)
+            )
+        return (scanner or AddressScanner()).scan(addresses, targets)
 
-            result_rpcs.append(rpc["url"])
+    def block_time_resolver(
+        self,
+        chain: Union[int, str, Mapping[str, Any]],
+        no_tracking: bool = False,
+        llama: Optional[DefiLlamaAPI] = None,
+        **options: Any,
+    ) -> BlockTimeResolver:
+        """Create a resolver between a chain's timestamps and block numbers
+
+        It reads blocks through the chain's healthy HTTP endpoints and, given
+        llama, seeds searches from DefiLlama under the chain's slug. Closing it
+        saves what it learned to block_times; options are passed to RpcClient.
+        """
+        record = self._require_chain(chain)
+        try:
+            client: Optional[RpcClient] = self.rpc_client(record, no_tracking, **options)
+        except ValueError:
+            if llama is None or not record.get("chainSlug"):
+                raise
+            client = None
+        return BlockTimeResolver(
+            self.block_times.index(record["chainId"]),
+            client,
+            llama,
+            record.get("chainSlug"),
+            store=self.block_times,
+        )
 
-        return result_rpcs
+    def log_scanner(
+        self,
+        chain: Union[int, str, Mapping[str, Any]],
+        no_tracking: bool = False,
+        checkpoint: Optional[str] = None,
+        chunk_size: Optional[int] = None,
+        **options: Any,
+    ) -> LogScanner:
+        """Create a LogScanner over a chain's healthy HTTP endpoints
+
+        The caller closes scanner.client when done; options are passed to
+        RpcClient.
+        """
+        client = self.rpc_client(chain, no_tracking, **options)
+        return LogScanner(client, chunk_size=chunk_size, checkpoint=checkpoint)
+
+    async def scan_logs(
+        self,
+        chain: Union[int, str, Mapping[str, Any]],
+        from_block: int,
+        to_block: Union[int, str] = "latest",
+        address: Union[None, str, Sequence[str]] = None,
+        topics: Optional[Topics] = None,
+        **options: Any,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield a chain's logs matching a filter in block order; options go to log_scanner"""
+        scanner = self.log_scanner(chain, **options)
+        async with scanner.client:
+            async for log in scanner.scan(from_block, to_block, address, topics):
+                yield log
 
     def get_explorer(
         self, identifier: Union[int, str], explorer_type: Optional[str] = None
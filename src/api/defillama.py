@@ -1,9 +1,11 @@
 import hashlib
 import json
 import os
+import re
+import time
 from datetime import datetime
 from functools import lru_cache
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Pattern, Tuple, Union
 
 import requests
 from requests.adapters import HTTPAdapter
@@ -11,15 +13,62 @@ from urllib3.util.retry import Retry
 
 from ..core.cache import defillama_cache
 from ..core.config import config
+from ..core.logger import OfflineError, get_logger
+from ..core.metrics import observe_request
+from ..core.profiler import profiler
+from ..core.recorder import get_recorder
+from ..core.tracing import requests_retries, tracer, url_template
+
+logger = get_logger("api.defillama")
+
+SPEC_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "defillama-api-spec.json"
+)
+
+# Spec servers and the service name each one maps to
+SPEC_SERVICES = {
+    "https://api.llama.fi": "defillama",
+    "https://coins.llama.fi": "coins",
+    "https://stablecoins.llama.fi": "stablecoins",
+    "https://yields.llama.fi": "yields",
+}
+
+
+def load_spec_templates(spec_file: str = SPEC_FILE) -> Dict[str, List[Tuple[str, Pattern]]]:
+    """Load DefiLlama path templates from the OpenAPI spec, grouped by service"""
+    templates: Dict[str, List[Tuple[str, Pattern]]] = {}
+    if not os.path.exists(spec_file):
+        return templates
+
+    with open(spec_file, "r") as f:
+        spec = json.load(f)
+
+    default_server = spec.get("servers", [{}])[0].get("url")
+    for path, operations in spec.get("paths", {}).items():
+        servers = operations.get("get", {}).get("servers") or [{"url": default_server}]
+        service = SPEC_SERVICES.get(servers[0].get("url"))
+        if not service:
+            continue
+        pattern = re.compile("^" + re.sub(r"\{[^/]+\}", "[^/]+", path) + "$")
+        templates.setdefault(service, []).append((path, pattern))
+    return templates
+
+
+@lru_cache(maxsize=1)
+def _spec_templates() -> Dict[str, List[Tuple[str, Pattern]]]:
+    """Spec templates, loaded once for tracing"""
+    return load_spec_templates()
 
 
 class DefiLlamaAPI:
     def __init__(self):
-        self.base_url = "https://api.llama.fi"
-        self.coins_url = "https://coins.llama.fi"
-        self.stablecoins_url = "https://stablecoins.llama.fi"
-        self.yields_url = "https://yields.llama.fi"
+        self.base_url = config.get("api.defillama_base_url")
+        self.coins_url = config.get("api.coins_base_url")
+        self.stablecoins_url = config.get("api.stablecoins_base_url")
+        self.yields_url = config.get("api.yields_base_url")
         self.session = self._create_session()
+        # Age in seconds of the oldest response served in offline mode
+        self.data_age: Optional[float] = None
 
     def _create_session(self):
         """Create a requests session with retry logic"""
@@ -44,22 +93,75 @@ class DefiLlamaAPI:
         # Create a hash of the key to use as the filename
         return hashlib.md5(key.encode()).hexdigest()
 
+    def _service_for(self, url: str) -> Tuple[str, str]:
+        """Get the service name and base URL that a request URL belongs to"""
+        for service, base_url in (
+            ("coins", self.coins_url),
+            ("stablecoins", self.stablecoins_url),
+            ("yields", self.yields_url),
+        ):
+            if url.startswith(base_url):
+                return service, base_url
+        return "defillama", self.base_url
+
+    def _url_template(self, url: str) -> str:
+        """Get the spec route a request URL belongs to, for low-cardinality span names"""
+        service, base_url = self._service_for(url)
+        path = url[len(base_url):].split("?")[0]
+        for template, pattern in _spec_templates().get(service, []):
+            if pattern.match(path):
+                return base_url + template
+        return url_template(url)
+
     def _make_request(self, url: str, params: Optional[Dict] = None) -> Dict:
         """Make a request to the API with caching"""
         cache_key = self._sanitize_cache_key(url, params)
-        cached_data = defillama_cache.load_from_cache(cache_key)
-        if cached_data:
-            return cached_data
-
-        try:
-            response = self.session.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            defillama_cache.save_to_cache(cache_key, data)
-            return data
-        except requests.exceptions.RequestException as e:
-            print(f"Error making request to {url}: {e}")
-            return {}
+        template = self._url_template(url)
+        with tracer.http_span("GET", template) as span:
+            if config.get("network.offline"):
+                cached = defillama_cache.load_with_age(cache_key, ignore_expiry=True)
+                span.set_attribute("chaindata.cache", "offline" if cached else "miss")
+                if cached is None:
+                    raise OfflineError(f"Offline mode: no cached response for {url}")
+                data, age = cached
+                self.data_age = max(self.data_age or 0.0, age)
+                return data
+
+            # Record mode always goes upstream so the capture is complete
+            recorder = get_recorder()
+            if recorder is None:
+                cached_data = defillama_cache.load_from_cache(cache_key)
+                if cached_data:
+                    span.set_attribute("chaindata.cache", "hit")
+                    return cached_data
+            span.set_attribute("chaindata.cache", "miss" if recorder is None else "bypass")
+
+            try:
+                started = time.perf_counter()
+                with profiler.phase("network wait"):
+                    response = self.session.get(url, params=params, timeout=10)
+                elapsed = time.perf_counter() - started
+                retries = requests_retries(response)
+                # requests' connection pools never block, so there is no queue wait
+                span.record_response(response.status_code, len(response.content), retries)
+                observe_request(
+                    template, response.status_code, elapsed, len(response.content), retries
+                )
+                logger.debug(
+                    "GET %s -> %s in %.1f ms", template, response.status_code, elapsed * 1000
+                )
+                response.raise_for_status()
+                with profiler.phase("json decode"):
+                    data = response.json()
+                defillama_cache.save_to_cache(cache_key, data)
+                if recorder is not None:
+                    service, base_url = self._service_for(url)
+                    recorder.record(service, base_url, url, cache_key, data, params)
+                return data
+            except requests.exceptions.RequestException as e:
+                span.set_status("ERROR", str(e))
+                logger.warning("Error making request to %s: %s", url, e)
+                return {}
 
     # Existing TVL methods...
 
@@ -128,6 +230,11 @@ class DefiLlamaAPI:
         url = f"{self.coins_url}/prices/first/{','.join(coins)}"
         return self._make_request(url)
 
+    def get_block(self, chain: str, timestamp: int) -> Dict[str, int]:
+        """Get the block closest to a timestamp, as its height and timestamp"""
+        url = f"{self.coins_url}/block/{chain}/{int(timestamp)}"
+        return self._make_request(url)
+
     # Stablecoins API
     def get_stablecoins(self, include_prices: bool = True) -> List[Dict]:
         """Get list of all stablecoins"""
@@ -350,6 +457,7 @@ class DefiLlamaAPI:
             "tvl_history": tvl_history,
         }
 
+    @profiler.timed("filtering")
     def search_protocols(self, query: str) -> List[Dict]:
         """Search for protocols by name"""
         query = query.lower()
@@ -361,6 +469,7 @@ class DefiLlamaAPI:
             or query in protocol.get("slug", "").lower()
         ]
 
+    @profiler.timed("filtering")
     def get_top_protocols(self, limit: Optional[int] = None) -> List[Dict]:
         """Get top protocols by TVL"""
         all_protocols = self.get_all_protocols()
@@ -373,6 +482,7 @@ class DefiLlamaAPI:
             reverse=True,
         )[:limit]
 
+    @profiler.timed("filtering")
     def get_chain_protocols(self, chain: str) -> List[Dict]:
         """Get all protocols on a specific chain"""
         all_protocols = self.get_all_protocols()
@@ -1,7 +1,9 @@
 """Etherscan API client for ChainData."""
 
+import hashlib
 import os
-from typing import List, Optional
+import time
+from typing import Dict, List, Optional
 from dotenv import load_dotenv
 
 import requests
@@ -9,8 +11,15 @@ from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
 from ..models.etherscan import Transaction, TokenTransfer, ContractSource
+from ..core.cache import etherscan_cache
 from ..core.config import config
-from ..utils.display import print_error, print_info
+from ..core.logger import OfflineError, get_logger
+from ..core.metrics import observe_request
+from ..core.profiler import profiler
+from ..core.recorder import get_recorder
+from ..core.tracing import requests_retries, tracer
+
+logger = get_logger("api.etherscan")
 
 
 class EtherscanAPI:
@@ -18,19 +27,24 @@ class EtherscanAPI:
 
     def __init__(self):
         """Initialize the Etherscan API client."""
-        self.base_url = "https://api.etherscan.io/api"
+        self.base_url = config.get("api.etherscan_base_url")
         
         # Load environment variables from .env file
         load_dotenv()
         
         # Try to get API key from environment variables
         self.api_key = os.getenv("ETHERSCAN_API_KEY")
-        if not self.api_key:
-            print_error("ETHERSCAN_API_KEY environment variable not set")
-            print_info("Please set your Etherscan API key in the .env file or as an environment variable")
+        # Offline mode only reads the cache, so it doesn't need a key
+        if not self.api_key and not config.get("network.offline"):
+            logger.error(
+                "ETHERSCAN_API_KEY environment variable not set; set it in the .env file"
+                " or as an environment variable"
+            )
             raise ValueError("ETHERSCAN_API_KEY environment variable not set")
         
         self.session = self._create_session()
+        # Age in seconds of the oldest response served in offline mode
+        self.data_age: Optional[float] = None
 
     def _create_session(self):
         """Create a requests session with retry logic."""
@@ -47,6 +61,15 @@ class EtherscanAPI:
         session.mount("https://", adapter)
         return session
 
+    def _sanitize_cache_key(self, url: str, params: Optional[Dict] = None) -> str:
+        """Create a safe cache key from URL and parameters, leaving out the API key."""
+        key = url
+        if params:
+            key += "?" + "&".join(
+                f"{k}={v}" for k, v in sorted(params.items()) if k != "apikey"
+            )
+        return hashlib.md5(key.encode()).hexdigest()
+
     def _make_request(self, module: str, action: str, **params) -> dict:
         """Make a request to the Etherscan API."""
         params.update({
@@ -54,20 +77,60 @@ class EtherscanAPI:
             "action": action,
             "apikey": self.api_key
         })
-        
-        try:
-            response = self.session.get(self.base_url, params=params)
-            response.raise_for_status()
-            data = response.json()
-            
-            if data["status"] != "1":
-                print_error(f"Etherscan API error: {data.get('message', 'Unknown error')}")
+        cache_key = self._sanitize_cache_key(self.base_url, params)
+        template = f"{self.base_url}?module={module}&action={action}"
+
+        with tracer.http_span("GET", template) as span:
+            # Responses are only read back from the cache in offline mode
+            if config.get("network.offline"):
+                cached = etherscan_cache.load_with_age(cache_key, ignore_expiry=True)
+                span.set_attribute("chaindata.cache", "offline" if cached else "miss")
+                if cached is None:
+                    raise OfflineError(
+                        f"Offline mode: no cached Etherscan response for {module}/{action}"
+                    )
+                data, age = cached
+                self.data_age = max(self.data_age or 0.0, age)
+                return data
+            span.set_attribute("chaindata.cache", "bypass")
+
+            try:
+                started = time.perf_counter()
+                with profiler.phase("network wait"):
+                    response = self.session.get(self.base_url, params=params)
+                elapsed = time.perf_counter() - started
+                retries = requests_retries(response)
+                # requests' connection pools never block, so there is no queue wait
+                span.record_response(response.status_code, len(response.content), retries)
+                observe_request(
+                    template, response.status_code, elapsed, len(response.content), retries
+                )
+                response.raise_for_status()
+                with profiler.phase("json decode"):
+                    data = response.json()
+
+                recorder = get_recorder()
+                if recorder is not None:
+                    recorder.record(
+                        "etherscan", self.base_url, self.base_url, cache_key, data, params
+                    )
+
+                if data["status"] != "1":
+                    span.set_status("ERROR", data.get("message", "Unknown error"))
+                    logger.warning(
+                        "Etherscan API error for %s/%s: %s",
+                        module,
+                        action,
+                        data.get("message", "Unknown error"),
+                    )
+                    return None
+
+                etherscan_cache.save_to_cache(cache_key, data["result"])
+                return data["result"]
+            except requests.exceptions.RequestException as e:
+                span.set_status("ERROR", str(e))
+                logger.warning("Failed to fetch data from Etherscan: %s", e)
                 return None
-                
-            return data["result"]
-        except requests.exceptions.RequestException as e:
-            print_error(f"Failed to fetch data from Etherscan: {e}")
-            return None
 
     def get_transactions(
         self,
@@ -95,7 +158,8 @@ class EtherscanAPI:
         if not data:
             return []
             
-        return [Transaction(**tx) for tx in data]
+        with profiler.phase("model validation"):
+            return [Transaction(**tx) for tx in data]
 
     def get_token_transfers(
         self,
@@ -120,7 +184,8 @@ class EtherscanAPI:
         if not data:
             return []
             
-        return [TokenTransfer(**transfer) for transfer in data]
+        with profiler.phase("model validation"):
+            return [TokenTransfer(**transfer) for transfer in data]
 
     def get_contract_source(self, address: str) -> Optional[ContractSource]:
         """Get contract source code."""
@@ -128,7 +193,8 @@ class EtherscanAPI:
         if not data or not isinstance(data, list) or not data:
             return None
             
-        return ContractSource(**data[0])
+        with profiler.phase("model validation"):
+            return ContractSource(**data[0])
 
 
 # Create global instance
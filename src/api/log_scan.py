@@ -0,0 +1,239 @@
+"""Pulling event logs over a block range in adaptively sized chunks.
+
+The range is cut into chunks that are fetched concurrently with ``eth_getLogs``
+through an RpcClient, which spreads them across the chain's endpoints. Chunk
+size adapts to what the endpoints allow:
+
+- A chunk an endpoint refuses as too large ("query returned more than 10000
+  results", "block range too large") is bisected, and new chunks start at
+  half its size.
+- A chunk that comes back with few logs doubles the size of the chunks
+  after it.
+
+Logs are yielded in block order, so a consumer can append them to a file.
+Once every log of a chunk has been handed over, the block after the chunk is
+written to an optional checkpoint file. A scan given the same checkpoint
+resumes from there. Delivery is at least once: a consumer that stops partway
+through a chunk gets that whole chunk again on resume. Consumers that must not
+see a log twice can drop repeats by block number and log index.
+"""
+
+import asyncio
+import json
+import os
+import re
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Set, Tuple, Union
+
+from ..core.config import config
+from ..core.logger import ResultTooLargeError, RpcError, get_logger
+from .rpc_client import RpcClient
+from .rpc_probe import quantity, rpc_result
+
+logger = get_logger("api.log_scan")
+
+# How providers word "narrow the query": Infura, Alchemy, QuickNode, geth,
+# Erigon and others all differ
+_TOO_LARGE = re.compile(
+    r"(more than \d+ (results|logs)|too many (results|logs)|range (is )?too (large|wide|big)"
+    r"|exceeds? (the )?(max(imum)? )?(block )?range|range (limit|exceeded)|limited to"
+    r"|response size|results? (limit|too large)|query timeout)",
+    re.IGNORECASE,
+)
+
+# Log fields that are hex quantities and are decoded to integers
+QUANTITY_FIELDS = ("blockNumber", "logIndex", "transactionIndex")
+
+# Completed chunks held for in-order delivery, per chunk in flight, before
+# fetching pauses to let a slow chunk catch up
+BUFFERED_CHUNKS_PER_SLOT = 4
+
+Topics = Sequence[Union[None, str, Sequence[str]]]
+
+
+def too_large(message: str) -> bool:
+    """Check an error message asks for a smaller query"""
+    return bool(_TOO_LARGE.search(message))
+
+
+def logs_result(body: Any) -> Any:
+    """Get an eth_getLogs result, raising ResultTooLargeError when the range must shrink"""
+    try:
+        return rpc_result(body)
+    except RpcError as e:
+        if too_large(e.message):
+            raise ResultTooLargeError(e.message, code=e.code) from None
+        raise
+
+
+def log_filter(
+    address: Union[None, str, Sequence[str]] = None, topics: Optional[Topics] = None
+) -> Dict[str, Any]:
+    """Build the address and topics part of a log filter, leaving out what is not set"""
+    query: Dict[str, Any] = {}
+    if address:
+        query["address"] = address if isinstance(address, str) else list(address)
+    if topics:
+        query["topics"] = [
+            topic if topic is None or isinstance(topic, str) else list(topic) for topic in topics
+        ]
+    return query
+
+
+def decode_log(log: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn a log's hex block number and indexes into integers"""
+    decoded = dict(log)
+    for field in QUANTITY_FIELDS:
+        value = decoded.get(field)
+        if isinstance(value, str):
+            decoded[field] = quantity(value)
+    return decoded
+
+
+class LogScanner:
+    """Fetch logs matching a filter over a block range, splitting and growing chunks as needed"""
+
+    def __init__(
+        self,
+        client: RpcClient,
+        chunk_size: Optional[int] = None,
+        max_chunk_size: Optional[int] = None,
+        target_logs: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        checkpoint: Optional[str] = None,
+    ):
+        self.client = client
+        # Blocks per chunk to start with, and the most growth may reach
+        self.chunk_size = (
+            config.get("rpc.log_chunk_size", 1000) if chunk_size is None else chunk_size
+        )
+        self.max_chunk_size = (
+            config.get("rpc.log_max_chunk_size", 100000)
+            if max_chunk_size is None
+            else max_chunk_size
+        )
+        # Chunks returning fewer than half this many logs double the chunk size
+        self.target_logs = (
+            config.get("rpc.log_target", 2000) if target_logs is None else target_logs
+        )
+        # Chunks in flight
+        self.concurrency = concurrency or client.pool_size * len(client.endpoints)
+        # File recording the next block to fetch
+        self.checkpoint = checkpoint
+        self.stats = {"chunks": 0, "splits": 0, "logs": 0}
+
+    def _resume(self, query: Dict[str, Any], from_block: int) -> int:
+        """Get the block to start from, which a checkpoint for the same filter may move on"""
+        if not self.checkpoint:
+            return from_block
+        try:
+            with open(self.checkpoint, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            return from_block
+        except (OSError, ValueError) as e:
+            raise ValueError(f"Unreadable checkpoint {self.checkpoint}: {e}") from None
+        if saved.get("filter") != query:
+            raise ValueError(f"Checkpoint {self.checkpoint} is for a different filter")
+        return max(from_block, int(saved["next_block"]))
+
+    def _save(self, query: Dict[str, Any], next_block: int) -> None:
+        if not self.checkpoint:
+            return
+        tmp_path = f"{self.checkpoint}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"filter": query, "next_block": next_block}, f)
+        os.replace(tmp_path, self.checkpoint)
+
+    async def _fetch(self, query: Dict[str, Any], start: int, end: int) -> List[Dict[str, Any]]:
+        params = dict(query)
+        params["fromBlock"] = hex(start)
+        params["toBlock"] = hex(end)
+        payload = {
+            "jsonrpc": "2.0",
+            "id": self.client.next_id(),
+            "method": "eth_getLogs",
+            "params": [params],
+        }
+        logs = await self.client.send(payload, logs_result)
+        if not isinstance(logs, list):
+            raise RpcError("eth_getLogs did not return a list")
+        return logs
+
+    async def scan(
+        self,
+        from_block: int,
+        to_block: Union[int, str] = "latest",
+        address: Union[None, str, Sequence[str]] = None,
+        topics: Optional[Topics] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield decoded logs from from_block to to_block inclusive, in block order
+
+        Raises RpcError when a chunk fails on every endpoint, or when a single
+        block has more logs than the endpoints will return; the checkpoint
+        then lets a later scan resume. The checkpoint only moves past a chunk
+        once all of its logs are yielded, so a resumed scan repeats the logs
+        of a chunk that was only partly consumed.
+        """
+        query = log_filter(address, topics)
+        if to_block == "latest":
+            last = quantity(await self.client.call("eth_blockNumber"))
+        else:
+            last = int(to_block)
+        cursor = next_emit = self._resume(query, from_block)
+        chunk = max(1, self.chunk_size)
+        retry: List[Tuple[int, int]] = []
+        completed: Dict[int, Tuple[int, List[Dict[str, Any]]]] = {}
+        ranges: Dict["asyncio.Task[List[Dict[str, Any]]]", Tuple[int, int]] = {}
+        pending: Set["asyncio.Task[List[Dict[str, Any]]]"] = set()
+        buffer_limit = self.concurrency * BUFFERED_CHUNKS_PER_SLOT
+
+        try:
+            while True:
+                while len(pending) < self.concurrency:
+                    if retry:
+                        start, end = retry.pop()
+                    elif cursor <= last and len(completed) < buffer_limit:
+                        start, end = cursor, min(cursor + chunk - 1, last)
+                        cursor = end + 1
+                    else:
+                        break
+                    task = asyncio.ensure_future(self._fetch(query, start, end))
+                    ranges[task] = (start, end)
+                    pending.add(task)
+                if not pending:
+                    break
+
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    start, end = ranges.pop(task)
+                    try:
+                        logs = task.result()
+                    except ResultTooLargeError as e:
+                        if start == end:
+                            raise RpcError(
+                                f"Block {start} has more logs than the endpoints return: "
+                                f"{e.message}"
+                            ) from None
+                        middle = (start + end) // 2
+                        # Popped from the end, so the lower half goes first
+                        retry.extend([(middle + 1, end), (start, middle)])
+                        chunk = max(1, min(chunk, middle - start + 1))
+                        self.stats["splits"] += 1
+                        continue
+                    self.stats["chunks"] += 1
+                    completed[start] = (end, logs)
+                    if len(logs) * 2 < self.target_logs and end - start + 1 >= chunk:
+                        chunk = min(self.max_chunk_size, chunk * 2)
+
+                while next_emit in completed:
+                    end, logs = completed.pop(next_emit)
+                    for log in logs:
+                        yield decode_log(log)
+                    self.stats["logs"] += len(logs)
+                    next_emit = end + 1
+                    self._save(query, next_emit)
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
@@ -0,0 +1,75 @@
+"""Packing JSON-RPC calls into batch arrays and matching the answers back up.
+
+Calls are packed in order into batches of at most ``max_size`` calls and
+``max_bytes`` of encoded JSON. A batch's answers can come back in any order,
+so they are matched to the calls by id. An endpoint that refuses a batch as a
+whole raises BatchRejectedError. It can do that with HTTP 413 or with a
+single error object instead of an array. RpcClient.call_many then splits the
+batch and retries the halves. A single error object saying the endpoint is
+rate limited or failing is not a refusal, and the batch goes to another
+endpoint whole.
+"""
+
+import json
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Sequence
+
+from ..core.logger import BatchRejectedError, RpcError
+from .rpc_probe import FAILOVER_CODES, rpc_result
+
+_ENCODER = json.JSONEncoder(separators=(",", ":"))
+
+
+def encoded_size(request: Mapping[str, Any]) -> int:
+    """Get the bytes a request object takes up in a batch"""
+    return len(_ENCODER.encode(request).encode("utf-8"))
+
+
+def pack(
+    requests: Iterable[Dict[str, Any]], max_size: int, max_bytes: int
+) -> Iterator[List[Dict[str, Any]]]:
+    """Group requests in order into batches within max_size calls and max_bytes of JSON
+
+    A request too large for max_bytes on its own gets a batch to itself.
+    """
+    batch: List[Dict[str, Any]] = []
+    # Brackets around the array
+    size = 2
+    for request in requests:
+        request_size = encoded_size(request) + 1
+        if batch and (len(batch) >= max_size or size + request_size > max_bytes):
+            yield batch
+            batch = []
+            size = 2
+        batch.append(request)
+        size += request_size
+    if batch:
+        yield batch
+
+
+def demultiplex(batch: Sequence[Mapping[str, Any]], body: Any) -> Dict[Any, Dict[str, Any]]:
+    """Match a batch response to its requests by id
+
+    Requests with no answer are left out. Raises BatchRejectedError when the
+    endpoint answered with something other than an array, or RpcError when
+    that answer is an error in FAILOVER_CODES.
+    """
+    if not isinstance(body, list):
+        try:
+            rpc_result(body)
+        except RpcError as e:
+            if e.code in FAILOVER_CODES:
+                raise
+            raise BatchRejectedError(e.message, code=e.code) from None
+        raise BatchRejectedError("Batch answered with a single response")
+    wanted = {request["id"] for request in batch}
+    return {
+        response["id"]: response
+        for response in body
+        if isinstance(response, dict) and response.get("id") in wanted
+    }
+
+
+def halves(batch: Sequence[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """Split a rejected batch in two"""
+    middle = (len(batch) + 1) // 2
+    return [list(batch[:middle]), list(batch[middle:])]
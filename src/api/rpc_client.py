@@ -0,0 +1,367 @@
+"""JSON-RPC client that spreads calls across a chain's RPC endpoints.
+
+Each call goes to the better of two endpoints picked at random ("power of two
+choices"). The better one has the lower live latency, weighted by the calls
+already in flight to it. This keeps load away from slow or busy endpoints
+without herding every caller onto a single fastest one.
+
+When an endpoint fails at the transport level, sits out a backoff and the
+call fails over to another. Failures include timeouts, HTTP errors, unreadable
+bodies and rate limit errors. A call that has not been answered after
+``hedge_after`` seconds is also sent to a second endpoint, and the first
+answer wins, which cuts the tail latency of a slow endpoint. Every endpoint
+has its own connection pool, so a stalled host cannot use up the connections
+of the others. Every attempt also updates the RpcScoreboard the client was
+given, so RPC lists ranked later reflect what the client saw.
+
+call_many() packs calls into JSON-RPC batch arrays (see rpc_batch), sends the
+batches concurrently through the same machinery and splits any batch an
+endpoint refuses.
+"""
+
+import asyncio
+import itertools
+import random
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import aiohttp
+
+from ..core.config import config
+from ..core.logger import BatchRejectedError, ResultTooLargeError, RpcError, get_logger
+from ..core.metrics import rpc_requests
+from .rpc_batch import demultiplex, halves, pack
+from .rpc_index import unusable
+from .rpc_probe import FAILOVER_CODES, rpc_result
+from .rpc_scores import RpcScoreboard
+
+logger = get_logger("api.rpc_client")
+
+# Methods that change chain state are never hedged
+UNHEDGED_METHODS = frozenset({"eth_sendRawTransaction", "eth_sendTransaction"})
+
+# Seconds a failed endpoint sits out, doubling with each consecutive failure
+COOLDOWN_SECONDS = 1.0
+MAX_COOLDOWN_SECONDS = 60.0
+
+# Weight of the newest round trip in an endpoint's live latency
+LATENCY_ALPHA = 0.3
+
+Parse = Callable[[Any], Any]
+
+
+class Failover(Exception):
+    """An endpoint could not answer; the call may be tried on another"""
+
+    def __init__(self, url: str, message: str):
+        super().__init__(f"{url}: {message}")
+        self.url = url
+        self.message = message
+
+
+class Endpoint:
+    """Live state of one endpoint as seen by a client"""
+
+    __slots__ = ("url", "latency_ms", "in_flight", "failures", "available_at", "session")
+
+    def __init__(self, url: str, latency_ms: Optional[float] = None):
+        self.url = url
+        self.latency_ms = latency_ms
+        self.in_flight = 0
+        # Consecutive failures, reset by an answer
+        self.failures = 0
+        # time.monotonic() before which the endpoint is only used as a last resort
+        self.available_at = 0.0
+        self.session: Optional[aiohttp.ClientSession] = None
+
+    def load(self) -> float:
+        """Expected wait for a new call; untried endpoints count as free so they get tried"""
+        return (self.latency_ms or 0.0) * (self.in_flight + 1)
+
+    def answered(self, latency_ms: float) -> None:
+        if self.latency_ms is None:
+            self.latency_ms = latency_ms
+        else:
+            self.latency_ms += LATENCY_ALPHA * (latency_ms - self.latency_ms)
+        self.failures = 0
+        self.available_at = 0.0
+
+    def failed(self) -> None:
+        self.failures += 1
+        cooldown = min(COOLDOWN_SECONDS * 2 ** (self.failures - 1), MAX_COOLDOWN_SECONDS)
+        self.available_at = time.monotonic() + cooldown
+
+
+class RpcClient:
+    """Send JSON-RPC calls to the best of several endpoints, with failover and hedging
+
+    Use it as an async context manager, or call close() when done, so that
+    connections are released and scores saved.
+    """
+
+    def __init__(
+        self,
+        urls: Sequence[str],
+        scoreboard: Optional[RpcScoreboard] = None,
+        timeout: Optional[float] = None,
+        hedge_after: Optional[float] = None,
+        max_attempts: Optional[int] = None,
+        pool_size: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        max_batch_bytes: Optional[int] = None,
+        seed: Optional[int] = None,
+    ):
+        endpoints = [url for url in dict.fromkeys(urls) if unusable(url) is None]
+        endpoints = [url for url in endpoints if url.lower().startswith(("http://", "https://"))]
+        if not endpoints:
+            raise ValueError("No usable HTTP endpoints")
+        self.scoreboard = scoreboard
+        self.timeout = config.get("rpc.timeout", 5.0) if timeout is None else timeout
+        # Seconds before an unanswered call is also sent elsewhere; 0 disables hedging
+        self.hedge_after = (
+            config.get("rpc.hedge_after", 0.5) if hedge_after is None else hedge_after
+        )
+        # Endpoints one call may be sent to, counting hedges and failovers
+        self.max_attempts = (
+            config.get("rpc.max_attempts", 3) if max_attempts is None else max_attempts
+        )
+        # Connections kept open per endpoint
+        self.pool_size = config.get("rpc.per_host", 4) if pool_size is None else pool_size
+        # Calls and bytes of JSON per batch; batch_size drops when endpoints refuse batches
+        self.batch_size = config.get("rpc.batch_size", 100) if batch_size is None else batch_size
+        self.max_batch_bytes = (
+            config.get("rpc.max_batch_bytes", 1048576)
+            if max_batch_bytes is None
+            else max_batch_bytes
+        )
+        self.endpoints = [Endpoint(url, self._known_latency(url)) for url in endpoints]
+        self.stats = {"calls": 0, "attempts": 0, "hedges": 0, "failovers": 0, "splits": 0}
+        self._rng = random.Random(seed)
+        self._ids = itertools.count(1)
+
+    def _known_latency(self, url: str) -> Optional[float]:
+        score = self.scoreboard.get(url) if self.scoreboard is not None else None
+        return score.latency_ms if score is not None else None
+
+    async def __aenter__(self) -> "RpcClient":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def close(self, save: bool = True) -> None:
+        """Close every connection pool and save the scores unless told not to"""
+        for endpoint in self.endpoints:
+            if endpoint.session is not None:
+                await endpoint.session.close()
+                endpoint.session = None
+        if save and self.scoreboard is not None:
+            self.scoreboard.save()
+
+    def next_id(self) -> int:
+        """Get an unused JSON-RPC request id"""
+        return next(self._ids)
+
+    async def call(self, method: str, params: Optional[Sequence[Any]] = None) -> Any:
+        """Call a method and return its result, raising RpcError if it fails everywhere"""
+        payload = {"jsonrpc": "2.0", "id": self.next_id(), "method": method}
+        payload["params"] = list(params) if params is not None else []
+        return await self.send(payload, rpc_result, hedge=method not in UNHEDGED_METHODS)
+
+    async def call_many(
+        self,
+        calls: Iterable[Tuple[str, Optional[Sequence[Any]]]],
+        return_errors: bool = False,
+        concurrency: Optional[int] = None,
+    ) -> List[Any]:
+        """Make many (method, params) calls in batches and return their results in order
+
+        Up to concurrency batches are in flight at once, by default a pool's
+        worth per endpoint. A failed call raises its RpcError, or with
+        return_errors the error takes the place of its result.
+        """
+        requests = [
+            {"jsonrpc": "2.0", "id": self.next_id(), "method": method, "params": list(params or [])}
+            for method, params in calls
+        ]
+        position = {request["id"]: n for n, request in enumerate(requests)}
+        results: List[Any] = [None] * len(requests)
+        slots = asyncio.Semaphore(concurrency or self.pool_size * len(self.endpoints))
+
+        async def send_batch(batch: List[Dict[str, Any]]) -> None:
+            hedge = not any(request["method"] in UNHEDGED_METHODS for request in batch)
+            if len(batch) == 1:
+                # Plain call, which endpoints without batch support answer too
+                try:
+                    async with slots:
+                        results[position[batch[0]["id"]]] = await self.send(
+                            batch[0], rpc_result, hedge
+                        )
+                except RpcError as e:
+                    results[position[batch[0]["id"]]] = e
+                return
+            try:
+                async with slots:
+                    answers = await self.send(batch, lambda body: demultiplex(batch, body), hedge)
+            except BatchRejectedError as e:
+                logger.debug("Batch of %d refused (%s); splitting it", len(batch), e.message)
+                self.stats["splits"] += 1
+                retry = halves(batch)
+                self.batch_size = min(self.batch_size, len(retry[0]))
+                await asyncio.gather(*(send_batch(half) for half in retry))
+                return
+            except RpcError as e:
+                for request in batch:
+                    results[position[request["id"]]] = e
+                return
+
+            # Calls left unanswered or refused for load are sent again in a smaller batch
+            resend = []
+            for request in batch:
+                answer = answers.get(request["id"])
+                try:
+                    if answer is None:
+                        raise RpcError("No response", code=-32005)
+                    results[position[request["id"]]] = rpc_result(answer)
+                except RpcError as e:
+                    if e.code in FAILOVER_CODES:
+                        resend.append(request)
+                    else:
+                        results[position[request["id"]]] = e
+            if len(resend) == len(batch):
+                self.stats["splits"] += 1
+                await asyncio.gather(*(send_batch(half) for half in halves(batch)))
+            elif resend:
+                await send_batch(resend)
+
+        await asyncio.gather(
+            *(send_batch(batch) for batch in pack(requests, self.batch_size, self.max_batch_bytes))
+        )
+        if not return_errors:
+            for result in results:
+                if isinstance(result, RpcError):
+                    raise result
+        return results
+
+    async def send(self, payload: Any, parse: Parse, hedge: bool = True) -> Any:
+        """Post a request body and return parse(response body)
+
+        parse may raise RpcError: a code in FAILOVER_CODES (or none, for a
+        malformed body) sends the request to another endpoint, and any other
+        code is the answer and is raised to the caller.
+        """
+        self.stats["calls"] += 1
+        tried: Set[str] = set()
+        pending: Set["asyncio.Task[Any]"] = set()
+        errors: List[str] = []
+        hedge = hedge and self.hedge_after > 0
+
+        def launch() -> bool:
+            endpoint = self._choose(tried)
+            if endpoint is None:
+                return False
+            tried.add(endpoint.url)
+            self.stats["attempts"] += 1
+            pending.add(asyncio.ensure_future(self._attempt(endpoint, payload, parse)))
+            return True
+
+        launch()
+        try:
+            while pending:
+                can_hedge = hedge and len(tried) < self.max_attempts
+                done, _ = await asyncio.wait(
+                    pending,
+                    timeout=self.hedge_after if can_hedge else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    if launch():
+                        self.stats["hedges"] += 1
+                    else:
+                        hedge = False
+                    continue
+                for task in done:
+                    pending.discard(task)
+                    try:
+                        return task.result()
+                    except Failover as e:
+                        errors.append(str(e))
+                if not pending and len(tried) < self.max_attempts and launch():
+                    self.stats["failovers"] += 1
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        raise RpcError(f"No endpoint answered: {'; '.join(errors) or 'none available'}")
+
+    def _choose(self, tried: Set[str]) -> Optional[Endpoint]:
+        """Pick the less loaded of two random untried endpoints, preferring ones not cooling down"""
+        untried = [endpoint for endpoint in self.endpoints if endpoint.url not in tried]
+        if not untried:
+            return None
+        now = time.monotonic()
+        candidates = [endpoint for endpoint in untried if endpoint.available_at <= now]
+        if not candidates:
+            return min(untried, key=lambda endpoint: endpoint.available_at)
+        if len(candidates) == 1:
+            return candidates[0]
+        first, second = self._rng.sample(candidates, 2)
+        return first if first.load() <= second.load() else second
+
+    def _session(self, endpoint: Endpoint) -> aiohttp.ClientSession:
+        if endpoint.session is None:
+            endpoint.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size)
+            )
+        return endpoint.session
+
+    async def _attempt(self, endpoint: Endpoint, payload: Any, parse: Parse) -> Any:
+        """Send to one endpoint, raising Failover if another should be tried"""
+        session = self._session(endpoint)
+        endpoint.in_flight += 1
+        started = time.perf_counter()
+        try:
+            body = await asyncio.wait_for(self._post(session, endpoint.url, payload), self.timeout)
+            result = parse(body)
+        except asyncio.TimeoutError:
+            self._failed(endpoint, f"Timed out after {self.timeout:g}s")
+        except (BatchRejectedError, ResultTooLargeError):
+            # Another endpoint would refuse it too; the caller sends something smaller
+            self._answered(endpoint, (time.perf_counter() - started) * 1000, "rejected")
+            raise
+        except RpcError as e:
+            if e.code is not None and e.code not in FAILOVER_CODES:
+                # The endpoint answered; the call itself was refused
+                self._answered(endpoint, (time.perf_counter() - started) * 1000, "rejected")
+                raise
+            self._failed(endpoint, e.message)
+        except (aiohttp.ClientError, OSError, ValueError) as e:
+            self._failed(endpoint, str(e) or type(e).__name__)
+        else:
+            self._answered(endpoint, (time.perf_counter() - started) * 1000, "ok")
+            return result
+        finally:
+            endpoint.in_flight -= 1
+
+    async def _post(self, session: aiohttp.ClientSession, url: str, payload: Any) -> Any:
+        async with session.post(url, json=payload) as response:
+            if response.status == 413 and isinstance(payload, list):
+                raise BatchRejectedError("HTTP 413", status_code=413)
+            if response.status != 200:
+                raise RpcError(f"HTTP {response.status}", status_code=response.status)
+            return await response.json(content_type=None)
+
+    def _answered(self, endpoint: Endpoint, latency_ms: float, outcome: str) -> None:
+        endpoint.answered(latency_ms)
+        rpc_requests.labels(outcome).inc()
+        if self.scoreboard is not None:
+            self.scoreboard.record(endpoint.url, latency_ms)
+
+    def _failed(self, endpoint: Endpoint, message: str) -> None:
+        endpoint.failed()
+        rpc_requests.labels("failed").inc()
+        if self.scoreboard is not None:
+            self.scoreboard.record(endpoint.url, ok=False)
+        logger.debug("RPC call to %s failed: %s", endpoint.url, message)
+        raise Failover(endpoint.url, message)
@@ -0,0 +1,190 @@
+"""Chain RPC endpoints classified once per index snapshot.
+
+Each endpoint's URL scheme, tracking level and open-source flag is worked out
+once per snapshot, and its URL is filed under every filter combination it
+satisfies. A lookup is then a dict access returning a shared tuple, however
+many endpoints the chain has.
+"""
+
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+# URL schemes endpoints are classified by
+SCHEMES = ("https", "wss", "http", "ws")
+
+# Tracking levels a lookup can cap results at, most private first
+TRACKING_LEVELS = ("none", "limited", "yes")
+
+# Tracking level of endpoints that do not declare a known one; never passes a cap
+UNSPECIFIED = "unspecified"
+
+_EMPTY: Tuple[str, ...] = ()
+
+
+class RpcEndpoint(NamedTuple):
+    """One classified entry of a chain's rpc list"""
+
+    url: str
+    # One of SCHEMES, or None for anything else
+    scheme: Optional[str]
+    # One of TRACKING_LEVELS, or UNSPECIFIED
+    tracking: str
+    # None when the dataset does not say
+    open_source: Optional[bool]
+
+
+def classify(rpc: Any) -> Optional[RpcEndpoint]:
+    """Classify a chainlist rpc entry (a mapping or a bare URL), or None if it has no URL"""
+    if isinstance(rpc, str):
+        rpc = {"url": rpc}
+    elif not isinstance(rpc, Mapping):
+        return None
+    url = rpc.get("url")
+    if not isinstance(url, str) or not url:
+        return None
+
+    scheme, separator, _ = url.partition("://")
+    scheme = scheme.lower()
+    tracking = rpc.get("tracking")
+    tracking = tracking.lower() if isinstance(tracking, str) else ""
+    open_source = rpc.get("isOpenSource")
+    return RpcEndpoint(
+        url,
+        scheme if separator and scheme in SCHEMES else None,
+        tracking if tracking in TRACKING_LEVELS else UNSPECIFIED,
+        open_source if isinstance(open_source, bool) else None,
+    )
+
+
+def unusable(url: str) -> Optional[str]:
+    """Get why a URL cannot be called as listed, or None if it can"""
+    if "${" in url:
+        return "URL needs an API key"
+    scheme, separator, _ = url.partition("://")
+    if not separator or scheme.lower() not in SCHEMES:
+        return f"Unsupported scheme '{scheme.lower() if separator else ''}'"
+    return None
+
+
+def matches(
+    endpoint: RpcEndpoint,
+    scheme: Optional[str] = None,
+    max_tracking: Optional[str] = None,
+    open_source: bool = False,
+) -> bool:
+    """Check an endpoint against lookup filters, for records outside an index"""
+    if scheme is not None and endpoint.scheme != scheme:
+        return False
+    if max_tracking is not None and (
+        endpoint.tracking == UNSPECIFIED
+        or TRACKING_LEVELS.index(endpoint.tracking) > TRACKING_LEVELS.index(max_tracking)
+    ):
+        return False
+    return not open_source or endpoint.open_source is True
+
+
+def _file_endpoints(
+    endpoints: Tuple[RpcEndpoint, ...],
+) -> Dict[Tuple[Optional[str], Optional[str], bool], Tuple[str, ...]]:
+    """File each endpoint's URL under every filter combination it passes"""
+    buckets: Dict[Tuple[Optional[str], Optional[str], bool], List[str]] = {}
+    for endpoint in endpoints:
+        schemes = (None,) if endpoint.scheme is None else (None, endpoint.scheme)
+        if endpoint.tracking == UNSPECIFIED:
+            levels: Tuple[Optional[str], ...] = (None,)
+        else:
+            # Passes a cap at its own level and at every looser one
+            levels = (None,) + TRACKING_LEVELS[TRACKING_LEVELS.index(endpoint.tracking) :]
+        open_source = (False, True) if endpoint.open_source else (False,)
+        for scheme in schemes:
+            for level in levels:
+                for only_open_source in open_source:
+                    key = (scheme, level, only_open_source)
+                    bucket = buckets.get(key)
+                    if bucket is None:
+                        buckets[key] = [endpoint.url]
+                    else:
+                        bucket.append(endpoint.url)
+    return {key: tuple(bucket) for key, bucket in buckets.items()}
+
+
+# A chain's classified endpoints and its URLs by filter combination
+_Filed = Tuple[Tuple[RpcEndpoint, ...], Dict[Any, Tuple[str, ...]]]
+
+
+class RpcIndex:
+    """RPC URLs of every chain, by chain ID and filter combination
+
+    A chain's endpoints are classified and filed the first time it is looked
+    up, so loading a snapshot stays cheap for one-shot commands; call warm()
+    to do every chain up front in long-running processes.
+    """
+
+    __slots__ = ("_chains", "_filed")
+
+    def __init__(self, chains_by_id: Mapping[Any, Dict[str, Any]]):
+        self._chains = chains_by_id
+        # Chain ID -> (classified endpoints, URLs by filter combination)
+        self._filed: Dict[Any, _Filed] = {}
+
+    def _entry(self, chain_id: Any) -> Optional[_Filed]:
+        entry = self._filed.get(chain_id)
+        if entry is None:
+            chain = self._chains.get(chain_id)
+            if chain is None:
+                return None
+            endpoints = tuple(
+                endpoint
+                for endpoint in map(classify, chain.get("rpc") or ())
+                if endpoint is not None
+            )
+            # Concurrent builds of one chain produce equal entries, so either may win
+            entry = self._filed[chain_id] = (endpoints, _file_endpoints(endpoints))
+        return entry
+
+    def get(
+        self,
+        chain_id: Any,
+        scheme: Optional[str] = None,
+        max_tracking: Optional[str] = None,
+        open_source: bool = False,
+    ) -> Tuple[str, ...]:
+        """Get a chain's RPC URLs passing the filters, in dataset order"""
+        entry = self._filed.get(chain_id) or self._entry(chain_id)
+        if entry is None:
+            return _EMPTY
+        return entry[1].get((scheme, max_tracking, open_source), _EMPTY)
+
+    def endpoints(self, chain_id: Any) -> Tuple[RpcEndpoint, ...]:
+        """Get a chain's classified endpoints, in dataset order"""
+        entry = self._entry(chain_id)
+        return entry[0] if entry is not None else ()
+
+    def inherit(self, previous: "RpcIndex") -> None:
+        """Reuse previous's classification of every chain whose record is the same object here"""
+        chains = self._chains
+        previous_chains = previous._chains
+        for chain_id, entry in list(previous._filed.items()):
+            if chains.get(chain_id) is previous_chains.get(chain_id):
+                self._filed.setdefault(chain_id, entry)
+
+    def warm(self) -> None:
+        """Classify every chain's endpoints now rather than on first lookup"""
+        for chain_id in self._chains:
+            self._entry(chain_id)
+
+    def __len__(self) -> int:
+        return len(self._chains)
+
+
+def filter_urls(
+    rpcs: Iterable[Any],
+    scheme: Optional[str] = None,
+    max_tracking: Optional[str] = None,
+    open_source: bool = False,
+) -> Tuple[str, ...]:
+    """Filter an unindexed rpc list the way RpcIndex.get does"""
+    return tuple(
+        endpoint.url
+        for endpoint in map(classify, rpcs)
+        if endpoint is not None and matches(endpoint, scheme, max_tracking, open_source)
+    )
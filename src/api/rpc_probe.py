@@ -0,0 +1,305 @@
+"""Concurrent health and latency probes of chain RPC endpoints.
+
+Every endpoint gets one ``eth_chainId`` call and then ``samples``
+``eth_blockNumber`` calls, over HTTP or a WebSocket depending on its URL.
+Endpoints are probed concurrently under an overall limit and a per-host limit,
+so a provider serving dozens of chains never sees more than a few connections
+from us at once, and every call has its own timeout. Each chain's report gives
+latency percentiles, each endpoint's lag behind the median head reported for
+the chain, and any endpoint that answers with the wrong chain ID.
+"""
+
+import asyncio
+import json
+import statistics
+import time
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from ..core.config import config
+from ..core.logger import RpcError, get_logger
+from .rpc_index import unusable
+from .rpc_scores import RpcScoreboard
+
+logger = get_logger("api.rpc_probe")
+
+# Percentiles reported per chain
+PERCENTILES = (50, 90, 99)
+
+# JSON-RPC error codes that say the endpoint, not the call, is at fault, so
+# another endpoint may answer: limit exceeded and internal error
+FAILOVER_CODES = frozenset({-32005, -32603})
+
+Call = Callable[[str], Awaitable[Any]]
+
+
+def percentile(values: Sequence[float], q: float) -> Optional[float]:
+    """Get the q-th percentile (0-100) of values, interpolating between ranks"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def quantity(value: Any) -> int:
+    """Decode a JSON-RPC hex quantity such as "0x1a" """
+    if isinstance(value, str) and value[:2].lower() == "0x":
+        try:
+            return int(value, 16)
+        except ValueError:
+            pass
+    raise RpcError(f"Invalid quantity {value!r}")
+
+
+def rpc_result(body: Any) -> Any:
+    """Get the result of a JSON-RPC response object, raising RpcError for an error object"""
+    if not isinstance(body, dict):
+        raise RpcError("Invalid JSON-RPC response")
+    error = body.get("error")
+    if error is not None:
+        if isinstance(error, dict):
+            raise RpcError(str(error.get("message") or "RPC error"), code=error.get("code"))
+        raise RpcError(str(error))
+    if "result" not in body:
+        raise RpcError("Invalid JSON-RPC response")
+    return body["result"]
+
+
+class EndpointProbe(NamedTuple):
+    """What probing one endpoint found"""
+
+    # Chain the endpoint is listed under
+    chain_id: int
+    url: str
+    # Round trip of every call that was answered
+    latencies_ms: Tuple[float, ...] = ()
+    reported_chain_id: Optional[int] = None
+    block: Optional[int] = None
+    error: Optional[str] = None
+    # Blocks behind the median head of the chain; negative when ahead
+    lag: Optional[int] = None
+
+    @property
+    def mismatched(self) -> bool:
+        return self.reported_chain_id is not None and self.reported_chain_id != self.chain_id
+
+    @property
+    def latency_ms(self) -> Optional[float]:
+        """Median round trip"""
+        return percentile(self.latencies_ms, 50)
+
+    def healthy(self, max_lag: int) -> bool:
+        """Check the endpoint answered every call for the right chain and is fresh"""
+        return (
+            self.error is None
+            and not self.mismatched
+            and self.lag is not None
+            and self.lag <= max_lag
+        )
+
+    def status(self, max_lag: int) -> str:
+        if self.error is not None:
+            return "error"
+        if self.mismatched:
+            return "wrong chain"
+        if self.lag is None or self.lag > max_lag:
+            return "lagging"
+        return "ok"
+
+
+class ChainProbe(NamedTuple):
+    """Probe results for every endpoint of one chain"""
+
+    chain_id: int
+    endpoints: Tuple[EndpointProbe, ...]
+    # Median head block among endpoints reporting the right chain (the higher
+    # of the middle two for an even count)
+    head: Optional[int]
+    max_lag: int
+
+    def latency_percentiles(self) -> Dict[int, Optional[float]]:
+        """Get PERCENTILES of every round trip to endpoints of the right chain"""
+        latencies = [
+            latency
+            for endpoint in self.endpoints
+            if not endpoint.mismatched
+            for latency in endpoint.latencies_ms
+        ]
+        return {q: percentile(latencies, q) for q in PERCENTILES}
+
+    def healthy(self) -> List[EndpointProbe]:
+        """Get the healthy endpoints, fastest first"""
+        return sorted(
+            (endpoint for endpoint in self.endpoints if endpoint.healthy(self.max_lag)),
+            key=lambda endpoint: (endpoint.latency_ms is None, endpoint.latency_ms or 0.0),
+        )
+
+    def best(self, limit: Optional[int] = None) -> List[str]:
+        """Get the URLs of the fastest healthy endpoints"""
+        return [endpoint.url for endpoint in self.healthy()[:limit]]
+
+
+class RpcProber:
+    """Probe many endpoints at once under overall and per-host concurrency limits"""
+
+    def __init__(
+        self,
+        samples: Optional[int] = None,
+        timeout: Optional[float] = None,
+        concurrency: Optional[int] = None,
+        per_host: Optional[int] = None,
+        max_lag: Optional[int] = None,
+        scoreboard: Optional[RpcScoreboard] = None,
+    ):
+        self.samples = config.get("rpc.probe_samples", 3) if samples is None else samples
+        self.timeout = config.get("rpc.timeout", 5.0) if timeout is None else timeout
+        self.concurrency = config.get("rpc.concurrency", 64) if concurrency is None else concurrency
+        self.per_host = config.get("rpc.per_host", 4) if per_host is None else per_host
+        self.max_lag = config.get("rpc.max_lag", 5) if max_lag is None else max_lag
+        # Updated with every report when set
+        self.scoreboard = scoreboard
+
+    async def probe(self, endpoints: Mapping[int, Iterable[str]]) -> List[ChainProbe]:
+        """Probe each chain's endpoint URLs, returning one report per chain in input order"""
+        targets = [
+            (chain_id, url) for chain_id, urls in endpoints.items() for url in dict.fromkeys(urls)
+        ]
+        overall = asyncio.Semaphore(self.concurrency)
+        hosts: Dict[str, asyncio.Semaphore] = {}
+
+        async def limited(session: aiohttp.ClientSession, chain_id: int, url: str) -> EndpointProbe:
+            host = urlsplit(url).hostname or url
+            if host not in hosts:
+                hosts[host] = asyncio.Semaphore(self.per_host)
+            # The host's slot first, so probes queued on a busy host hold no global slot
+            async with hosts[host], overall:
+                return await self.probe_endpoint(session, chain_id, url)
+
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.per_host)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            probes = await asyncio.gather(
+                *(limited(session, chain_id, url) for chain_id, url in targets)
+            )
+
+        by_chain: Dict[int, List[EndpointProbe]] = {chain_id: [] for chain_id in endpoints}
+        for endpoint in probes:
+            by_chain[endpoint.chain_id].append(endpoint)
+        reports = [self._report(chain_id, found) for chain_id, found in by_chain.items()]
+        if self.scoreboard is not None:
+            for report in reports:
+                self.scoreboard.record_probe(report)
+        return reports
+
+    def run(self, endpoints: Mapping[int, Iterable[str]]) -> List[ChainProbe]:
+        """Probe from synchronous code"""
+        return asyncio.run(self.probe(endpoints))
+
+    def _report(self, chain_id: int, endpoints: List[EndpointProbe]) -> ChainProbe:
+        heights = [
+            endpoint.block
+            for endpoint in endpoints
+            if endpoint.block is not None and not endpoint.mismatched
+        ]
+        head = statistics.median_high(heights) if heights else None
+        if head is not None:
+            endpoints = [
+                (
+                    endpoint._replace(lag=head - endpoint.block)
+                    if endpoint.block is not None and not endpoint.mismatched
+                    else endpoint
+                )
+                for endpoint in endpoints
+            ]
+        return ChainProbe(chain_id, tuple(endpoints), head, self.max_lag)
+
+    async def probe_endpoint(
+        self, session: aiohttp.ClientSession, chain_id: int, url: str
+    ) -> EndpointProbe:
+        """Send eth_chainId and then eth_blockNumber samples to one endpoint"""
+        reason = unusable(url)
+        if reason is not None:
+            return EndpointProbe(chain_id, url, error=reason)
+        scheme = urlsplit(url).scheme.lower()
+
+        latencies: List[float] = []
+        reported = block = error = None
+        try:
+            if scheme in ("ws", "wss"):
+                ws = await asyncio.wait_for(session.ws_connect(url), self.timeout)
+                async with ws:
+                    reported, block = await self._sample(self._ws_call(ws), latencies)
+            else:
+                reported, block = await self._sample(self._http_call(session, url), latencies)
+        except asyncio.TimeoutError:
+            error = f"Timed out after {self.timeout:g}s"
+        except RpcError as e:
+            error = e.message
+        except (aiohttp.ClientError, OSError, ValueError) as e:
+            error = str(e) or type(e).__name__
+        if error is not None:
+            logger.debug("Probe of %s failed: %s", url, error)
+        return EndpointProbe(chain_id, url, tuple(latencies), reported, block, error)
+
+    async def _sample(
+        self, call: Call, latencies: List[float]
+    ) -> Tuple[Optional[int], Optional[int]]:
+        async def timed(method: str) -> Any:
+            started = time.perf_counter()
+            result = await asyncio.wait_for(call(method), self.timeout)
+            latencies.append((time.perf_counter() - started) * 1000)
+            return result
+
+        reported = quantity(await timed("eth_chainId"))
+        block = None
+        for _ in range(self.samples):
+            block = quantity(await timed("eth_blockNumber"))
+        return reported, block
+
+    def _http_call(self, session: aiohttp.ClientSession, url: str) -> Call:
+        ids = iter(range(1, 1 << 62))
+
+        async def call(method: str) -> Any:
+            payload = {"jsonrpc": "2.0", "id": next(ids), "method": method, "params": []}
+            async with session.post(url, json=payload) as response:
+                if response.status != 200:
+                    raise RpcError(f"HTTP {response.status}", status_code=response.status)
+                body = await response.json(content_type=None)
+            return rpc_result(body)
+
+        return call
+
+    def _ws_call(self, ws: "aiohttp.ClientWebSocketResponse[bool]") -> Call:
+        ids = iter(range(1, 1 << 62))
+
+        async def call(method: str) -> Any:
+            call_id = next(ids)
+            await ws.send_str(
+                json.dumps({"jsonrpc": "2.0", "id": call_id, "method": method, "params": []})
+            )
+            # Skip anything that is not our answer, such as subscription notifications
+            while True:
+                message = await ws.receive()
+                if message.type != aiohttp.WSMsgType.TEXT:
+                    raise RpcError(f"WebSocket closed ({message.type.name.lower()})")
+                body = json.loads(message.data)
+                if isinstance(body, dict) and body.get("id") == call_id:
+                    return rpc_result(body)
+
+        return call
@@ -0,0 +1,229 @@
+"""Remembered health of chain RPC endpoints, for ordering RPC lists best-first.
+
+Every call the library makes to an endpoint, and every probe of one, updates
+exponentially weighted moving averages of its round trip, its success rate and
+how many blocks it trails its chain's head. Recent outcomes count for ``alpha``
+of each average, so an endpoint that starts failing drops quickly, and one
+that recovers climbs back within a few calls. The averages are saved beside
+the chain list cache so they outlive the process. ``ChainlistAPI.get_rpcs``
+then uses them to put the fastest healthy endpoints first.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Tuple
+
+from ..core.config import config
+from ..core.logger import get_logger
+from .rpc_index import unusable
+
+logger = get_logger("api.rpc_scores")
+
+# Layout of the scores file; files with another version are ignored
+SCORES_VERSION = 1
+
+
+class EndpointScore(NamedTuple):
+    """Moving averages of one endpoint's recent behaviour"""
+
+    # Round trip of answered calls; None until one is answered
+    latency_ms: Optional[float]
+    # 1.0 when every recent call was answered, 0.0 when none were
+    success: float
+    # Blocks behind the chain's head; None until measured
+    lag: Optional[float]
+    samples: int
+    updated_at: float
+
+    def health(self, max_lag: float) -> float:
+        """Score the endpoint from 0 to 1: its success rate, scaled down when it lags"""
+        if self.lag is None or self.lag <= max_lag:
+            return self.success
+        return self.success * (max_lag + 1) / (self.lag + 1)
+
+    def cost(self, max_lag: float) -> float:
+        """Expected milliseconds per answered call, for ordering endpoints"""
+        health = self.health(max_lag)
+        if self.latency_ms is None or health <= 0:
+            return float("inf")
+        return self.latency_ms / health
+
+
+def _ewma(previous: Optional[float], value: Optional[float], alpha: float) -> Optional[float]:
+    if value is None:
+        return previous
+    if previous is None:
+        return float(value)
+    return previous + alpha * (value - previous)
+
+
+def _stored_score(fields: Any) -> Optional[EndpointScore]:
+    """Rebuild a saved score, or None if the entry is malformed"""
+    if not isinstance(fields, list) or len(fields) != len(EndpointScore._fields):
+        return None
+    latency_ms, success, lag, samples, updated_at = fields
+    numbers = (int, float)
+    if not all(isinstance(value, numbers) for value in (success, samples, updated_at)):
+        return None
+    if not all(value is None or isinstance(value, numbers) for value in (latency_ms, lag)):
+        return None
+    return EndpointScore(latency_ms, success, lag, samples, updated_at)
+
+
+class RpcScoreboard:
+    """Per-endpoint scores, updated from calls and probes and saved to a JSON file"""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        alpha: Optional[float] = None,
+        max_lag: Optional[float] = None,
+        max_age: Optional[float] = None,
+        min_health: Optional[float] = None,
+    ):
+        self.path = path
+        self.alpha = config.get("rpc.score_alpha", 0.3) if alpha is None else alpha
+        self.max_lag = config.get("rpc.max_lag", 5) if max_lag is None else max_lag
+        # Scores not updated for this many seconds are forgotten
+        self.max_age = config.get("rpc.score_max_age", 604800) if max_age is None else max_age
+        self.min_health = config.get("rpc.min_health", 0.5) if min_health is None else min_health
+        self._scores: Optional[Dict[str, EndpointScore]] = None
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    @property
+    def scores(self) -> Dict[str, EndpointScore]:
+        """Get every current score by URL, reading the file on first use"""
+        if self._scores is None:
+            with self._lock:
+                if self._scores is None:
+                    self._scores = self._read()
+        return self._scores
+
+    def _read(self) -> Dict[str, EndpointScore]:
+        if not self.path:
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable RPC scores in %s: %s", self.path, e)
+            return {}
+        if not isinstance(stored, dict) or stored.get("version") != SCORES_VERSION:
+            return {}
+        cutoff = time.time() - self.max_age
+        scores = {}
+        for url, fields in (stored.get("scores") or {}).items():
+            score = _stored_score(fields)
+            if score is not None and score.updated_at >= cutoff:
+                scores[url] = score
+        return scores
+
+    def get(self, url: str) -> Optional[EndpointScore]:
+        """Get an endpoint's score, or None if it has no recent one"""
+        score = self.scores.get(url)
+        if score is None or score.updated_at < time.time() - self.max_age:
+            return None
+        return score
+
+    def record(
+        self,
+        url: str,
+        latency_ms: Optional[float] = None,
+        ok: bool = True,
+        lag: Optional[float] = None,
+        at: Optional[float] = None,
+    ) -> EndpointScore:
+        """Fold the outcome of one call into an endpoint's averages"""
+        at = time.time() if at is None else at
+        loaded = self.scores
+        with self._lock:
+            # Taken under the lock, since save() swaps in the merged dict
+            scores = self._scores if self._scores is not None else loaded
+            previous = scores.get(url)
+            if previous is None or previous.updated_at < at - self.max_age:
+                score = EndpointScore(
+                    float(latency_ms) if ok and latency_ms is not None else None,
+                    1.0 if ok else 0.0,
+                    float(lag) if lag is not None else None,
+                    1,
+                    at,
+                )
+            else:
+                success = 1.0 if ok else 0.0
+                score = EndpointScore(
+                    _ewma(previous.latency_ms, latency_ms if ok else None, self.alpha),
+                    previous.success + self.alpha * (success - previous.success),
+                    _ewma(previous.lag, lag, self.alpha),
+                    previous.samples + 1,
+                    max(at, previous.updated_at),
+                )
+            scores[url] = score
+            self._dirty = True
+        return score
+
+    def record_probe(self, report: Any) -> None:
+        """Fold a ChainProbe into the scores; endpoints that were never called are skipped"""
+        for endpoint in report.endpoints:
+            if unusable(endpoint.url) is not None:
+                continue
+            ok = endpoint.error is None and not endpoint.mismatched
+            self.record(endpoint.url, endpoint.latency_ms, ok, endpoint.lag)
+
+    def health(self, url: str) -> Optional[float]:
+        """Get an endpoint's health from 0 to 1, or None if it has no recent score"""
+        score = self.get(url)
+        return score.health(self.max_lag) if score is not None else None
+
+    def rank(self, urls: Iterable[str], min_health: Optional[float] = None) -> Tuple[str, ...]:
+        """Order URLs best-first and drop those below min_health
+
+        Scored endpoints come first, cheapest expected round trip first, and
+        endpoints with no recent score follow in their original order, since
+        nothing is known against them.
+        """
+        min_health = self.min_health if min_health is None else min_health
+        scored = []
+        unscored = []
+        for position, url in enumerate(urls):
+            score = self.get(url)
+            if score is None:
+                unscored.append(url)
+            elif score.health(self.max_lag) >= min_health:
+                scored.append((score.cost(self.max_lag), position, url))
+        scored.sort()
+        return tuple(url for _, _, url in scored) + tuple(unscored)
+
+    def save(self) -> None:
+        """Write the scores if they changed, keeping newer ones another process saved"""
+        if not self.path or not self._dirty:
+            return
+        with self._lock:
+            merged = self._read()
+            for url, score in (self._scores or {}).items():
+                saved = merged.get(url)
+                if saved is None or saved.updated_at <= score.updated_at:
+                    merged[url] = score
+            cutoff = time.time() - self.max_age
+            merged = {url: score for url, score in merged.items() if score.updated_at >= cutoff}
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(
+                        {
+                            "version": SCORES_VERSION,
+                            "scores": {url: list(score) for url, score in merged.items()},
+                        },
+                        f,
+                        separators=(",", ":"),
+                    )
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                logger.warning("Error saving RPC scores to %s: %s", self.path, e)
+                return
+            self._scores = merged
+            self._dirty = False
@@ -0,0 +1,454 @@
+"""Sharing chain event subscriptions over a few WebSocket connections.
+
+A SubscriptionManager keeps ``connections`` WebSockets (2 by default) open to
+a chain's best wss endpoints, each to a different endpoint where there are
+enough. Every subscription, to new heads or to logs matching a filter, is made
+once on each connection. Subscribers asking for the same events share it, so
+any number of new heads subscribers cost one upstream subscription per
+connection.
+
+Each event then arrives once per connection. The first copy is passed on and
+later ones are dropped: heads by block hash, logs by block hash, transaction
+and log index. A subscriber sees every event once, as soon as the fastest
+endpoint sends it, and a stalled endpoint costs nothing while another is live.
+
+A dropped connection is reopened at once on the next endpoint, and every live
+subscription is made again on it. The dropped endpoint sits out the same
+backoff RpcClient uses. Events sent while no connection was open are not
+replayed.
+"""
+
+import asyncio
+import itertools
+import json
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional, Sequence, Set, Tuple, Union
+
+import aiohttp
+
+from ..core.config import config
+from ..core.logger import RpcError, get_logger
+from .log_scan import Topics, decode_log, log_filter
+from .rpc_client import Endpoint
+from .rpc_index import unusable
+from .rpc_probe import quantity, rpc_result
+from .rpc_scores import RpcScoreboard
+
+logger = get_logger("api.rpc_subscriptions")
+
+HEADS = "newHeads"
+LOGS = "logs"
+
+# Events remembered per subscription to drop the copies other connections send
+DEDUP_WINDOW = 4096
+
+# Header fields that are hex quantities and are decoded to integers
+HEAD_QUANTITY_FIELDS = ("number", "timestamp")
+
+
+def decode_head(head: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn a header's hex number and timestamp into integers"""
+    decoded = dict(head)
+    for field in HEAD_QUANTITY_FIELDS:
+        value = decoded.get(field)
+        if isinstance(value, str):
+            decoded[field] = quantity(value)
+    return decoded
+
+
+def event_key(kind: str, event: Dict[str, Any]) -> Any:
+    """Identify an event so copies of it from other connections can be dropped"""
+    if kind == HEADS:
+        return event.get("hash") or event.get("number")
+    return (
+        event.get("blockHash"),
+        event.get("transactionHash"),
+        event.get("logIndex"),
+        bool(event.get("removed")),
+    )
+
+
+class _Feed:
+    """One upstream subscription and the subscribers sharing it"""
+
+    def __init__(self, kind: str, params: List[Any]):
+        self.kind = kind
+        self.params = params
+        self.key = json.dumps(params, sort_keys=True)
+        self.subscribers: Set["Subscription"] = set()
+        self.seen: "OrderedDict[Any, None]" = OrderedDict()
+        # Set once any connection has made the subscription
+        self.ready = asyncio.Event()
+
+    def deliver(self, event: Dict[str, Any], stats: Dict[str, int]) -> None:
+        key = event_key(self.kind, event)
+        if key in self.seen:
+            stats["duplicates"] += 1
+            return
+        # Decoded before it is recorded, so a malformed copy does not hide a good one
+        decoded = decode_head(event) if self.kind == HEADS else decode_log(event)
+        self.seen[key] = None
+        if len(self.seen) > DEDUP_WINDOW:
+            self.seen.popitem(last=False)
+        stats["events"] += 1
+        for subscriber in self.subscribers:
+            subscriber._put(decoded)
+
+
+class Subscription:
+    """One subscriber's events, read with ``async for``; close it when done
+
+    Events wait in a queue of up to max_queue; when a subscriber falls that
+    far behind, its oldest events are dropped so it cannot hold up the others.
+    """
+
+    def __init__(self, manager: "SubscriptionManager", feed: _Feed, max_queue: int):
+        self._manager = manager
+        self._feed = feed
+        self._events: Deque[Dict[str, Any]] = deque(maxlen=max_queue)
+        self._wakeup = asyncio.Event()
+        self.closed = False
+        self.dropped = 0
+
+    @property
+    def kind(self) -> str:
+        return self._feed.kind
+
+    def _put(self, event: Dict[str, Any]) -> None:
+        if len(self._events) == self._events.maxlen:
+            self.dropped += 1
+            self._manager.stats["dropped"] += 1
+        self._events.append(event)
+        self._wakeup.set()
+
+    def _end(self) -> None:
+        self.closed = True
+        self._wakeup.set()
+
+    async def ready(self, timeout: Optional[float] = None) -> None:
+        """Wait until at least one connection is delivering this subscription's events"""
+        await asyncio.wait_for(self._feed.ready.wait(), timeout)
+
+    def __aiter__(self) -> "Subscription":
+        return self
+
+    async def __anext__(self) -> Dict[str, Any]:
+        while not self._events:
+            if self.closed:
+                raise StopAsyncIteration
+            self._wakeup.clear()
+            await self._wakeup.wait()
+        return self._events.popleft()
+
+    async def __aenter__(self) -> "Subscription":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Stop receiving events; the upstream subscription ends with its last subscriber"""
+        if not self.closed:
+            self._end()
+            await self._manager._leave(self)
+
+
+class _Connection:
+    """One WebSocket, reopened on another endpoint whenever it drops"""
+
+    def __init__(self, manager: "SubscriptionManager"):
+        self.manager = manager
+        self.endpoint: Optional[Endpoint] = None
+        self.ws: "Optional[aiohttp.ClientWebSocketResponse[bool]]" = None
+        # Upstream subscription ids by feed key, and feeds by subscription id
+        self.subscribed: Dict[str, str] = {}
+        self.feeds: Dict[str, _Feed] = {}
+        self._subscribing: Set[str] = set()
+        self._pending: Dict[int, Tuple["asyncio.Future[Any]", Optional[_Feed]]] = {}
+
+    async def run(self) -> None:
+        manager = self.manager
+        while True:
+            endpoint = await manager._pick(self)
+            started = time.perf_counter()
+            try:
+                ws = await asyncio.wait_for(
+                    manager._session().ws_connect(endpoint.url, heartbeat=manager.heartbeat),
+                    manager.timeout,
+                )
+            except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+                manager._failed(endpoint, str(e) or type(e).__name__)
+                self.endpoint = None
+                continue
+            manager._answered(endpoint, (time.perf_counter() - started) * 1000)
+            manager.stats["connects"] += 1
+            self.ws = ws
+            reader = asyncio.ensure_future(self._read(ws))
+            try:
+                await asyncio.gather(*(self.subscribe(feed) for feed in manager._feeds.values()))
+                await reader
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("WebSocket to %s failed: %s", endpoint.url, e)
+            finally:
+                reader.cancel()
+                self.ws = None
+                await ws.close()
+                self._reset()
+            manager.stats["disconnects"] += 1
+            logger.info("WebSocket to %s closed; reconnecting", endpoint.url)
+            # A drop counts against the endpoint only for choosing where to reconnect
+            endpoint.failed()
+            self.endpoint = None
+
+    def _reset(self) -> None:
+        self.subscribed.clear()
+        self.feeds.clear()
+        for future, _ in self._pending.values():
+            if not future.done():
+                future.set_exception(RpcError("WebSocket closed"))
+        self._pending.clear()
+
+    async def _read(self, ws: "aiohttp.ClientWebSocketResponse[bool]") -> None:
+        async for message in ws:
+            if message.type != aiohttp.WSMsgType.TEXT:
+                continue
+            try:
+                body = json.loads(message.data)
+            except ValueError:
+                continue
+            if not isinstance(body, dict):
+                continue
+            if body.get("method") == "eth_subscription":
+                params = body.get("params")
+                if not isinstance(params, dict):
+                    continue
+                subscription_id = params.get("subscription")
+                feed = self.feeds.get(subscription_id) if isinstance(subscription_id, str) else None
+                if feed is None or not isinstance(params.get("result"), dict):
+                    continue
+                try:
+                    feed.deliver(params["result"], self.manager.stats)
+                except (RpcError, TypeError, ValueError) as e:
+                    logger.debug("Skipping malformed %s event from %s: %s", feed.kind, self.url, e)
+                continue
+            request_id = body.get("id")
+            pending = self._pending.get(request_id) if isinstance(request_id, int) else None
+            if pending is None or pending[0].done():
+                continue
+            future, feed = pending
+            try:
+                result = rpc_result(body)
+            except RpcError as e:
+                future.set_exception(e)
+                continue
+            if feed is not None:
+                # Recorded here so notifications right after the answer find their feed
+                self.subscribed[feed.key] = result
+                self.feeds[result] = feed
+            future.set_result(result)
+
+    async def _request(self, method: str, params: List[Any], feed: Optional[_Feed] = None) -> Any:
+        ws = self.ws
+        if ws is None:
+            raise RpcError("WebSocket closed")
+        request_id = self.manager._next_id()
+        future: "asyncio.Future[Any]" = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = (future, feed)
+        try:
+            await ws.send_str(
+                json.dumps({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params})
+            )
+            return await asyncio.wait_for(future, self.manager.timeout)
+        except (ConnectionError, aiohttp.ClientError) as e:
+            raise RpcError(f"WebSocket send failed: {e}") from None
+        except asyncio.TimeoutError:
+            raise RpcError(f"{method} timed out after {self.manager.timeout:g}s") from None
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def subscribe(self, feed: _Feed) -> None:
+        """Make a feed's subscription on this connection if it is open and lacks it"""
+        if self.ws is None or feed.key in self.subscribed or feed.key in self._subscribing:
+            return
+        self._subscribing.add(feed.key)
+        try:
+            await self._request("eth_subscribe", feed.params, feed)
+        except RpcError as e:
+            logger.warning("Subscribing to %s on %s failed: %s", feed.kind, self.url, e.message)
+            return
+        finally:
+            self._subscribing.discard(feed.key)
+        feed.ready.set()
+        # The last subscriber may have left while the subscription was made
+        if feed.key not in self.manager._feeds:
+            await self.unsubscribe(feed)
+
+    async def unsubscribe(self, feed: _Feed) -> None:
+        subscription_id = self.subscribed.pop(feed.key, None)
+        if subscription_id is None:
+            return
+        self.feeds.pop(subscription_id, None)
+        try:
+            await self._request("eth_unsubscribe", [subscription_id])
+        except RpcError as e:
+            logger.debug("Unsubscribing on %s failed: %s", self.url, e.message)
+
+    @property
+    def url(self) -> Optional[str]:
+        return self.endpoint.url if self.endpoint is not None else None
+
+
+class SubscriptionManager:
+    """Multiplex newHeads and logs subscriptions over a pool of WebSockets to one chain
+
+    Use it as an async context manager, or call close() when done, so that
+    connections are closed and subscribers' iterators end.
+    """
+
+    def __init__(
+        self,
+        urls: Sequence[str],
+        scoreboard: Optional[RpcScoreboard] = None,
+        connections: Optional[int] = None,
+        timeout: Optional[float] = None,
+        heartbeat: Optional[float] = None,
+        max_queue: Optional[int] = None,
+    ):
+        urls = [url for url in dict.fromkeys(urls) if unusable(url) is None]
+        urls = [url for url in urls if url.lower().startswith(("ws://", "wss://"))]
+        if not urls:
+            raise ValueError("No usable WebSocket endpoints")
+        self.endpoints = [Endpoint(url) for url in urls]
+        self.scoreboard = scoreboard
+        # WebSockets kept open, each to a different endpoint while there are enough
+        self.connections = (
+            config.get("rpc.ws_connections", 2) if connections is None else connections
+        )
+        self.timeout = config.get("rpc.timeout", 5.0) if timeout is None else timeout
+        # Seconds between pings that find a silently dead connection
+        self.heartbeat = config.get("rpc.ws_heartbeat", 15.0) if heartbeat is None else heartbeat
+        self.max_queue = config.get("rpc.ws_queue", 1000) if max_queue is None else max_queue
+        self.stats = {"connects": 0, "disconnects": 0, "events": 0, "duplicates": 0, "dropped": 0}
+        self._feeds: Dict[str, _Feed] = {}
+        self._pool: List[_Connection] = []
+        self._tasks: List["asyncio.Task[None]"] = []
+        self._background: Set["asyncio.Task[Any]"] = set()
+        self._client_session: Optional[aiohttp.ClientSession] = None
+        self._ids = itertools.count(1)
+        self._closed = False
+
+    async def __aenter__(self) -> "SubscriptionManager":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def close(self, save: bool = True) -> None:
+        """Close every connection, end every subscription and save the scores"""
+        self._closed = True
+        for task in self._tasks + list(self._background):
+            task.cancel()
+        await asyncio.gather(*self._tasks, *self._background, return_exceptions=True)
+        self._tasks.clear()
+        for feed in self._feeds.values():
+            for subscriber in feed.subscribers:
+                subscriber._end()
+        self._feeds.clear()
+        if self._client_session is not None:
+            await self._client_session.close()
+            self._client_session = None
+        if save and self.scoreboard is not None:
+            self.scoreboard.save()
+
+    def _session(self) -> aiohttp.ClientSession:
+        if self._client_session is None:
+            self._client_session = aiohttp.ClientSession()
+        return self._client_session
+
+    def _next_id(self) -> int:
+        return next(self._ids)
+
+    async def _pick(self, connection: _Connection) -> Endpoint:
+        """Choose the best endpoint out of backoff, preferring one no other connection uses"""
+        while True:
+            in_use = {other.url for other in self._pool if other is not connection}
+            now = time.monotonic()
+            available = [endpoint for endpoint in self.endpoints if endpoint.available_at <= now]
+            if available:
+                unused = [endpoint for endpoint in available if endpoint.url not in in_use]
+                connection.endpoint = (unused or available)[0]
+                return connection.endpoint
+            await asyncio.sleep(min(endpoint.available_at for endpoint in self.endpoints) - now)
+
+    def _answered(self, endpoint: Endpoint, latency_ms: float) -> None:
+        endpoint.answered(latency_ms)
+        if self.scoreboard is not None:
+            self.scoreboard.record(endpoint.url, latency_ms, ok=True)
+
+    def _failed(self, endpoint: Endpoint, message: str) -> None:
+        logger.debug("WebSocket to %s failed: %s", endpoint.url, message)
+        endpoint.failed()
+        if self.scoreboard is not None:
+            self.scoreboard.record(endpoint.url, ok=False)
+
+    def _start(self) -> None:
+        if self._closed:
+            raise RpcError("Subscription manager is closed")
+        if self._pool:
+            return
+        for _ in range(max(1, min(self.connections, len(self.endpoints)))):
+            connection = _Connection(self)
+            self._pool.append(connection)
+            self._tasks.append(asyncio.ensure_future(connection.run()))
+
+    def _spawn(self, coroutine: Any) -> None:
+        task = asyncio.ensure_future(coroutine)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    def subscribe(self, kind: str, params: Optional[Dict[str, Any]] = None) -> Subscription:
+        """Subscribe to newHeads or to logs matching params, sharing an existing subscription"""
+        if kind not in (HEADS, LOGS):
+            raise ValueError(f"Unsupported subscription {kind!r}")
+        self._start()
+        feed_params: List[Any] = [kind, params] if params else [kind]
+        key = json.dumps(feed_params, sort_keys=True)
+        feed = self._feeds.get(key)
+        if feed is None:
+            feed = self._feeds[key] = _Feed(kind, feed_params)
+            for connection in self._pool:
+                if connection.ws is not None:
+                    self._spawn(connection.subscribe(feed))
+        subscription = Subscription(self, feed, self.max_queue)
+        feed.subscribers.add(subscription)
+        return subscription
+
+    def new_heads(self) -> Subscription:
+        """Subscribe to each new block header"""
+        return self.subscribe(HEADS)
+
+    def logs(
+        self, address: Union[None, str, Sequence[str]] = None, topics: Optional[Topics] = None
+    ) -> Subscription:
+        """Subscribe to logs from address matching topics, as they are mined"""
+        return self.subscribe(LOGS, log_filter(address, topics))
+
+    async def _leave(self, subscription: Subscription) -> None:
+        feed = subscription._feed
+        feed.subscribers.discard(subscription)
+        if feed.subscribers or self._feeds.get(feed.key) is not feed:
+            return
+        del self._feeds[feed.key]
+        await asyncio.gather(*(connection.unsubscribe(feed) for connection in self._pool))
+
+    @property
+    def connected(self) -> List[str]:
+        """Get the URLs of the open connections"""
+        return [
+            connection.endpoint.url
+            for connection in self._pool
+            if connection.ws is not None and connection.endpoint is not None
+        ]
@@ -0,0 +1,375 @@
+"""Synthetic, schema-faithful datasets for scale testing.
+
+Every generator is deterministic for a given seed and produces records in the
+same shape the upstream APIs return, so they can be fed straight into
+``ChainlistAPI.initialize_data_structures``, the DefiLlama helpers, the
+Etherscan models, or written out as recordings for the stub server::
+
+    python -m src.bench.datasets --out recordings --chains 100000 --pools 1000000
+"""
+
+import argparse
+import hashlib
+import random
+from typing import Any, Dict, List, Optional
+
+from ..core.recorder import Recorder
+
+NAME_PARTS = [
+    "Aurora",
+    "Nova",
+    "Zeta",
+    "Orbit",
+    "Flux",
+    "Nexus",
+    "Quark",
+    "Helix",
+    "Lumen",
+    "Vertex",
+    "Astra",
+    "Boreal",
+    "Cinder",
+    "Delta",
+    "Ember",
+    "Forge",
+    "Granite",
+    "Harbor",
+    "Ion",
+    "Jade",
+    "Krypton",
+    "Lattice",
+    "Meridian",
+    "Nimbus",
+    "Onyx",
+    "Prism",
+    "Quantum",
+    "Radiant",
+    "Summit",
+    "Titan",
+    "Umbra",
+    "Vector",
+    "Willow",
+    "Xenon",
+    "Yonder",
+    "Zephyr",
+]
+NAME_SUFFIXES = ["Mainnet", "Testnet", "Chain", "Network", "One", "L2", "Devnet", "Sepolia"]
+SYMBOLS = ["ETH", "BNB", "MATIC", "AVAX", "FTM", "GLMR", "CELO", "XDAI", "CRO", "KAVA"]
+TRACKING = ["none", "limited", "yes"]
+EXPLORER_STANDARDS = ["EIP3091", "none"]
+CATEGORIES = ["Dexes", "Lending", "CDP", "Bridge", "Liquid Staking", "Yield", "Derivatives"]
+ORACLES = ["Chainlink", "Pyth", "RedStone", "Chronicle", "API3", "UMA"]
+POOL_CHAINS = ["Ethereum", "Arbitrum", "Optimism", "Polygon", "BSC", "Base", "Avalanche"]
+TOKENS = ["USDC", "USDT", "DAI", "WETH", "WBTC", "stETH", "FRAX", "LINK", "UNI", "AAVE"]
+
+# Transaction fields that token transfers share
+TRANSFER_TX_FIELDS = (
+    "blockNumber",
+    "timeStamp",
+    "hash",
+    "nonce",
+    "blockHash",
+    "from",
+    "to",
+    "transactionIndex",
+    "gas",
+    "gasPrice",
+    "gasUsed",
+    "cumulativeGasUsed",
+    "input",
+    "confirmations",
+)
+
+
+def _hex(rng: random.Random, length: int) -> str:
+    """Generate a random 0x-prefixed hex string of the given number of digits"""
+    return "0x" + "".join(rng.choice("0123456789abcdef") for _ in range(length))
+
+
+def generate_chains(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Generate chains in the chainlist ``rpcs.json`` shape"""
+    rng = random.Random(seed)
+    chains = []
+    for i in range(count):
+        parts = len(NAME_PARTS)
+        base = f"{NAME_PARTS[i % parts]} {NAME_PARTS[(i // parts) % parts]}"
+        suffix = rng.choice(NAME_SUFFIXES)
+        # Part combinations run out after parts ** 2 chains, then names get a number
+        name = f"{base} {suffix} {i}" if i >= parts**2 else f"{base} {suffix}"
+        slug = name.lower().replace(" ", "-")
+        short_name = "".join(word[0] for word in name.split()[:-1]).lower() + str(i)
+        symbol = rng.choice(SYMBOLS)
+        host = slug.replace("-", "")
+
+        rpcs = []
+        for j in range(rng.randint(1, 8)):
+            scheme = rng.choices(["https", "wss", "http"], weights=[7, 2, 1])[0]
+            rpc: Dict[str, Any] = {
+                "url": f"{scheme}://rpc{j}.{host}.example.org",
+                "tracking": rng.choice(TRACKING),
+            }
+            if rng.random() < 0.5:
+                rpc["isOpenSource"] = rng.random() < 0.5
+            rpcs.append(rpc)
+
+        testnet = suffix in ("Testnet", "Devnet", "Sepolia")
+        chains.append(
+            {
+                "name": name,
+                "chain": symbol,
+                "icon": host,
+                "rpc": rpcs,
+                "features": [{"name": "EIP155"}, {"name": "EIP1559"}][: rng.randint(0, 2)],
+                "faucets": [f"https://faucet.{host}.example.org"] if testnet else [],
+                "nativeCurrency": {"name": f"{symbol} Token", "symbol": symbol, "decimals": 18},
+                "infoURL": f"https://{host}.example.org",
+                "shortName": short_name,
+                "chainId": 100_000 + i,
+                "networkId": 100_000 + i,
+                "network": "testnet" if testnet else "mainnet",
+                "explorers": [
+                    {
+                        "name": f"{base} Explorer",
+                        "url": f"https://explorer.{host}.example.org",
+                        "standard": rng.choice(EXPLORER_STANDARDS),
+                    }
+                    for _ in range(rng.randint(1, 2))
+                ],
+                "tvl": round(rng.uniform(0, 1e9), 2) if rng.random() < 0.3 else None,
+                "chainSlug": slug,
+            }
+        )
+    return chains
+
+
+def generate_protocols(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Generate protocols in the DefiLlama ``/protocols`` shape"""
+    rng = random.Random(seed)
+    protocols = []
+    for i in range(count):
+        kind = rng.choice(["Finance", "Swap", "Lend", "Vault", "DAO"])
+        name = f"{rng.choice(NAME_PARTS)} {kind} {i}"
+        chains = rng.sample(POOL_CHAINS, rng.randint(1, 4))
+        tvl = rng.lognormvariate(14, 3)
+        protocols.append(
+            {
+                "id": str(i),
+                "name": name,
+                "slug": name.lower().replace(" ", "-"),
+                "symbol": rng.choice(TOKENS),
+                "url": f"https://{name.lower().replace(' ', '')}.example.org",
+                "category": rng.choice(CATEGORIES),
+                "chains": chains,
+                "chain": chains[0] if len(chains) == 1 else "Multi-Chain",
+                "oracles": rng.sample(ORACLES, rng.randint(0, 2)),
+                "tvl": tvl,
+                "chainTvls": {chain: tvl / len(chains) for chain in chains},
+                "change_1h": round(rng.uniform(-5, 5), 4),
+                "change_1d": round(rng.uniform(-15, 15), 4),
+                "change_7d": round(rng.uniform(-40, 40), 4),
+                "mcap": rng.choice([None, tvl * rng.uniform(0.1, 3)]),
+            }
+        )
+    return protocols
+
+
+def generate_pools(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Generate yield pools in the DefiLlama ``/pools`` ``data`` shape"""
+    rng = random.Random(seed)
+    pools = []
+    for i in range(count):
+        tokens = rng.sample(TOKENS, rng.randint(1, 2))
+        apy_base = round(rng.expovariate(0.2), 4)
+        apy_reward = round(rng.expovariate(0.5), 4) if rng.random() < 0.4 else None
+        pools.append(
+            {
+                "pool": hashlib.md5(f"{seed}:{i}".encode()).hexdigest(),
+                "chain": rng.choice(POOL_CHAINS),
+                "project": f"{rng.choice(NAME_PARTS).lower()}-{rng.randint(1, 500)}",
+                "symbol": "-".join(tokens),
+                "tvlUsd": round(rng.lognormvariate(12, 2.5), 2),
+                "apyBase": apy_base,
+                "apyReward": apy_reward,
+                "apy": round(apy_base + (apy_reward or 0), 4),
+                "rewardTokens": [_hex(rng, 40)] if apy_reward else None,
+                "underlyingTokens": [_hex(rng, 40) for _ in tokens],
+                "stablecoin": all(token in ("USDC", "USDT", "DAI", "FRAX") for token in tokens),
+                "ilRisk": "no" if len(tokens) == 1 else "yes",
+                "exposure": "single" if len(tokens) == 1 else "multi",
+                "poolMeta": None,
+                "mu": round(rng.uniform(0, 20), 4),
+                "sigma": round(rng.uniform(0, 2), 4),
+                "count": rng.randint(1, 1000),
+                "outlier": rng.random() < 0.02,
+                "predictions": {
+                    "predictedClass": rng.choice(["Stable/Up", "Down"]),
+                    "predictedProbability": rng.randint(50, 99),
+                    "binnedConfidence": rng.randint(1, 3),
+                },
+            }
+        )
+    return pools
+
+
+def generate_price_chart(
+    coins: List[str], points: int, start: int = 1_600_000_000, span: int = 3600, seed: int = 0
+) -> Dict[str, Any]:
+    """Generate a coins ``/chart/{coins}`` response with a random walk per coin"""
+    rng = random.Random(seed)
+    chart = {}
+    for coin in coins:
+        price = rng.uniform(0.5, 5000)
+        prices = []
+        for i in range(points):
+            price = max(price * (1 + rng.gauss(0, 0.01)), 1e-6)
+            prices.append({"timestamp": start + i * span, "price": round(price, 6)})
+        chart[coin] = {
+            "symbol": coin.split(":")[-1].upper(),
+            "confidence": 0.99,
+            "decimals": 18,
+            "prices": prices,
+        }
+    return {"coins": chart}
+
+
+def generate_transactions(
+    count: int, address: Optional[str] = None, seed: int = 0
+) -> List[Dict[str, str]]:
+    """Generate Etherscan ``account/txlist`` results"""
+    rng = random.Random(seed)
+    address = address or _hex(rng, 40)
+    block = 18_000_000
+    timestamp = 1_700_000_000
+    transactions = []
+    for i in range(count):
+        block += rng.randint(0, 20)
+        timestamp += rng.randint(0, 240)
+        outgoing = rng.random() < 0.5
+        transactions.append(
+            {
+                "blockNumber": str(block),
+                "timeStamp": str(timestamp),
+                "hash": _hex(rng, 64),
+                "nonce": str(i),
+                "blockHash": _hex(rng, 64),
+                "transactionIndex": str(rng.randint(0, 300)),
+                "from": address if outgoing else _hex(rng, 40),
+                "to": _hex(rng, 40) if outgoing else address,
+                "value": str(rng.randint(0, 10**20)),
+                "gas": str(rng.randint(21_000, 500_000)),
+                "gasPrice": str(rng.randint(10**9, 10**11)),
+                "gasUsed": str(rng.randint(21_000, 300_000)),
+                "cumulativeGasUsed": str(rng.randint(21_000, 30_000_000)),
+                "input": "0x" if rng.random() < 0.6 else _hex(rng, 136),
+                "contractAddress": "",
+                "confirmations": str(rng.randint(1, 100_000)),
+                "isError": "0" if rng.random() < 0.97 else "1",
+                "txreceipt_status": "1",
+            }
+        )
+    return transactions
+
+
+def generate_token_transfers(
+    count: int, address: Optional[str] = None, seed: int = 0
+) -> List[Dict[str, str]]:
+    """Generate Etherscan ``account/tokentx`` results"""
+    rng = random.Random(seed)
+    address = address or _hex(rng, 40)
+    contracts = {token: _hex(rng, 40) for token in TOKENS}
+    transfers = []
+    for tx in generate_transactions(count, address, seed):
+        token = rng.choice(TOKENS)
+        transfer = {key: tx[key] for key in TRANSFER_TX_FIELDS}
+        transfer.update(
+            {
+                "contractAddress": contracts[token],
+                "value": str(rng.randint(0, 10**24)),
+                "tokenName": token,
+                "tokenSymbol": token,
+                "tokenDecimal": "6" if token in ("USDC", "USDT") else "18",
+            }
+        )
+        transfers.append(transfer)
+    return transfers
+
+
+def write_recordings(
+    directory: str,
+    chains: int = 0,
+    protocols: int = 0,
+    pools: int = 0,
+    price_points: int = 0,
+    transactions: int = 0,
+    seed: int = 0,
+) -> None:
+    """Write synthetic datasets as recordings the stub server can replay"""
+    recorder = Recorder(directory)
+    if chains:
+        recorder.record("chainlist", "", "/rpcs.json", "rpcs", generate_chains(chains, seed))
+    if protocols:
+        recorder.record(
+            "defillama", "", "/protocols", "protocols", generate_protocols(protocols, seed)
+        )
+    if pools:
+        recorder.record(
+            "yields",
+            "",
+            "/pools",
+            "pools",
+            {"status": "success", "data": generate_pools(pools, seed)},
+        )
+    if price_points:
+        coins = ["coingecko:ethereum", "coingecko:bitcoin"]
+        recorder.record(
+            "coins",
+            "",
+            f"/chart/{','.join(coins)}",
+            "chart",
+            generate_price_chart(coins, price_points, seed=seed),
+        )
+    if transactions:
+        for action, records in (
+            ("txlist", generate_transactions(transactions, seed=seed)),
+            ("tokentx", generate_token_transfers(transactions, seed=seed)),
+        ):
+            recorder.record(
+                "etherscan",
+                "",
+                "/",
+                action,
+                {"status": "1", "message": "OK", "result": records},
+                {"module": "account", "action": action},
+            )
+
+
+def main() -> None:
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Generate synthetic datasets")
+    parser.add_argument("--out", required=True, help="Recording directory to write")
+    parser.add_argument("--chains", type=int, default=10_000, help="Number of chains")
+    parser.add_argument("--protocols", type=int, default=10_000, help="Number of protocols")
+    parser.add_argument("--pools", type=int, default=10_000, help="Number of yield pools")
+    parser.add_argument(
+        "--price-points", type=int, default=10_000, help="Price chart points per coin"
+    )
+    parser.add_argument(
+        "--transactions", type=int, default=10_000, help="Etherscan transactions/transfers"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    write_recordings(
+        args.out,
+        chains=args.chains,
+        protocols=args.protocols,
+        pools=args.pools,
+        price_points=args.price_points,
+        transactions=args.transactions,
+        seed=args.seed,
+    )
+    print(f"Wrote synthetic recordings to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
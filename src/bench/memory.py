@@ -0,0 +1,379 @@
+"""Memory harness for the flows that hold the most data at once.
+
+Each flow runs against synthetic data served through the real offline cache
+path, so JSON decoding, indexing, filtering and rendering are all measured the
+way the CLI runs them. For every flow the harness reports the RSS peak (sampled
+from a background thread, in a run without tracemalloc overhead), the
+tracemalloc peak, the memory still held by the flow's result, what leaks once
+that result is released, and the top allocation sites::
+
+    python -m src.bench.memory --scale 4 --budget-mb 512 --json
+
+Flows run in a fresh interpreter each by default so RSS numbers do not bleed
+into one another. The exit status is 1 when any flow's RSS peak exceeds the
+budget, which makes the harness usable as a CI gate for 512MB workers.
+"""
+
+import argparse
+import contextlib
+import gc
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from tabulate import tabulate
+
+from ..api.chainlist import chainlist_api
+from ..api.defillama import defillama_api
+from ..core.cache import blockchain_cache, defillama_cache, etherscan_cache
+from ..core.config import config
+from ..models.chain import Chain
+from .datasets import generate_chains, generate_pools, generate_protocols
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+
+# Record counts at scale 1, roughly what the upstream APIs return today
+DEFAULT_SIZES = {"chains": 2_500, "protocols": 5_000, "pools": 20_000}
+
+
+def current_rss() -> int:
+    """Get the resident set size of this process in bytes"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        # No procfs: fall back to the high-water mark, which is the best we have
+        import resource
+
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return usage if sys.platform == "darwin" else usage * 1024
+
+
+class RSSSampler:
+    """Sample RSS from a background thread and keep the peak"""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.start_rss = 0
+        self.peak_rss = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.peak_rss = max(self.peak_rss, current_rss())
+            time.sleep(self.interval)
+
+    def __enter__(self) -> "RSSSampler":
+        self.start_rss = self.peak_rss = current_rss()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak_rss = max(self.peak_rss, current_rss())
+
+
+class PeakSnapshotter:
+    """Snapshot tracemalloc whenever traced memory reaches a new high.
+
+    The final snapshot only shows what a flow kept; transient peaks such as a
+    decoded response that is filtered down are only visible while they last.
+    """
+
+    def __init__(self, interval: float = 0.01, growth: float = 1.05):
+        self.interval = interval
+        self.growth = growth
+        self.snapshot: Optional[tracemalloc.Snapshot] = None
+        self._best = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            current = tracemalloc.get_traced_memory()[0]
+            if current > self._best * self.growth:
+                self._best = current
+                self.snapshot = tracemalloc.take_snapshot()
+            time.sleep(self.interval)
+
+    def __enter__(self) -> "PeakSnapshotter":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+@contextlib.contextmanager
+def scratch_cache() -> Iterator[str]:
+    """Point every cache at a temporary directory and serve it offline"""
+    caches = (blockchain_cache, defillama_cache, etherscan_cache)
+    saved_dirs = [cache.cache_dir for cache in caches]
+    saved_offline = config.get("network.offline")
+    with tempfile.TemporaryDirectory(prefix="chaindata-memory-") as directory:
+        for cache, saved in zip(caches, saved_dirs):
+            cache.cache_dir = os.path.join(directory, os.path.basename(saved))
+            os.makedirs(cache.cache_dir, exist_ok=True)
+        config.set("network.offline", True)
+        try:
+            yield directory
+        finally:
+            for cache, saved in zip(caches, saved_dirs):
+                cache.cache_dir = saved
+            config.set("network.offline", saved_offline)
+
+
+def _import_chain_data() -> Any:
+    """Import the legacy CLI module without printing its banner"""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        if PROJECT_ROOT not in sys.path:
+            sys.path.insert(0, PROJECT_ROOT)
+        import chain_data
+    return chain_data
+
+
+def _seed_chains(scale: float) -> None:
+    chains = generate_chains(int(DEFAULT_SIZES["chains"] * scale))
+    blockchain_cache.save_to_cache("blockchain_data", chains)
+
+
+def _seed_protocols(scale: float) -> None:
+    protocols = generate_protocols(int(DEFAULT_SIZES["protocols"] * scale))
+    url = f"{defillama_api.base_url}/protocols"
+    defillama_cache.save_to_cache(defillama_api._sanitize_cache_key(url, None), protocols)
+
+
+def _seed_pools(scale: float) -> None:
+    pools = generate_pools(int(DEFAULT_SIZES["pools"] * scale))
+    url = f"{defillama_api.yields_url}/pools"
+    defillama_cache.save_to_cache(
+        defillama_api._sanitize_cache_key(url, None), {"status": "success", "data": pools}
+    )
+
+
+def _setup_chainlist_load(scale: float) -> Tuple:
+    _seed_chains(scale)
+    return ()
+
+
+def _run_chainlist_load() -> Any:
+    chainlist_api.get_all_blockchain_data()
+    return chainlist_api.blockchain_data
+
+
+def _run_chainlist_load_compact() -> Any:
+    compact = config.get("chainlist.compact_records")
+    config.set("chainlist.compact_records", True)
+    try:
+        return _run_chainlist_load()
+    finally:
+        config.set("chainlist.compact_records", compact)
+
+
+def _setup_get_pools(scale: float) -> Tuple:
+    _seed_pools(scale)
+    return (_import_chain_data(),)
+
+
+def _run_get_pools(chain_data: Any) -> Any:
+    return chain_data.get_pools(limit=50, min_tvl=1_000_000, min_apy=5.0)
+
+
+def _setup_protocols_format(scale: float) -> Tuple:
+    _seed_protocols(scale)
+    return (_import_chain_data(),)
+
+
+def _run_protocols_format(chain_data: Any) -> Any:
+    protocols = chain_data.defillama_api.get_all_protocols()
+    return chain_data.format_chain_data(protocols, "text", show_chains=True)
+
+
+def _setup_chain_validation(scale: float) -> Tuple:
+    _seed_chains(scale)
+    return (chainlist_api.get_all_blockchain_data(),)
+
+
+def _run_chain_validation(chains: List[Dict[str, Any]]) -> Any:
+    return [Chain(**chain) for chain in chains]
+
+
+# Flow name -> (setup, run); setup is not measured and its result is passed to run
+FLOWS: Dict[str, Tuple[Callable[[float], Tuple], Callable[..., Any]]] = {
+    "chainlist-load": (_setup_chainlist_load, _run_chainlist_load),
+    "chainlist-load-compact": (_setup_chainlist_load, _run_chainlist_load_compact),
+    "get-pools": (_setup_get_pools, _run_get_pools),
+    "protocols-format": (_setup_protocols_format, _run_protocols_format),
+    "chain-validation": (_setup_chain_validation, _run_chain_validation),
+}
+
+
+def _hotspots(snapshot: tracemalloc.Snapshot, top: int) -> List[Dict[str, Any]]:
+    """Get the allocation sites holding the most memory"""
+    snapshot = snapshot.filter_traces(
+        [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, threading.__file__),
+            tracemalloc.Filter(False, __file__),
+        ]
+    )
+    hotspots = []
+    for stat in snapshot.statistics("lineno")[:top]:
+        frame = stat.traceback[0]
+        filename = frame.filename
+        roots = [PROJECT_ROOT] + [path for path in sys.path if path]
+        for root in sorted(roots, key=len, reverse=True):
+            if filename.startswith(root + os.sep):
+                filename = os.path.relpath(filename, root)
+                break
+        hotspots.append(
+            {"location": f"{filename}:{frame.lineno}", "bytes": stat.size, "count": stat.count}
+        )
+    return hotspots
+
+
+def run_flow(name: str, scale: float = 1.0, top: int = 10) -> Dict[str, Any]:
+    """Measure one flow and return its memory report"""
+    setup, run = FLOWS[name]
+    with scratch_cache():
+        args = setup(scale)
+
+        # RSS pass, without tracemalloc inflating the numbers
+        gc.collect()
+        with RSSSampler() as sampler:
+            started = time.perf_counter()
+            result = run(*args)
+            elapsed = time.perf_counter() - started
+        del result
+        gc.collect()
+
+        # Allocation pass
+        tracemalloc.start()
+        with PeakSnapshotter() as watcher:
+            result = run(*args)
+        retained, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        peak_snapshot = watcher.snapshot or snapshot
+        del result
+        gc.collect()
+        leaked = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+    return {
+        "flow": name,
+        "scale": scale,
+        "seconds": round(elapsed, 4),
+        "rss_start_bytes": sampler.start_rss,
+        "rss_peak_bytes": sampler.peak_rss,
+        "traced_peak_bytes": peak,
+        "retained_bytes": retained,
+        "leaked_bytes": leaked,
+        "peak_hotspots": _hotspots(peak_snapshot, top),
+        "retained_hotspots": _hotspots(snapshot, top),
+    }
+
+
+def run_flows(
+    names: List[str], scale: float = 1.0, top: int = 10, isolate: bool = True
+) -> List[Dict[str, Any]]:
+    """Measure several flows, each in a fresh interpreter when isolated"""
+    if not isolate:
+        return [run_flow(name, scale, top) for name in names]
+
+    context = multiprocessing.get_context("spawn")
+    reports = []
+    for name in names:
+        with context.Pool(1) as pool:
+            reports.append(pool.apply(run_flow, (name, scale, top)))
+    return reports
+
+
+def _mb(value: int) -> str:
+    return f"{value / 1024 / 1024:,.1f}"
+
+
+def format_reports(reports: List[Dict[str, Any]], budget_mb: float) -> str:
+    """Render reports as a summary table followed by each flow's hotspots"""
+    rows = [
+        [
+            report["flow"],
+            f"{report['seconds']:.3f}",
+            _mb(report["rss_peak_bytes"]),
+            _mb(report["rss_peak_bytes"] - report["rss_start_bytes"]),
+            _mb(report["traced_peak_bytes"]),
+            _mb(report["retained_bytes"]),
+            _mb(report["leaked_bytes"]),
+            "OVER" if report["rss_peak_bytes"] > budget_mb * 1024 * 1024 else "ok",
+        ]
+        for report in reports
+    ]
+    headers = [
+        "Flow",
+        "Seconds",
+        "RSS peak MB",
+        "RSS growth MB",
+        "Traced peak MB",
+        "Retained MB",
+        "Leaked MB",
+        f"Budget {budget_mb:g}MB",
+    ]
+    lines = [tabulate(rows, headers=headers, tablefmt="grid")]
+    for report in reports:
+        for kind in ("peak", "retained"):
+            lines.append(f"\nTop {kind} allocations for {report['flow']}:")
+            lines.append(
+                tabulate(
+                    [
+                        [h["location"], _mb(h["bytes"]), h["count"]]
+                        for h in report[f"{kind}_hotspots"]
+                    ],
+                    headers=["Location", "MB", "Blocks"],
+                    tablefmt="simple",
+                )
+            )
+    return "\n".join(lines)
+
+
+def main() -> int:
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Measure memory use of data-heavy flows")
+    parser.add_argument(
+        "--flow",
+        action="append",
+        choices=sorted(FLOWS),
+        help="Flow to measure (repeatable, default: all)",
+    )
+    parser.add_argument(
+        "--scale", type=float, default=1.0, help="Multiplier for the default dataset sizes"
+    )
+    parser.add_argument("--top", type=int, default=10, help="Allocation hotspots per flow")
+    parser.add_argument(
+        "--budget-mb", type=float, default=512, help="Fail when a flow's RSS peak exceeds this"
+    )
+    parser.add_argument(
+        "--in-process", action="store_true", help="Run every flow in this interpreter"
+    )
+    parser.add_argument("--json", action="store_true", help="Print reports as JSON")
+    args = parser.parse_args()
+
+    reports = run_flows(args.flow or list(FLOWS), args.scale, args.top, not args.in_process)
+    if args.json:
+        print(json.dumps(reports, indent=2))
+    else:
+        print(format_reports(reports, args.budget_mb))
+
+    over_budget = [r for r in reports if r["rss_peak_bytes"] > args.budget_mb * 1024 * 1024]
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
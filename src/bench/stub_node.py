@@ -0,0 +1,376 @@
+"""Local stub JSON-RPC node for testing RPC clients without the network.
+
+A stub answers JSON-RPC over HTTP POST (single calls and batches) and over a
+WebSocket at ``/ws``, with configurable chain ID, head block, latency,
+batch size limit and error injection::
+
+    python -m src.bench.stub_node --chain-id 1 --block 19000000 --latency-ms 40
+
+Methods are plain callables taking the params list, so tests can add the ones
+they need with ``add_method``; raise ``RpcError`` from one to answer with a
+JSON-RPC error object. ``serve_logs`` installs an ``eth_getLogs`` that makes up
+logs per block and refuses queries the way providers do, and ``serve_blocks``
+an ``eth_getBlockByNumber`` with timestamps from a function of the block number.
+
+Over the WebSocket, ``eth_subscribe`` takes ``newHeads`` and ``logs``
+subscriptions. ``mine()`` advances the head and notifies them, with logs from
+``serve_logs`` when it is installed.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from aiohttp import WSMsgType, web
+
+from ..core.logger import RpcError
+
+# JSON-RPC error codes from the specification
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+# Common extension for queries over a provider's limits
+LIMIT_EXCEEDED = -32005
+
+# ERC-20 Transfer(address,address,uint256)
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+
+Handler = Callable[[List[Any]], Any]
+
+
+class StubNode:
+    """Answer JSON-RPC calls the way an Ethereum node would, with injectable faults"""
+
+    def __init__(
+        self,
+        chain_id: int = 1,
+        block_number: int = 100,
+        latency_ms: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        max_batch: Optional[int] = None,
+        seed: Optional[int] = None,
+    ):
+        self.chain_id = chain_id
+        self.block_number = block_number
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        # Larger batches are refused with a single error object, as many providers do
+        self.max_batch = max_batch
+        self.methods: Dict[str, Handler] = {
+            "eth_chainId": lambda params: hex(self.chain_id),
+            "eth_blockNumber": lambda params: hex(self.block_number),
+        }
+        # Unix time of block n, for headers
+        self.block_timestamp: Callable[[int], int] = lambda number: 1_600_000_000 + 12 * number
+        self.stats = {
+            "requests": 0,
+            "calls": 0,
+            "batches": 0,
+            "errors": 0,
+            "connections": 0,
+            "in_flight": 0,
+            "max_in_flight": 0,
+            "subscriptions": 0,
+        }
+        self._rng = random.Random(seed)
+        self.url: Optional[str] = None
+        self._runner: Optional[web.AppRunner] = None
+        self._sockets: List[web.WebSocketResponse] = []
+        # Live subscriptions by id: the socket, the kind and its filter
+        self.subscriptions: Dict[str, Tuple[web.WebSocketResponse, str, Dict[str, Any]]] = {}
+        self._subscription_ids = itertools.count(1)
+
+    def add_method(self, name: str, handler: Handler) -> None:
+        """Answer calls to name with handler(params)"""
+        self.methods[name] = handler
+
+    def serve_logs(
+        self,
+        per_block: Callable[[int], int],
+        max_results: Optional[int] = None,
+        max_range: Optional[int] = None,
+    ) -> None:
+        """Answer eth_getLogs with per_block(n) made-up Transfer logs in each block n
+
+        Queries spanning more than max_range blocks or matching more than
+        max_results logs are refused with the errors Infura and others send.
+        """
+
+        def get_logs(params: List[Any]) -> List[Dict[str, Any]]:
+            query = params[0] if params else {}
+            start = int(query.get("fromBlock", "0x0"), 16)
+            end = query.get("toBlock", "latest")
+            end = self.block_number if end == "latest" else int(end, 16)
+            if max_range is not None and end - start + 1 > max_range:
+                raise RpcError(f"block range is too wide (max {max_range})", code=LIMIT_EXCEEDED)
+            if max_results is not None:
+                total = sum(per_block(block) for block in range(start, end + 1))
+                if total > max_results:
+                    raise RpcError(
+                        f"query returned more than {max_results} results", code=LIMIT_EXCEEDED
+                    )
+            address = query.get("address") or "0x" + "00" * 20
+            if isinstance(address, list):
+                address = address[0]
+            logs = []
+            for block in range(start, end + 1):
+                for index in range(per_block(block)):
+                    logs.append(
+                        {
+                            "address": address,
+                            "topics": [TRANSFER_TOPIC],
+                            "data": hex(index),
+                            "blockNumber": hex(block),
+                            "blockHash": f"0x{block:064x}",
+                            "transactionHash": f"0x{block:032x}{index:032x}",
+                            "transactionIndex": hex(index),
+                            "logIndex": hex(index),
+                            "removed": False,
+                        }
+                    )
+            return logs
+
+        self.add_method("eth_getLogs", get_logs)
+
+    def header(self, number: int) -> Dict[str, Any]:
+        """Make up the header of block number"""
+        return {
+            "number": hex(number),
+            "hash": f"0x{number:064x}",
+            "parentHash": f"0x{max(number - 1, 0):064x}",
+            "timestamp": hex(self.block_timestamp(number)),
+        }
+
+    def serve_blocks(self, timestamp: Optional[Callable[[int], int]] = None) -> None:
+        """Answer eth_getBlockByNumber for blocks up to the head, block n made at timestamp(n)"""
+        if timestamp is not None:
+            self.block_timestamp = timestamp
+
+        def get_block(params: List[Any]) -> Optional[Dict[str, Any]]:
+            tag = params[0] if params else "latest"
+            number = self.block_number if tag == "latest" else int(tag, 16)
+            if number > self.block_number:
+                return None
+            return self.header(number)
+
+        self.add_method("eth_getBlockByNumber", get_block)
+
+    async def mine(self, blocks: int = 1) -> None:
+        """Advance the head, sending each new block to newHeads and logs subscribers"""
+        for _ in range(blocks):
+            self.block_number += 1
+            number = self.block_number
+            get_logs = self.methods.get("eth_getLogs")
+            for subscription_id, (ws, kind, query) in list(self.subscriptions.items()):
+                if kind == "newHeads":
+                    results = [self.header(number)]
+                elif get_logs is not None:
+                    query = dict(query, fromBlock=hex(number), toBlock=hex(number))
+                    results = get_logs([query])
+                else:
+                    results = []
+                for result in results:
+                    notification = {
+                        "jsonrpc": "2.0",
+                        "method": "eth_subscription",
+                        "params": {"subscription": subscription_id, "result": result},
+                    }
+                    try:
+                        await ws.send_json(notification)
+                    except ConnectionError:
+                        break
+
+    def _subscription_call(self, ws: web.WebSocketResponse, call: Dict[str, Any]) -> Any:
+        """Answer eth_subscribe or eth_unsubscribe on a socket"""
+        self.stats["calls"] += 1
+        params = call.get("params") or []
+        if call["method"] == "eth_unsubscribe":
+            found = bool(params) and self.subscriptions.pop(params[0], None) is not None
+            return {"jsonrpc": "2.0", "id": call.get("id"), "result": found}
+        kind = params[0] if params else None
+        if kind not in ("newHeads", "logs"):
+            return _error(call.get("id"), -32602, f"Unsupported subscription {kind!r}")
+        subscription_id = hex(next(self._subscription_ids))
+        self.subscriptions[subscription_id] = (ws, kind, params[1] if len(params) > 1 else {})
+        self.stats["subscriptions"] += 1
+        return {"jsonrpc": "2.0", "id": call.get("id"), "result": subscription_id}
+
+    def _call(self, call: Any) -> Dict[str, Any]:
+        """Answer one JSON-RPC request object"""
+        self.stats["calls"] += 1
+        if not isinstance(call, dict) or not isinstance(call.get("method"), str):
+            return _error(None, INVALID_REQUEST, "Invalid request")
+        call_id = call.get("id")
+        handler = self.methods.get(call["method"])
+        if handler is None:
+            return _error(call_id, METHOD_NOT_FOUND, f"Method {call['method']} not found")
+        try:
+            result = handler(call.get("params") or [])
+        except RpcError as e:
+            return _error(call_id, e.code if e.code is not None else -32000, e.message)
+        return {"jsonrpc": "2.0", "id": call_id, "result": result}
+
+    def answer(self, payload: Any) -> Any:
+        """Answer a request body: one call or a batch of them"""
+        if isinstance(payload, list):
+            if not payload:
+                return _error(None, INVALID_REQUEST, "Empty batch")
+            if self.max_batch is not None and len(payload) > self.max_batch:
+                return _error(None, INVALID_REQUEST, f"Batch exceeds {self.max_batch} calls")
+            self.stats["batches"] += 1
+            return [self._call(call) for call in payload]
+        return self._call(payload)
+
+    async def _delay(self) -> None:
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+
+    async def _handle_http(self, request: web.Request) -> web.StreamResponse:
+        stats = self.stats
+        stats["requests"] += 1
+        stats["in_flight"] += 1
+        stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+        try:
+            return await self._respond(request)
+        finally:
+            stats["in_flight"] -= 1
+
+    async def _respond(self, request: web.Request) -> web.StreamResponse:
+        await self._delay()
+        if self.error_rate and self._rng.random() < self.error_rate:
+            self.stats["errors"] += 1
+            return web.Response(status=self.error_status, text="injected error")
+        try:
+            payload = json.loads(await request.text())
+        except ValueError:
+            return web.json_response(_error(None, PARSE_ERROR, "Parse error"))
+        return web.json_response(self.answer(payload))
+
+    async def _handle_ws(self, request: web.Request) -> web.StreamResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.stats["connections"] += 1
+        self._sockets.append(ws)
+        try:
+            async for message in ws:
+                if message.type != WSMsgType.TEXT:
+                    continue
+                self.stats["requests"] += 1
+                await self._delay()
+                try:
+                    payload = json.loads(message.data)
+                except ValueError:
+                    await ws.send_json(_error(None, PARSE_ERROR, "Parse error"))
+                    continue
+                if isinstance(payload, dict) and payload.get("method") in (
+                    "eth_subscribe",
+                    "eth_unsubscribe",
+                ):
+                    await ws.send_json(self._subscription_call(ws, payload))
+                    continue
+                await ws.send_json(self.answer(payload))
+        finally:
+            self._sockets.remove(ws)
+            for subscription_id, (socket, _, _) in list(self.subscriptions.items()):
+                if socket is ws:
+                    del self.subscriptions[subscription_id]
+        return ws
+
+    def make_app(self) -> web.Application:
+        """Create the aiohttp application"""
+        app = web.Application()
+        app.router.add_post("/", self._handle_http)
+        app.router.add_get("/ws", self._handle_ws)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving and return the HTTP URL; the WebSocket is at ws_url()"""
+        self._runner = web.AppRunner(self.make_app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_host, bound_port = self._runner.addresses[0][:2]
+        self.url = f"http://{bound_host}:{bound_port}/"
+        return self.url
+
+    def ws_url(self) -> str:
+        """Get the WebSocket URL of a started node"""
+        return str(self.url).replace("http://", "ws://", 1) + "ws"
+
+    async def drop_connections(self) -> None:
+        """Close every open WebSocket, as a node restart would"""
+        for ws in list(self._sockets):
+            await ws.close()
+
+    async def stop(self) -> None:
+        """Stop serving"""
+        if self._runner:
+            await self.drop_connections()
+            await self._runner.cleanup()
+            self._runner = None
+
+
+def _error(call_id: Any, code: int, message: str) -> Dict[str, Any]:
+    return {"jsonrpc": "2.0", "id": call_id, "error": {"code": code, "message": message}}
+
+
+async def _serve(node: StubNode, host: str, port: int, block_time: Optional[float]) -> None:
+    """Run the stub node until cancelled, mining a block every block_time seconds if given"""
+    url = await node.start(host, port)
+    print(f"Stub node for chain {node.chain_id} listening on {url} and {node.ws_url()}")
+    try:
+        while True:
+            if block_time:
+                await asyncio.sleep(block_time)
+                await node.mine()
+            else:
+                await asyncio.sleep(3600)
+    finally:
+        await node.stop()
+
+
+def main() -> None:
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Serve a stub JSON-RPC node")
+    parser.add_argument("--host", default="127.0.0.1", help="Host to bind to")
+    parser.add_argument("--port", type=int, default=8545, help="Port to bind to")
+    parser.add_argument("--chain-id", type=int, default=1, help="Chain ID to report")
+    parser.add_argument("--block", type=int, default=100, help="Head block to report")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Added latency")
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="Fraction of HTTP requests that fail"
+    )
+    parser.add_argument("--max-batch", type=int, help="Largest batch answered")
+    parser.add_argument(
+        "--logs-per-block", type=int, help="Serve eth_getLogs with this many logs per block"
+    )
+    parser.add_argument("--max-logs", type=int, help="Most logs one eth_getLogs query returns")
+    parser.add_argument(
+        "--block-time", type=float, help="Seconds between new heads sent to subscribers"
+    )
+    parser.add_argument("--seed", type=int, help="Random seed for errors")
+    args = parser.parse_args()
+
+    node = StubNode(
+        chain_id=args.chain_id,
+        block_number=args.block,
+        latency_ms=args.latency_ms,
+        error_rate=args.error_rate,
+        max_batch=args.max_batch,
+        seed=args.seed,
+    )
+    if args.logs_per_block is not None:
+        node.serve_logs(lambda block: args.logs_per_block, max_results=args.max_logs)
+    try:
+        asyncio.run(_serve(node, args.host, args.port, args.block_time))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
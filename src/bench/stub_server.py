@@ -0,0 +1,257 @@
+"""Local stub HTTP server that replays recorded API responses.
+
+Recordings are the files written by record mode (``--record DIR`` or
+``CHAINDATA_RECORD_DIR``). Every service is mounted under its own prefix, so a
+single server can stand in for chainlist, DefiLlama and Etherscan at once::
+
+    python -m src.bench.stub_server --recordings recordings --latency-ms 50
+
+and clients are pointed at it with the printed ``CHAINDATA_*_BASE_URL``
+variables. Latency, jitter, throttling and error injection are configurable so
+throughput work can be measured reproducibly without the network.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+from ..api.defillama import SPEC_FILE, load_spec_templates
+from ..core.recorder import canonical_params
+
+# Environment variable that points each client at its stub prefix
+BASE_URL_ENV = {
+    "chainlist": "CHAINDATA_CHAINLIST_BASE_URL",
+    "defillama": "CHAINDATA_DEFILLAMA_BASE_URL",
+    "coins": "CHAINDATA_COINS_BASE_URL",
+    "stablecoins": "CHAINDATA_STABLECOINS_BASE_URL",
+    "yields": "CHAINDATA_YIELDS_BASE_URL",
+    "etherscan": "CHAINDATA_ETHERSCAN_BASE_URL",
+}
+
+ParamsKey = Tuple[Tuple[str, str], ...]
+
+
+class StubServer:
+    """Replay recorded responses with configurable latency, throttling and errors"""
+
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        rate_limit: Optional[float] = None,
+        error_rate: float = 0.0,
+        error_status: int = 500,
+        seed: Optional[int] = None,
+        spec_file: str = SPEC_FILE,
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.templates = load_spec_templates(spec_file)
+        self.stats = {"requests": 0, "throttled": 0, "errors": 0, "misses": 0}
+        self._rng = random.Random(seed)
+        self._exact: Dict[Tuple[str, str, ParamsKey], Tuple[int, bytes]] = {}
+        self._by_path: Dict[Tuple[str, str], List[Tuple[Dict, Tuple[int, bytes]]]] = {}
+        self._by_template: Dict[Tuple[str, str], Tuple[int, bytes]] = {}
+        self._tokens = float(rate_limit or 0)
+        self._last_refill = time.monotonic()
+        self._runner: Optional[web.AppRunner] = None
+
+    def _template_for(self, service: str, path: str) -> Optional[str]:
+        """Get the spec path template a concrete path matches"""
+        for template, pattern in self.templates.get(service, []):
+            if pattern.match(path):
+                return template
+        return None
+
+    def add_response(
+        self,
+        service: str,
+        path: str,
+        data: Any,
+        params: Optional[Dict] = None,
+        status: int = 200,
+    ) -> None:
+        """Register a response to serve for a service path and query"""
+        entry = (status, json.dumps(data).encode())
+        params = canonical_params(params)
+        self._exact[(service, path, tuple(params.items()))] = entry
+        self._by_path.setdefault((service, path), []).append((params, entry))
+        template = self._template_for(service, path)
+        if template:
+            self._by_template.setdefault((service, template), entry)
+
+    def load_recordings(self, directory: str) -> int:
+        """Load every recording under a directory, returning how many were found"""
+        count = 0
+        for root, _, files in os.walk(directory):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                with open(os.path.join(root, name), "r") as f:
+                    entry = json.load(f)
+                self.add_response(
+                    entry["service"],
+                    entry["path"],
+                    entry["data"],
+                    entry.get("params"),
+                    entry.get("status", 200),
+                )
+                count += 1
+        return count
+
+    def lookup(
+        self, service: str, path: str, params: Optional[Dict] = None
+    ) -> Optional[Tuple[int, bytes]]:
+        """Find the best response for a request.
+
+        An exact path and query match wins, then the recording of the same path
+        whose query is the largest subset of the request's (so Etherscan
+        ``module``/``action`` recordings answer any address), then any recording
+        of the same spec template (so ``/protocol/aave`` can answer
+        ``/protocol/uniswap`` during load tests). A path recorded only with
+        other queries is a miss: every Etherscan action shares ``/``, so another
+        action's payload would be the wrong answer.
+        """
+        params = canonical_params(params)
+        entry = self._exact.get((service, path, tuple(params.items())))
+        candidates = self._by_path.get((service, path), [])
+        if entry is None and candidates:
+            subsets = [
+                (len(recorded), candidate)
+                for recorded, candidate in candidates
+                if recorded.items() <= params.items()
+            ]
+            if not subsets:
+                return None
+            entry = max(subsets, key=lambda x: x[0])[1]
+        if entry is None:
+            template = self._template_for(service, path)
+            if template:
+                entry = self._by_template.get((service, template))
+        return entry
+
+    def _take_token(self) -> bool:
+        """Take a token from the rate limiter bucket"""
+        if not self.rate_limit:
+            return True
+        now = time.monotonic()
+        self._tokens = min(
+            self.rate_limit, self._tokens + (now - self._last_refill) * self.rate_limit
+        )
+        self._last_refill = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        """Serve a single request"""
+        self.stats["requests"] += 1
+        delay_ms = self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay_ms > 0:
+            await asyncio.sleep(delay_ms / 1000)
+
+        if not self._take_token():
+            self.stats["throttled"] += 1
+            return web.json_response(
+                {"error": "rate limit exceeded"}, status=429, headers={"Retry-After": "1"}
+            )
+        if self.error_rate and self._rng.random() < self.error_rate:
+            self.stats["errors"] += 1
+            return web.json_response({"error": "injected error"}, status=self.error_status)
+
+        service = request.match_info["service"]
+        path = "/" + request.match_info.get("tail", "")
+        entry = self.lookup(service, path, dict(request.query))
+        if entry is None:
+            self.stats["misses"] += 1
+            return web.json_response({"error": f"no recording for {service}{path}"}, status=404)
+        status, body = entry
+        return web.Response(body=body, status=status, content_type="application/json")
+
+    def make_app(self) -> web.Application:
+        """Create the aiohttp application"""
+        app = web.Application()
+        app.router.add_get("/{service}", self._handle)
+        app.router.add_get("/{service}/{tail:.*}", self._handle)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving and return the root URL"""
+        self._runner = web.AppRunner(self.make_app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_host, bound_port = self._runner.addresses[0][:2]
+        return f"http://{bound_host}:{bound_port}"
+
+    async def stop(self) -> None:
+        """Stop serving"""
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+def base_urls(root_url: str) -> Dict[str, str]:
+    """Get the environment variables that point every client at a stub server"""
+    return {env: f"{root_url}/{service}" for service, env in BASE_URL_ENV.items()}
+
+
+async def _serve(server: StubServer, host: str, port: int) -> None:
+    """Run the stub server until cancelled"""
+    root_url = await server.start(host, port)
+    print(f"Stub server listening on {root_url}")
+    for env, url in base_urls(root_url).items():
+        print(f"export {env}={url}")
+    try:
+        while True:
+            await asyncio.sleep(3600)
+    finally:
+        await server.stop()
+
+
+def main() -> None:
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Replay recorded API responses")
+    parser.add_argument("--recordings", required=True, help="Recording directory")
+    parser.add_argument("--host", default="127.0.0.1", help="Host to bind to")
+    parser.add_argument("--port", type=int, default=8080, help="Port to bind to")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Added latency")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Latency jitter")
+    parser.add_argument("--rate-limit", type=float, help="Requests per second before 429s")
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="Fraction of requests that fail"
+    )
+    parser.add_argument(
+        "--error-status", type=int, default=500, help="Status code for injected errors"
+    )
+    parser.add_argument("--seed", type=int, help="Random seed for jitter and errors")
+    args = parser.parse_args()
+
+    server = StubServer(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        rate_limit=args.rate_limit,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        seed=args.seed,
+    )
+    count = server.load_recordings(args.recordings)
+    print(f"Loaded {count} recordings from {args.recordings}")
+    try:
+        asyncio.run(_serve(server, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
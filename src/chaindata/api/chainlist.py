@@ -7,8 +7,12 @@ from ..core.config import config
 from ..core.logger import logger
 from ..models.chain import Chain, ChainListResponse, ChainSearchResult
 from ..utils.http import AsyncHTTPClient
+from ...utils.search import SubstringIndex
 from .base import BaseAPI
 
+# Fields covered by the substring search index
+SEARCH_FIELDS = ("name", "shortName", "chain", "network")
+
 class ChainlistAPI(BaseAPI):
     """Chainlist API client."""
 
@@ -26,6 +30,7 @@ class ChainlistAPI(BaseAPI):
         self._chain_by_id: Dict[int, Chain] = {}
         self._chain_by_name: Dict[str, Chain] = {}
         self._chain_by_short_name: Dict[str, Chain] = {}
+        self._search = SubstringIndex([], SEARCH_FIELDS)
 
     async def initialize(self) -> None:
         """Initialize API client."""
@@ -60,6 +65,7 @@ class ChainlistAPI(BaseAPI):
             for chain in chains
             if chain.shortName
         }
+        self._search = SubstringIndex(chains, SEARCH_FIELDS)
 
     async def get_all_blockchain_data(self, force_refresh: bool = False) -> List[Chain]:
         """Get all blockchain data."""
@@ -122,7 +128,6 @@ class ChainlistAPI(BaseAPI):
         if not self._chains:
             await self.get_all_blockchain_data()
 
-        query = query.lower()
         results = []
 
         # Check chain ID
@@ -134,13 +139,7 @@ class ChainlistAPI(BaseAPI):
             pass
 
         # Check chain names
-        for chain in self._chains:
-            if (
-                query in chain.name.lower()
-                or (chain.shortName and query in chain.shortName.lower())
-            ):
-                results.append(chain)
-
+        results.extend(self._search.search(query, ("name", "shortName")))
         return results
 
     async def get_rpcs(
@@ -1,11 +1,19 @@
 """Main CLI entry point for ChainData."""
 
-import argparse
-from typing import Optional
+import time
 
-from ..core.logger import logger
-from ..core.config import config
-from .commands import (
+# Taken before anything else is imported so --profile can report import time
+IMPORT_STARTED = time.perf_counter()
+
+import argparse  # noqa: E402
+from typing import Optional  # noqa: E402
+
+from ..core.logger import logger  # noqa: E402
+from ..core.config import config  # noqa: E402
+from ...core.profiler import profiler  # noqa: E402
+from ...core.metrics import metrics  # noqa: E402
+from ...core.tracing import tracer  # noqa: E402
+from .commands import (  # noqa: E402
     chain_commands,
     defi_commands,
     price_commands,
@@ -36,6 +44,36 @@ def setup_parser() -> argparse.ArgumentParser:
         type=str,
         help="Path to cache directory",
     )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print a per-phase timing breakdown to stderr",
+    )
+    parser.add_argument(
+        "--profile-stats",
+        type=str,
+        help="Write cProfile stats to this file (implies --profile)",
+    )
+    parser.add_argument(
+        "--flamegraph",
+        type=str,
+        help="Write sampled collapsed stacks for flamegraph tools to this file (implies --profile)",
+    )
+    parser.add_argument(
+        "--trace",
+        type=str,
+        help="Write tracing spans to this file as JSON lines ('-' for stderr)",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        type=str,
+        help="Write Prometheus metrics to this file for node_exporter's textfile collector",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        help="Serve Prometheus metrics on /metrics at this local port while the command runs",
+    )
 
     # Create subparsers for different command groups
     subparsers = parser.add_subparsers(dest="command", help="Available commands")
@@ -72,34 +110,38 @@ def main(args: Optional[argparse.Namespace] = None) -> int:
     parser = setup_parser()
     args = args or parser.parse_args()
 
+    profiling = args.profile or args.profile_stats or args.flamegraph
+    if profiling:
+        profiler.start(IMPORT_STARTED, args.profile_stats, args.flamegraph)
+
     # Update config from command line arguments
-    if args.debug:
-        config.debug = True
-        logger.setLevel("DEBUG")
-    if args.config:
-        config.load_from_file(args.config)
-    if args.cache_dir:
-        config.cache.directory = args.cache_dir
+    with profiler.phase("config load"):
+        if args.debug:
+            config.debug = True
+            logger.setLevel("DEBUG")
+        if args.config:
+            config.load_from_file(args.config)
+        if args.cache_dir:
+            config.cache.directory = args.cache_dir
+
+    if args.trace:
+        tracer.configure(args.trace)
+    metrics_server = metrics.serve(args.metrics_port) if args.metrics_port else None
 
     try:
         if not args.command:
             parser.print_help()
             return 0
 
-        # Execute the appropriate command
-        if args.command == "chain":
-            return chain_commands.execute_chain_command(args)
-        elif args.command == "defi":
-            return defi_commands.execute_defi_command(args)
-        elif args.command == "price":
-            return price_commands.execute_price_command(args)
-        elif args.command == "pool":
-            return pool_commands.execute_pool_command(args)
-        elif args.command == "display":
-            return display_commands.execute_display_command(args)
-        else:
-            logger.error(f"Unknown command: {args.command}")
-            return 1
+        subcommand = getattr(args, "subcommand", None)
+        with tracer.start_span(
+            " ".join(filter(None, ["chaindata", args.command, subcommand])),
+            {"cli.command": args.command, "cli.subcommand": subcommand},
+        ) as span:
+            status = execute_command(args)
+            span.set_attribute("cli.exit_code", status)
+            span.set_status("OK" if status == 0 else "ERROR")
+            return status
 
     except Exception as e:
         logger.error(f"Error executing command: {e}")
@@ -107,5 +149,32 @@ def main(args: Optional[argparse.Namespace] = None) -> int:
             logger.exception("Detailed error traceback:")
         return 1
 
+    finally:
+        if profiling:
+            profiler.stop()
+            profiler.report()
+        if args.trace:
+            tracer.shutdown()
+        if args.metrics_file:
+            metrics.write_textfile(args.metrics_file)
+        if metrics_server is not None:
+            metrics_server.shutdown()
+
+def execute_command(args: argparse.Namespace) -> int:
+    """Execute the command group selected on the command line."""
+    if args.command == "chain":
+        return chain_commands.execute_chain_command(args)
+    elif args.command == "defi":
+        return defi_commands.execute_defi_command(args)
+    elif args.command == "price":
+        return price_commands.execute_price_command(args)
+    elif args.command == "pool":
+        return pool_commands.execute_pool_command(args)
+    elif args.command == "display":
+        return display_commands.execute_display_command(args)
+    else:
+        logger.error(f"Unknown command: {args.command}")
+        return 1
+
 if __name__ == "__main__":
     exit(main()) 
\ No newline at end of file
@@ -1,8 +1,9 @@
 """Async HTTP client for API calls."""
 
 import asyncio
+import time
 from typing import Any, Dict, Optional, Union
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlsplit
 
 import aiohttp
 from aiohttp import ClientSession, ClientTimeout
@@ -10,6 +11,8 @@ from aiohttp.typedefs import StrOrURL
 
 from ..core.config import config
 from ..core.logger import logger
+from ...core.metrics import observe_request, rate_limit_wait
+from ...core.tracing import tracer, url_template
 
 class AsyncHTTPClient:
     """Async HTTP client with retry logic and rate limiting."""
@@ -66,22 +69,42 @@ class AsyncHTTPClient:
         if not self._session:
             await self._initialize()
 
-        for attempt in range(self.retry_attempts):
-            try:
-                if self._semaphore:
-                    async with self._semaphore:
+        template = url_template(str(url))
+        with tracer.http_span(method, template) as span:
+            for attempt in range(self.retry_attempts):
+                try:
+                    queued = time.perf_counter()
+                    if self._semaphore:
+                        await self._semaphore.acquire()
+                    started = time.perf_counter()
+                    queue_wait_ms = (started - queued) * 1000
+                    if self._semaphore:
+                        rate_limit_wait.labels(urlsplit(template).hostname or "unknown").observe(
+                            queue_wait_ms / 1000
+                        )
+                    try:
                         async with self._session.request(method, url, **kwargs) as response:
+                            body = await response.read()
+                            span.record_response(
+                                response.status, len(body), attempt, queue_wait_ms
+                            )
+                            observe_request(
+                                template,
+                                response.status,
+                                time.perf_counter() - started,
+                                len(body),
+                                1 if attempt else 0,
+                            )
                             response.raise_for_status()
                             return await response.json()
-                else:
-                    async with self._session.request(method, url, **kwargs) as response:
-                        response.raise_for_status()
-                        return await response.json()
-            except aiohttp.ClientError as e:
-                if attempt == self.retry_attempts - 1:
-                    raise
-                logger.warning(f"Request failed (attempt {attempt + 1}/{self.retry_attempts}): {e}")
-                await asyncio.sleep(self.retry_backoff * (attempt + 1))
+                    finally:
+                        if self._semaphore:
+                            self._semaphore.release()
+                except aiohttp.ClientError as e:
+                    if attempt == self.retry_attempts - 1:
+                        raise
+                    logger.warning(f"Request failed (attempt {attempt + 1}/{self.retry_attempts}): {e}")
+                    await asyncio.sleep(self.retry_backoff * (attempt + 1))
 
     def _build_url(self, path: str) -> str:
         """Build full URL from path."""
@@ -1,13 +1,19 @@
 import json
 import os
 import time
-from typing import Any, Optional
+from typing import Any, Optional, Tuple
 
 from ..core.config import config
+from ..core.logger import get_logger
+from ..core.metrics import cache_evictions, cache_requests
+from ..core.profiler import profiler
+
+logger = get_logger("cache")
 
 
 class Cache:
     def __init__(self, subdir: str):
+        self.name = subdir
         self.cache_dir = os.path.join(config.get("cache.directory"), subdir)
         self.expiry_seconds = config.get("cache.expiry_seconds")
         os.makedirs(self.cache_dir, exist_ok=True)
@@ -16,31 +22,62 @@ class Cache:
         """Get the full path for a cache file"""
         return os.path.join(self.cache_dir, f"{key}.json")
 
-    def load_from_cache(self, key: str) -> Optional[Any]:
-        """Load data from cache if it exists and is not expired"""
-        cache_path = self._get_cache_path(key)
-        if not os.path.exists(cache_path):
-            return None
+    def sidecar_path(self, key: str, extension: str) -> str:
+        """Get the path of a file derived from a cache entry and stored beside it"""
+        return os.path.join(self.cache_dir, f"{key}.{extension}")
 
+    def saved_at(self, key: str) -> Optional[float]:
+        """Get when a cache entry was last written, or None if there is none"""
         try:
-            with open(cache_path, "r") as f:
-                data = json.load(f)
-                if time.time() - data.get("timestamp", 0) < self.expiry_seconds:
-                    return data.get("data")
-        except (json.JSONDecodeError, IOError):
+            return os.path.getmtime(self._get_cache_path(key))
+        except OSError:
             return None
+
+    def load_with_age(self, key: str, ignore_expiry: bool = False) -> Optional[Tuple[Any, float]]:
+        """Load data and its age in seconds from cache.
+
+        Expired entries are skipped unless ignore_expiry is set, which is how
+        offline mode serves whatever is on disk.
+        """
+        cache_path = self._get_cache_path(key)
+        with profiler.phase("cache lookup"):
+            if not os.path.exists(cache_path):
+                cache_requests.labels(self.name, "miss").inc()
+                return None
+
+            try:
+                with open(cache_path, "r") as f:
+                    raw = f.read()
+                with profiler.phase("json decode"):
+                    data = json.loads(raw)
+            except (json.JSONDecodeError, IOError):
+                cache_requests.labels(self.name, "miss").inc()
+                return None
+
+        age = time.time() - data.get("timestamp", 0)
+        if ignore_expiry or age < self.expiry_seconds:
+            cache_requests.labels(self.name, "hit").inc()
+            return data.get("data"), age
+        cache_requests.labels(self.name, "expired").inc()
+        cache_evictions.labels(self.name).inc()
         return None
 
+    def load_from_cache(self, key: str) -> Optional[Any]:
+        """Load data from cache if it exists and is not expired"""
+        cached = self.load_with_age(key)
+        return cached[0] if cached is not None else None
+
     def save_to_cache(self, key: str, data: Any) -> None:
         """Save data to cache with timestamp"""
         cache_path = self._get_cache_path(key)
         try:
-            with open(cache_path, "w") as f:
+            with profiler.phase("cache save"), open(cache_path, "w") as f:
                 json.dump({"timestamp": time.time(), "data": data}, f)
         except IOError as e:
-            print(f"Error saving to cache: {e}")
+            logger.warning("Error saving %s to the %s cache: %s", key, self.name, e)
 
 
 # Create cache instances
 defillama_cache = Cache("defillama")
 blockchain_cache = Cache("blockchain")
+etherscan_cache = Cache("etherscan")
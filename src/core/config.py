@@ -12,6 +12,92 @@ DEFAULT_CONFIG: Dict[str, Any] = {
         "expiry_seconds": 3600,  # 1 hour
         "blockchain_expiry_seconds": 86400,  # 24 hours
     },
+    "api": {
+        "chainlist_base_url": os.getenv("CHAINDATA_CHAINLIST_BASE_URL", "https://chainlist.org"),
+        "defillama_base_url": os.getenv("CHAINDATA_DEFILLAMA_BASE_URL", "https://api.llama.fi"),
+        "coins_base_url": os.getenv("CHAINDATA_COINS_BASE_URL", "https://coins.llama.fi"),
+        "stablecoins_base_url": os.getenv(
+            "CHAINDATA_STABLECOINS_BASE_URL", "https://stablecoins.llama.fi"
+        ),
+        "yields_base_url": os.getenv("CHAINDATA_YIELDS_BASE_URL", "https://yields.llama.fi"),
+        "etherscan_base_url": os.getenv(
+            "CHAINDATA_ETHERSCAN_BASE_URL", "https://api.etherscan.io/api"
+        ),
+    },
+    "chainlist": {
+        # Hold chain records as read-only slotted objects with interned strings
+        # instead of nested dicts; saves memory in long-lived workers
+        "compact_records": os.getenv("CHAINDATA_COMPACT_RECORDS", "").lower()
+        in ("1", "true", "yes"),
+        # Refresh summaries kept in the changelog read by "chainlist changes"
+        "changelog_entries": int(os.getenv("CHAINDATA_CHANGELOG_ENTRIES", "1000")),
+    },
+    "rpc": {
+        # Seconds each JSON-RPC call to a chain endpoint may take
+        "timeout": float(os.getenv("CHAINDATA_RPC_TIMEOUT", "5")),
+        # Calls in flight at once, overall and per endpoint host
+        "concurrency": int(os.getenv("CHAINDATA_RPC_CONCURRENCY", "64")),
+        "per_host": int(os.getenv("CHAINDATA_RPC_PER_HOST", "4")),
+        # Seconds before an unanswered call is also sent to another endpoint; 0 disables
+        "hedge_after": float(os.getenv("CHAINDATA_RPC_HEDGE_AFTER", "0.5")),
+        # Endpoints one call may be sent to, counting hedges and failovers
+        "max_attempts": int(os.getenv("CHAINDATA_RPC_MAX_ATTEMPTS", "3")),
+        # Calls and bytes of JSON packed into one JSON-RPC batch
+        "batch_size": int(os.getenv("CHAINDATA_RPC_BATCH_SIZE", "100")),
+        "max_batch_bytes": int(os.getenv("CHAINDATA_RPC_BATCH_BYTES", "1048576")),
+        # Seconds a multi-chain address scan may take before outstanding chains are dropped
+        "scan_deadline": float(os.getenv("CHAINDATA_RPC_SCAN_DEADLINE", "30")),
+        # Blocks per eth_getLogs chunk to start with and to grow to at most; chunks
+        # returning fewer than half of log_target logs double in size
+        "log_chunk_size": int(os.getenv("CHAINDATA_RPC_LOG_CHUNK", "1000")),
+        "log_max_chunk_size": int(os.getenv("CHAINDATA_RPC_LOG_MAX_CHUNK", "100000")),
+        "log_target": 2000,
+        # Blocks between the nearest known neighbours of a timestamp above which
+        # DefiLlama is asked for a nearby block before searching over RPC
+        "block_seed_span": 1000,
+        # WebSockets a subscription manager keeps open per chain, the seconds
+        # between pings that find dead ones, and events queued per subscriber
+        "ws_connections": int(os.getenv("CHAINDATA_RPC_WS_CONNECTIONS", "2")),
+        "ws_heartbeat": 15.0,
+        "ws_queue": 1000,
+        # eth_blockNumber calls per endpoint when probing
+        "probe_samples": 3,
+        # Blocks an endpoint may trail its chain's median head and still count as fresh
+        "max_lag": int(os.getenv("CHAINDATA_RPC_MAX_LAG", "5")),
+        # Weight of the newest outcome in each endpoint's moving averages
+        "score_alpha": float(os.getenv("CHAINDATA_RPC_SCORE_ALPHA", "0.3")),
+        # Endpoints scoring lower (0 to 1) are dropped from ranked RPC lists
+        "min_health": float(os.getenv("CHAINDATA_RPC_MIN_HEALTH", "0.5")),
+        # Seconds an endpoint's score is kept without being updated
+        "score_max_age": 604800,  # 7 days
+    },
+    "network": {
+        # Serve cached data regardless of age and never touch the network
+        "offline": os.getenv("CHAINDATA_OFFLINE", "").lower() in ("1", "true", "yes"),
+        # Directory to capture upstream responses into for the stub server
+        "record_dir": os.getenv("CHAINDATA_RECORD_DIR"),
+    },
+    "tracing": {
+        # JSON lines file that spans are written to ("-" for stderr)
+        "file": os.getenv("CHAINDATA_TRACE_FILE"),
+    },
+    "logging": {
+        "level": os.getenv("CHAINDATA_LOG_LEVEL", "INFO"),
+        # "text" or "json"
+        "format": os.getenv("CHAINDATA_LOG_FORMAT", "text"),
+        "file": os.getenv("CHAINDATA_LOG_FILE"),
+        # Per message and second, keep the first sample_initial records and
+        # then one in every sample_thereafter
+        "sample_initial": 10,
+        "sample_thereafter": 100,
+        "sample_interval": 1.0,
+    },
+    "metrics": {
+        # Prometheus textfile written when a command finishes
+        "textfile": os.getenv("CHAINDATA_METRICS_FILE"),
+        # Port to serve /metrics on while a command runs
+        "port": int(os.getenv("CHAINDATA_METRICS_PORT", "0")) or None,
+    },
     "display": {
         "max_history_entries": 5,
         "date_format": "%Y-%m-%d %H:%M:%S",
@@ -1,45 +1,170 @@
+import atexit
+import json
 import logging
+import queue
 import sys
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
 from .config import config
+from .metrics import log_records_dropped
+
+# Attributes every LogRecord has; anything else was passed through extra=
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+# Listeners started by setup_logger, keyed by logger name
+_listeners: Dict[str, QueueListener] = {}
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(
+            (key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES
+        )
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep the first few records per message each interval, then one in N.
+
+    Records are grouped by logger, level and unformatted message, so a
+    per-request ``log.debug("GET %s", url)`` is one group however many URLs it
+    sees. Errors are never dropped.
+    """
+
+    def __init__(self, initial: int = 10, thereafter: int = 100, interval: float = 1.0):
+        super().__init__()
+        self.initial = initial
+        self.thereafter = thereafter
+        self.interval = interval
+        self._counts: Dict[Tuple[str, int, str], int] = {}
+        self._window = time.monotonic()
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.ERROR:
+            return True
+        key = (record.name, record.levelno, str(record.msg))
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window >= self.interval:
+                self._counts = {}
+                self._window = now
+            count = self._counts[key] = self._counts.get(key, 0) + 1
+        if count <= self.initial or (count - self.initial) % self.thereafter == 0:
+            return True
+        log_records_dropped.labels(record.name).inc()
+        return False
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """Queue records unformatted so formatting happens on the listener thread.
+
+    The stock handler formats in the caller's thread to make records safe to
+    pickle; this queue never leaves the process, so there is no need.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
 
 def setup_logger(
     name: str = "chaindata",
     level: Optional[str] = None,
-    log_file: Optional[str] = None
+    log_file: Optional[str] = None,
+    fmt: Optional[str] = None,
 ) -> logging.Logger:
-    """Setup and configure the logger"""
+    """Setup and configure the logger.
+
+    Handlers run on a QueueListener thread, so logging never blocks the caller
+    on I/O. Calling this again replaces the previous configuration.
+    """
     logger = logging.getLogger(name)
-    
+
     # Set log level from config or default to INFO
-    log_level = level or config.log_level
+    log_level = level or config.get("logging.level") or "INFO"
     logger.setLevel(getattr(logging, log_level.upper()))
-    
+    log_file = log_file or config.get("logging.file")
+    fmt = fmt or config.get("logging.format") or "text"
+
+    # Drop whatever an earlier call installed
+    previous = _listeners.pop(name, None)
+    if previous is not None:
+        previous.stop()
+    for handler in list(logger.handlers):
+        if isinstance(handler, _DeferredQueueHandler):
+            logger.removeHandler(handler)
+
     # Create formatters
-    console_formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-    )
-    file_formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(filename)s:%(lineno)d - %(message)s"
-    )
-    
-    # Console handler
-    console_handler = logging.StreamHandler(sys.stdout)
+    console_formatter: logging.Formatter
+    file_formatter: logging.Formatter
+    if fmt == "json":
+        console_formatter = file_formatter = JsonFormatter()
+    else:
+        console_formatter = logging.Formatter(
+            "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+        )
+        file_formatter = logging.Formatter(
+            "%(asctime)s - %(name)s - %(levelname)s - %(filename)s:%(lineno)d - %(message)s"
+        )
+
+    # Console handler, on stderr so it never mixes with command output
+    console_handler = logging.StreamHandler(sys.stderr)
     console_handler.setFormatter(console_formatter)
-    logger.addHandler(console_handler)
-    
+    handlers: List[logging.Handler] = [console_handler]
+
     # File handler if log_file is specified
     if log_file:
         log_path = Path(log_file)
         log_path.parent.mkdir(parents=True, exist_ok=True)
         file_handler = logging.FileHandler(log_file)
         file_handler.setFormatter(file_formatter)
-        logger.addHandler(file_handler)
-    
+        handlers.append(file_handler)
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = _DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(
+        SamplingFilter(
+            config.get("logging.sample_initial", 10),
+            config.get("logging.sample_thereafter", 100),
+            config.get("logging.sample_interval", 1.0),
+        )
+    )
+    logger.addHandler(queue_handler)
+
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    _listeners[name] = listener
     return logger
 
+
+def get_logger(name: str) -> logging.Logger:
+    """Get a child of the chaindata logger, e.g. get_logger("api.defillama")"""
+    return logging.getLogger(f"chaindata.{name}")
+
+
+@atexit.register
+def _stop_listeners() -> None:
+    """Flush queued records before the interpreter exits"""
+    for listener in _listeners.values():
+        listener.stop()
+    _listeners.clear()
+
+
 # Create default logger instance
 logger = setup_logger()
 
@@ -58,10 +183,35 @@ class DefiLlamaError(APIError):
     """Exception for DefiLlama API errors"""
     pass
 
+class RpcError(APIError):
+    """Exception for failed JSON-RPC calls to chain endpoints"""
+    def __init__(
+        self, message: str, status_code: Optional[int] = None, code: Optional[int] = None
+    ):
+        super().__init__(message, status_code)
+        # JSON-RPC error code, when the endpoint returned an error object
+        self.code = code
+
+class BatchRejectedError(RpcError):
+    """Exception raised when an endpoint refuses a JSON-RPC batch as a whole"""
+    pass
+
+class ResultTooLargeError(RpcError):
+    """Exception raised when an endpoint refuses a query whose result would be too large"""
+    pass
+
 class CacheError(Exception):
     """Exception for cache-related errors"""
     pass
 
+class OfflineError(CacheError):
+    """Exception raised when offline mode has no cached data for a request"""
+    pass
+
+class SnapshotError(CacheError):
+    """Exception raised when a snapshot file is missing, truncated or not a snapshot"""
+    pass
+
 class ValidationError(Exception):
     """Exception for data validation errors"""
     pass 
\ No newline at end of file
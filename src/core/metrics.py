@@ -0,0 +1,414 @@
+"""Prometheus-style metrics with textfile and HTTP exporters.
+
+Counters, gauges and histograms are always recorded; they are cheap enough
+that there is no on/off switch. Export them either by writing the text
+exposition format for node_exporter's textfile collector::
+
+    python chain_data.py --metrics-file /var/lib/node_exporter/chaindata.prom ...
+
+or by serving ``/metrics`` for the duration of a run with ``--metrics-port``.
+"""
+
+import bisect
+import functools
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+)
+from urllib.parse import urlsplit
+
+# Latency buckets in seconds, the Prometheus client defaults
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class _CounterChild:
+    __slots__ = ("_value", "_lock")
+
+    def __init__(self) -> None:
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class _GaugeChild:
+    __slots__ = ("_value", "_lock")
+
+    def __init__(self) -> None:
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            self._value = float(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class _HistogramChild:
+    __slots__ = ("_buckets", "_counts", "_sum", "_count", "_lock")
+
+    def __init__(self, buckets: Sequence[float]):
+        self._buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self._buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def sum(self) -> float:
+        return self._sum
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        """Get (upper bound, cumulative count) pairs, ending with +Inf"""
+        total = 0
+        result = []
+        for bound, count in zip(list(self._buckets) + [float("inf")], self._counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+C = TypeVar("C")
+V = TypeVar("V", bound=Union[_CounterChild, _GaugeChild])
+
+
+class Metric(Generic[C]):
+    """A named metric family with a fixed set of label names"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], C] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self) -> C:
+        raise NotImplementedError
+
+    def labels(self, *values: str) -> C:
+        """Get the child for a set of label values, creating it on first use"""
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def clear(self) -> None:
+        with self._lock:
+            self._children = {}
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class _ValueMetric(Metric[V]):
+    """A metric whose children each hold a single value"""
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+            for key, child in sorted(self._children.items())
+        ]
+
+
+class Counter(_ValueMetric[_CounterChild]):
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+
+class Gauge(_ValueMetric[_GaugeChild]):
+    kind = "gauge"
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+
+class Histogram(Metric[_HistogramChild]):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for key, child in sorted(self._children.items()):
+            for bound, count in child.cumulative():
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+            lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+
+M = TypeVar("M", bound=Metric[Any])
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Metric[Any]] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: M) -> M:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} is already registered differently")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def get(self, name: str) -> Optional[Metric[Any]]:
+        return self._metrics.get(name)
+
+    def clear(self) -> None:
+        """Reset every metric's values, keeping the registrations"""
+        for metric in list(self._metrics.values()):
+            metric.clear()
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+    def write_textfile(self, path: str) -> None:
+        """Write the metrics atomically for node_exporter's textfile collector"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+    def serve(self, port: int = 9464, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """Serve /metrics from a background thread; call shutdown() on the result to stop"""
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+# Create a global registry
+metrics = MetricsRegistry()
+
+http_request_duration = metrics.histogram(
+    "chaindata_http_request_duration_seconds",
+    "Latency of upstream HTTP requests",
+    ["host", "endpoint"],
+)
+http_requests = metrics.counter(
+    "chaindata_http_requests_total",
+    "Upstream HTTP requests by response status",
+    ["host", "endpoint", "status"],
+)
+http_response_bytes = metrics.counter(
+    "chaindata_http_response_bytes_total",
+    "Bytes downloaded from upstream APIs",
+    ["host"],
+)
+http_retries = metrics.counter(
+    "chaindata_http_retries_total",
+    "Upstream HTTP requests that were retried",
+    ["host"],
+)
+rate_limit_wait = metrics.histogram(
+    "chaindata_rate_limit_wait_seconds",
+    "Time spent waiting for a rate limiter slot before a request",
+    ["host"],
+)
+cache_requests = metrics.counter(
+    "chaindata_cache_requests_total",
+    "Cache lookups by result (hit, miss, expired)",
+    ["cache", "result"],
+)
+cache_evictions = metrics.counter(
+    "chaindata_cache_evictions_total",
+    "Cache entries found expired and refetched",
+    ["cache"],
+)
+records_loaded = metrics.gauge(
+    "chaindata_records_loaded",
+    "Records held in memory per dataset",
+    ["dataset"],
+)
+records_changed = metrics.counter(
+    "chaindata_records_changed_total",
+    "Records refreshes added, removed or changed",
+    ["dataset", "change"],
+)
+rpc_requests = metrics.counter(
+    "chaindata_rpc_requests_total",
+    "JSON-RPC requests sent to chain endpoints by outcome (ok, rejected, failed)",
+    ["outcome"],
+)
+log_records_dropped = metrics.counter(
+    "chaindata_log_records_dropped_total",
+    "Log records dropped by sampling",
+    ["logger"],
+)
+rows_rendered = metrics.counter(
+    "chaindata_rows_rendered_total",
+    "Rows rendered by display formatters",
+    ["formatter"],
+)
+
+
+def observe_request(
+    template: str, status: int, seconds: float, body_bytes: int = 0, retries: int = 0
+) -> None:
+    """Record one upstream HTTP request"""
+    host = urlsplit(template).hostname or "unknown"
+    http_request_duration.labels(host, template).observe(seconds)
+    http_requests.labels(host, template, str(status)).inc()
+    if body_bytes:
+        http_response_bytes.labels(host).inc(body_bytes)
+    if retries:
+        http_retries.labels(host).inc(retries)
+
+
+def _row_count(data: Any) -> int:
+    """Guess how many rows a formatter input holds"""
+    if data is None:
+        return 0
+    if isinstance(data, (list, tuple)):
+        return len(data)
+    if isinstance(data, dict):
+        for value in data.values():
+            if isinstance(value, list):
+                return len(value)
+            if (
+                isinstance(value, dict)
+                and value
+                and all(isinstance(v, dict) for v in value.values())
+            ):
+                return len(value)
+    return 1
+
+
+def counts_rows(func: Callable) -> Callable:
+    """Decorator that counts the rows passed to a display formatter"""
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        data = args[0] if args else next(iter(kwargs.values()), None)
+        rows_rendered.labels(name).inc(_row_count(data))
+        return func(*args, **kwargs)
+
+    return wrapper
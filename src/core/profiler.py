@@ -0,0 +1,243 @@
+"""Per-phase timing, cProfile dumps and flamegraph sampling for CLI runs.
+
+Library code marks its phases with ``profiler.phase("network wait")`` or the
+``profiler.timed("rendering")`` decorator. Both are no-ops until ``start()`` is
+called, which is what the CLI ``--profile`` flags do. Time is attributed to the
+innermost phase only, so a cache lookup that decodes JSON reports the file read
+under "cache lookup" and the decode under "json decode".
+"""
+
+import cProfile
+import functools
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, TextIO, Union
+
+from tabulate import tabulate
+
+# Phases in the order they are reported; anything else is listed after them
+PHASES = [
+    "import",
+    "config load",
+    "cache lookup",
+    "network wait",
+    "json decode",
+    "model validation",
+    "indexing",
+    "filtering",
+    "rendering",
+    "cache save",
+]
+
+
+class _NullPhase:
+    """Context manager used while profiling is off"""
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class _Phase:
+    """Time one phase, pausing whichever phase it is nested in"""
+
+    __slots__ = ("profiler", "name", "elapsed", "resumed")
+
+    def __init__(self, profiler: "Profiler", name: str):
+        self.profiler = profiler
+        self.name = name
+        self.elapsed = 0.0
+        self.resumed = 0.0
+
+    def __enter__(self) -> None:
+        stack = self.profiler._stack()
+        now = time.perf_counter()
+        if stack:
+            parent = stack[-1]
+            parent.elapsed += now - parent.resumed
+        self.resumed = now
+        stack.append(self)
+
+    def __exit__(self, *exc: Any) -> None:
+        stack = self.profiler._stack()
+        now = time.perf_counter()
+        self.elapsed += now - self.resumed
+        stack.pop()
+        if stack:
+            stack[-1].resumed = now
+        self.profiler.record(self.name, self.elapsed)
+
+
+class StackSampler:
+    """Sample a thread's call stack into collapsed-stack (flamegraph) counts"""
+
+    def __init__(self, thread_id: int, interval: float = 0.001):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                filename = os.path.basename(code.co_filename)
+                stack.append(f"{code.co_name} ({filename}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.counts[";".join(reversed(stack))] += 1
+            time.sleep(self.interval)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path: str) -> None:
+        """Write the samples in the collapsed format flamegraph.pl and speedscope read"""
+        with open(path, "w") as f:
+            for stack, count in self.counts.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class Profiler:
+    def __init__(self) -> None:
+        self.enabled = False
+        self._totals: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._origin: Optional[float] = None
+        self._ended: Optional[float] = None
+        self._cprofile: Optional[cProfile.Profile] = None
+        self._sampler: Optional[StackSampler] = None
+        self._stats_path: Optional[str] = None
+        self._flamegraph_path: Optional[str] = None
+
+    def _stack(self) -> List[_Phase]:
+        """Get the open phases of the calling thread"""
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def start(
+        self,
+        origin: Optional[float] = None,
+        stats_path: Optional[str] = None,
+        flamegraph_path: Optional[str] = None,
+    ) -> None:
+        """Start profiling; origin is a perf_counter() reading to measure wall time from"""
+        self.enabled = True
+        self._totals = {}
+        self._origin = origin if origin is not None else time.perf_counter()
+        self._ended = None
+        if origin is not None:
+            self.record("import", time.perf_counter() - origin)
+        self._stats_path = stats_path
+        if stats_path:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        self._flamegraph_path = flamegraph_path
+        if flamegraph_path:
+            self._sampler = StackSampler(threading.get_ident())
+            self._sampler.start()
+
+    def stop(self) -> None:
+        """Stop profiling and write any requested profile files"""
+        if not self.enabled:
+            return
+        self.enabled = False
+        self._ended = time.perf_counter()
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            if self._stats_path:
+                self._cprofile.dump_stats(self._stats_path)
+            self._cprofile = None
+        if self._sampler is not None:
+            self._sampler.stop()
+            if self._flamegraph_path:
+                self._sampler.write(self._flamegraph_path)
+            self._sampler = None
+
+    def record(self, name: str, seconds: float, calls: int = 1) -> None:
+        """Add time to a phase"""
+        with self._lock:
+            totals = self._totals.setdefault(name, [0.0, 0])
+            totals[0] += seconds
+            totals[1] += calls
+
+    def phase(self, name: str) -> Union[_NullPhase, _Phase]:
+        """Context manager that times a block as the given phase"""
+        if not self.enabled:
+            return _NULL_PHASE
+        return _Phase(self, name)
+
+    def timed(self, name: str) -> Callable:
+        """Decorator that times every call of a function as the given phase"""
+
+        def decorator(func: Callable) -> Callable:
+            @functools.wraps(func)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with _Phase(self, name):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Get seconds and call counts per phase, plus unattributed time as "other" """
+        end = self._ended if self._ended is not None else time.perf_counter()
+        wall = end - (self._origin or end)
+        with self._lock:
+            totals = dict(self._totals)
+        order = PHASES + sorted(name for name in totals if name not in PHASES)
+        summary = {
+            name: {"seconds": totals[name][0], "calls": totals[name][1]}
+            for name in order
+            if name in totals
+        }
+        attributed = sum(entry["seconds"] for entry in summary.values())
+        summary["other"] = {"seconds": max(wall - attributed, 0.0), "calls": 0}
+        summary["total"] = {"seconds": wall, "calls": 0}
+        return summary
+
+    def report(self, stream: Optional[TextIO] = None) -> None:
+        """Print the per-phase breakdown, to stderr unless a stream is given"""
+        stream = stream or sys.stderr
+        summary = self.summary()
+        wall = summary["total"]["seconds"] or 1.0
+        rows = [
+            [
+                name,
+                entry["calls"] or "",
+                f"{entry['seconds'] * 1000:,.1f}",
+                f"{entry['seconds'] / wall * 100:.1f}%",
+            ]
+            for name, entry in summary.items()
+        ]
+        print("\nProfile:", file=stream)
+        print(tabulate(rows, headers=["Phase", "Calls", "ms", "Share"]), file=stream)
+        if self._stats_path:
+            print(f"cProfile stats written to {self._stats_path}", file=stream)
+        if self._flamegraph_path:
+            print(f"Collapsed stacks written to {self._flamegraph_path}", file=stream)
+
+
+# Create a global instance
+profiler = Profiler()
@@ -0,0 +1,64 @@
+import json
+import os
+from typing import Any, Dict, Optional
+
+from ..core.config import config
+from ..core.logger import get_logger
+
+logger = get_logger("recorder")
+
+
+class Recorder:
+    """Capture upstream API responses so the stub server can replay them.
+
+    Each response is written to ``<directory>/<service>/<cache key>.json`` along
+    with the path (relative to the service base URL) and query it answered, so
+    recordings made against the real APIs can be served from any host.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def record(
+        self,
+        service: str,
+        base_url: str,
+        url: str,
+        key: str,
+        data: Any,
+        params: Optional[Dict] = None,
+        status: int = 200,
+    ) -> None:
+        """Write a single response to the recording directory"""
+        path = url[len(base_url) :] if url.startswith(base_url) else url
+        service_dir = os.path.join(self.directory, service)
+        entry = {
+            "service": service,
+            "path": path or "/",
+            "params": canonical_params(params),
+            "status": status,
+            "data": data,
+        }
+        try:
+            os.makedirs(service_dir, exist_ok=True)
+            with open(os.path.join(service_dir, f"{key}.json"), "w") as f:
+                json.dump(entry, f)
+        except IOError as e:
+            logger.warning("Error recording %s response %s: %s", service, key, e)
+
+
+def canonical_params(params: Optional[Dict] = None) -> Dict[str, str]:
+    """Normalise query parameters the way they go over the wire.
+
+    None values are dropped (requests never sends them), values are stringified
+    and API keys are left out so recordings can be shared.
+    """
+    if not params:
+        return {}
+    return {str(k): str(v) for k, v in sorted(params.items()) if v is not None and k != "apikey"}
+
+
+def get_recorder() -> Optional[Recorder]:
+    """Get a recorder if record mode is enabled in the config"""
+    directory = config.get("network.record_dir")
+    return Recorder(directory) if directory else None
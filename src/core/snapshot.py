@@ -0,0 +1,137 @@
+"""Binary record snapshots that answer single lookups without a full load.
+
+A snapshot file holds every record JSON-encoded back to back, followed by an
+open-addressing hash table from lookup keys (such as ``id:1`` or
+``name:ethereum``) to each record's offset and length::
+
+    header | record bytes ... | table slots (hash, offset, length) ...
+
+A reader mmaps the file, probes the table for one key and decodes only that
+record, so a lookup costs the same whatever the size of the dataset. Keys are
+hashed with BLAKE2b rather than ``hash()``, which is salted per process.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .logger import SnapshotError
+
+MAGIC = b"CDSNAP\x00\x01"
+
+# magic, record count, slot count, written at, table offset
+_HEADER = struct.Struct("<8sIIdQ")
+# key hash, record offset, record length
+_SLOT = struct.Struct("<QQI")
+
+# Table slots per key, so probe chains stay short
+_LOAD_FACTOR = 2
+
+
+def key_hash(key: str) -> int:
+    """Get the stable, non-zero 64-bit hash a key is filed under"""
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") or 1
+
+
+def write_snapshot(
+    path: str,
+    records: Iterable[Any],
+    keys: Callable[[Any], Iterable[str]],
+    written_at: Optional[float] = None,
+) -> int:
+    """Write records and their lookup keys to path atomically, returning the record count
+
+    When several records share a key, the last one wins.
+    """
+    chunks: List[bytes] = []
+    located: Dict[str, Tuple[int, int]] = {}
+    offset = _HEADER.size
+    count = 0
+    for record in records:
+        encoded = json.dumps(record, separators=(",", ":")).encode("utf-8")
+        for key in keys(record):
+            located[key] = (offset, len(encoded))
+        chunks.append(encoded)
+        offset += len(encoded)
+        count += 1
+
+    slot_count = 1
+    while slot_count < max(len(located) * _LOAD_FACTOR, 8):
+        slot_count <<= 1
+    mask = slot_count - 1
+    table = bytearray(_SLOT.size * slot_count)
+    for key, (record_offset, length) in located.items():
+        hashed = key_hash(key)
+        slot = hashed & mask
+        while _SLOT.unpack_from(table, slot * _SLOT.size)[0]:
+            slot = (slot + 1) & mask
+        _SLOT.pack_into(table, slot * _SLOT.size, hashed, record_offset, length)
+
+    header = _HEADER.pack(
+        MAGIC, count, slot_count, time.time() if written_at is None else written_at, offset
+    )
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.writelines(chunks)
+        f.write(table)
+    os.replace(tmp_path, path)
+    return count
+
+
+class Snapshot:
+    """Read-only view of a snapshot file"""
+
+    def __init__(self, path: str, keys: Callable[[Any], Iterable[str]]):
+        self.path = path
+        self._keys = keys
+        try:
+            with open(path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise SnapshotError(f"Cannot open snapshot {path}: {e}") from e
+
+        if len(self._map) < _HEADER.size:
+            self.close()
+            raise SnapshotError(f"Snapshot {path} is truncated")
+        magic, self.count, self._slots, self.written_at, self._table = _HEADER.unpack_from(
+            self._map
+        )
+        if magic != MAGIC or self._table + self._slots * _SLOT.size != len(self._map):
+            self.close()
+            raise SnapshotError(f"{path} is not a snapshot or is truncated")
+
+    @property
+    def age(self) -> float:
+        return time.time() - float(self.written_at)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Decode the record filed under key, or None"""
+        hashed = key_hash(key)
+        mask = self._slots - 1
+        slot = hashed & mask
+        for _ in range(self._slots):
+            found, offset, length = _SLOT.unpack_from(self._map, self._table + slot * _SLOT.size)
+            if not found:
+                return None
+            if found == hashed:
+                record = json.loads(self._map[offset : offset + length])
+                # Guard against the (astronomically rare) 64-bit collision
+                if key in self._keys(record):
+                    return record
+            slot = (slot + 1) & mask
+        return None
+
+    def close(self) -> None:
+        self._map.close()
+
+    def __enter__(self) -> "Snapshot":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
@@ -0,0 +1,307 @@
+"""Lightweight tracing spans for HTTP calls and CLI commands.
+
+Spans nest through a context variable, so every request made while a CLI
+command span is open becomes its child, including requests made from asyncio
+tasks. Finished spans are written as JSON lines using OpenTelemetry field
+names; when the OpenTelemetry SDK is installed they are also mirrored to the
+global tracer provider so any configured OTel exporter receives them.
+
+Tracing is off until ``tracer.configure()`` is called, and ``start_span``
+returns a shared no-op span in the meantime.
+"""
+
+import contextvars
+import json
+import os
+import re
+import sys
+import threading
+import time
+from types import TracebackType
+from typing import Any, Dict, List, Optional, TextIO, Type, Union
+from urllib.parse import urlsplit
+
+try:
+    from opentelemetry import trace as otel_trace  # type: ignore[import-not-found, unused-ignore]
+    from opentelemetry.trace import (  # type: ignore[import-not-found, unused-ignore]
+        Status,
+        StatusCode,
+    )
+except ImportError:  # pragma: no cover - optional dependency
+    otel_trace = None  # type: ignore[assignment, unused-ignore]
+
+# Path segments that identify a resource rather than a route
+_VARIABLE_SEGMENT = re.compile(r"^(\d+|0x[0-9a-fA-F]+|[0-9a-fA-F]{24,}|[0-9a-fA-F-]{36}|.*[:,].*)$")
+
+
+def url_template(url: str) -> str:
+    """Strip the query and replace ID-like path segments with placeholders"""
+    parts = urlsplit(url)
+    segments = [
+        "{id}" if _VARIABLE_SEGMENT.match(segment) else segment for segment in parts.path.split("/")
+    ]
+    return f"{parts.scheme}://{parts.netloc}{'/'.join(segments)}"
+
+
+class Span:
+    """A timed operation with attributes, written out when it ends"""
+
+    def __init__(
+        self,
+        tracer: "Tracer",
+        name: str,
+        parent: Optional["Span"] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+        kind: str = "internal",
+    ):
+        self.tracer = tracer
+        self.name = name
+        self.kind = kind
+        self.trace_id: str = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.status = "UNSET"
+        self.status_message: Optional[str] = None
+        self.start_time = time.time_ns()
+        self.end_time: Optional[int] = None
+        self._started = time.perf_counter()
+        self._token: Optional[contextvars.Token] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        self.attributes.update(attributes)
+
+    def set_status(self, status: str, message: Optional[str] = None) -> None:
+        """Set the status to "OK" or "ERROR" """
+        self.status = status
+        self.status_message = message
+
+    def record_response(
+        self, status: int, body_bytes: int, retries: int = 0, queue_wait_ms: float = 0.0
+    ) -> None:
+        """Record the outcome of an HTTP response"""
+        self.attributes.update(
+            {
+                "http.response.status_code": status,
+                "http.response.body.size": body_bytes,
+                "http.request.resend_count": retries,
+                "chaindata.queue_wait_ms": round(queue_wait_ms, 3),
+            }
+        )
+        self.set_status("ERROR" if status >= 400 else "OK")
+
+    @property
+    def duration_ms(self) -> float:
+        return (time.perf_counter() - self._started) * 1000
+
+    def end(self) -> None:
+        if self.end_time is None:
+            self.attributes.setdefault("chaindata.latency_ms", round(self.duration_ms, 3))
+            self.end_time = time.time_ns()
+            self.tracer._finish(self)
+
+    def __enter__(self) -> "Span":
+        self._token = self.tracer._current.set(self)
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None:
+        if exc is not None:
+            self.set_attribute("error.type", type(exc).__name__)
+            self.set_status("ERROR", str(exc))
+        self.end()
+        if self._token is not None:
+            self.tracer._current.reset(self._token)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the span in the shape written to JSON lines"""
+        status = {"code": self.status}
+        if self.status_message:
+            status["message"] = self.status_message
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "startTimeUnixNano": self.start_time,
+            "endTimeUnixNano": self.end_time,
+            "status": status,
+            "attributes": self.attributes,
+        }
+
+
+class _NullSpan:
+    """Span used while tracing is off"""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        pass
+
+    def set_status(self, status: str, message: Optional[str] = None) -> None:
+        pass
+
+    def record_response(self, *args: Any, **kwargs: Any) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class JsonLinesExporter:
+    """Write each finished span as one JSON line"""
+
+    def __init__(self, path: Optional[str] = None, stream: Optional[TextIO] = None):
+        self._owns_stream = False
+        if stream is None and path is not None and path != "-":
+            stream = open(path, "a", buffering=1)
+            self._owns_stream = True
+        self._stream: TextIO = stream or sys.stderr
+        self._lock = threading.Lock()
+
+    def on_start(self, span: Span) -> None:
+        pass
+
+    def on_end(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            self._stream.write(line + "\n")
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._stream.flush()
+            if self._owns_stream:
+                self._stream.close()
+
+
+class OpenTelemetryExporter:
+    """Mirror spans to the OpenTelemetry tracer provider, keeping their parents"""
+
+    def __init__(self) -> None:
+        self._tracer = otel_trace.get_tracer("chaindata")
+        self._spans: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def on_start(self, span: Span) -> None:
+        with self._lock:
+            parent = self._spans.get(span.parent_id) if span.parent_id else None
+        context = otel_trace.set_span_in_context(parent) if parent is not None else None
+        kind = otel_trace.SpanKind.CLIENT if span.kind == "client" else otel_trace.SpanKind.INTERNAL
+        otel_span = self._tracer.start_span(
+            span.name, context=context, kind=kind, start_time=span.start_time
+        )
+        with self._lock:
+            self._spans[span.span_id] = otel_span
+
+    def on_end(self, span: Span) -> None:
+        with self._lock:
+            otel_span = self._spans.pop(span.span_id, None)
+        if otel_span is None:
+            return
+        otel_span.set_attributes({k: v for k, v in span.attributes.items() if v is not None})
+        if span.status == "ERROR":
+            otel_span.set_status(Status(StatusCode.ERROR, span.status_message))
+        elif span.status == "OK":
+            otel_span.set_status(Status(StatusCode.OK))
+        otel_span.end(end_time=span.end_time)
+
+    def shutdown(self) -> None:
+        pass
+
+
+class Tracer:
+    def __init__(self) -> None:
+        self.enabled = False
+        self._exporters: List[Any] = []
+        self._current: "contextvars.ContextVar[Optional[Span]]" = contextvars.ContextVar(
+            "chaindata_span", default=None
+        )
+
+    def configure(
+        self,
+        path: Optional[str] = None,
+        stream: Optional[TextIO] = None,
+        otel: bool = True,
+    ) -> None:
+        """Start tracing to a JSON lines file ("-" for stderr) or stream.
+
+        Spans are also sent to OpenTelemetry when its SDK is installed, unless
+        otel is False.
+        """
+        self.shutdown()
+        if path or stream:
+            self._exporters.append(JsonLinesExporter(path, stream))
+        if otel and otel_trace is not None:
+            self._exporters.append(OpenTelemetryExporter())
+        self.enabled = bool(self._exporters)
+
+    def shutdown(self) -> None:
+        """Flush and close every exporter and stop tracing"""
+        for exporter in self._exporters:
+            exporter.shutdown()
+        self._exporters = []
+        self.enabled = False
+
+    def current_span(self) -> Optional[Span]:
+        return self._current.get()
+
+    def start_span(
+        self,
+        name: str,
+        attributes: Optional[Dict[str, Any]] = None,
+        kind: str = "internal",
+    ) -> Union[Span, _NullSpan]:
+        """Start a span as a child of the current one; use it as a context manager"""
+        if not self.enabled:
+            return _NULL_SPAN
+        span = Span(self, name, self._current.get(), attributes, kind)
+        for exporter in self._exporters:
+            exporter.on_start(span)
+        return span
+
+    def http_span(
+        self, method: str, template: str, attributes: Optional[Dict] = None
+    ) -> Union[Span, _NullSpan]:
+        """Start a client span for an HTTP request to a URL template"""
+        if not self.enabled:
+            return _NULL_SPAN
+        span_attributes = {
+            "http.request.method": method,
+            "url.template": template,
+            "server.address": urlsplit(template).hostname,
+        }
+        span_attributes.update(attributes or {})
+        return self.start_span(f"{method} {template}", span_attributes, kind="client")
+
+    def _finish(self, span: Span) -> None:
+        for exporter in self._exporters:
+            exporter.on_end(span)
+
+
+def requests_retries(response: Any) -> int:
+    """Count how many times urllib3 retried the request behind a requests response"""
+    retries = getattr(getattr(response, "raw", None), "retries", None)
+    history = getattr(retries, "history", None)
+    return len(history) if history else 0
+
+
+# Create a global instance
+tracer = Tracer()
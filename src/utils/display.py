@@ -4,7 +4,10 @@ from typing import Any, Dict, List
 
 from tabulate import tabulate
 
+from ..api.chain_records import to_builtin
 from ..core.config import config
+from ..core.metrics import counts_rows
+from ..core.profiler import profiler
 
 
 def print_error(message: str):
@@ -27,6 +30,23 @@ def print_warning(message: str):
     print(f"\033[93mWarning: {message}\033[0m")
 
 
+def format_age(seconds: float) -> str:
+    """Format an age in seconds as a short human-readable duration"""
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes}m {seconds}s"
+    hours, minutes = divmod(minutes, 60)
+    if hours < 24:
+        return f"{hours}h {minutes}m"
+    days, hours = divmod(hours, 24)
+    return f"{days}d {hours}h"
+
+
+@profiler.timed("rendering")
+@counts_rows
 def format_protocol_info(protocol_data: Dict[str, Any]):
     """Format protocol information for display"""
     print_success(f"\nProtocol: {protocol_data['name']}")
@@ -53,6 +73,8 @@ def format_protocol_info(protocol_data: Dict[str, Any]):
         print(tabulate(table, headers=["Date", "TVL"], tablefmt="grid"))
 
 
+@profiler.timed("rendering")
+@counts_rows
 def format_chain_list(chains: List[str], format_type: str = "table"):
     """Format chain list for display"""
     if format_type == "json":
@@ -63,6 +85,8 @@ def format_chain_list(chains: List[str], format_type: str = "table"):
             print(f"  - {chain}")
 
 
+@profiler.timed("rendering")
+@counts_rows
 def format_protocol_list(protocols: List[Dict[str, Any]], format_type: str = "table"):
     """Format protocol list for display"""
     if format_type == "json":
@@ -78,6 +102,8 @@ def format_protocol_list(protocols: List[Dict[str, Any]], format_type: str = "ta
         print(tabulate(table, headers=["Protocol", "TVL", "Chains"], tablefmt="grid"))
 
 
+@profiler.timed("rendering")
+@counts_rows
 def format_chain_data(data: List[Dict[str, Any]], fmt: str = "table") -> None:
     """Format chain data as either JSON or table"""
     if fmt == "json":
@@ -98,10 +124,12 @@ def format_chain_data(data: List[Dict[str, Any]], fmt: str = "table") -> None:
     print(tabulate(rows, headers=headers, tablefmt="grid"))
 
 
+@profiler.timed("rendering")
+@counts_rows
 def format_chain_info(chain_data: Dict[str, Any], fmt: str = "table") -> None:
     """Format chain information for display"""
     if fmt == "json":
-        print(json.dumps(chain_data, indent=2))
+        print(json.dumps(chain_data, indent=2, default=to_builtin))
         return
 
     # Format as table
@@ -118,10 +146,12 @@ def format_chain_info(chain_data: Dict[str, Any], fmt: str = "table") -> None:
     print(tabulate(rows, headers=headers, tablefmt="grid"))
 
 
+@profiler.timed("rendering")
+@counts_rows
 def format_rpc_data(data: Dict[str, Any], fmt: str = "table") -> None:
     """Format RPC endpoint data as either JSON or table"""
     if fmt == "json":
-        print(json.dumps(data, indent=2))
+        print(json.dumps(data, indent=2, default=to_builtin))
         return
 
     # Extract RPC URLs from the data
@@ -140,6 +170,8 @@ def format_rpc_data(data: Dict[str, Any], fmt: str = "table") -> None:
     print(tabulate(rows, headers=headers, tablefmt="grid"))
 
 
+@profiler.timed("rendering")
+@counts_rows
 def format_price_data(data: Dict[str, Any], fmt: str = "table") -> None:
     """Format price data as either JSON or table"""
     if fmt == "json":
@@ -155,6 +187,8 @@ def format_price_data(data: Dict[str, Any], fmt: str = "table") -> None:
     print(tabulate(rows, headers=headers, tablefmt="grid"))
 
 
+@profiler.timed("rendering")
+@counts_rows
 def format_price_history(
     data: Dict[str, List[Dict[str, Any]]], fmt: str = "table"
 ) -> None:
@@ -177,6 +211,8 @@ def format_price_history(
     print(tabulate(rows, headers=headers, tablefmt="grid"))
 
 
+@profiler.timed("rendering")
+@counts_rows
 def format_price_chart(
     data: Dict[str, List[Dict[str, Any]]], fmt: str = "table"
 ) -> None:
@@ -201,6 +237,8 @@ def format_price_chart(
     print(tabulate(rows, headers=headers, tablefmt="grid"))
 
 
+@profiler.timed("rendering")
+@counts_rows
 def format_pool_data(data: List[Dict[str, Any]], fmt: str = "table") -> None:
     """Format pool data as either JSON or table"""
     if fmt == "json":
@@ -223,6 +261,8 @@ def format_pool_data(data: List[Dict[str, Any]], fmt: str = "table") -> None:
     print(tabulate(rows, headers=headers, tablefmt="grid"))
 
 
+@profiler.timed("rendering")
+@counts_rows
 def format_pool_chart(
     data: Dict[str, List[Dict[str, Any]]], fmt: str = "table"
 ) -> None:
@@ -248,6 +288,8 @@ def format_pool_chart(
     print(tabulate(rows, headers=headers, tablefmt="grid"))
 
 
+@profiler.timed("rendering")
+@counts_rows
 def format_dex_data(data: Dict[str, Any], fmt: str = "table") -> None:
     """Format DEX data as either JSON or table"""
     if fmt == "json":
@@ -269,6 +311,8 @@ def format_dex_data(data: Dict[str, Any], fmt: str = "table") -> None:
     print(tabulate(rows, headers=headers, tablefmt="grid"))
 
 
+@profiler.timed("rendering")
+@counts_rows
 def format_options_data(data: Dict[str, Any], fmt: str = "table") -> None:
     """Format options data as either JSON or table"""
     if fmt == "json":
@@ -290,6 +334,8 @@ def format_options_data(data: Dict[str, Any], fmt: str = "table") -> None:
     print(tabulate(rows, headers=headers, tablefmt="grid"))
 
 
+@profiler.timed("rendering")
+@counts_rows
 def format_chart_data(
     data: Dict[str, List[Dict[str, Any]]], fmt: str = "table"
 ) -> None:
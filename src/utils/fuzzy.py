@@ -0,0 +1,122 @@
+"""Typo-tolerant term lookup using symmetric deletes (the SymSpell approach).
+
+Every indexed term is stored under each string obtainable by deleting up to
+``max_distance`` characters from its prefix. A query generates the same
+deletes of its own prefix, so any term within the edit distance shares at
+least one key with it. Only those few candidates are checked with a real edit
+distance, which keeps lookups far below a millisecond for thousands of terms.
+"""
+
+from itertools import combinations
+from typing import (
+    Dict,
+    Generic,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+)
+
+T = TypeVar("T")
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """Get the optimal string alignment distance, or max_distance + 1 if it is larger.
+
+    Only the diagonal band the bound allows is computed, so a check costs
+    O(len * max_distance) instead of O(len ** 2).
+    """
+    too_far = max_distance + 1
+    if abs(len(a) - len(b)) > max_distance:
+        return too_far
+    if a == b:
+        return 0
+    width = len(b) + 1
+    previous_previous = [too_far] * width
+    previous = [j if j <= max_distance else too_far for j in range(width)]
+    for i in range(1, len(a) + 1):
+        current = [too_far] * width
+        low = max(1, i - max_distance)
+        high = min(len(b), i + max_distance)
+        if low == 1:
+            current[0] = i if i <= max_distance else too_far
+        row_min = current[0]
+        char = a[i - 1]
+        for j in range(low, high + 1):
+            value = previous[j - 1] + (char != b[j - 1])
+            if previous[j] + 1 < value:
+                value = previous[j] + 1
+            if current[j - 1] + 1 < value:
+                value = current[j - 1] + 1
+            if i > 1 and j > 1 and char == b[j - 2] and a[i - 2] == b[j - 1]:
+                if previous_previous[j - 2] + 1 < value:
+                    value = previous_previous[j - 2] + 1
+            current[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > max_distance:
+            return too_far
+        previous_previous, previous = previous, current
+    return min(previous[-1], too_far)
+
+
+def _deletes(term: str, max_distance: int) -> Set[str]:
+    """Get every string made by deleting up to max_distance characters from term"""
+    keys = {term}
+    for count in range(1, min(max_distance, len(term)) + 1):
+        for positions in combinations(range(len(term)), count):
+            keys.add("".join(c for i, c in enumerate(term) if i not in positions))
+    return keys
+
+
+class Match(NamedTuple):
+    term: str
+    distance: int
+    values: Tuple
+
+
+class EditDistanceIndex(Generic[T]):
+    """Map terms to values and find the terms within an edit distance of a query"""
+
+    def __init__(self, max_distance: int = 2, prefix_length: int = 7):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self._terms: Dict[str, List[T]] = {}
+        self._keys: Dict[str, Set[str]] = {}
+
+    def add(self, term: str, value: T) -> None:
+        values = self._terms.get(term)
+        if values is None:
+            values = self._terms[term] = []
+            for key in _deletes(term[: self.prefix_length], self.max_distance):
+                self._keys.setdefault(key, set()).add(term)
+        if value not in values:
+            values.append(value)
+
+    def update(self, items: Iterable[Tuple[str, T]]) -> None:
+        for term, value in items:
+            self.add(term, value)
+
+    def exact(self, term: str) -> Tuple[T, ...]:
+        return tuple(self._terms.get(term, ()))
+
+    def lookup(self, query: str, max_distance: Optional[int] = None) -> List[Match]:
+        """Get the terms within max_distance of query, closest first"""
+        if max_distance is None:
+            max_distance = self.max_distance
+        candidates: Set[str] = set()
+        for key in _deletes(query[: self.prefix_length], max_distance):
+            candidates.update(self._keys.get(key, ()))
+        matches = []
+        for term in candidates:
+            distance = edit_distance(query, term, max_distance)
+            if distance <= max_distance:
+                matches.append(Match(term, distance, tuple(self._terms[term])))
+        matches.sort(key=lambda match: (match.distance, match.term))
+        return matches
+
+    def __len__(self) -> int:
+        return len(self._terms)
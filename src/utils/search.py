@@ -0,0 +1,125 @@
+"""Case-insensitive substring search backed by an n-gram inverted index.
+
+Every record's indexed fields are lowercased once and broken into 1-, 2- and
+3-grams. Each gram maps to the positions of the records containing it, in
+record order. A query only has to look at the records in the shortest posting
+list among its grams, and a plain ``in`` check on those few records confirms
+the match. Results therefore come back in the same order as a linear scan.
+"""
+
+import copy
+from array import array
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Longest gram indexed; queries this short are answered by one posting list
+GRAM_SIZE = 3
+
+
+def _field_value(record: Any, field: str) -> Any:
+    if isinstance(record, dict):
+        return record.get(field)
+    return getattr(record, field, None)
+
+
+def scan(
+    records: Sequence[Any],
+    query: str,
+    fields: Sequence[str],
+    getter: Callable[[Any, str], Any] = _field_value,
+) -> List[Any]:
+    """Linear-scan equivalent of SubstringIndex.search, for one-off queries"""
+    query = query.lower()
+    results = []
+    for record in records:
+        for field in fields:
+            value = getter(record, field)
+            if isinstance(value, str) and query in value.lower():
+                results.append(record)
+                break
+    return results
+
+
+# Joins a record's fields so one containment check covers them all; queries
+# never contain it, so grams spanning two fields never match
+_SEPARATOR = "\x00"
+
+
+class SubstringIndex:
+    """Find records whose fields contain a query, as a linear scan would"""
+
+    def __init__(
+        self,
+        records: Sequence[Any],
+        fields: Sequence[str],
+        getter: Callable[[Any, str], Any] = _field_value,
+    ):
+        self.records = records
+        self.fields = tuple(fields)
+        # Lowercased text of each field, by field then record position
+        self._texts: Dict[str, List[str]] = {field: [] for field in self.fields}
+        # Field texts joined per record, by the tuple of fields joined
+        self._joined: Dict[Tuple[str, ...], List[str]] = {}
+        postings: Dict[str, List[int]] = {}
+
+        for position, record in enumerate(records):
+            values = []
+            for field in self.fields:
+                value = getter(record, field)
+                text = value.lower() if isinstance(value, str) else ""
+                self._texts[field].append(text)
+                values.append(text)
+            joined = _SEPARATOR.join(values)
+            record_grams = set(joined)
+            for size in range(2, GRAM_SIZE + 1):
+                record_grams.update(joined[i : i + size] for i in range(len(joined) - size + 1))
+            for gram in record_grams:
+                posting = postings.get(gram)
+                if posting is None:
+                    postings[gram] = [position]
+                else:
+                    posting.append(position)
+
+        self._postings: Dict[str, array] = {
+            gram: array("I", posting) for gram, posting in postings.items()
+        }
+
+    def with_records(self, records: Sequence[Any]) -> "SubstringIndex":
+        """Get a copy serving records whose indexed fields match the current ones, in order"""
+        index = copy.copy(self)
+        index.records = records
+        return index
+
+    def _candidates(self, query: str) -> Sequence[int]:
+        """Get the shortest posting list among the query's grams"""
+        if len(query) <= GRAM_SIZE:
+            return self._postings.get(query, ())
+        shortest: Sequence[int] = ()
+        for start in range(len(query) - GRAM_SIZE + 1):
+            posting = self._postings.get(query[start : start + GRAM_SIZE])
+            if posting is None:
+                return ()
+            if start == 0 or len(posting) < len(shortest):
+                shortest = posting
+        return shortest
+
+    def _joined_texts(self, fields: Tuple[str, ...]) -> List[str]:
+        joined = self._joined.get(fields)
+        if joined is None:
+            columns = [self._texts[field] for field in fields]
+            joined = self._joined[fields] = [_SEPARATOR.join(row) for row in zip(*columns)]
+        return joined
+
+    def search_positions(self, query: str, fields: Optional[Sequence[str]] = None) -> List[int]:
+        """Get the positions of records whose fields contain query, in record order"""
+        query = query.lower()
+        if not query:
+            return list(range(len(self.records)))
+        if _SEPARATOR in query:
+            return []
+        texts = self._joined_texts(tuple(fields or self.fields))
+        return [position for position in self._candidates(query) if query in texts[position]]
+
+    def search(self, query: str, fields: Optional[Sequence[str]] = None) -> List[Any]:
+        """Get the records whose fields contain query, in record order"""
+        records = self.records
+        return [records[position] for position in self.search_positions(query, fields)]
@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from src.api.address_scan import AddressScanner, is_address, is_mainnet
+from src.api.chainlist import ChainlistAPI
+from src.api.rpc_client import RpcClient
+from src.api.rpc_scores import RpcScoreboard
+from src.bench.stub_node import StubNode
+
+HOLDER = "0x" + "11" * 20
+CONTRACT = "0x" + "22" * 20
+UNUSED = "0x" + "33" * 20
+
+
+def accounts(node: StubNode) -> StubNode:
+    """Give the node one funded address and one contract"""
+    node.add_method("eth_getBalance", lambda params: hex(10**18 if params[0] == HOLDER else 0))
+    node.add_method("eth_getTransactionCount", lambda params: hex(7 if params[0] == HOLDER else 0))
+    node.add_method("eth_getCode", lambda params: "0x6080" if params[0] == CONTRACT else "0x")
+    return node
+
+
+def test_is_mainnet_and_is_address():
+    assert is_mainnet({"name": "Ethereum Mainnet", "chainId": 1})
+    assert not is_mainnet({"name": "Sepolia", "chainId": 11155111})
+    assert not is_mainnet({"name": "Base Sepolia Testnet"})
+    assert not is_mainnet({"name": "Some L2", "isTestnet": True})
+    assert not is_mainnet({"name": "Old Chain", "status": "deprecated"})
+    assert is_address(HOLDER) and not is_address("0x1234") and not is_address("11" * 21)
+
+
+def test_scan_reports_each_chain_as_it_finishes(stub_nodes):
+    fast, slow = (accounts(node) for node in stub_nodes(StubNode(1), StubNode(10, latency_ms=50)))
+    chains = [
+        ({"chainId": 10, "name": "OP Mainnet"}, RpcClient([slow.url], hedge_after=0)),
+        ({"chainId": 1, "name": "Ethereum"}, RpcClient([fast.url], hedge_after=0)),
+    ]
+    results = asyncio.run(AddressScanner(deadline=5).collect([HOLDER, CONTRACT, UNUSED], chains))
+
+    assert [result.chain_id for result in results] == [1, 10]
+    holder, contract, unused = results[0].accounts
+    assert holder.balance == 10**18 and holder.nonce == 7 and holder.has_code is False
+    assert contract.has_code and contract.active and not unused.active
+    assert [account.address for account in results[1].active] == [HOLDER, CONTRACT]
+    # Three calls per address go out as one batch
+    assert fast.stats["requests"] == 1 and fast.stats["calls"] == 9
+
+
+def test_scan_deadline_drops_stalled_chains(stub_nodes):
+    fast, stalled = (
+        accounts(node) for node in stub_nodes(StubNode(1), StubNode(5, latency_ms=1000))
+    )
+    chains = [
+        ({"chainId": 5, "name": "Stalled"}, RpcClient([stalled.url], hedge_after=0)),
+        ({"chainId": 1, "name": "Ethereum"}, RpcClient([fast.url], hedge_after=0)),
+    ]
+    results = asyncio.run(AddressScanner(deadline=0.3).collect([HOLDER], chains))
+    assert [(result.chain_id, result.error) for result in results] == [
+        (1, None),
+        (5, "Deadline of 0.3s passed"),
+    ]
+
+    with pytest.raises(ValueError):
+        asyncio.run(AddressScanner().collect(["not an address"], []))
+
+
+def test_scan_addresses_covers_mainnets_with_healthy_rpcs(stub_nodes):
+    mainnet, testnet, unhealthy = (
+        accounts(node) for node in stub_nodes(StubNode(1), StubNode(11155111), StubNode(42161))
+    )
+    api = ChainlistAPI()
+    api._rpc_scores = RpcScoreboard()
+    api.initialize_data_structures(
+        [
+            {"chainId": 1, "name": "Ethereum Mainnet", "rpc": [mainnet.url]},
+            {"chainId": 11155111, "name": "Sepolia", "rpc": [testnet.url]},
+            {"chainId": 42161, "name": "Arbitrum One", "rpc": [unhealthy.url]},
+            {"chainId": 250, "name": "Fantom Opera", "rpc": ["https://rpc.example/${KEY}"]},
+        ]
+    )
+    api.rpc_scores.record(unhealthy.url, ok=False)
+
+    async def scan(**options):
+        return [result async for result in api.scan_addresses([HOLDER], **options)]
+
+    assert [result.chain_id for result in asyncio.run(scan())] == [1]
+    assert [result.chain_id for result in asyncio.run(scan(chains=["Sepolia"]))] == [11155111]
+    assert api.rpc_scores.get(mainnet.url).samples == 1
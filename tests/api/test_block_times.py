@@ -0,0 +1,133 @@
+import asyncio
+
+import pytest
+
+from src.api.block_times import (
+    BlockTime,
+    BlockTimeIndex,
+    BlockTimeResolver,
+    BlockTimeStore,
+)
+from src.api.chainlist import ChainlistAPI
+from src.api.rpc_client import RpcClient
+from src.api.rpc_scores import RpcScoreboard
+from src.bench.stub_node import StubNode
+from src.core.logger import RpcError
+
+GENESIS = 1_600_000_000
+HEAD = 1_000_000
+
+
+def made_at(block: int) -> int:
+    """Uneven block times averaging 12s"""
+    return GENESIS + 12 * block + block * block % 7
+
+
+def expected(timestamp: int) -> BlockTime:
+    """The last block made at or before timestamp, by searching every block"""
+    low, high = 0, HEAD + 1
+    while low < high:
+        middle = (low + high) // 2
+        if made_at(middle) <= timestamp:
+            low = middle + 1
+        else:
+            high = middle
+    return BlockTime(low - 1, made_at(low - 1))
+
+
+class Llama:
+    """DefiLlama stand-in that answers the block nearest a timestamp"""
+
+    def __init__(self, offset: int = 0):
+        self.offset = offset
+        self.asked = []
+
+    def get_block(self, chain, timestamp):
+        self.asked.append((chain, timestamp))
+        block = expected(timestamp).block + self.offset
+        return {"height": block, "timestamp": made_at(block)}
+
+
+def resolve(resolver, timestamps):
+    async def run():
+        async with resolver:
+            return [await resolver.block_at(timestamp) for timestamp in timestamps]
+
+    return asyncio.run(run())
+
+
+def test_index_brackets_timestamps():
+    index = BlockTimeIndex([(10, 100), (20, 200), (11, 105)])
+    assert index.add(15, 150) and not index.add(16, 90) and index.add(10, 100)
+    assert index.timestamp(15) == 150 and index.timestamp(16) is None
+    assert index.bracket(120) == (BlockTime(11, 105), BlockTime(15, 150))
+    assert index.bracket(50) == (None, BlockTime(10, 100))
+    assert index.find(102) == BlockTime(10, 100) and index.find(120) is None
+
+    # Blocks sharing a timestamp resolve to the last of them
+    index = BlockTimeIndex([(1, 10), (2, 10), (3, 10), (4, 11)])
+    assert index.find(10) == BlockTime(3, 10)
+
+
+def test_block_at_interpolates_then_answers_locally(stub_nodes):
+    [node] = stub_nodes(StubNode(1, HEAD))
+    node.serve_blocks(made_at)
+    resolver = BlockTimeResolver(BlockTimeIndex(), RpcClient([node.url], hedge_after=0))
+    timestamps = [GENESIS + 5, made_at(123456), made_at(777777) - 1, GENESIS + 6_000_000]
+
+    assert resolve(resolver, timestamps) == [expected(timestamp) for timestamp in timestamps]
+    # A bisection would read about 20 blocks per lookup
+    assert resolver.stats["reads"] < 40
+    calls = node.stats["calls"]
+    assert resolve(resolver, timestamps) == [expected(timestamp) for timestamp in timestamps]
+    assert node.stats["calls"] == calls and resolver.stats["local"] == len(timestamps)
+
+    assert resolve(resolver, [made_at(HEAD) + 60]) == [BlockTime(HEAD, made_at(HEAD))]
+    with pytest.raises(ValueError, match="before the chain's first block"):
+        resolve(resolver, [GENESIS - 1])
+
+
+def test_block_at_seeds_from_defillama(stub_nodes):
+    [node] = stub_nodes(StubNode(1, HEAD))
+    node.serve_blocks(made_at)
+    llama = Llama(offset=1)
+    resolver = BlockTimeResolver(
+        BlockTimeIndex(), RpcClient([node.url], hedge_after=0), llama, "ethereum", seed_span=100
+    )
+    at = made_at(500000) + 3
+
+    assert resolve(resolver, [at, at]) == [expected(at)] * 2
+    # The head, the first block, then the guess next to DefiLlama's answer
+    assert llama.asked == [("ethereum", at)] and resolver.stats["reads"] <= 4
+
+    # Without RPC, DefiLlama's answer is taken when it is not after the timestamp
+    assert resolve(BlockTimeResolver(BlockTimeIndex(), None, Llama(), "ethereum"), [at]) == [
+        expected(at)
+    ]
+    with pytest.raises(RpcError, match="No block known"):
+        resolve(BlockTimeResolver(BlockTimeIndex(), None, llama, "ethereum"), [at])
+
+
+def test_store_saves_and_merges(stub_nodes, tmp_path):
+    [node] = stub_nodes(StubNode(1, HEAD))
+    node.serve_blocks(made_at)
+    path = str(tmp_path / "blocks.blocktimes")
+    other = BlockTimeStore(path)
+    other.index(1).add(5, made_at(5))
+    other.save()
+
+    api = ChainlistAPI()
+    api._rpc_scores = RpcScoreboard()
+    api._block_times = BlockTimeStore(path)
+    api.initialize_data_structures([{"chainId": 1, "name": "Ethereum", "rpc": [node.url]}])
+    resolver = api.block_time_resolver(1)
+    at = made_at(4321)
+
+    async def run():
+        async with resolver:
+            return await resolver.block_at(at), await resolver.timestamp_of(7)
+
+    assert asyncio.run(run()) == (BlockTime(4321, at), made_at(7))
+    saved = BlockTimeStore(path).index(1)
+    assert saved.find(at) == BlockTime(4321, at) and saved.timestamp(5) == made_at(5)
+    assert saved.timestamp(7) == made_at(7)
@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+from src.api.chain_changes import (
+    ChainDiff,
+    append_changelog,
+    changed_fields,
+    keyed,
+    parse_since,
+    read_changelog,
+    record_digest,
+)
+from src.api.chain_records import compact_chain
+
+ETHEREUM = {"chainId": 1, "name": "Ethereum", "rpc": [{"url": "https://eth.example"}]}
+
+
+def test_digest_is_canonical():
+    reordered = {"rpc": [{"url": "https://eth.example"}], "name": "Ethereum", "chainId": 1}
+    assert record_digest(ETHEREUM) == record_digest(reordered)
+    assert record_digest(ETHEREUM) == record_digest(compact_chain(ETHEREUM))
+    assert record_digest(ETHEREUM) != record_digest(dict(ETHEREUM, name="Ether"))
+
+
+def test_keys_are_unique():
+    chains = [ETHEREUM, {"name": "No ID"}, ETHEREUM, ETHEREUM]
+    assert [key for key, _ in keyed(chains)] == ["1", "name:no id", "1#2", "1#3"]
+
+
+def test_changed_fields():
+    new = {"chainId": 1, "name": "Ethereum", "rpc": [], "tvl": 5}
+    assert changed_fields(compact_chain(ETHEREUM), new) == ["rpc", "tvl"]
+    assert changed_fields(ETHEREUM, dict(ETHEREUM)) == []
+
+
+def test_diff_entry():
+    new = dict(ETHEREUM, rpc=[])
+    base = {"chainId": 8453, "name": "Base"}
+    entry = ChainDiff(added=(base,), changed=((ETHEREUM, new),)).entry(at=100.0, total=2)
+    assert entry == {
+        "at": 100.0,
+        "chains": 2,
+        "added": [{"chainId": 8453, "name": "Base"}],
+        "removed": [],
+        "changed": [{"chainId": 1, "name": "Ethereum", "fields": ["rpc"]}],
+    }
+    assert ChainDiff().empty and not ChainDiff(added=(base,)).empty
+
+
+def test_changelog_keeps_the_newest_entries(tmp_path):
+    path = str(tmp_path / "changelog")
+    assert read_changelog(path) == []
+    for at in range(5):
+        append_changelog(path, {"at": float(at)}, max_entries=3)
+    assert [entry["at"] for entry in read_changelog(path)] == [2.0, 3.0, 4.0]
+    assert [entry["at"] for entry in read_changelog(path, since=3.5)] == [4.0]
+
+    with open(path, "a") as f:
+        f.write("not json\n")
+        f.write(json.dumps({"at": 9.0}) + "\n")
+    assert [entry["at"] for entry in read_changelog(path, since=4)] == [4.0, 9.0]
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("90m", 1_000_000 - 5400),
+        ("24h", 1_000_000 - 86400),
+        ("2w", 1_000_000 - 1209600),
+        ("1.5d", 1_000_000 - 129600),
+        ("123456", 123456.0),
+    ],
+)
+def test_parse_since(text, expected):
+    assert parse_since(text, now=1_000_000) == expected
+
+
+def test_parse_since_dates_and_errors():
+    assert parse_since("2026-01-02T03:04:05+00:00") == 1767323045.0
+    with pytest.raises(ValueError):
+        parse_since("yesterday")
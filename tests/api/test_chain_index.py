@@ -0,0 +1,130 @@
+import pytest
+
+from src.api.chain_index import EMPTY_INDEX, SCAN_QUERIES, ChainIndex
+
+
+def test_index_is_read_only():
+    index = ChainIndex([{"chainId": 1, "name": "Ethereum", "shortName": "eth"}])
+    with pytest.raises(AttributeError):
+        index.chains = ()
+    with pytest.raises(TypeError):
+        index.by_id[2] = {}
+    assert index.by_short_name["eth"]["chainId"] == 1
+
+
+def test_versions_increase_and_skip_invalid_records():
+    first = ChainIndex([{"chainId": 1, "name": "Ethereum"}, "not a chain"])
+    second = ChainIndex([])
+    assert EMPTY_INDEX.version == 0 < first.version < second.version
+    assert len(first) == 1
+
+
+def test_search_builds_the_index_only_after_repeated_queries():
+    chains = [
+        {"chainId": 1, "name": "Ethereum", "shortName": "eth", "chain": "ETH"},
+        {"chainId": 42161, "name": "Arbitrum One", "shortName": "arb1", "chain": "ETH"},
+    ]
+    index = ChainIndex(chains)
+    for _ in range(SCAN_QUERIES):
+        assert index.search_chains("eth", ("name", "shortName")) == chains[:1]
+        assert index._search is None
+    assert index.search_chains("eth", ("name", "shortName")) == chains[:1]
+    assert index._search is not None
+    assert index.search_chains("eth") == chains
+
+
+def test_search_scans_fields_the_index_does_not_cover():
+    chains = [
+        {"chainId": 1, "name": "Ethereum", "shortName": "eth", "chainSlug": "ethereum"},
+        {"chainId": 10, "name": "OP Mainnet", "shortName": "oeth", "chainSlug": "optimism"},
+    ]
+    index = ChainIndex(chains)
+    for _ in range(SCAN_QUERIES + 2):
+        assert index.search_chains("optim", ("name", "chainSlug")) == chains[1:]
+    assert index._search is None
+
+
+def make_chains():
+    return [
+        {
+            "chainId": 1,
+            "name": "Ethereum",
+            "shortName": "eth",
+            "chain": "ETH",
+            "rpc": [{"url": "https://eth.example", "tracking": "none"}],
+        },
+        {
+            "chainId": 10,
+            "name": "OP Mainnet",
+            "shortName": "oeth",
+            "chain": "ETH",
+            "rpc": [{"url": "https://op.example", "tracking": "none"}],
+        },
+        {
+            "chainId": 42161,
+            "name": "Arbitrum One",
+            "shortName": "arb1",
+            "chain": "ETH",
+            "rpc": [{"url": "https://arb.example", "tracking": "yes"}],
+        },
+    ]
+
+
+def test_refresh_without_changes_keeps_the_index():
+    index = ChainIndex(make_chains())
+    refreshed, diff = index.refreshed(make_chains())
+    assert refreshed is index
+    assert diff.empty
+
+
+def test_refresh_reuses_unchanged_records_and_their_indexes():
+    index = ChainIndex(make_chains())
+    index.rpcs.warm()
+    index.search
+    index.resolver
+
+    chains = make_chains()
+    chains[1]["rpc"].append({"url": "https://op2.example", "tracking": "none"})
+    refreshed, diff = index.refreshed(chains)
+
+    assert refreshed.version > index.version
+    assert diff.changed == ((index.by_id[10], refreshed.by_id[10]),)
+    assert not diff.added and not diff.removed
+    assert refreshed.by_id[1] is index.by_id[1]
+    assert refreshed.rpcs._filed[1] is index.rpcs._filed[1]
+    assert refreshed.rpcs.get(10, "https") == ("https://op.example", "https://op2.example")
+    # Names did not move, so the search index and resolver carry over
+    assert refreshed._search is not None and refreshed.search.records is refreshed.chains
+    assert refreshed.search_chains("op main") == [refreshed.by_id[10]]
+    assert refreshed.resolver.resolve("oeth")[0].chain is refreshed.by_id[10]
+
+
+def test_refresh_reports_added_and_removed_chains():
+    index = ChainIndex(make_chains())
+    index.search
+    chains = make_chains()
+    removed = chains.pop(0)
+    chains.append({"chainId": 8453, "name": "Base", "shortName": "base"})
+    refreshed, diff = index.refreshed(chains)
+
+    assert diff.added == (chains[-1],)
+    assert diff.removed == (removed,)
+    assert diff.chain_ids() == {1, 8453}
+    assert 1 not in refreshed.by_id and refreshed.by_short_name["base"]["chainId"] == 8453
+    # Positions moved, so the search index is rebuilt on first use
+    assert refreshed._search is None
+    assert refreshed.search_chains("base") == [chains[-1]]
+
+
+def test_compact_refresh_matches_a_full_build():
+    index = ChainIndex(make_chains(), compact=True)
+    chains = make_chains()
+    chains[2]["name"] = "Arbitrum"
+    refreshed, diff = index.refreshed(chains, compact=True)
+    full = ChainIndex(chains, compact=True)
+
+    assert [chain.to_dict() for chain in refreshed.chains] == chains
+    assert dict(refreshed.digests) == dict(full.digests)
+    assert list(refreshed.by_name) == list(full.by_name)
+    assert refreshed.by_id[1] is index.by_id[1]
+    assert [old["name"] for old, _ in diff.changed] == ["Arbitrum One"]
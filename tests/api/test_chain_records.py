@@ -0,0 +1,83 @@
+import copy
+import json
+import pickle
+
+import pytest
+
+from src.api.chain_index import ChainIndex
+from src.api.chain_records import ChainRecord, CompactRecord, compact_chain, to_builtin
+from src.bench.datasets import generate_chains
+
+CHAIN = {
+    "name": "Ethereum Mainnet",
+    "chainId": 1,
+    "shortName": "eth",
+    "nativeCurrency": {"name": "Ether", "symbol": "ETH", "decimals": 18},
+    "rpc": [
+        {"url": "https://eth.example", "tracking": "none", "isOpenSource": True},
+        "wss://eth.example/ws",
+    ],
+    "explorers": [{"name": "etherscan", "url": "https://etherscan.io", "standard": "EIP3091"}],
+    "features": [{"name": "EIP1559"}],
+    "ens": {"registry": "0x00000000000C2E074eC69A0dFb2997BA6C7d2e1e"},
+    "customField": ["a", "b"],
+}
+
+
+def test_records_read_like_the_dicts():
+    record = compact_chain(CHAIN)
+    assert isinstance(record, ChainRecord)
+    assert record["name"] == record.name == "Ethereum Mainnet"
+    assert record["nativeCurrency"]["symbol"] == "ETH"
+    assert record.get("rpc")[0].get("tracking") == "none"
+    assert record["rpc"][1] == "wss://eth.example/ws"
+    assert record["customField"] == ("a", "b")
+    assert record.get("tvl", 0) == 0
+    assert "tvl" not in record and "chainId" in record and "customField" in record
+    with pytest.raises(KeyError):
+        record["tvl"]
+    with pytest.raises(KeyError):
+        record["get"]
+    assert set(record) == set(CHAIN)
+    assert len(record) == len(CHAIN)
+
+
+def test_records_are_read_only():
+    record = compact_chain(CHAIN)
+    with pytest.raises(AttributeError):
+        record.name = "Other"
+    with pytest.raises(TypeError):
+        record["name"] = "Other"
+
+
+def test_round_trips_to_plain_data():
+    record = compact_chain(CHAIN)
+    assert record.to_dict() == CHAIN
+    assert json.loads(json.dumps(record, default=to_builtin)) == CHAIN
+    assert pickle.loads(pickle.dumps(record)).to_dict() == CHAIN
+    assert copy.deepcopy(record).to_dict() == CHAIN
+
+
+def test_short_strings_are_interned():
+    first, second = (compact_chain(json.loads(json.dumps(CHAIN))) for _ in range(2))
+    assert first["rpc"][0]["tracking"] is second["rpc"][0]["tracking"]
+    assert first["nativeCurrency"]["symbol"] is second["nativeCurrency"]["symbol"]
+
+
+def test_compact_index_matches_dict_index():
+    chains = generate_chains(100, seed=2)
+    plain = ChainIndex(chains)
+    compact = ChainIndex(chains, compact=True)
+    assert all(isinstance(chain, CompactRecord) for chain in compact.chains)
+    assert [chain.to_dict() for chain in compact.chains] == list(plain.chains)
+    assert set(compact.by_short_name) == set(plain.by_short_name)
+    chain_id = chains[7]["chainId"]
+    for scheme in ("https", "wss", None):
+        assert compact.rpcs.get(chain_id, scheme, "limited") == plain.rpcs.get(
+            chain_id, scheme, "limited"
+        )
+    assert compact.search_chains("nova") == [
+        compact.by_id[chain["chainId"]] for chain in plain.search_chains("nova")
+    ]
+    # Already compact records are indexed as they are
+    assert ChainIndex(compact.chains).chains == compact.chains
@@ -0,0 +1,70 @@
+import pytest
+
+from src.api.chain_resolver import RESOLVE_THRESHOLD, ChainResolver, normalize
+
+CHAINS = [
+    {"chainId": 1, "name": "Ethereum Mainnet", "shortName": "eth"},
+    {"chainId": 137, "name": "Polygon Mainnet", "shortName": "matic"},
+    {"chainId": 56, "name": "BNB Smart Chain Mainnet", "shortName": "bnb"},
+    {"chainId": 42161, "name": "Arbitrum One", "shortName": "arb1"},
+    {"chainId": 42170, "name": "Arbitrum Nova", "shortName": "arb-nova"},
+]
+
+
+@pytest.fixture(scope="module")
+def resolver():
+    return ChainResolver(CHAINS)
+
+
+def best(resolver, identifier):
+    match = resolver.resolve(identifier)[0]
+    return match.chain["chainId"], match.method
+
+
+def test_normalize():
+    assert normalize("Polygon-PoS") == "polygonpos"
+    assert normalize("  Arbitrum One ") == "arbitrumone"
+
+
+@pytest.mark.parametrize(
+    "identifier, expected",
+    [
+        (137, (137, "id")),
+        ("42161", (42161, "id")),
+        ("arbitrum one", (42161, "exact")),
+        ("ARB1", (42161, "exact")),
+        ("ethereum", (1, "exact")),
+        ("polygon-pos", (137, "alias")),
+        ("bsc", (56, "alias")),
+        ("etherium", (1, "fuzzy")),
+        ("arbitum", (42161, "fuzzy")),
+        ("nova", (42170, "substring")),
+    ],
+)
+def test_resolves_loose_identifiers(resolver, identifier, expected):
+    assert best(resolver, identifier) == expected
+
+
+def test_scores_rank_exact_above_fuzzy_above_substring(resolver):
+    exact = resolver.resolve("arbitrum one")[0].score
+    fuzzy = resolver.resolve("etherium")[0].score
+    substring = resolver.resolve("nova")[0].score
+    assert exact == 1.0 > fuzzy >= RESOLVE_THRESHOLD > substring > 0
+
+
+def test_returns_ranked_candidates_up_to_limit(resolver):
+    matches = resolver.resolve("arbitrum")
+    assert [match.chain["chainId"] for match in matches] == [42161, 42170]
+    assert matches[0].score > matches[1].score
+    assert len(resolver.resolve("mainnet", limit=2)) == 2
+
+
+def test_unknown_identifiers_have_no_candidates(resolver):
+    assert resolver.resolve("qqqqqqq") == []
+    assert resolver.resolve("---") == []
+    assert resolver.resolve("999999") == []
+
+
+def test_aliases_for_missing_chains_are_ignored():
+    resolver = ChainResolver(CHAINS[:1])
+    assert resolver.resolve("bsc") == []
@@ -1,20 +1,39 @@
+import threading
+import time
 from typing import Any, Dict, List
 from unittest.mock import MagicMock, patch
 
 import pytest
 
-from src.api.chainlist import ChainlistAPI
+from src.api.chainlist import ChainlistAPI, chain_snapshot_keys
+from src.core.config import config
+from src.core.logger import OfflineError
+from src.core.metrics import cache_requests
+from src.core.snapshot import Snapshot
 
 
 @pytest.fixture
-def mock_cache():
-    """Mock the blockchain cache"""
+def mock_cache(tmp_path):
+    """Mock the blockchain cache, keeping its lookup snapshot in a temporary directory"""
     with patch("src.api.chainlist.blockchain_cache") as mock:
         mock.load_from_cache.return_value = None
         mock.save_to_cache.return_value = None
+        mock.load_with_age.return_value = None
+        mock.saved_at.return_value = None
+        mock.expiry_seconds = 3600
+        mock.sidecar_path.side_effect = lambda key, extension: str(tmp_path / f"{key}.{extension}")
         yield mock
 
 
+@pytest.fixture
+def offline():
+    """Enable offline mode for the duration of a test"""
+    previous = config.get("network.offline")
+    config.set("network.offline", True)
+    yield
+    config.set("network.offline", previous)
+
+
 @pytest.fixture
 def chainlist_api(mock_cache):
     """Create a fresh ChainlistAPI instance for each test"""
@@ -172,6 +191,26 @@ def test_get_rpcs(chainlist_api, mock_blockchain_data):
     assert len(rpcs) == 1
     assert rpcs[0] == "https://mainnet.infura.io/v3/"
 
+    # Names and records resolve to the same precomputed tuple
+    assert chainlist_api.get_rpcs("Arbitrum One", "https") is chainlist_api.get_rpcs(42161, "https")
+    record = mock_blockchain_data[1]
+    assert chainlist_api.get_rpcs(record, "https") is chainlist_api.get_rpcs(42161, "https")
+
+
+def test_get_rpcs_ranked(chainlist_api, mock_blockchain_data, tmp_path):
+    chainlist_api.initialize_data_structures(mock_blockchain_data)
+    listed = chainlist_api.get_rpcs(1, "https")
+    # Unscored endpoints keep their dataset order
+    assert chainlist_api.get_rpcs(1, "https", ranked=True) == listed
+
+    scores = chainlist_api.rpc_scores
+    assert scores.path == str(tmp_path / "blockchain_data.scores")
+    scores.record(listed[1], 40.0)
+    scores.record(listed[0], 20.0, ok=False)
+    assert chainlist_api.get_rpcs(1, "https", ranked=True) == (listed[1],)
+    assert chainlist_api.get_rpcs(1, "https", ranked=True, min_health=0) == (listed[1], listed[0])
+    assert chainlist_api.get_rpcs_many([1, "Arbitrum One"], "https", ranked=True)[1] == (listed[1],)
+
 
 def test_get_explorer(chainlist_api, mock_blockchain_data):
     chainlist_api.initialize_data_structures(mock_blockchain_data)
@@ -217,3 +256,243 @@ def test_get_explorer_link(chainlist_api, mock_blockchain_data):
         link
         == "https://etherscan.io/address/0x1234567890123456789012345678901234567890"
     )
+
+
+def test_offline_serves_stale_cache(chainlist_api, mock_cache, mock_blockchain_data, offline):
+    mock_cache.load_with_age.return_value = (mock_blockchain_data, 7200.0)
+    with patch("requests.Session.get") as mock_get:
+        result = chainlist_api.get_all_blockchain_data()
+        mock_get.assert_not_called()
+    mock_cache.load_with_age.assert_called_once_with("blockchain_data", ignore_expiry=True)
+    assert result == mock_blockchain_data
+    assert chainlist_api.data_age == 7200.0
+    assert chainlist_api.chain_by_id[1]["name"] == "Ethereum"
+
+
+def test_offline_cache_miss(chainlist_api, mock_cache, offline):
+    mock_cache.load_with_age.return_value = None
+    with patch("requests.Session.get") as mock_get:
+        with pytest.raises(OfflineError):
+            chainlist_api.get_all_blockchain_data()
+        mock_get.assert_not_called()
+
+
+def test_reload_swaps_in_a_new_index(chainlist_api, mock_blockchain_data):
+    chainlist_api.initialize_data_structures(mock_blockchain_data)
+    old_index = chainlist_api.index
+    assert chainlist_api.get_chain_data_by_name("ETHEREUM")["chainId"] == 1
+
+    renamed = [dict(mock_blockchain_data[0], name="Ethereum Mainnet")]
+    chainlist_api.initialize_data_structures(renamed)
+
+    assert chainlist_api.index.version > old_index.version
+    assert chainlist_api.get_chain_data_by_name("ethereum") is None
+    assert chainlist_api.get_chain_data_by_name("Ethereum Mainnet")["chainId"] == 1
+    # The previous snapshot is untouched for readers still holding it
+    assert old_index.by_name["ethereum"]["chainId"] == 1
+
+
+def test_name_lookups_share_one_memo_entry(chainlist_api, mock_blockchain_data):
+    chainlist_api.initialize_data_structures(mock_blockchain_data)
+    for name in ("Ethereum", "ETHEREUM", "ethereum"):
+        chainlist_api.get_chain_data_by_name(name)
+    assert list(chainlist_api._memo) == [(chainlist_api.index.version, "name", "ethereum")]
+
+
+def test_concurrent_readers_never_see_partial_state(chainlist_api, mock_blockchain_data):
+    datasets = [
+        [dict(chain, name=f"{chain['name']} v{generation}") for chain in mock_blockchain_data]
+        for generation in range(2)
+    ]
+    chainlist_api.initialize_data_structures(datasets[0])
+    stop = threading.Event()
+    torn = []
+
+    def read():
+        while not stop.is_set():
+            index = chainlist_api.index
+            names = {chain["name"].lower() for chain in index.chains}
+            if set(index.by_name) != names:
+                torn.append(index.version)
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    for generation in range(200):
+        chainlist_api.initialize_data_structures(datasets[generation % 2])
+    stop.set()
+    for reader in readers:
+        reader.join()
+    assert torn == []
+
+
+def test_fuzzy_lookup_uses_confident_matches_only(chainlist_api, mock_blockchain_data):
+    chainlist_api.initialize_data_structures(mock_blockchain_data)
+    assert chainlist_api.get_chain_data("etherium") is None
+    assert chainlist_api.get_chain_data("etherium", fuzzy=True)["chainId"] == 1
+    assert chainlist_api.get_chain_data("arb", fuzzy=True)["chainId"] == 42161
+    assert chainlist_api.get_chain_data("qqqqqqq", fuzzy=True) is None
+
+
+def test_resolve_is_memoized_per_snapshot(chainlist_api, mock_blockchain_data):
+    chainlist_api.initialize_data_structures(mock_blockchain_data)
+    first = chainlist_api.resolve("Arbitrum-One")
+    assert [match.method for match in first] == ["exact"]
+    assert chainlist_api.resolve("arbitrum one") == first
+    assert [key for key in chainlist_api._memo if key[1] == "resolve"] == [
+        (chainlist_api.index.version, "resolve", ("arbitrumone", 5))
+    ]
+    chainlist_api.initialize_data_structures(mock_blockchain_data)
+    assert chainlist_api._memo == {}
+
+
+def test_resolve_many_reports_found_and_missing_in_order(chainlist_api, mock_blockchain_data):
+    chainlist_api.initialize_data_structures(mock_blockchain_data)
+    results = list(chainlist_api.resolve_many(["1", 42161, "ARB1", "Ethereum", "etherium", ""]))
+    assert [result.identifier for result in results] == ["1", 42161, "ARB1", "Ethereum", "etherium", ""]
+    assert [result.found for result in results] == [True, True, True, True, False, False]
+    assert [result.method for result in results[:4]] == ["id", "id", "exact", "exact"]
+    assert results[4].chain is None and results[4].score == 0.0
+
+
+def test_resolve_many_memoizes_repeats_and_can_be_fuzzy(chainlist_api, mock_blockchain_data):
+    chainlist_api.initialize_data_structures(mock_blockchain_data)
+    first, second, fuzzy = chainlist_api.resolve_many(["etherium", "etherium", "arb"], fuzzy=True)
+    assert first is second
+    assert (first.chain["chainId"], first.method) == (1, "fuzzy")
+    assert (fuzzy.chain["chainId"], fuzzy.method) == (42161, "alias")
+
+
+def test_resolve_many_uses_one_snapshot(chainlist_api, mock_blockchain_data):
+    chainlist_api.initialize_data_structures(mock_blockchain_data)
+    results = chainlist_api.resolve_many(["1", "1", "42161"])
+    assert next(results).found
+    chainlist_api.initialize_data_structures([])
+    assert [result.found for result in results] == [True, True]
+
+
+def test_get_rpcs_filters_by_privacy(chainlist_api, mock_blockchain_data):
+    chains = [dict(chain, rpc=list(chain["rpc"])) for chain in mock_blockchain_data]
+    chains[0]["rpc"].append({"url": "wss://eth.example", "tracking": "none", "isOpenSource": True})
+    chainlist_api.initialize_data_structures(chains)
+    assert chainlist_api.get_rpcs(1, None) == (
+        "https://mainnet.infura.io/v3/",
+        "https://eth-mainnet.public.blastapi.io",
+        "wss://eth.example",
+    )
+    assert chainlist_api.get_rpcs(1, "https", max_tracking="limited") == chainlist_api.get_rpcs(1, "https")
+    assert chainlist_api.get_rpcs(1, "wss", open_source=True) == ("wss://eth.example",)
+    assert chainlist_api.get_rpcs(1, "https", open_source=True) == ()
+    with pytest.raises(ValueError):
+        chainlist_api.get_rpcs(1, "https", max_tracking="some")
+
+
+def test_get_rpcs_of_records_outside_the_index(chainlist_api, mock_blockchain_data):
+    chainlist_api.initialize_data_structures(mock_blockchain_data)
+    record = dict(mock_blockchain_data[0], rpc=[{"url": "https://other", "tracking": "none"}])
+    assert chainlist_api.get_rpcs(record, "https", no_tracking=True) == ("https://other",)
+
+
+def test_get_rpcs_many(chainlist_api, mock_blockchain_data):
+    chainlist_api.initialize_data_structures(mock_blockchain_data)
+    rpcs = chainlist_api.get_rpcs_many([1, "arb1", "Ethereum", "unknown", 1], "https", no_tracking=True)
+    assert rpcs == {
+        1: ("https://mainnet.infura.io/v3/",),
+        "arb1": ("https://arb1.arbitrum.io/rpc",),
+        "Ethereum": ("https://mainnet.infura.io/v3/",),
+        "unknown": (),
+    }
+
+
+def test_compact_records_setting(chainlist_api, mock_blockchain_data):
+    config.set("chainlist.compact_records", True)
+    try:
+        chainlist_api.initialize_data_structures(mock_blockchain_data)
+    finally:
+        config.set("chainlist.compact_records", False)
+    chain = chainlist_api.get_chain_data("Ethereum")
+    assert chain.to_dict() == mock_blockchain_data[0]
+    assert chainlist_api.get_rpcs(chain, "https", no_tracking=True) == ("https://mainnet.infura.io/v3/",)
+    assert chainlist_api.get_native_currency(1)["symbol"] == "ETH"
+
+
+def test_refresh_writes_a_lookup_snapshot(chainlist_api, mock_response, mock_blockchain_data):
+    with patch("requests.Session.get", return_value=mock_response):
+        chainlist_api.get_all_blockchain_data()
+
+    # A fresh process answers exact lookups without loading the dataset
+    api = ChainlistAPI()
+    hits = cache_requests.labels("chainlist-snapshot", "hit")
+    misses = cache_requests.labels("chainlist-snapshot", "miss")
+    counted = hits.value, misses.value
+    with patch.object(api, "get_all_blockchain_data") as load:
+        assert api.lookup_chain(1) == mock_blockchain_data[0]
+        assert api.lookup_chain("42161")["name"] == "Arbitrum One"
+        assert api.lookup_chain("ETHEREUM")["chainId"] == 1
+        assert api.lookup_chain("arb1")["chainId"] == 42161
+        assert api.lookup_chain("unknown") is None
+        load.assert_not_called()
+    assert not api.blockchain_data
+    assert (hits.value - counted[0], misses.value - counted[1]) == (4, 1)
+
+
+def test_expired_snapshot_falls_back_to_a_full_load(mock_cache, mock_blockchain_data):
+    ChainlistAPI()._write_snapshot(mock_blockchain_data, written_at=0.0)
+    api = ChainlistAPI()
+    mock_cache.load_from_cache.return_value = mock_blockchain_data
+    assert api.lookup_chain("eth")["chainId"] == 1
+    mock_cache.load_from_cache.assert_called_once()
+    assert list(api.blockchain_data) == mock_blockchain_data
+
+
+def test_offline_snapshot_lookups_report_data_age(mock_cache, mock_blockchain_data, offline):
+    ChainlistAPI()._write_snapshot(mock_blockchain_data, written_at=0.0)
+    api = ChainlistAPI()
+    assert api.lookup_chain(1)["name"] == "Ethereum"
+    assert api.data_age > 0
+    mock_cache.load_with_age.assert_not_called()
+
+
+def test_cache_hit_rewrites_a_stale_snapshot(chainlist_api, mock_cache, mock_blockchain_data):
+    mock_cache.load_from_cache.return_value = mock_blockchain_data
+    mock_cache.saved_at.return_value = time.time() + 60
+    chainlist_api.get_all_blockchain_data()
+
+    # Dated like the cache entry it was rebuilt from
+    path = mock_cache.sidecar_path("blockchain_data", "snap")
+    with Snapshot(path, chain_snapshot_keys) as snapshot:
+        assert snapshot.written_at == mock_cache.saved_at.return_value
+        assert snapshot.get("short:arb1")["chainId"] == 42161
+
+
+def test_refresh_patches_the_index_and_logs_changes(chainlist_api, mock_cache, mock_blockchain_data):
+    chainlist_api.initialize_data_structures(mock_blockchain_data)
+    ethereum = chainlist_api.chain_by_id[1]
+    updated = [dict(mock_blockchain_data[0]), dict(mock_blockchain_data[1], tvl=1)]
+    response = MagicMock()
+    response.json.return_value = updated
+    with patch("requests.Session.get", return_value=response):
+        chainlist_api.get_all_blockchain_data(force_refresh=True)
+
+    assert chainlist_api.chain_by_id[1] is ethereum
+    assert chainlist_api.chain_by_id[42161]["tvl"] == 1
+    assert chainlist_api.last_changes.chain_ids() == {42161}
+    [entry] = chainlist_api.changes()
+    assert entry["changed"] == [{"chainId": 42161, "name": "Arbitrum One", "fields": ["tvl"]}]
+    assert chainlist_api.changes(since=entry["at"] + 1) == []
+
+    # Nothing changed: the index and its memos stay, and nothing is logged
+    index = chainlist_api.index
+    with patch("requests.Session.get", return_value=response):
+        chainlist_api.get_all_blockchain_data(force_refresh=True)
+    assert chainlist_api.index is index
+    assert len(chainlist_api.changes()) == 1
+
+
+def test_refresh_in_a_fresh_process_diffs_against_the_cache(chainlist_api, mock_cache, mock_response, mock_blockchain_data):
+    mock_cache.load_with_age.return_value = (mock_blockchain_data[:1], 90000.0)
+    with patch("requests.Session.get", return_value=mock_response):
+        chainlist_api.get_all_blockchain_data()
+    [entry] = chainlist_api.changes()
+    assert entry["added"] == [{"chainId": 42161, "name": "Arbitrum One"}]
+    assert entry["chains"] == 2
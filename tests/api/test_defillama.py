@@ -3,6 +3,8 @@ from unittest.mock import MagicMock, patch
 import pytest
 
 from src.api.defillama import DefiLlamaAPI
+from src.core.config import config
+from src.core.logger import OfflineError
 
 
 @pytest.fixture
@@ -10,6 +12,15 @@ def defillama_api():
     return DefiLlamaAPI()
 
 
+@pytest.fixture
+def offline():
+    """Enable offline mode for the duration of a test"""
+    previous = config.get("network.offline")
+    config.set("network.offline", True)
+    yield
+    config.set("network.offline", previous)
+
+
 @pytest.fixture
 def mock_protocols_response():
     return [
@@ -158,6 +169,13 @@ def test_get_historical_prices(defillama_api, mock_prices_response):
         assert result["coins"]["coingecko:ethereum"]["price"] == 2000.50
 
 
+def test_get_block(defillama_api):
+    answer = {"height": 11150916, "timestamp": 1603964988}
+    with patch.object(defillama_api, "_make_request", return_value=answer) as request:
+        assert defillama_api.get_block("ethereum", 1603964990) == answer
+    request.assert_called_once_with(f"{defillama_api.coins_url}/block/ethereum/1603964990")
+
+
 def test_sanitize_cache_key(defillama_api):
     url = "https://api.llama.fi/protocols"
     params = {"chain": "ethereum", "limit": 10}
@@ -200,3 +218,24 @@ def test_get_protocol_info(
         assert result["name"] == protocol
         assert result["current_tvl"] == expected_tvl
         assert "tvl_history" in result
+
+
+def test_offline_make_request(defillama_api, mock_protocols_response, offline):
+    with patch("src.api.defillama.defillama_cache") as mock_cache, patch.object(
+        defillama_api.session, "get"
+    ) as mock_get:
+        mock_cache.load_with_age.return_value = (mock_protocols_response, 90000.0)
+        result = defillama_api.get_all_protocols()
+        mock_get.assert_not_called()
+    assert result == mock_protocols_response
+    assert defillama_api.data_age == 90000.0
+
+
+def test_offline_cache_miss(defillama_api, offline):
+    with patch("src.api.defillama.defillama_cache") as mock_cache, patch.object(
+        defillama_api.session, "get"
+    ) as mock_get:
+        mock_cache.load_with_age.return_value = None
+        with pytest.raises(OfflineError):
+            defillama_api.get_all_protocols()
+        mock_get.assert_not_called()
@@ -0,0 +1,108 @@
+import asyncio
+import json
+
+import pytest
+
+from src.api.chainlist import ChainlistAPI
+from src.api.log_scan import LogScanner, decode_log, logs_result, too_large
+from src.api.rpc_client import RpcClient
+from src.api.rpc_scores import RpcScoreboard
+from src.bench.stub_node import StubNode
+from src.core.logger import ResultTooLargeError, RpcError
+
+
+def dense(block: int) -> int:
+    """Ten logs in every tenth block"""
+    return 10 if block % 10 == 0 else 0
+
+
+def scan(scanner: LogScanner, from_block: int, to_block, **filter):
+    async def run():
+        async with scanner.client:
+            return [log async for log in scanner.scan(from_block, to_block, **filter)]
+
+    return asyncio.run(run())
+
+
+def test_too_large_and_decode():
+    assert too_large("query returned more than 10000 results")
+    assert too_large("Log response size exceeded. You can make eth_getLogs requests with up to")
+    assert too_large("block range is too wide")
+    assert not too_large("daily request limit reached")
+    with pytest.raises(ResultTooLargeError) as error:
+        logs_result(
+            {"jsonrpc": "2.0", "id": 1, "error": {"code": -32005, "message": "too many logs"}}
+        )
+    assert error.value.code == -32005
+
+    log = decode_log({"blockNumber": "0x10", "logIndex": "0x2", "data": "0x10"})
+    assert log == {"blockNumber": 16, "logIndex": 2, "data": "0x10"}
+
+
+def test_scan_splits_refused_chunks_and_keeps_order(stub_nodes):
+    nodes = stub_nodes(StubNode(1, 1000), StubNode(1, 1000))
+    for node in nodes:
+        node.serve_logs(dense, max_results=25)
+    client = RpcClient([node.url for node in nodes], hedge_after=0)
+    scanner = LogScanner(client, chunk_size=100, concurrency=4)
+    logs = scan(scanner, 5, 504)
+
+    assert [(log["blockNumber"], log["logIndex"]) for log in logs] == [
+        (block, index) for block in range(10, 501, 10) for index in range(10)
+    ]
+    assert scanner.stats["splits"] > 0 and scanner.stats["logs"] == 500
+
+    [single] = stub_nodes(StubNode(1, 1000))
+    single.serve_logs(lambda block: 30, max_results=25)
+    with pytest.raises(RpcError, match="Block 0 has more logs"):
+        scan(LogScanner(RpcClient([single.url], hedge_after=0), chunk_size=4, concurrency=1), 0, 3)
+
+
+def test_scan_grows_chunks_over_sparse_ranges(stub_nodes):
+    [node] = stub_nodes(StubNode(1, 100000))
+    node.serve_logs(lambda block: 1 if block % 1000 == 0 else 0)
+    scanner = LogScanner(
+        RpcClient([node.url], hedge_after=0), chunk_size=10, max_chunk_size=5000, concurrency=1
+    )
+    logs = scan(scanner, 0, "latest")
+
+    assert [log["blockNumber"] for log in logs] == list(range(0, 100001, 1000))
+    # Doubling from 10 blocks reaches the 5000 cap instead of making 10000 queries
+    assert scanner.stats["chunks"] < 40 and node.stats["calls"] == scanner.stats["chunks"] + 1
+
+
+def test_checkpoint_resumes_without_repeating_logs(stub_nodes, tmp_path):
+    [node] = stub_nodes(StubNode(1, 1000))
+    node.serve_logs(dense)
+    checkpoint = str(tmp_path / "logs.json")
+    address = "0x" + "ab" * 20
+
+    def scanner():
+        return LogScanner(
+            RpcClient([node.url], hedge_after=0), chunk_size=50, checkpoint=checkpoint
+        )
+
+    first = scan(scanner(), 0, 199, address=address)
+    with open(checkpoint, encoding="utf-8") as f:
+        assert json.load(f) == {"filter": {"address": address}, "next_block": 200}
+    second = scan(scanner(), 0, 399, address=address)
+    assert [log["blockNumber"] for log in first + second] == [
+        block for block in range(0, 400, 10) for _ in range(10)
+    ]
+
+    with pytest.raises(ValueError, match="different filter"):
+        scan(scanner(), 0, 399, address=address, topics=[None, "0x" + "00" * 32])
+
+
+def test_scan_logs_through_chainlist(stub_nodes):
+    [node] = stub_nodes(StubNode(10, 300))
+    node.serve_logs(dense)
+    api = ChainlistAPI()
+    api._rpc_scores = RpcScoreboard()
+    api.initialize_data_structures([{"chainId": 10, "name": "OP Mainnet", "rpc": [node.url]}])
+
+    async def run():
+        return [log async for log in api.scan_logs(10, 100, chunk_size=64)]
+
+    assert len(asyncio.run(run())) == 210
+    assert api.rpc_scores.get(node.url).samples > 0
@@ -0,0 +1,120 @@
+import asyncio
+
+import pytest
+
+from src.api.rpc_batch import demultiplex, encoded_size, halves, pack
+from src.api.rpc_client import RpcClient
+from src.bench.stub_node import LIMIT_EXCEEDED, StubNode
+from src.core.logger import BatchRejectedError, RpcError
+
+
+def request(call_id, method="eth_getBalance", params=("0x" + "ab" * 20, "latest")):
+    return {"jsonrpc": "2.0", "id": call_id, "method": method, "params": list(params)}
+
+
+def test_pack_limits_calls_and_bytes():
+    requests = [request(n) for n in range(10)]
+    assert [len(batch) for batch in pack(requests, 4, 1 << 20)] == [4, 4, 2]
+
+    size = encoded_size(requests[0]) + 1
+    assert [len(batch) for batch in pack(requests, 100, 2 + 3 * size)] == [3, 3, 3, 1]
+    # An oversized call still goes out, on its own
+    assert [len(batch) for batch in pack(requests[:2], 100, 10)] == [1, 1]
+    assert [batch[0]["id"] for batch in pack(requests, 3, 1 << 20)] == [0, 3, 6, 9]
+
+
+def test_demultiplex_matches_answers_by_id():
+    batch = [request(1), request(2), request(3)]
+    body = [
+        {"jsonrpc": "2.0", "id": 3, "result": "0x3"},
+        {"jsonrpc": "2.0", "id": 1, "result": "0x1"},
+        {"jsonrpc": "2.0", "id": 9, "result": "0x9"},
+    ]
+    answers = demultiplex(batch, body)
+    assert sorted(answers) == [1, 3] and answers[3]["result"] == "0x3"
+
+    with pytest.raises(BatchRejectedError) as error:
+        demultiplex(
+            batch, {"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "too big"}}
+        )
+    assert error.value.code == -32600
+    assert halves(batch) == [batch[:2], batch[2:]]
+
+    # A rate limited endpoint has not refused the batch itself
+    with pytest.raises(RpcError) as error:
+        demultiplex(batch, {"jsonrpc": "2.0", "id": None, "error": {"code": -32005}})
+    assert not isinstance(error.value, BatchRejectedError)
+
+
+def balances(node: StubNode) -> None:
+    node.add_method("eth_getBalance", lambda params: hex(int(params[0], 16) % 1000))
+
+    def reverted(params):
+        raise RpcError("execution reverted", code=3)
+
+    node.add_method("eth_call", reverted)
+
+
+def test_call_many_batches_and_orders_results(stub_nodes):
+    nodes = stub_nodes(StubNode(1, 100), StubNode(1, 100))
+    for node in nodes:
+        balances(node)
+    client = RpcClient([node.url for node in nodes], batch_size=50, hedge_after=0)
+    calls = [("eth_getBalance", [hex(n), "latest"]) for n in range(1000)]
+
+    async def run():
+        async with client:
+            return await client.call_many(calls)
+
+    assert asyncio.run(run()) == [hex(n % 1000) for n in range(1000)]
+    assert sum(node.stats["batches"] for node in nodes) == 20
+    assert sum(node.stats["requests"] for node in nodes) == 20
+
+
+def test_call_many_splits_refused_batches(stub_nodes):
+    [node] = stub_nodes(StubNode(1, 100, max_batch=8))
+    balances(node)
+    client = RpcClient([node.url], batch_size=30, hedge_after=0)
+    calls = [("eth_getBalance", [hex(n), "latest"]) for n in range(60)]
+    calls.append(("eth_call", [{}]))
+
+    async def run():
+        async with client:
+            return await client.call_many(calls, return_errors=True)
+
+    results = asyncio.run(run())
+    assert results[:60] == [hex(n) for n in range(60)]
+    assert isinstance(results[60], RpcError) and results[60].code == 3
+    assert client.stats["splits"] > 0 and client.batch_size <= 8
+
+    async def strict():
+        async with client:
+            return await client.call_many(calls)
+
+    with pytest.raises(RpcError):
+        asyncio.run(strict())
+
+
+class BatchLimitedNode(StubNode):
+    """Stub node that rate limits every batch with a single error object"""
+
+    def answer(self, payload):
+        if isinstance(payload, list):
+            return {"jsonrpc": "2.0", "id": None, "error": {"code": LIMIT_EXCEEDED}}
+        return super().answer(payload)
+
+
+def test_call_many_fails_over_rate_limited_batches(stub_nodes):
+    limited, healthy = stub_nodes(BatchLimitedNode(1, 100), StubNode(1, 100))
+    balances(healthy)
+    client = RpcClient([limited.url, healthy.url], batch_size=10, hedge_after=0)
+    calls = [("eth_getBalance", [hex(n), "latest"]) for n in range(40)]
+
+    async def run():
+        async with client:
+            return await client.call_many(calls)
+
+    assert asyncio.run(run()) == [hex(n) for n in range(40)]
+    # The batches went elsewhere whole, and the batch size was kept
+    assert client.stats["splits"] == 0 and client.batch_size == 10
+    assert healthy.stats["batches"] == 4
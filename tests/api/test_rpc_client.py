@@ -0,0 +1,90 @@
+import asyncio
+import time
+
+import pytest
+
+from src.api.chainlist import ChainlistAPI
+from src.api.rpc_client import RpcClient
+from src.api.rpc_scores import RpcScoreboard
+from src.bench.stub_node import StubNode
+from src.core.logger import RpcError
+
+
+def run_calls(client: RpcClient, method: str, count: int = 1):
+    async def calls():
+        async with client:
+            return [await client.call(method) for _ in range(count)]
+
+    return asyncio.run(calls())
+
+
+def test_calls_prefer_the_faster_endpoint(stub_nodes):
+    fast, slow = stub_nodes(StubNode(1, 100), StubNode(1, 100, latency_ms=40))
+    client = RpcClient([slow.url, fast.url], hedge_after=0, seed=1)
+    assert run_calls(client, "eth_blockNumber", 20) == ["0x64"] * 20
+    assert fast.stats["calls"] >= 18
+    assert client.stats == {"calls": 20, "attempts": 20, "hedges": 0, "failovers": 0, "splits": 0}
+
+
+def test_failed_endpoints_are_failed_over_and_scored(stub_nodes):
+    good, failing = stub_nodes(StubNode(1, 100), StubNode(1, 100, error_rate=1.0))
+    scores = RpcScoreboard()
+    client = RpcClient([failing.url, good.url], scoreboard=scores, hedge_after=0, seed=3)
+    # Untried endpoints look free, so the failing one is tried before it sits out
+    client.endpoints[1].latency_ms = 1.0
+    assert run_calls(client, "eth_chainId", 5) == ["0x1"] * 5
+    assert failing.stats["requests"] == 1 and client.stats["failovers"] == 1
+    assert scores.get(failing.url).success == 0.0
+    assert scores.get(good.url).samples == 5
+
+
+def test_slow_calls_are_hedged(stub_nodes):
+    fast, stalled = stub_nodes(StubNode(1, 100), StubNode(1, 100, latency_ms=800))
+    client = RpcClient([stalled.url, fast.url], hedge_after=0.05, timeout=5)
+    # Stale belief that the fast endpoint is slow sends the call to the stalled one first
+    client.endpoints[1].latency_ms = 1000.0
+    started = time.perf_counter()
+    assert run_calls(client, "eth_blockNumber") == ["0x64"]
+    assert time.perf_counter() - started < 0.5
+    assert client.stats["hedges"] == 1 and fast.stats["calls"] == 1
+
+
+def test_call_errors_are_not_failed_over(stub_nodes):
+    nodes = stub_nodes(StubNode(1, 100), StubNode(1, 100))
+
+    def reverted(params):
+        raise RpcError("execution reverted", code=3)
+
+    for node in nodes:
+        node.add_method("eth_call", reverted)
+    client = RpcClient([node.url for node in nodes], hedge_after=0)
+    with pytest.raises(RpcError) as error:
+        run_calls(client, "eth_call")
+    assert error.value.code == 3
+    assert client.stats["attempts"] == 1
+
+
+def test_call_fails_when_every_endpoint_does(stub_nodes):
+    nodes = stub_nodes(*(StubNode(1, 100, error_rate=1.0) for _ in range(4)))
+    client = RpcClient([node.url for node in nodes], hedge_after=0, max_attempts=3)
+    with pytest.raises(RpcError, match="No endpoint answered"):
+        run_calls(client, "eth_chainId")
+    assert client.stats["attempts"] == 3
+    with pytest.raises(ValueError):
+        RpcClient(["wss://only.example", "https://mainnet.example/${API_KEY}"])
+
+
+def test_rpc_client_for_chain(stub_nodes):
+    healthy, unhealthy = stub_nodes(StubNode(10, 7), StubNode(10, 7))
+    api = ChainlistAPI()
+    api._rpc_scores = RpcScoreboard()
+    api.initialize_data_structures(
+        [{"chainId": 10, "name": "OP Mainnet", "rpc": [unhealthy.url, healthy.url]}]
+    )
+    api.rpc_scores.record(unhealthy.url, ok=False)
+    client = api.rpc_client("OP Mainnet")
+    assert [endpoint.url for endpoint in client.endpoints] == [healthy.url]
+    assert client.scoreboard is api.rpc_scores
+    assert run_calls(client, "eth_blockNumber") == ["0x7"]
+    with pytest.raises(ValueError):
+        api.rpc_client("Unknown chain")
@@ -0,0 +1,70 @@
+import itertools
+
+import pytest
+
+from src.api.rpc_index import (
+    SCHEMES,
+    TRACKING_LEVELS,
+    UNSPECIFIED,
+    RpcIndex,
+    classify,
+    filter_urls,
+)
+from src.bench.datasets import generate_chains
+
+
+def test_classify_normalizes_scheme_tracking_and_flags():
+    endpoint = classify({"url": "WSS://node.example", "tracking": "Limited", "isOpenSource": True})
+    assert (endpoint.scheme, endpoint.tracking, endpoint.open_source) == ("wss", "limited", True)
+    bare = classify("https://rpc.example/${API_KEY}")
+    assert (bare.scheme, bare.tracking, bare.open_source) == ("https", UNSPECIFIED, None)
+    assert classify({"url": "ipc:/tmp/geth.ipc"}).scheme is None
+    assert classify({"tracking": "none"}) is None
+    assert classify(None) is None
+
+
+def test_lookups_match_filtering_each_record():
+    chains = generate_chains(200, seed=5)
+    index = RpcIndex({chain["chainId"]: chain for chain in chains})
+    filters = itertools.product((None,) + SCHEMES, (None,) + TRACKING_LEVELS, (False, True))
+    for scheme, max_tracking, open_source in filters:
+        for chain in chains:
+            expected = filter_urls(chain["rpc"], scheme, max_tracking, open_source)
+            assert index.get(chain["chainId"], scheme, max_tracking, open_source) == expected
+
+
+def test_tracking_caps_are_inclusive_and_skip_undeclared():
+    chain = {
+        "chainId": 1,
+        "rpc": [
+            {"url": "https://a", "tracking": "none"},
+            {"url": "https://b", "tracking": "limited"},
+            {"url": "https://c", "tracking": "yes"},
+            {"url": "https://d"},
+        ],
+    }
+    index = RpcIndex({1: chain})
+    assert index.get(1, "https", "none") == ("https://a",)
+    assert index.get(1, "https", "limited") == ("https://a", "https://b")
+    assert index.get(1, "https") == ("https://a", "https://b", "https://c", "https://d")
+
+
+def test_repeated_lookups_share_one_tuple():
+    index = RpcIndex({1: {"chainId": 1, "rpc": [{"url": "https://a", "tracking": "none"}]}})
+    assert index.get(1, "https") is index.get(1, "https")
+    assert index.get(1, "wss") == ()
+    assert index.get(2, "https") == ()
+    assert index.endpoints(1)[0].url == "https://a"
+
+
+def test_warm_classifies_every_chain():
+    chains = generate_chains(20, seed=1)
+    index = RpcIndex({chain["chainId"]: chain for chain in chains})
+    index.warm()
+    assert len(index._filed) == len(index) == 20
+
+
+@pytest.mark.parametrize("rpc", [{"url": ""}, {"url": 5}, "", 7])
+def test_unusable_entries_are_skipped(rpc):
+    index = RpcIndex({1: {"chainId": 1, "rpc": [rpc, "https://ok"]}})
+    assert index.get(1) == ("https://ok",)
@@ -0,0 +1,81 @@
+import pytest
+
+from src.api.chainlist import ChainlistAPI
+from src.api.rpc_probe import RpcProber, percentile, quantity, rpc_result
+from src.bench.stub_node import StubNode
+from src.core.logger import RpcError
+
+
+def test_percentile():
+    assert percentile([], 50) is None
+    assert percentile([5.0], 99) == 5.0
+    assert percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.5
+    assert percentile([4.0, 1.0, 3.0, 2.0], 100) == 4.0
+
+
+def test_quantity_and_result():
+    assert quantity("0x1a") == 26
+    with pytest.raises(RpcError):
+        quantity("26")
+    assert rpc_result({"jsonrpc": "2.0", "id": 1, "result": "0x1"}) == "0x1"
+    with pytest.raises(RpcError) as error:
+        rpc_result({"jsonrpc": "2.0", "id": 1, "error": {"code": -32000, "message": "busy"}})
+    assert error.value.code == -32000 and error.value.message == "busy"
+    with pytest.raises(RpcError):
+        rpc_result({"jsonrpc": "2.0", "id": 1})
+
+
+def test_probe_reports_lag_mismatches_and_failures(stub_nodes):
+    fresh, slow, behind, wrong, failing, hanging = stub_nodes(
+        StubNode(1, 100),
+        StubNode(1, 101, latency_ms=30),
+        StubNode(1, 90),
+        StubNode(5, 100),
+        StubNode(1, 100, error_rate=1.0),
+        StubNode(1, 100, latency_ms=1000),
+    )
+    urls = [fresh.url, slow.ws_url(), behind.url, wrong.url, failing.url, hanging.url]
+    urls.append("https://mainnet.example/v3/${API_KEY}")
+    [report] = RpcProber(samples=2, timeout=0.3, max_lag=5).run({1: urls})
+
+    endpoints = {endpoint.url: endpoint for endpoint in report.endpoints}
+    assert report.chain_id == 1 and report.head == 100
+    assert [endpoint.url for endpoint in report.endpoints] == urls
+
+    assert endpoints[urls[0]].status(5) == "ok" and endpoints[urls[0]].lag == 0
+    assert len(endpoints[urls[0]].latencies_ms) == 3
+    assert endpoints[urls[1]].lag == -1 and endpoints[urls[1]].latency_ms >= 30
+    assert endpoints[urls[2]].lag == 10 and endpoints[urls[2]].status(5) == "lagging"
+    assert endpoints[urls[3]].mismatched and endpoints[urls[3]].reported_chain_id == 5
+    assert endpoints[urls[3]].lag is None and endpoints[urls[3]].status(5) == "wrong chain"
+    assert endpoints[urls[4]].error == "HTTP 503"
+    assert endpoints[urls[5]].error == "Timed out after 0.3s"
+    assert endpoints[urls[6]].error == "URL needs an API key"
+
+    assert report.best() == [urls[0], urls[1]]
+    assert report.best(1) == [urls[0]]
+    percentiles = report.latency_percentiles()
+    assert percentiles[50] <= percentiles[90] <= percentiles[99]
+
+
+def test_probe_respects_the_per_host_limit(stub_nodes):
+    [node] = stub_nodes(StubNode(1, 100, latency_ms=20))
+    urls = [f"{node.url}?endpoint={n}" for n in range(8)]
+    [report] = RpcProber(samples=1, per_host=2).run({1: urls})
+    assert len(report.healthy()) == 8
+    assert node.stats["max_in_flight"] == 2
+
+
+def test_probe_rpcs_resolves_chains(stub_nodes):
+    ethereum, optimism = stub_nodes(StubNode(1, 100), StubNode(10, 7))
+    api = ChainlistAPI()
+    api.initialize_data_structures(
+        [
+            {"chainId": 1, "name": "Ethereum", "shortName": "eth", "rpc": [{"url": ethereum.url}]},
+            {"chainId": 10, "name": "OP Mainnet", "shortName": "oeth", "rpc": [optimism.url]},
+        ]
+    )
+    reports = api.probe_rpcs(["oeth", 1], schemes=("http",), prober=RpcProber(samples=1))
+    assert [(report.chain_id, report.head) for report in reports] == [(10, 7), (1, 100)]
+    with pytest.raises(ValueError):
+        api.probe_rpcs(["nope"])
@@ -0,0 +1,105 @@
+import json
+
+import pytest
+
+from src.api.rpc_probe import RpcProber
+from src.api.rpc_scores import RpcScoreboard
+from src.bench.stub_node import StubNode
+
+
+def test_record_folds_outcomes_into_moving_averages():
+    scores = RpcScoreboard(alpha=0.5, max_lag=5)
+    scores.record("https://a.example", 100.0, at=1000.0)
+    score = scores.record("https://a.example", 200.0, lag=2, at=1001.0)
+    assert score.latency_ms == 150.0 and score.success == 1.0 and score.lag == 2.0
+    assert score.samples == 2
+
+    # Failures lower the success rate without touching the latency
+    score = scores.record("https://a.example", ok=False, at=1002.0)
+    assert score.latency_ms == 150.0 and score.success == 0.5
+    assert scores.record("https://b.example", ok=False).health(5) == 0.0
+
+
+def test_health_penalizes_lag():
+    scores = RpcScoreboard(max_lag=5)
+    scores.record("https://fresh.example", 10.0, lag=5)
+    scores.record("https://behind.example", 10.0, lag=11)
+    assert scores.health("https://fresh.example") == 1.0
+    assert scores.health("https://behind.example") == pytest.approx(0.5)
+    assert scores.health("https://unknown.example") is None
+
+
+def test_rank_orders_best_first_and_drops_unhealthy():
+    scores = RpcScoreboard(alpha=0.5, max_lag=5, min_health=0.5)
+    scores.record("https://slow.example", 300.0)
+    scores.record("https://fast.example", 20.0)
+    scores.record("https://flaky.example", 10.0)
+    scores.record("https://flaky.example", ok=False)
+    scores.record("https://flaky.example", ok=False)
+    urls = ["https://new.example", "https://slow.example", "https://flaky.example"]
+    urls.append("https://fast.example")
+
+    assert scores.rank(urls) == (
+        "https://fast.example",
+        "https://slow.example",
+        "https://new.example",
+    )
+    # A 25% success rate costs 40ms per answered call at 10ms a try
+    assert scores.rank(urls, min_health=0.2)[:2] == (
+        "https://fast.example",
+        "https://flaky.example",
+    )
+
+
+def test_scores_persist_and_expire(tmp_path):
+    path = str(tmp_path / "blockchain_data.scores")
+    scores = RpcScoreboard(path, max_age=3600)
+    scores.save()
+    assert not (tmp_path / "blockchain_data.scores").exists()
+
+    scores.record("https://a.example", 50.0)
+    scores.record("https://old.example", 50.0, at=1.0)
+    scores.save()
+    reloaded = RpcScoreboard(path, max_age=3600)
+    assert reloaded.get("https://a.example") == scores.get("https://a.example")
+    assert reloaded.get("https://old.example") is None
+    assert list(json.loads((tmp_path / "blockchain_data.scores").read_text())["scores"]) == [
+        "https://a.example"
+    ]
+
+    # Newer scores another process saved are kept
+    other = RpcScoreboard(path)
+    other.record("https://b.example", 70.0)
+    other.save()
+    scores.record("https://a.example", 60.0)
+    scores.save()
+    assert set(RpcScoreboard(path).scores) == {"https://a.example", "https://b.example"}
+
+    (tmp_path / "blockchain_data.scores").write_text("not json")
+    assert RpcScoreboard(path).scores == {}
+
+    # Malformed entries are skipped, keeping the rest
+    fields = list(scores.get("https://a.example"))
+    stored = {
+        "https://a.example": fields,
+        "https://text.example": "fives",
+        "https://x.example": [1],
+        "https://none.example": [None, None, None, 1, fields[-1]],
+    }
+    (tmp_path / "blockchain_data.scores").write_text(json.dumps({"version": 1, "scores": stored}))
+    assert list(RpcScoreboard(path).scores) == ["https://a.example"]
+
+
+def test_probes_update_scores_passively(stub_nodes):
+    fresh, behind, failing = stub_nodes(
+        StubNode(1, 100), StubNode(1, 50), StubNode(1, 100, error_rate=1.0)
+    )
+    scores = RpcScoreboard(max_lag=5)
+    urls = [failing.url, behind.url, fresh.url, "https://mainnet.example/${API_KEY}"]
+    RpcProber(samples=1, max_lag=5, scoreboard=scores).run({1: urls, 2: []})
+
+    assert scores.get(fresh.url).success == 1.0 and scores.get(fresh.url).lag == 0
+    assert scores.get(behind.url).lag == 50
+    assert scores.get(failing.url).success == 0.0
+    assert scores.get(urls[3]) is None
+    assert scores.rank(urls) == (fresh.url, urls[3])
@@ -0,0 +1,134 @@
+import asyncio
+import json
+
+from src.api.chainlist import ChainlistAPI
+from src.api.rpc_scores import RpcScoreboard
+from src.api.rpc_subscriptions import SubscriptionManager, decode_head, event_key
+from src.bench.stub_node import StubNode
+
+CONTRACT = "0x" + "22" * 20
+
+
+def on_nodes(stub_nodes, coroutine):
+    """Run a node coroutine on the stub nodes' loop without blocking this one"""
+    return asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coroutine, stub_nodes.loop))
+
+
+async def until(predicate, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def test_decode_head_and_event_key():
+    head = {"number": "0x10", "timestamp": "0x5f5e1000", "hash": "0xab"}
+    assert decode_head(head) == {"number": 16, "timestamp": 1600000000, "hash": "0xab"}
+    assert event_key("newHeads", head) == "0xab"
+    log = {"blockHash": "0x1", "transactionHash": "0x2", "logIndex": "0x0"}
+    assert event_key("logs", log) != event_key("logs", dict(log, removed=True))
+
+
+def test_subscribers_share_deduplicated_feeds(stub_nodes):
+    nodes = stub_nodes(StubNode(1, 100), StubNode(1, 100))
+    for node in nodes:
+        node.serve_logs(lambda block: 2)
+
+    async def run():
+        async with SubscriptionManager([node.ws_url() for node in nodes]) as manager:
+            heads = [manager.new_heads() for _ in range(20)]
+            logs = manager.logs(address=CONTRACT)
+            await until(lambda: all(len(node.subscriptions) == 2 for node in nodes))
+            for node in nodes:
+                await on_nodes(stub_nodes, node.mine(3))
+
+            received = [[(await sub.__anext__())["number"] for _ in range(3)] for sub in heads]
+            log_events = [await logs.__anext__() for _ in range(6)]
+            await until(lambda: manager.stats["duplicates"] == 9)
+            assert sorted(manager.connected) == sorted(node.ws_url() for node in nodes)
+
+            # The upstream subscription ends with its last subscriber
+            for sub in heads:
+                await sub.close()
+            await until(lambda: all(len(node.subscriptions) == 1 for node in nodes))
+            return received, log_events, dict(manager.stats), logs
+
+    received, log_events, stats, logs = asyncio.run(run())
+    assert received == [[101, 102, 103]] * 20
+    assert [(log["blockNumber"], log["logIndex"]) for log in log_events] == [
+        (block, index) for block in (101, 102, 103) for index in range(2)
+    ]
+    assert log_events[0]["address"] == CONTRACT
+    assert stats["events"] == 9 and stats["connects"] == 2
+    # Each node saw one subscription per feed, however many subscribers there were
+    assert [node.stats["subscriptions"] for node in nodes] == [2, 2]
+    assert logs.closed
+
+
+def test_reconnects_and_resubscribes(stub_nodes):
+    first, second = stub_nodes(StubNode(1, 100), StubNode(1, 100))
+    api = ChainlistAPI()
+    api._rpc_scores = RpcScoreboard()
+    api.initialize_data_structures(
+        [{"chainId": 1, "name": "Ethereum", "rpc": [first.url, first.ws_url(), second.ws_url()]}]
+    )
+
+    async def mine():
+        for node in (first, second):
+            await on_nodes(stub_nodes, node.mine())
+
+    async def run():
+        async with api.subscriptions(1, connections=1) as manager:
+            assert [endpoint.url for endpoint in manager.endpoints] == [
+                first.ws_url(),
+                second.ws_url(),
+            ]
+            async with manager.new_heads() as heads:
+                await heads.ready(5)
+                await mine()
+                before = (await heads.__anext__())["number"]
+
+                await on_nodes(stub_nodes, first.drop_connections())
+                await until(lambda: len(second.subscriptions) == 1)
+                await mine()
+                after = (await heads.__anext__())["number"]
+                return before, after, manager.connected, dict(manager.stats)
+
+    before, after, connected, stats = asyncio.run(run())
+    assert (before, after) == (101, 102)
+    assert connected == [second.ws_url()]
+    assert stats["connects"] == 2 and stats["disconnects"] == 1
+    assert api.rpc_scores.get(second.ws_url()).samples == 1
+
+
+def test_skips_malformed_notifications(stub_nodes):
+    [node] = stub_nodes(StubNode(1, 100))
+
+    async def notify(params):
+        for subscription_id, (ws, _, _) in list(node.subscriptions.items()):
+            body = {
+                "jsonrpc": "2.0",
+                "method": "eth_subscription",
+                "params": params(subscription_id),
+            }
+            await ws.send_str(json.dumps(body))
+
+    async def run():
+        async with SubscriptionManager([node.ws_url()], connections=1) as manager:
+            async with manager.new_heads() as heads:
+                await heads.ready(5)
+                await on_nodes(stub_nodes, notify(lambda subscription_id: []))
+                bad = {"number": "0xzz", "timestamp": "0x1", "hash": "0xbad"}
+                await on_nodes(
+                    stub_nodes,
+                    notify(
+                        lambda subscription_id: {"subscription": subscription_id, "result": bad}
+                    ),
+                )
+                await on_nodes(stub_nodes, node.mine())
+                head = await asyncio.wait_for(heads.__anext__(), 5)
+                return head["number"], dict(manager.stats)
+
+    number, stats = asyncio.run(run())
+    assert number == 101
+    assert stats["events"] == 1 and stats["connects"] == 1 and stats["disconnects"] == 0
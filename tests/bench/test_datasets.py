@@ -0,0 +1,54 @@
+from src.api.chainlist import ChainlistAPI
+from src.bench.datasets import (
+    generate_chains,
+    generate_price_chart,
+    generate_token_transfers,
+    write_recordings,
+)
+from src.bench.stub_server import StubServer
+from src.models.chain import Chain
+from src.models.etherscan import TokenTransfer, Transaction
+
+
+def test_generators_are_deterministic():
+    assert generate_chains(50, seed=3) == generate_chains(50, seed=3)
+    assert generate_chains(50, seed=3) != generate_chains(50, seed=4)
+
+
+def test_chains_match_chainlist_shape(synthetic_chains):
+    api = ChainlistAPI()
+    api.initialize_data_structures(synthetic_chains)
+    assert len(api.chain_by_id) == len(synthetic_chains)
+    assert len(api.chain_by_name) == len(synthetic_chains)
+    assert len(api.chain_by_short_name) == len(synthetic_chains)
+
+    chain = synthetic_chains[0]
+    assert api.get_rpcs(chain["chainId"], "https") == tuple(
+        rpc["url"] for rpc in chain["rpc"] if rpc["url"].startswith("https://")
+    )
+    assert Chain(**chain).chainId == chain["chainId"]
+
+
+def test_etherscan_records_validate(synthetic_transactions):
+    assert all(Transaction(**tx) for tx in synthetic_transactions[:100])
+    assert all(TokenTransfer(**tx) for tx in generate_token_transfers(100))
+
+
+def test_price_chart_shape():
+    chart = generate_price_chart(["coingecko:ethereum"], 24)
+    prices = chart["coins"]["coingecko:ethereum"]["prices"]
+    assert len(prices) == 24
+    assert prices[1]["timestamp"] - prices[0]["timestamp"] == 3600
+
+
+def test_write_recordings_for_stub_server(tmp_path):
+    write_recordings(str(tmp_path), chains=10, pools=10, transactions=5)
+    server = StubServer()
+    assert server.load_recordings(str(tmp_path)) == 4
+    assert server.lookup("chainlist", "/rpcs.json") is not None
+    assert server.lookup("yields", "/pools") is not None
+
+    params = {"module": "account", "action": "tokentx", "address": "0x1", "page": "1"}
+    status, body = server.lookup("etherscan", "/", params)
+    assert status == 200
+    assert b"tokenSymbol" in body
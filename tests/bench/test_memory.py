@@ -0,0 +1,30 @@
+import pytest
+
+from src.bench.memory import FLOWS, format_reports, run_flow, run_flows
+from src.core.cache import blockchain_cache
+from src.core.config import config
+
+
+@pytest.mark.parametrize("name", sorted(FLOWS))
+def test_flow_reports_memory(name):
+    report = run_flow(name, scale=0.02, top=3)
+    assert report["flow"] == name
+    assert report["rss_peak_bytes"] >= report["rss_start_bytes"] > 0
+    assert report["traced_peak_bytes"] >= report["retained_bytes"] >= report["leaked_bytes"]
+    assert 0 < len(report["peak_hotspots"]) <= 3
+    assert all(":" in hotspot["location"] for hotspot in report["retained_hotspots"])
+
+
+def test_flows_leave_caches_untouched():
+    cache_dir = blockchain_cache.cache_dir
+    offline = config.get("network.offline")
+    run_flow("chainlist-load", scale=0.01)
+    assert blockchain_cache.cache_dir == cache_dir
+    assert config.get("network.offline") == offline
+
+
+def test_isolated_run_and_budget_flag():
+    reports = run_flows(["chain-validation"], scale=0.01, top=2, isolate=True)
+    assert reports[0]["flow"] == "chain-validation"
+    assert "OVER" in format_reports(reports, budget_mb=1)
+    assert "OVER" not in format_reports(reports, budget_mb=100_000)
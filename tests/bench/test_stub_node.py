@@ -0,0 +1,34 @@
+import requests
+
+from src.bench.stub_node import METHOD_NOT_FOUND, StubNode
+from src.core.logger import RpcError
+
+
+def test_answers_calls_and_batches():
+    node = StubNode(chain_id=10, block_number=255)
+
+    def fail(params):
+        raise RpcError("query returned more than 10000 results", code=-32005)
+
+    node.add_method("eth_getLogs", fail)
+    assert node.answer({"jsonrpc": "2.0", "id": 1, "method": "eth_chainId"})["result"] == "0xa"
+    batch = node.answer(
+        [
+            {"jsonrpc": "2.0", "id": 1, "method": "eth_blockNumber"},
+            {"jsonrpc": "2.0", "id": 2, "method": "eth_getLogs", "params": [{}]},
+            {"jsonrpc": "2.0", "id": 3, "method": "eth_unknown"},
+        ]
+    )
+    assert batch[0] == {"jsonrpc": "2.0", "id": 1, "result": "0xff"}
+    assert batch[1]["error"]["code"] == -32005
+    assert batch[2]["error"]["code"] == METHOD_NOT_FOUND
+    assert node.stats["calls"] == 4
+
+
+def test_serves_http_and_injects_errors(stub_nodes):
+    healthy, failing = stub_nodes(StubNode(chain_id=5), StubNode(error_rate=1.0))
+    response = requests.post(healthy.url, json={"jsonrpc": "2.0", "id": 7, "method": "eth_chainId"})
+    assert response.json() == {"jsonrpc": "2.0", "id": 7, "result": "0x5"}
+    assert healthy.ws_url().startswith("ws://") and healthy.ws_url().endswith("/ws")
+    assert requests.post(failing.url, json={}).status_code == 503
+    assert failing.stats["errors"] == 1
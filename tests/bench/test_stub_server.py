@@ -0,0 +1,104 @@
+import asyncio
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from src.api.defillama import DefiLlamaAPI
+from src.bench.stub_server import StubServer, base_urls
+from src.core.recorder import Recorder
+
+
+@pytest.fixture
+def mock_protocols():
+    return [{"name": "Aave", "slug": "aave", "tvl": 100.0, "chains": ["Ethereum"]}]
+
+
+def run_server(server):
+    """Run a stub server on a background event loop and return its root URL"""
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    result = {}
+
+    def serve():
+        asyncio.set_event_loop(loop)
+        result["url"] = loop.run_until_complete(server.start())
+        started.set()
+        loop.run_forever()
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    started.wait(5)
+
+    def stop():
+        asyncio.run_coroutine_threadsafe(server.stop(), loop).result(5)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(5)
+
+    return result["url"], stop
+
+
+def test_lookup_falls_back_to_spec_template():
+    server = StubServer()
+    server.add_response("defillama", "/protocol/aave", {"name": "aave"})
+    assert server.lookup("defillama", "/protocol/aave") is not None
+    assert server.lookup("defillama", "/protocol/uniswap") is not None
+    assert server.lookup("defillama", "/unknown") is None
+    assert server.lookup("coins", "/protocol/aave") is None
+
+
+def test_lookup_misses_unrecorded_queries():
+    server = StubServer()
+    balance = {"module": "account", "action": "balance"}
+    server.add_response("etherscan", "/", {"result": "1"}, balance)
+    assert server.lookup("etherscan", "/", dict(balance, address="0x1")) is not None
+    assert server.lookup("etherscan", "/", {"module": "account", "action": "txlist"}) is None
+    assert server.lookup("etherscan", "/") is None
+
+
+def test_record_and_replay(tmp_path, mock_protocols):
+    # Record a response through the client as if it came from upstream
+    api = DefiLlamaAPI()
+    response = MagicMock()
+    response.json.return_value = mock_protocols
+    with patch.object(api.session, "get", return_value=response), patch(
+        "src.api.defillama.defillama_cache"
+    ), patch("src.api.defillama.get_recorder", return_value=Recorder(str(tmp_path))):
+        api.get_all_protocols()
+
+    server = StubServer()
+    assert server.load_recordings(str(tmp_path)) == 1
+
+    root_url, stop = run_server(server)
+    try:
+        replay = DefiLlamaAPI()
+        replay.base_url = base_urls(root_url)["CHAINDATA_DEFILLAMA_BASE_URL"]
+        with patch("src.api.defillama.defillama_cache") as mock_cache:
+            mock_cache.load_from_cache.return_value = None
+            assert replay.get_all_protocols() == mock_protocols
+    finally:
+        stop()
+    assert server.stats["requests"] == 1
+
+
+def test_latency_throttling_and_errors():
+    server = StubServer(latency_ms=20, rate_limit=1, seed=1)
+    server.add_response("chainlist", "/rpcs.json", [])
+    root_url, stop = run_server(server)
+    try:
+        url = f"{root_url}/chainlist/rpcs.json"
+        start = time.perf_counter()
+        assert requests.get(url, timeout=5).status_code == 200
+        assert time.perf_counter() - start >= 0.02
+        assert requests.get(url, timeout=5).status_code == 429
+
+        server.rate_limit = None
+        server.error_rate = 1.0
+        assert requests.get(url, timeout=5).status_code == 500
+        assert requests.get(f"{root_url}/chainlist/missing", timeout=5).status_code == 500
+    finally:
+        stop()
+    assert server.stats["throttled"] == 1
+    assert server.stats["errors"] == 2
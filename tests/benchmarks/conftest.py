@@ -0,0 +1,94 @@
+import os
+
+import pytest
+
+from src.bench.datasets import (
+    generate_chains,
+    generate_pools,
+    generate_price_chart,
+    generate_protocols,
+    generate_token_transfers,
+    generate_transactions,
+)
+
+# Chainlist currently lists a couple of thousand chains; the large size shows scaling
+REALISTIC_SIZE = 2_000
+LARGE_SIZE = int(os.getenv("CHAINDATA_BENCH_SIZE", "20000"))
+SIZES = [REALISTIC_SIZE, LARGE_SIZE]
+
+_datasets = {}
+
+
+def pytest_collection_modifyitems(items):
+    """Mark every benchmark so the default test run can deselect them"""
+    here = os.path.dirname(__file__)
+    for item in items:
+        if str(item.fspath).startswith(here):
+            item.add_marker(pytest.mark.benchmark)
+
+
+def dataset(kind: str, size: int):
+    """Get a generated dataset, building each kind and size only once per session"""
+    if (kind, size) not in _datasets:
+        generators = {
+            "chains": generate_chains,
+            "protocols": generate_protocols,
+            "pools": generate_pools,
+            "transactions": generate_transactions,
+            "token_transfers": generate_token_transfers,
+        }
+        _datasets[(kind, size)] = generators[kind](size)
+    return _datasets[(kind, size)]
+
+
+@pytest.fixture(params=SIZES, ids=lambda size: f"n={size}")
+def size(request):
+    """Dataset size the benchmark runs at"""
+    return request.param
+
+
+@pytest.fixture
+def chains(size):
+    """Synthetic chainlist data"""
+    return dataset("chains", size)
+
+
+@pytest.fixture
+def protocols(size):
+    """Synthetic DefiLlama protocols"""
+    return dataset("protocols", size)
+
+
+@pytest.fixture
+def pools(size):
+    """Synthetic DefiLlama yield pools"""
+    return dataset("pools", size)
+
+
+@pytest.fixture
+def transactions(size):
+    """Synthetic Etherscan transactions"""
+    return dataset("transactions", size)
+
+
+@pytest.fixture
+def token_transfers(size):
+    """Synthetic Etherscan token transfers"""
+    return dataset("token_transfers", size)
+
+
+@pytest.fixture(scope="session")
+def price_chart():
+    """Synthetic hourly price chart for a handful of coins"""
+    return generate_price_chart(
+        ["coingecko:ethereum", "coingecko:bitcoin", "coingecko:chainlink"], REALISTIC_SIZE
+    )
+
+
+@pytest.fixture(scope="session")
+def chain_data_module():
+    """The legacy CLI module, imported without a real Etherscan key"""
+    os.environ.setdefault("ETHERSCAN_API_KEY", "benchmark")
+    import chain_data
+
+    return chain_data
@@ -0,0 +1,23 @@
+import pytest
+
+from src.core.cache import Cache
+from src.core.config import config
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setitem(config._config["cache"], "directory", str(tmp_path))
+    return Cache("bench")
+
+
+@pytest.mark.benchmark(group="cache")
+def test_save_to_cache(benchmark, cache, chains):
+    benchmark(cache.save_to_cache, "blockchain_data", chains)
+
+
+@pytest.mark.benchmark(group="cache")
+def test_load_from_cache(benchmark, cache, chains):
+    cache.save_to_cache("blockchain_data", chains)
+    assert len(benchmark(cache.load_from_cache, "blockchain_data")) == len(chains)
@@ -0,0 +1,140 @@
+import os
+
+import pytest
+
+from src.api.chain_index import ChainIndex
+from src.api.chainlist import ChainlistAPI
+
+pytest.importorskip("pytest_benchmark")
+
+SEARCH_QUERIES = {
+    "common": "nova",
+    "rare": "zephyr yonder",
+    "chain_id": "100042",
+    "miss": "doesnotexist",
+}
+
+
+@pytest.fixture
+def api(chains):
+    api = ChainlistAPI()
+    api.initialize_data_structures(chains)
+    return api
+
+
+@pytest.mark.benchmark(group="chainlist-index")
+def test_initialize_data_structures(benchmark, chains):
+    api = ChainlistAPI()
+    benchmark(api.initialize_data_structures, chains)
+    assert len(api.chain_by_id) == len(chains)
+
+
+@pytest.mark.benchmark(group="chainlist-records")
+@pytest.mark.parametrize("compact", [False, True], ids=["dict", "compact"])
+def test_record_lookups(benchmark, chains, compact):
+    index = ChainIndex(chains, compact=compact)
+    chain_ids = [chain["chainId"] for chain in chains[:: max(len(chains) // 1000, 1)]]
+
+    def lookup():
+        for chain_id in chain_ids:
+            chain = index.by_id[chain_id]
+            chain["name"], chain.get("shortName"), chain["nativeCurrency"]["symbol"]
+            chain.get("rpc")[0]["url"]
+
+    benchmark(lookup)
+
+
+@pytest.mark.benchmark(group="chainlist-search")
+@pytest.mark.parametrize("kind", sorted(SEARCH_QUERIES))
+def test_search_chains(benchmark, api, kind):
+    results = benchmark(api.search_chains, SEARCH_QUERIES[kind])
+    if kind == "miss":
+        assert results == []
+    else:
+        assert results
+
+
+@pytest.mark.benchmark(group="chainlist-rpcs")
+@pytest.mark.parametrize("rpc_type", ["https", "wss"])
+@pytest.mark.parametrize("no_tracking", [False, True], ids=["all", "no-tracking"])
+def test_get_rpcs_by_id(benchmark, api, chains, rpc_type, no_tracking):
+    chain_ids = [chain["chainId"] for chain in chains[:: max(len(chains) // 100, 1)]]
+
+    def lookup():
+        for chain_id in chain_ids:
+            api.get_rpcs(chain_id, rpc_type, no_tracking)
+
+    benchmark(lookup)
+
+
+@pytest.mark.benchmark(group="chainlist-rpcs")
+def test_get_rpcs_by_name(benchmark, api, chains):
+    names = [chain["name"] for chain in chains[:: max(len(chains) // 100, 1)]]
+
+    def lookup():
+        for name in names:
+            api.get_rpcs(name, "https")
+
+    benchmark(lookup)
+
+
+@pytest.mark.benchmark(group="chainlist-rpcs")
+def test_get_rpcs_many(benchmark, api, chains):
+    chain_ids = [chain["chainId"] for chain in chains]
+    rpcs = benchmark(api.get_rpcs_many, chain_ids, "https", True)
+    assert len(rpcs) == len(chains)
+
+
+@pytest.mark.benchmark(group="chainlist-index")
+def test_warm_rpc_index(benchmark, chains):
+    api = ChainlistAPI()
+
+    def warm():
+        api.initialize_data_structures(chains)
+        api.index.rpcs.warm()
+
+    benchmark.pedantic(warm, rounds=3)
+
+
+@pytest.mark.benchmark(group="chainlist-resolve-many")
+@pytest.mark.parametrize("repeats", [1, 10], ids=["unique", "repeated"])
+def test_resolve_many(benchmark, api, chains, repeats):
+    identifiers = [str(chain["chainId"]) for chain in chains]
+    identifiers += [chain["shortName"] for chain in chains]
+    identifiers *= repeats
+
+    def resolve():
+        return sum(resolution.found for resolution in api.resolve_many(identifiers))
+
+    assert benchmark(resolve) == len(identifiers)
+
+
+@pytest.mark.benchmark(group="chainlist-resolve-many")
+@pytest.mark.parametrize("format", ["ndjson", "csv"])
+def test_write_resolutions(benchmark, api, chains, chain_data_module, format):
+    resolutions = list(api.resolve_many(chain["name"] for chain in chains))
+    sink = open(os.devnull, "w")
+    benchmark(chain_data_module.write_resolutions, resolutions, format, sink)
+    sink.close()
+
+
+@pytest.mark.benchmark(group="chainlist-refresh")
+@pytest.mark.parametrize("incremental", [False, True], ids=["full", "incremental"])
+def test_refresh_with_few_changes(benchmark, chains, incremental):
+    """Swap in a copy of the data with five chains changed, then warm it up"""
+    index = ChainIndex(chains)
+    index.rpcs.warm()
+    index.search, index.resolver, index.digests
+    updated = [dict(chain) for chain in chains]
+    for chain in updated[:: max(len(updated) // 5, 1)]:
+        chain["rpc"] = chain["rpc"][1:]
+
+    def refresh():
+        if incremental:
+            refreshed, _ = index.refreshed(updated)
+        else:
+            refreshed = ChainIndex(updated)
+        refreshed.rpcs.warm()
+        refreshed.search, refreshed.resolver
+
+    benchmark.pedantic(refresh, rounds=3)
@@ -0,0 +1,43 @@
+import pytest
+
+from src.api.defillama import DefiLlamaAPI
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.fixture
+def api(protocols, monkeypatch):
+    """A DefiLlama client whose protocol list is served from memory"""
+    api = DefiLlamaAPI()
+    monkeypatch.setattr(api, "get_all_protocols", lambda: protocols)
+    return api
+
+
+@pytest.mark.benchmark(group="defillama-protocols")
+@pytest.mark.parametrize("query", ["swap", "nova finance 1", "doesnotexist"])
+def test_search_protocols(benchmark, api, query):
+    benchmark(api.search_protocols, query)
+
+
+@pytest.mark.benchmark(group="defillama-protocols")
+@pytest.mark.parametrize("limit", [20, None], ids=["top20", "all"])
+def test_get_top_protocols(benchmark, api, protocols, limit):
+    results = benchmark(api.get_top_protocols, limit or len(protocols))
+    assert len(results) == (limit or len(protocols))
+
+
+@pytest.mark.benchmark(group="defillama-protocols")
+@pytest.mark.parametrize("chain", ["Ethereum", "Base"])
+def test_get_chain_protocols(benchmark, api, chain):
+    assert benchmark(api.get_chain_protocols, chain)
+
+
+@pytest.mark.benchmark(group="defillama-pools")
+@pytest.mark.parametrize(
+    "filters",
+    [{}, {"min_tvl": 1_000_000}, {"min_apy": 10.0, "limit": 50}],
+    ids=["unfiltered", "min-tvl", "min-apy-top50"],
+)
+def test_get_pools(benchmark, chain_data_module, pools, monkeypatch, filters):
+    monkeypatch.setattr(chain_data_module.defillama_api, "get_pools", lambda: pools)
+    benchmark(chain_data_module.get_pools, **filters)
@@ -0,0 +1,140 @@
+import contextlib
+import os
+
+import pytest
+
+from src.models.etherscan import TokenTransfer, Transaction
+from src.utils import display
+
+from .conftest import REALISTIC_SIZE, dataset
+
+pytest.importorskip("pytest_benchmark")
+
+# Table inputs for src.utils.display, built from the synthetic datasets
+DISPLAY_INPUTS = {
+    "format_protocol_info": lambda d: (d["protocol_info"],),
+    "format_chain_list": lambda d: ([chain["name"] for chain in d["chains"]],),
+    "format_protocol_list": lambda d: (d["protocols"],),
+    "format_chain_data": lambda d: (d["chains"],),
+    "format_chain_info": lambda d: (d["chains"][0],),
+    "format_rpc_data": lambda d: (d["chains"][0],),
+    "format_price_data": lambda d: (d["prices"],),
+    "format_price_history": lambda d: ({"prices": d["history"]},),
+    "format_price_chart": lambda d: ({"prices": d["history"]},),
+    "format_pool_data": lambda d: (d["pools"],),
+    "format_pool_chart": lambda d: ({"data": d["pool_chart"]},),
+    "format_dex_data": lambda d: ({"dexes": d["dexes"]},),
+    "format_options_data": lambda d: ({"protocols": d["options"]},),
+    "format_chart_data": lambda d: ({"data": d["chart"]},),
+}
+
+# Renderers in the legacy chain_data CLI, which build strings or print rows
+CLI_INPUTS = {
+    "format_chain_data": lambda d: (d["protocols"], "text", None, True),
+    "format_price_data": lambda d: ({"coins": d["prices"]},),
+    "format_chart_data": lambda d: (d["tvl_chart"],),
+    "format_pool_data": lambda d: (d["pools"],),
+    "format_dex_data": lambda d: ({"protocols": d["volumes"]}, "table", len(d["volumes"])),
+    "format_options_data": lambda d: ({"total24h": 1e9, "protocols": d["volumes"]},),
+    "format_transaction_data": lambda d: (d["transactions"],),
+    "format_token_transfer_data": lambda d: (d["token_transfers"],),
+}
+
+
+@pytest.fixture(scope="module")
+def inputs(price_chart):
+    """Realistic-size inputs for every formatter"""
+    chains = dataset("chains", REALISTIC_SIZE)
+    protocols = dataset("protocols", REALISTIC_SIZE)
+    pools = dataset("pools", REALISTIC_SIZE)
+    history = price_chart["coins"]["coingecko:ethereum"]["prices"]
+    return {
+        "chains": chains,
+        "protocols": protocols,
+        "pools": pools,
+        "protocol_info": {
+            **protocols[0],
+            "tvl_history": [
+                {"date": point["timestamp"], "tvl": point["price"] * 1e6} for point in history
+            ],
+        },
+        "prices": {
+            coin: {
+                "price": data["prices"][-1]["price"],
+                "timestamp": data["prices"][-1]["timestamp"],
+            }
+            for coin, data in price_chart["coins"].items()
+        },
+        "history": [
+            {
+                "date": point["timestamp"],
+                "price": point["price"],
+                "marketCap": point["price"] * 1e8,
+                "volume": point["price"] * 1e6,
+            }
+            for point in history
+        ],
+        "pool_chart": [
+            {"date": point["timestamp"], "tvl": point["price"] * 1e4, "apy": point["price"] % 20}
+            for point in history
+        ],
+        "chart": [{"date": point["timestamp"], "value": point["price"]} for point in history],
+        "tvl_chart": [
+            {"timestamp": point["timestamp"], "tvl": point["price"]} for point in history
+        ],
+        "dexes": [
+            {
+                "name": protocol["name"],
+                "chain": protocol["chain"],
+                "volume24h": protocol["tvl"] / 10,
+                "volume7d": protocol["tvl"] / 2,
+                "tvl": protocol["tvl"],
+            }
+            for protocol in protocols
+        ],
+        "options": [
+            {
+                "name": protocol["name"],
+                "totalValue": protocol["tvl"],
+                "volume24h": protocol["tvl"] / 10,
+                "fees24h": protocol["tvl"] / 1000,
+            }
+            for protocol in protocols
+        ],
+        "volumes": [
+            {
+                "name": protocol["name"],
+                "total24h": protocol["tvl"] / 10,
+                "total7d": protocol["tvl"] / 2,
+                "total30d": protocol["tvl"] * 2,
+                "change_1d": protocol["change_1d"],
+                "change_7d": protocol["change_7d"],
+                "change_1m": protocol["change_7d"] * 2,
+            }
+            for protocol in protocols
+        ],
+        "transactions": [Transaction(**tx) for tx in dataset("transactions", REALISTIC_SIZE)],
+        "token_transfers": [
+            TokenTransfer(**transfer) for transfer in dataset("token_transfers", REALISTIC_SIZE)
+        ],
+    }
+
+
+@pytest.fixture
+def quiet():
+    """Send printed output to /dev/null so terminal speed is not measured"""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+@pytest.mark.benchmark(group="display")
+@pytest.mark.parametrize("name", sorted(DISPLAY_INPUTS))
+def test_display_formatter(benchmark, inputs, quiet, name):
+    benchmark(getattr(display, name), *DISPLAY_INPUTS[name](inputs))
+
+
+@pytest.mark.benchmark(group="display-cli")
+@pytest.mark.parametrize("name", sorted(CLI_INPUTS))
+def test_cli_formatter(benchmark, chain_data_module, inputs, quiet, name):
+    formatter = getattr(chain_data_module, name)
+    benchmark(formatter, *CLI_INPUTS[name](inputs))
@@ -0,0 +1,17 @@
+import pytest
+
+from src.models.etherscan import TokenTransfer, Transaction
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.mark.benchmark(group="models")
+def test_transaction_construction(benchmark, transactions):
+    results = benchmark(lambda: [Transaction(**tx) for tx in transactions])
+    assert len(results) == len(transactions)
+
+
+@pytest.mark.benchmark(group="models")
+def test_token_transfer_construction(benchmark, token_transfers):
+    results = benchmark(lambda: [TokenTransfer(**transfer) for transfer in token_transfers])
+    assert len(results) == len(token_transfers)
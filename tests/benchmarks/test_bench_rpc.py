@@ -0,0 +1,33 @@
+import asyncio
+
+import pytest
+
+from src.api.rpc_client import RpcClient
+from src.bench.stub_node import StubNode
+
+pytest.importorskip("pytest_benchmark")
+
+# Balance reads per round, against a stub node 2ms away
+CALLS = 500
+
+
+@pytest.fixture
+def node(stub_nodes):
+    [node] = stub_nodes(StubNode(1, 100, latency_ms=2))
+    node.add_method("eth_getBalance", lambda params: "0x0")
+    return node
+
+
+@pytest.mark.benchmark(group="rpc-bulk-reads")
+@pytest.mark.parametrize("batched", [False, True], ids=["one-by-one", "batched"])
+def test_bulk_balance_reads(benchmark, node, batched):
+    calls = [("eth_getBalance", [hex(n), "latest"]) for n in range(CALLS)]
+
+    async def read():
+        async with RpcClient([node.url], hedge_after=0) as client:
+            if batched:
+                return await client.call_many(calls)
+            return await asyncio.gather(*(client.call(*call) for call in calls))
+
+    results = benchmark.pedantic(lambda: asyncio.run(read()), rounds=3)
+    assert len(results) == CALLS
@@ -0,0 +1,73 @@
+import pytest
+
+from src.api.chain_index import SEARCH_FIELDS
+from src.api.chain_resolver import ChainResolver
+from src.utils.search import SubstringIndex, scan
+
+from .conftest import REALISTIC_SIZE, dataset
+
+pytest.importorskip("pytest_benchmark")
+
+# The substring index is meant for bulk and autocomplete loops, so it is
+# measured well past the realistic size regardless of CHAINDATA_BENCH_SIZE
+SEARCH_SIZES = [REALISTIC_SIZE, 100_000]
+
+QUERIES = {
+    "prefix": "nov",
+    "word": "nova",
+    "phrase": "zephyr yonder",
+    "single-char": "x",
+    "miss": "doesnotexist",
+}
+
+_indexes = {}
+
+
+@pytest.fixture(params=SEARCH_SIZES, ids=lambda size: f"n={size}")
+def search_chains(request):
+    return dataset("chains", request.param)
+
+
+@pytest.fixture
+def index(search_chains):
+    key = len(search_chains)
+    if key not in _indexes:
+        _indexes[key] = SubstringIndex(search_chains, SEARCH_FIELDS)
+    return _indexes[key]
+
+
+@pytest.mark.benchmark(group="search-build")
+def test_build_index(benchmark, search_chains):
+    benchmark.pedantic(SubstringIndex, (search_chains, SEARCH_FIELDS), rounds=3)
+
+
+@pytest.mark.benchmark(group="search-query")
+@pytest.mark.parametrize("kind", sorted(QUERIES))
+def test_indexed_search(benchmark, index, kind):
+    benchmark(index.search, QUERIES[kind], ("name", "shortName"))
+
+
+@pytest.mark.benchmark(group="search-query")
+@pytest.mark.parametrize("kind", sorted(QUERIES))
+def test_linear_scan(benchmark, search_chains, index, kind):
+    results = benchmark(scan, search_chains, QUERIES[kind], ("name", "shortName"))
+    assert results == index.search(QUERIES[kind], ("name", "shortName"))
+
+
+RESOLVE_QUERIES = {
+    "exact": "zephyr yonder",
+    "typo": "zephir yonder",
+    "substring": "yonder",
+    "miss": "qqqqqqqq",
+}
+
+
+@pytest.fixture(scope="module")
+def resolver():
+    return ChainResolver(dataset("chains", REALISTIC_SIZE))
+
+
+@pytest.mark.benchmark(group="resolve")
+@pytest.mark.parametrize("kind", sorted(RESOLVE_QUERIES))
+def test_resolve(benchmark, resolver, kind):
+    benchmark(resolver.resolve, RESOLVE_QUERIES[kind])
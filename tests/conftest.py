@@ -1,6 +1,71 @@
+import asyncio
 import os
 import sys
+import threading
 
 # Add the project root directory to the Python path
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, project_root)
+
+import pytest  # noqa: E402
+
+from src.bench.datasets import (  # noqa: E402
+    generate_chains,
+    generate_pools,
+    generate_protocols,
+    generate_transactions,
+)
+from src.bench.stub_node import StubNode  # noqa: E402
+
+# Size of the synthetic datasets shared by tests; benchmarks scale this up
+SYNTHETIC_SIZE = int(os.getenv("CHAINDATA_SYNTHETIC_SIZE", "2000"))
+
+
+@pytest.fixture(scope="session")
+def synthetic_chains():
+    """Synthetic chains in the chainlist rpcs.json shape"""
+    return generate_chains(SYNTHETIC_SIZE)
+
+
+@pytest.fixture(scope="session")
+def synthetic_protocols():
+    """Synthetic protocols in the DefiLlama /protocols shape"""
+    return generate_protocols(SYNTHETIC_SIZE)
+
+
+@pytest.fixture(scope="session")
+def synthetic_pools():
+    """Synthetic yield pools in the DefiLlama /pools shape"""
+    return generate_pools(SYNTHETIC_SIZE)
+
+
+@pytest.fixture(scope="session")
+def synthetic_transactions():
+    """Synthetic Etherscan txlist results"""
+    return generate_transactions(SYNTHETIC_SIZE)
+
+
+@pytest.fixture
+def stub_nodes():
+    """Start stub JSON-RPC nodes on a background event loop: stub_nodes(StubNode(1), ...)
+
+    The loop is stub_nodes.loop, for running node coroutines such as mine().
+    """
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    started = []
+
+    def start(*nodes: StubNode):
+        for node in nodes:
+            asyncio.run_coroutine_threadsafe(node.start(), loop).result(5)
+            started.append(node)
+        return nodes
+
+    start.loop = loop
+    yield start
+    for node in started:
+        asyncio.run_coroutine_threadsafe(node.stop(), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+    loop.close()
@@ -0,0 +1,38 @@
+import json
+import time
+
+import pytest
+
+from src.core.cache import Cache
+from src.core.config import config
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setitem(config._config["cache"], "directory", str(tmp_path))
+    return Cache("test")
+
+
+def write_entry(cache, key, data, age):
+    with open(cache._get_cache_path(key), "w") as f:
+        json.dump({"timestamp": time.time() - age, "data": data}, f)
+
+
+def test_save_and_load(cache):
+    cache.save_to_cache("key", {"value": 1})
+    assert cache.load_from_cache("key") == {"value": 1}
+
+
+def test_load_missing(cache):
+    assert cache.load_from_cache("missing") is None
+    assert cache.load_with_age("missing", ignore_expiry=True) is None
+
+
+def test_expired_entry(cache):
+    write_entry(cache, "old", [1, 2, 3], cache.expiry_seconds + 60)
+    assert cache.load_from_cache("old") is None
+
+    # Offline mode serves expired entries along with their age
+    data, age = cache.load_with_age("old", ignore_expiry=True)
+    assert data == [1, 2, 3]
+    assert age >= cache.expiry_seconds + 60
@@ -0,0 +1,113 @@
+import io
+import json
+import logging
+import threading
+from logging.handlers import QueueHandler
+from unittest.mock import patch
+
+import pytest
+
+from src.core import logger as logger_module
+from src.core.logger import JsonFormatter, SamplingFilter, get_logger, setup_logger
+
+
+@pytest.fixture
+def configured():
+    """Configure a throwaway logger and return its captured output"""
+    stream = io.StringIO()
+    with patch.object(logger_module.sys, "stderr", stream):
+        log = setup_logger("chaindata_test", level="DEBUG", fmt="json")
+    yield log, stream
+    logger_module._listeners.pop("chaindata_test").stop()
+    log.handlers.clear()
+
+
+def _flush(name="chaindata_test"):
+    listener = logger_module._listeners[name]
+    listener.stop()
+    listener.start()
+
+
+def test_setup_logger_does_not_stack_handlers(configured):
+    log, _ = configured
+    for _ in range(3):
+        setup_logger("chaindata_test", level="DEBUG", fmt="json")
+    assert sum(isinstance(h, QueueHandler) for h in log.handlers) == 1
+
+
+def test_json_output_with_extra_fields(configured):
+    log, stream = configured
+    log.warning("fetch %s failed", "protocols", extra={"host": "api.llama.fi"})
+    _flush()
+    entry = json.loads(stream.getvalue())
+    assert entry["level"] == "WARNING"
+    assert entry["logger"] == "chaindata_test"
+    assert entry["message"] == "fetch protocols failed"
+    assert entry["host"] == "api.llama.fi"
+
+
+def test_formatting_happens_off_the_calling_thread(configured):
+    log, stream = configured
+    formatted_on = []
+
+    class Probe:
+        def __str__(self):
+            formatted_on.append(threading.get_ident())
+            return "probe"
+
+    # Leave out pytest's capture handlers, which format on the calling thread
+    queue_only = [h for h in log.handlers if isinstance(h, QueueHandler)]
+    with patch.object(log, "handlers", queue_only), patch.object(log, "propagate", False):
+        log.info("value %s", Probe())
+    _flush()
+    assert formatted_on and threading.get_ident() not in formatted_on
+    assert json.loads(stream.getvalue())["message"] == "value probe"
+
+
+def test_disabled_levels_are_never_formatted(configured):
+    log, _ = configured
+    log.setLevel(logging.INFO)
+
+    class Exploding:
+        def __str__(self):
+            raise AssertionError("formatted a disabled record")
+
+    log.debug("value %s", Exploding())
+    _flush()
+
+
+def test_sampling_keeps_first_records_then_one_in_n():
+    sampler = SamplingFilter(initial=3, thereafter=10, interval=60)
+    record = logging.makeLogRecord({"name": "x", "levelno": logging.INFO, "msg": "GET %s"})
+    kept = sum(sampler.filter(record) for _ in range(53))
+    assert kept == 3 + 5
+
+
+def test_sampling_never_drops_errors():
+    sampler = SamplingFilter(initial=0, thereafter=1000, interval=60)
+    record = logging.makeLogRecord({"name": "x", "levelno": logging.ERROR, "msg": "boom"})
+    assert all(sampler.filter(record) for _ in range(10))
+
+
+def test_json_formatter_includes_exceptions():
+    try:
+        raise ValueError("bad")
+    except ValueError:
+        record = logging.getLogger("x").makeRecord(
+            "x", logging.ERROR, __file__, 1, "failed", (), __import__("sys").exc_info()
+        )
+    entry = json.loads(JsonFormatter().format(record))
+    assert "ValueError: bad" in entry["exc_info"]
+
+
+def test_cache_save_errors_are_logged(caplog, tmp_path):
+    from src.core.cache import Cache
+
+    with patch("src.core.cache.config") as config:
+        config.get.side_effect = {"cache.directory": str(tmp_path)}.get
+        cache = Cache("logging")
+    cache.cache_dir = str(tmp_path / "missing")
+    with caplog.at_level(logging.WARNING, logger="chaindata.cache"):
+        cache.save_to_cache("key", {"a": 1})
+    assert "Error saving key to the logging cache" in caplog.text
+    assert get_logger("cache").name == "chaindata.cache"
@@ -0,0 +1,150 @@
+import os
+import urllib.request
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.api.defillama import DefiLlamaAPI
+from src.core.cache import Cache
+from src.core.metrics import (
+    MetricsRegistry,
+    cache_evictions,
+    cache_requests,
+    counts_rows,
+    http_request_duration,
+    http_requests,
+    http_response_bytes,
+    http_retries,
+    metrics,
+    rows_rendered,
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    metrics.clear()
+    yield
+    metrics.clear()
+
+
+def test_counter_and_gauge_exposition():
+    registry = MetricsRegistry()
+    requests = registry.counter("app_requests_total", "Requests", ["path"])
+    inflight = registry.gauge("app_inflight", "In-flight requests")
+    requests.labels('/a"b').inc()
+    requests.labels('/a"b').inc(2)
+    inflight.labels().set(3)
+    inflight.labels().dec()
+
+    text = registry.render()
+    assert "# TYPE app_requests_total counter" in text
+    assert 'app_requests_total{path="/a\\"b"} 3.0' in text
+    assert "# HELP app_inflight In-flight requests" in text
+    assert "app_inflight 2.0" in text
+
+
+def test_counters_only_increase():
+    counter = MetricsRegistry().counter("app_total", "Total")
+    with pytest.raises(ValueError):
+        counter.labels().inc(-1)
+
+
+def test_labels_must_match():
+    counter = MetricsRegistry().counter("app_total", "Total", ["host"])
+    with pytest.raises(ValueError):
+        counter.labels("a", "b")
+
+
+def test_reregistering_returns_the_same_metric():
+    registry = MetricsRegistry()
+    first = registry.counter("app_total", "Total", ["host"])
+    assert registry.counter("app_total", "Total", ["host"]) is first
+    with pytest.raises(ValueError):
+        registry.gauge("app_total", "Total", ["host"])
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    latency = registry.histogram("app_seconds", "Latency", ["host"], buckets=[0.1, 1.0])
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.labels("x").observe(value)
+
+    text = registry.render()
+    assert 'app_seconds_bucket{host="x",le="0.1"} 2' in text
+    assert 'app_seconds_bucket{host="x",le="1.0"} 3' in text
+    assert 'app_seconds_bucket{host="x",le="+Inf"} 4' in text
+    assert 'app_seconds_count{host="x"} 4' in text
+    assert 'app_seconds_sum{host="x"} 3.65' in text
+
+
+def test_write_textfile_is_atomic(tmp_path):
+    registry = MetricsRegistry()
+    registry.counter("app_total", "Total").labels().inc()
+    path = tmp_path / "chaindata.prom"
+    registry.write_textfile(str(path))
+    assert "app_total 1.0" in path.read_text()
+    assert os.listdir(tmp_path) == ["chaindata.prom"]
+
+
+def test_metrics_endpoint():
+    registry = MetricsRegistry()
+    registry.counter("app_total", "Total").labels().inc()
+    server = registry.serve(0)
+    try:
+        port = server.server_address[1]
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+            assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            assert "app_total 1.0" in response.read().decode()
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/other")
+    finally:
+        server.shutdown()
+
+
+def test_defillama_request_metrics():
+    api = DefiLlamaAPI()
+    response = MagicMock(status_code=200, content=b'{"tvl": 1}')
+    response.json.return_value = {"tvl": 1}
+    response.raw.retries.history = ("first attempt",)
+    with patch.object(api.session, "get", return_value=response), patch(
+        "src.api.defillama.defillama_cache"
+    ) as cache:
+        cache.load_from_cache.return_value = None
+        api.get_protocol_tvl("aave")
+
+    endpoint = "https://api.llama.fi/protocol/{protocol}"
+    assert http_requests.labels("api.llama.fi", endpoint, 200).value == 1
+    assert http_request_duration.labels("api.llama.fi", endpoint).count == 1
+    assert http_response_bytes.labels("api.llama.fi").value == 10
+    assert http_retries.labels("api.llama.fi").value == 1
+
+
+def test_cache_hits_misses_and_evictions(tmp_path):
+    with patch("src.core.cache.config") as config:
+        config.get.side_effect = {
+            "cache.directory": str(tmp_path),
+            "cache.expiry_seconds": 60,
+        }.get
+        cache = Cache("metrics")
+    cache.load_from_cache("missing")
+    cache.save_to_cache("present", [1])
+    cache.load_from_cache("present")
+    cache.expiry_seconds = -1
+    cache.load_from_cache("present")
+
+    assert cache_requests.labels("metrics", "miss").value == 1
+    assert cache_requests.labels("metrics", "hit").value == 1
+    assert cache_requests.labels("metrics", "expired").value == 1
+    assert cache_evictions.labels("metrics").value == 1
+
+
+def test_counts_rows():
+    @counts_rows
+    def format_things(data, fmt="table"):
+        return fmt
+
+    assert format_things([1, 2, 3], fmt="json") == "json"
+    format_things({"protocols": [1, 2]})
+    format_things(data={"coins": {"a": {}, "b": {}, "c": {}}})
+    format_things({"name": "Ethereum"})
+    assert rows_rendered.labels("format_things").value == 9
@@ -0,0 +1,67 @@
+import pstats
+import time
+
+import pytest
+
+from src.core.profiler import Profiler
+
+
+@pytest.fixture
+def profiler():
+    profiler = Profiler()
+    yield profiler
+    profiler.stop()
+
+
+def test_disabled_profiler_records_nothing(profiler):
+    with profiler.phase("network wait"):
+        pass
+    assert profiler.timed("rendering")(lambda: 42)() == 42
+    assert profiler._totals == {}
+
+
+def test_nested_phases_are_exclusive(profiler):
+    profiler.start()
+    with profiler.phase("cache lookup"):
+        time.sleep(0.02)
+        with profiler.phase("json decode"):
+            time.sleep(0.05)
+    profiler.stop()
+
+    summary = profiler.summary()
+    assert summary["json decode"]["seconds"] >= 0.05
+    assert 0.02 <= summary["cache lookup"]["seconds"] < 0.05
+    attributed = sum(entry["seconds"] for name, entry in summary.items() if name != "total")
+    assert attributed == pytest.approx(summary["total"]["seconds"])
+
+
+def test_timed_decorator_and_import_origin(profiler):
+    @profiler.timed("rendering")
+    def render(rows):
+        return len(rows)
+
+    profiler.start(origin=time.perf_counter() - 0.1)
+    assert render([1, 2, 3]) == 3
+    assert render([]) == 0
+    profiler.stop()
+
+    summary = profiler.summary()
+    assert summary["rendering"]["calls"] == 2
+    assert summary["import"]["seconds"] >= 0.1
+    assert list(summary)[0] == "import"
+
+
+def test_profile_files_are_written(profiler, tmp_path, capsys):
+    stats_path = tmp_path / "run.pstats"
+    flamegraph_path = tmp_path / "run.folded"
+    profiler.start(stats_path=str(stats_path), flamegraph_path=str(flamegraph_path))
+    deadline = time.perf_counter() + 0.05
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+    profiler.stop()
+    profiler.report()
+
+    assert pstats.Stats(str(stats_path)).total_calls > 0
+    lines = flamegraph_path.read_text().splitlines()
+    assert lines and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert "Phase" in capsys.readouterr().err
@@ -0,0 +1,29 @@
+import json
+import os
+
+from src.core.recorder import Recorder, canonical_params
+
+
+def test_canonical_params():
+    params = {"b": True, "a": 1, "skip": None, "apikey": "secret"}
+    assert canonical_params(params) == {"a": "1", "b": "True"}
+    assert canonical_params(None) == {}
+
+
+def test_record(tmp_path):
+    recorder = Recorder(str(tmp_path))
+    recorder.record(
+        "coins",
+        "https://coins.llama.fi",
+        "https://coins.llama.fi/prices/current/coingecko:ethereum",
+        "abc123",
+        {"coins": {}},
+        {"searchWidth": "6h"},
+    )
+
+    with open(os.path.join(tmp_path, "coins", "abc123.json")) as f:
+        entry = json.load(f)
+    assert entry["path"] == "/prices/current/coingecko:ethereum"
+    assert entry["params"] == {"searchWidth": "6h"}
+    assert entry["status"] == 200
+    assert entry["data"] == {"coins": {}}
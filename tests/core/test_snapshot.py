@@ -0,0 +1,72 @@
+import pytest
+
+from src.core.logger import SnapshotError
+from src.core.snapshot import Snapshot, key_hash, write_snapshot
+
+
+def keys(record):
+    return [f"id:{record['id']}", f"name:{record['name'].lower()}"]
+
+
+RECORDS = [{"id": i, "name": f"Chain {i}", "tags": ["a", "b"]} for i in range(200)]
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = str(tmp_path / "records.snap")
+    write_snapshot(path, RECORDS, keys, written_at=1000.0)
+    return path
+
+
+def test_round_trip(path):
+    with Snapshot(path, keys) as snapshot:
+        assert snapshot.count == len(RECORDS)
+        assert snapshot.written_at == 1000.0
+        assert snapshot.age > 0
+        for record in RECORDS:
+            assert snapshot.get(f"id:{record['id']}") == record
+            assert snapshot.get(f"name:{record['name'].lower()}") == record
+        assert snapshot.get("id:200") is None
+        assert snapshot.get("name:nothing") is None
+
+
+def test_last_record_wins_a_shared_key(tmp_path):
+    path = str(tmp_path / "dupes.snap")
+    records = [{"id": 1, "name": "First"}, {"id": 1, "name": "Second"}]
+    assert write_snapshot(path, records, keys) == 2
+    with Snapshot(path, keys) as snapshot:
+        assert snapshot.get("id:1")["name"] == "Second"
+        assert snapshot.get("name:first")["name"] == "First"
+
+
+def test_empty_snapshot(tmp_path):
+    path = str(tmp_path / "empty.snap")
+    write_snapshot(path, [], keys)
+    with Snapshot(path, keys) as snapshot:
+        assert snapshot.count == 0
+        assert snapshot.get("id:1") is None
+
+
+def test_key_hash_is_stable_and_non_zero():
+    assert key_hash("id:1") == key_hash("id:1")
+    assert key_hash("id:1") != key_hash("id:2")
+    assert all(key_hash(f"k{i}") for i in range(1000))
+
+
+def test_missing_file(tmp_path):
+    with pytest.raises(SnapshotError):
+        Snapshot(str(tmp_path / "missing.snap"), keys)
+
+
+@pytest.mark.parametrize(
+    "damage",
+    [lambda data: data[:10], lambda data: data[:-1], lambda data: b"NOTSNAP!" + data[8:]],
+    ids=["header", "table", "magic"],
+)
+def test_damaged_file(path, damage):
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(path, "wb") as f:
+        f.write(damage(data))
+    with pytest.raises(SnapshotError):
+        Snapshot(path, keys)
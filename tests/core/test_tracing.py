@@ -0,0 +1,94 @@
+import asyncio
+import io
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.api.defillama import DefiLlamaAPI
+from src.core.tracing import Tracer, tracer, url_template
+
+
+@pytest.fixture
+def spans():
+    """Trace into memory with the global tracer and return the parsed spans"""
+    stream = io.StringIO()
+    tracer.configure(stream=stream, otel=False)
+    yield lambda: [json.loads(line) for line in stream.getvalue().splitlines()]
+    tracer.shutdown()
+
+
+def test_disabled_tracer_is_a_no_op():
+    idle = Tracer()
+    with idle.start_span("command") as span:
+        span.set_attribute("key", "value")
+    assert idle.current_span() is None
+
+
+def test_spans_nest_and_export_as_json_lines(spans):
+    with tracer.start_span("chaindata defillama protocols") as command:
+        with tracer.http_span("GET", "https://api.llama.fi/protocols") as request:
+            request.set_attribute("chaindata.cache", "hit")
+    exported = spans()
+
+    child, parent = exported
+    assert parent["name"] == "chaindata defillama protocols"
+    assert parent["parentSpanId"] is None
+    assert child["parentSpanId"] == command.span_id == parent["spanId"]
+    assert child["traceId"] == parent["traceId"]
+    assert child["kind"] == "client"
+    assert child["attributes"]["server.address"] == "api.llama.fi"
+    assert child["attributes"]["chaindata.latency_ms"] >= 0
+    assert child["endTimeUnixNano"] >= child["startTimeUnixNano"]
+
+
+def test_exceptions_mark_spans_as_errors(spans):
+    with pytest.raises(ValueError):
+        with tracer.start_span("failing"):
+            raise ValueError("boom")
+    (span,) = spans()
+    assert span["status"] == {"code": "ERROR", "message": "boom"}
+    assert span["attributes"]["error.type"] == "ValueError"
+
+
+def test_spans_nest_across_asyncio_tasks(spans):
+    async def request(path):
+        with tracer.http_span("GET", f"https://example.org/{path}"):
+            await asyncio.sleep(0)
+
+    async def command():
+        with tracer.start_span("command"):
+            await asyncio.gather(request("a"), request("b"))
+
+    asyncio.run(command())
+    *children, parent = spans()
+    assert {child["parentSpanId"] for child in children} == {parent["spanId"]}
+
+
+def test_url_template_replaces_identifiers():
+    assert (
+        url_template("https://coins.llama.fi/prices/historical/1700000000/coingecko:eth?x=1")
+        == "https://coins.llama.fi/prices/historical/{id}/{id}"
+    )
+    assert url_template("https://chainlist.org/rpcs.json") == "https://chainlist.org/rpcs.json"
+
+
+def test_defillama_request_span(spans):
+    api = DefiLlamaAPI()
+    response = MagicMock(status_code=200, content=b'{"tvl": 1}')
+    response.json.return_value = {"tvl": 1}
+    response.raw.retries.history = ("first attempt",)
+    with patch.object(api.session, "get", return_value=response), patch(
+        "src.api.defillama.defillama_cache"
+    ) as cache:
+        cache.load_from_cache.return_value = None
+        api.get_protocol_tvl("aave")
+
+    (span,) = spans()
+    assert span["name"] == "GET https://api.llama.fi/protocol/{protocol}"
+    assert span["attributes"]["url.template"] == "https://api.llama.fi/protocol/{protocol}"
+    assert span["attributes"]["chaindata.cache"] == "miss"
+    assert span["attributes"]["http.response.status_code"] == 200
+    assert span["attributes"]["http.response.body.size"] == 10
+    assert span["attributes"]["http.request.resend_count"] == 1
+    assert span["status"]["code"] == "OK"
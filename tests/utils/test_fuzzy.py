@@ -0,0 +1,79 @@
+import random
+import string
+
+from src.utils.fuzzy import EditDistanceIndex, edit_distance
+
+
+def reference_distance(a, b):
+    rows = [[0] * (len(b) + 1) for _ in range(len(a) + 1)]
+    for i in range(len(a) + 1):
+        rows[i][0] = i
+    for j in range(len(b) + 1):
+        rows[0][j] = j
+    for i in range(1, len(a) + 1):
+        for j in range(1, len(b) + 1):
+            rows[i][j] = min(
+                rows[i - 1][j] + 1,
+                rows[i][j - 1] + 1,
+                rows[i - 1][j - 1] + (a[i - 1] != b[j - 1]),
+            )
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                rows[i][j] = min(rows[i][j], rows[i - 2][j - 2] + 1)
+    return rows[-1][-1]
+
+
+def mutate(rng, word):
+    for _ in range(rng.randint(0, 3)):
+        position = rng.randrange(len(word) + 1)
+        action = rng.choice("ids")
+        if action == "i" or not word:
+            word = word[:position] + rng.choice("abc") + word[position:]
+        elif action == "d":
+            word = word[:position] + word[position + 1 :]
+        else:
+            word = word[:position] + rng.choice("abc") + word[position + 1 :]
+    return word
+
+
+def test_banded_distance_matches_full_computation():
+    rng = random.Random(11)
+    for _ in range(2000):
+        a = "".join(rng.choice("abc") for _ in range(rng.randint(0, 9)))
+        b = mutate(rng, a) if rng.random() < 0.7 else "".join(rng.choice("abc") for _ in range(6))
+        expected = reference_distance(a, b)
+        for bound in (0, 1, 2, 3):
+            assert edit_distance(a, b, bound) == min(expected, bound + 1), (a, b, bound)
+
+
+def test_transposition_counts_once():
+    assert edit_distance("etherum", "ethreum", 2) == 1
+
+
+def test_lookup_finds_every_term_within_the_distance():
+    rng = random.Random(5)
+    terms = {
+        "".join(rng.choice(string.ascii_lowercase[:6]) for _ in range(rng.randint(3, 12)))
+        for _ in range(300)
+    }
+    index = EditDistanceIndex(max_distance=2)
+    index.update((term, term.upper()) for term in terms)
+    for term in rng.sample(sorted(terms), 50):
+        query = mutate(rng, term)
+        expected = sorted(
+            (reference_distance(query, other), other)
+            for other in terms
+            if reference_distance(query, other) <= 2
+        )
+        found = [(match.distance, match.term) for match in index.lookup(query)]
+        assert found == expected, query
+        assert all(match.values == (match.term.upper(),) for match in index.lookup(query))
+
+
+def test_terms_keep_every_value():
+    index = EditDistanceIndex()
+    index.add("base", 1)
+    index.add("base", 2)
+    index.add("base", 1)
+    assert index.exact("base") == (1, 2)
+    assert len(index) == 1
+    assert index.lookup("bsae")[0].values == (1, 2)
@@ -0,0 +1,59 @@
+import random
+
+import pytest
+
+from src.bench.datasets import generate_chains
+from src.utils.search import SubstringIndex, scan
+
+FIELDS = ("name", "shortName", "chain", "network")
+
+
+@pytest.fixture(scope="module")
+def chains():
+    return generate_chains(500, seed=7)
+
+
+@pytest.fixture(scope="module")
+def index(chains):
+    return SubstringIndex(chains, FIELDS)
+
+
+def test_matches_a_linear_scan_in_order(chains, index):
+    rng = random.Random(3)
+    queries = ["", "a", "NO", "ova", "nova", "zephyr yonder", "mainnet", "nothing-like-this"]
+    for chain in rng.sample(chains, 50):
+        name = chain["name"]
+        start = rng.randrange(len(name))
+        queries.append(name[start : start + rng.randint(1, 8)])
+    for query in queries:
+        for fields in (FIELDS, ("name", "shortName"), ("network",)):
+            assert index.search(query, fields) == scan(chains, query, fields), (query, fields)
+
+
+def test_fields_restrict_matches():
+    records = [
+        {"name": "Ethereum", "shortName": "eth", "chain": "ETH"},
+        {"name": "Arbitrum One", "shortName": "arb1", "chain": "ETH"},
+    ]
+    index = SubstringIndex(records, ("name", "shortName", "chain"))
+    assert index.search("eth", ("name", "shortName")) == records[:1]
+    assert index.search("eth") == records
+    assert index.search_positions("ONE") == [1]
+
+
+def test_grams_never_span_fields():
+    index = SubstringIndex([{"name": "abc", "shortName": "def"}], ("name", "shortName"))
+    assert index.search("cd") == []
+    assert index.search("c\x00d") == []
+
+
+def test_objects_and_missing_fields():
+    class Chain:
+        def __init__(self, name, shortName=None):
+            self.name = name
+            self.shortName = shortName
+
+    records = [Chain("Polygon", "matic"), Chain("Gnosis")]
+    index = SubstringIndex(records, ("name", "shortName", "chain"))
+    assert index.search("mat") == records[:1]
+    assert index.search("o") == records